@@ -13,6 +13,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 from exchanges.funding_rates import FundingRateManager
+from exchanges.collector import CollectorClient
+from exchanges.spread_state import format_duration
 from utils.config_loader import ConfigLoader
 
 # ── Logging ──────────────────────────────────────────────────────────
@@ -36,12 +38,16 @@ is_fetching: bool = False                   # prevent concurrent fetches
 async def lifespan(app: FastAPI):
     global manager, config
     config = ConfigLoader()
-    manager = FundingRateManager()
-    logger.info("FundingRateManager ready – API server starting")
+    # Read from the shared collector daemon when one is configured
+    manager = FundingRateManager(collector=CollectorClient.from_config(config))
+    source = f"collector at {config.collector_address}" if manager.collector else "direct polling"
+    logger.info(f"FundingRateManager ready ({source}) – API server starting")
     # Kick off a background fetch immediately so data is ready soon
     asyncio.create_task(_background_fetch())
     yield
     logger.info("API server shutting down")
+    if manager.collector is not None:
+        await manager.collector.close()
 
 
 async def _background_fetch():
@@ -85,6 +91,11 @@ class SpreadItem(BaseModel):
     status: str
     funding: float
     timeActive: str
+    openedAt: float
+    cyclesSeen: int
+    peakSpread: float
+    zScore: Optional[float] = None
+    spreadMean: Optional[float] = None
 
 class SpreadsResponse(BaseModel):
     spreads: List[SpreadItem]
@@ -118,6 +129,12 @@ def _format_spread(raw: Dict, idx: int) -> SpreadItem:
 
     spread_pct = raw.get("spread_percentage", 0)
 
+    # Path session from FundingRateManager: one-cycle paths are still "pending"
+    opened_at = raw.get("opened_at", 0)
+    cycles_seen = raw.get("cycles_seen", 0)
+    status = "active" if cycles_seen >= 2 else "pending"
+    time_active = format_duration(time.time() - opened_at) if opened_at else "—"
+
     return SpreadItem(
         id=str(idx),
         token=token,
@@ -128,9 +145,14 @@ def _format_spread(raw: Dict, idx: int) -> SpreadItem:
         spread=round(spread_pct, 4),
         buyVolume=round(buy_volume, 2),
         sellVolume=round(sell_volume, 2),
-        status="active",
+        status=status,
         funding=0.0,
-        timeActive="—",
+        timeActive=time_active,
+        openedAt=opened_at,
+        cyclesSeen=cycles_seen,
+        peakSpread=round(raw.get("peak_spread", spread_pct), 4),
+        zScore=raw.get("zscore"),
+        spreadMean=raw.get("spread_mean"),
     )
 
 # ── Routes ───────────────────────────────────────────────────────────
@@ -158,6 +180,7 @@ async def get_spreads(
     mode: str = Query("futures-futures", description="Spread mode"),
     min_spread: Optional[float] = Query(None),
     max_spread: Optional[float] = Query(None),
+    min_cycles: int = Query(0, description="Hide paths seen in fewer scan cycles (flicker filter)"),
 ):
     """
     Return current spread opportunities.
@@ -174,11 +197,14 @@ async def get_spreads(
         asyncio.create_task(_background_fetch())
 
     # Format whatever we have cached right now
-    items = [_format_spread(s, i) for i, s in enumerate(cached_spreads)]
+    spreads = cached_spreads
+    if min_cycles > 1:
+        spreads = [s for s in spreads if s.get("cycles_seen", 0) >= min_cycles]
+    items = [_format_spread(s, i) for i, s in enumerate(spreads)]
 
     # Collect unique exchange names actually appearing in the data
     seen_exchanges: set = set()
-    for s in cached_spreads:
+    for s in spreads:
         seen_exchanges.add(s.get("lowest_exchange") or s.get("buy_exchange", ""))
         seen_exchanges.add(s.get("highest_exchange") or s.get("sell_exchange", ""))
     seen_exchanges.discard("")
@@ -0,0 +1,64 @@
+"""
+Backtest spread thresholds and alert policy over recorded snapshots.
+
+Sweeps min_spread, increase_ratio and min_volume_usdt around the current
+config.json settings and prints hit rate, spread lifetime and simulated PnL
+per parameter set. Snapshots are recorded by setting "snapshot_store_path".
+
+Run with: python backtest.py [days] [processes]
+    days: how many most recent days to test (default: everything recorded)
+"""
+import logging
+import sys
+import time
+
+from exchanges.backtest import BacktestParams, param_grid, run_sweep
+from exchanges.fees import FeeTable
+from utils.config_loader import ConfigLoader
+from utils.snapshot_store import SnapshotStore
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger = logging.getLogger(__name__)
+
+    config = ConfigLoader()
+    if not config.snapshot_store_path:
+        logger.error("snapshot_store_path is not set in config.json")
+        sys.exit(1)
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else None
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    store = SnapshotStore(config.snapshot_store_path)
+    fee_table = FeeTable(config)
+    live = BacktestParams.from_config(config)
+    grid = param_grid(
+        live,
+        min_spread=[live.min_spread, live.min_spread * 2, live.min_spread * 4],
+        increase_ratio=[1.25, 1.5, 2.0],
+        min_volume_usdt=[100000, 250000, 1000000],
+    )
+    start = time.time() - days * 86400 if days else None
+
+    started = time.time()
+    results = run_sweep(
+        config.snapshot_store_path, grid,
+        leg_costs=fee_table.leg_costs(store.exchanges),
+        transfer_cost=fee_table.transfer_cost,
+        start=start, processes=processes,
+    )
+    logger.info(f"Evaluated {len(grid)} parameter sets in {time.time() - started:.1f}s")
+
+    print(f"{'min_spread':>10} {'increase':>8} {'min_vol':>9} {'alerts':>8} {'trades':>7} "
+          f"{'hit':>6} {'pnl %':>9} {'life s':>7}")
+    for result in sorted(results, key=lambda r: r.total_pnl, reverse=True):
+        p, s = result.params, result.summary()
+        print(f"{p.min_spread:>10.3f} {p.increase_ratio:>8.2f} {p.min_volume_usdt:>9.0f} {s['alerts']:>8} "
+              f"{s['trades']:>7} {s['hit_rate']:>6.1%} {s['total_pnl']:>9.2f} {s['lifetime_median']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
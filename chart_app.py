@@ -5,9 +5,11 @@ Supports single exchange price charts and cross-exchange spread charts.
 """
 
 import asyncio
+import concurrent.futures
 import sys
 import os
 import json
+import numpy as np
 import webview
 from datetime import datetime, timezone
 from typing import Optional, Dict, List
@@ -23,6 +25,14 @@ from exchanges.htx import HTXExchange
 from exchanges.kucoin import KucoinExchange
 from exchanges.mexc import MEXCExchange
 from exchanges.okx import OKXExchange
+from exchanges.kline_cache import KlineCache
+from exchanges.kline_engine import (
+    align_closes, display_period, encode_columns, lttb, resample, spread_candles, spread_matrix_stats, spread_stats
+)
+from exchanges.klines_mixin import get_history_timestamps_seconds
+from exchanges.live_candles import LiveTail
+from exchanges.ws_providers import FUTURES_ONLY_EXCHANGES
+from utils.async_loop import AsyncLoopThread
 
 
 # Available exchanges
@@ -37,6 +47,21 @@ EXCHANGES = {
     'okx': OKXExchange
 }
 
+# On-disk kline cache: repeat chart loads only fetch the tail since the last load
+KLINE_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'klines.sqlite3')
+
+# History: the first load covers DEFAULT_HISTORY_DAYS, older ranges are loaded as the
+# chart scrolls back, HISTORY_CHUNK_BARS candles (at least DEFAULT_HISTORY_DAYS) at a time
+DEFAULT_HISTORY_DAYS = 7
+MAX_HISTORY_DAYS = 180
+HISTORY_CHUNK_BARS = 2000
+
+# Base candles fetched per range at most; longer ranges use a coarser native base interval
+MAX_BASE_CANDLES = 20160
+
+# Live mode: minimum seconds between candle updates pushed to the page
+LIVE_PUSH_INTERVAL = 0.25
+
 # Standard intervals
 INTERVALS = ['1m', '5m', '15m', '30m', '1h', '4h', '1d']
 
@@ -51,13 +76,70 @@ INTERVAL_SECONDS = {
     '1d': 86400
 }
 
+# Transport dtypes of the columns sent to the page (see kline_engine.encode_columns).
+# Times fit int32 seconds; spread % needs no more than float32, prices keep float64.
+CANDLE_DTYPES = {'time': '<i4', 'open': '<f8', 'high': '<f8', 'low': '<f8', 'close': '<f8', 'volume': '<f8'}
+SPREAD_DTYPES = {'time': '<i4', 'open': '<f4', 'high': '<f4', 'low': '<f4', 'close': '<f4',
+                 'ex1_close': '<f8', 'ex2_close': '<f8'}
+
 
 class ChartAPI:
     """API class exposed to JavaScript"""
     
     def __init__(self):
         self.exchange_instances: Dict[str, object] = {}
-        self.current_data: List[dict] = []
+        self.current_data: Dict[str, np.ndarray] = {}
+        self.kline_cache = KlineCache(KLINE_CACHE_PATH, retention_days=MAX_HISTORY_DAYS)
+        self._window = None  # Set by main(), live updates are pushed through it (private: not exposed to JS)
+        self.live_tail: Optional[LiveTail] = None
+        self.live_task: Optional[asyncio.Task] = None
+        
+        # One long-lived loop for all JS calls: exchange instances and their
+        # aiohttp sessions are created once and reused across chart loads
+        self.loop_thread = AsyncLoopThread('chart-api')
+        self.loop_thread.start()
+    
+    def _run(self, key: str, coro) -> str:
+        """Run a coroutine on the shared loop; a newer call with the same key cancels this one"""
+        try:
+            result = self.loop_thread.run(coro, key=key)
+            return json.dumps(result)
+        except concurrent.futures.CancelledError:
+            return json.dumps({'error': None, 'cancelled': True, 'data': []})
+        except Exception as e:
+            return json.dumps({'error': str(e), 'data': []})
+    
+    def _exchange(self, name: str):
+        """Cached exchange instance (only called on the shared loop)"""
+        ex = self.exchange_instances.get(name)
+        if ex is None:
+            ex = self.exchange_instances[name] = EXCHANGES[name]()
+        return ex
+    
+    async def _close_exchanges(self):
+        for ex in self.exchange_instances.values():
+            try:
+                await ex.close()
+            except Exception:
+                pass
+        self.exchange_instances.clear()
+    
+    def _history_range(self, interval: str, end: Optional[int]) -> tuple:
+        """(start, end, has_more) of the range to load: the default window for a new chart,
+        or the chunk before `end` when the chart scrolls back"""
+        if end is None:
+            start, end = get_history_timestamps_seconds(DEFAULT_HISTORY_DAYS)
+        else:
+            days = max(DEFAULT_HISTORY_DAYS, HISTORY_CHUNK_BARS * INTERVAL_SECONDS.get(interval, 60) / 86400)
+            start, end = get_history_timestamps_seconds(days, int(end) - 1)
+        earliest, _ = get_history_timestamps_seconds(MAX_HISTORY_DAYS)
+        return max(start, earliest), end, start > earliest
+    
+    async def _get_klines(self, ex, exchange: str, market: str, symbol: str, interval: str,
+                          start: int, end: int) -> Dict[str, np.ndarray]:
+        """Klines of [start, end] as columns through the kline cache (resampled locally from the base interval)"""
+        return await self.kline_cache.get_arrays(ex, exchange, market, symbol, interval, start, end,
+                                                 max_base_candles=MAX_BASE_CANDLES)
     
     def get_exchanges(self) -> List[str]:
         """Get list of available exchanges"""
@@ -67,26 +149,23 @@ class ChartAPI:
         """Get list of available intervals"""
         return INTERVALS
     
-    def fetch_spread_data(self, exchange1: str, exchange2: str, symbol: str, interval: str, market1: str, market2: str) -> str:
+    def fetch_spread_data(self, exchange1: str, exchange2: str, symbol: str, interval: str, market1: str, market2: str,
+                          end: Optional[int] = None, max_points: int = 0) -> str:
         """
         Fetch spread data between two exchanges with independent market types.
         
         The spread is calculated as: (Ex1_price - Ex2_price) / Ex2_price * 100
         
         Candles are continuous: each candle's OPEN equals the previous candle's CLOSE.
+        Without `end` the default window up to now is loaded; with `end` (seconds) the
+        older chunk before it. With max_points the range is downsampled to at most that
+        many candles. A newer request of the same kind cancels this one (returns {'cancelled': true}).
         """
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                self._async_fetch_spread_data(exchange1, exchange2, symbol, interval, market1, market2)
-            )
-            loop.close()
-            return json.dumps(result)
-        except Exception as e:
-            return json.dumps({'error': str(e), 'data': []})
+        return self._run('chart' if end is None else 'history', self._async_fetch_spread_data(
+            exchange1, exchange2, symbol, interval, market1, market2, end, max_points))
     
-    async def _async_fetch_spread_data(self, exchange1: str, exchange2: str, symbol: str, interval: str, market1: str, market2: str) -> dict:
+    async def _async_fetch_spread_data(self, exchange1: str, exchange2: str, symbol: str, interval: str, market1: str, market2: str,
+                                       end: Optional[int] = None, max_points: int = 0) -> dict:
         """Async method to fetch and calculate spread data between two exchanges"""
         if exchange1 not in EXCHANGES:
             return {'error': f'Unknown exchange: {exchange1}', 'data': []}
@@ -94,147 +173,57 @@ class ChartAPI:
             return {'error': f'Unknown exchange: {exchange2}', 'data': []}
         
         try:
-            # Create fresh exchange instances
-            ex1 = EXCHANGES[exchange1]()
-            ex2 = EXCHANGES[exchange2]()
-            
-            # Fetch klines from both exchanges concurrently
-            if market1 == 'futures':
-                fetch1 = ex1.get_klines_futures(symbol, interval)
-            else:
-                fetch1 = ex1.get_klines_spot(symbol, interval)
+            # Pooled exchange instances keep their sessions warm between calls
+            ex1 = self._exchange(exchange1)
+            ex2 = self._exchange(exchange2)
             
-            if market2 == 'futures':
-                fetch2 = ex2.get_klines_futures(symbol, interval)
-            else:
-                fetch2 = ex2.get_klines_spot(symbol, interval)
-            
-            klines1, klines2 = await asyncio.gather(fetch1, fetch2)
-            
-            # Close sessions
-            await ex1.close()
-            await ex2.close()
+            # Fetch klines from both exchanges concurrently (cached, only missing ranges hit the API)
+            start, end, has_more = self._history_range(interval, end)
+            klines1, klines2 = await asyncio.gather(
+                self._get_klines(ex1, exchange1, market1, symbol, interval, start, end),
+                self._get_klines(ex2, exchange2, market2, symbol, interval, start, end),
+            )
             
-            if not klines1:
+            if not len(klines1['time']):
                 return {'error': f'No data from {exchange1}', 'data': []}
-            if not klines2:
+            if not len(klines2['time']):
                 return {'error': f'No data from {exchange2}', 'data': []}
             
             # Get interval in seconds
             period_sec = INTERVAL_SECONDS.get(interval, 60)
             
-            # Normalize timestamps: round to nearest period boundary
-            # This handles minor drift between exchanges (e.g., 12:00:00.1 vs 12:00:00.0)
-            def normalize_timestamp(t):
-                return int(round(float(t) / period_sec) * period_sec)
-            
-            # Build lookup maps with normalized timestamps
-            data1_map = {}
-            for k in klines1:
-                normalized_t = normalize_timestamp(k['time'])
-                data1_map[normalized_t] = k
-            
-            data2_map = {}
-            for k in klines2:
-                normalized_t = normalize_timestamp(k['time'])
-                data2_map[normalized_t] = k
-            
-            if not data1_map or not data2_map:
-                return {'error': 'No data after normalization', 'data': []}
+            # Align on normalized timestamps and compute continuous spread candles
+            # (Open = previous Close) as NumPy columns
+            spread = spread_candles(klines1, klines2, period_sec)
             
-            # Find overlapping time range
-            common_times = sorted(set(data1_map.keys()) & set(data2_map.keys()))
-            
-            if not common_times:
+            if not len(spread['time']):
                 return {'error': 'No overlapping timestamps between exchanges', 'data': []}
             
-            # Calculate spread for each common timestamp
-            # CRITICAL: Candles are CONTINUOUS - Open = Previous Close
-            spread_line_data = []
-            spread_candle_data = []
-            prev_spread_close = None
-            
-            for timestamp in common_times:
-                k1 = data1_map[timestamp]
-                k2 = data2_map[timestamp]
-                
-                # Skip if any price is zero (invalid data)
-                if k2['open'] == 0 or k2['high'] == 0 or k2['low'] == 0 or k2['close'] == 0:
-                    continue
-                if k1['open'] == 0 or k1['high'] == 0 or k1['low'] == 0 or k1['close'] == 0:
-                    continue
-                
-                # Calculate spread percentage for each OHLC component
-                spread_close = ((k1['close'] - k2['close']) / k2['close']) * 100
-                
-                # CONTINUOUS CANDLES: Open = Previous candle's Close
-                if prev_spread_close is not None:
-                    spread_open = prev_spread_close
-                else:
-                    # First candle: calculate actual open spread
-                    spread_open = ((k1['open'] - k2['open']) / k2['open']) * 100
-                
-                # Calculate raw high/low spreads
-                raw_spread_high = ((k1['high'] - k2['high']) / k2['high']) * 100
-                raw_spread_low = ((k1['low'] - k2['low']) / k2['low']) * 100
-                
-                # High must be >= max(open, close), Low must be <= min(open, close)
-                spread_high = max(spread_open, spread_close, raw_spread_high, raw_spread_low)
-                spread_low = min(spread_open, spread_close, raw_spread_high, raw_spread_low)
-                
-                # Update previous close for next candle continuity
-                prev_spread_close = spread_close
-                
-                # Line data (for baseline chart)
-                spread_line_data.append({
-                    'time': int(timestamp),
-                    'value': round(spread_close, 6),
-                    'ex1_close': k1['close'],
-                    'ex2_close': k2['close']
-                })
-                
-                # Candlestick data
-                spread_candle_data.append({
-                    'time': int(timestamp),
-                    'open': round(spread_open, 6),
-                    'high': round(spread_high, 6),
-                    'low': round(spread_low, 6),
-                    'close': round(spread_close, 6),
-                    'ex1_prices': {
-                        'open': k1['open'], 'high': k1['high'],
-                        'low': k1['low'], 'close': k1['close']
-                    },
-                    'ex2_prices': {
-                        'open': k2['open'], 'high': k2['high'],
-                        'low': k2['low'], 'close': k2['close']
-                    }
-                })
-            
-            if not spread_line_data:
-                return {'error': 'No valid spread data calculated', 'data': []}
+            stats = spread_stats(spread['close'])
             
-            # Calculate statistics
-            close_values = [d['value'] for d in spread_line_data]
-            avg_spread = sum(close_values) / len(close_values)
-            max_spread = max(close_values)
-            min_spread = min(close_values)
+            # Downsample to the chart's pixel width: min-max candles, LTTB points for the line
+            period = display_period(start, end, period_sec, max_points)
+            dtypes = SPREAD_DTYPES
+            if period != period_sec:
+                line = spread['close'][lttb(spread['time'], spread['close'], period)]
+                spread = resample(spread, period)
+                spread['line'] = line
+                dtypes = {**SPREAD_DTYPES, 'line': '<f4'}
             
+            # Columnar payload of base64 typed arrays, the page builds the series from them
             return {
                 'error': None,
-                'lineData': spread_line_data,
-                'candleData': spread_candle_data,
+                'spread': encode_columns(spread, dtypes),
                 'symbol': symbol,
                 'exchange1': exchange1,
                 'exchange2': exchange2,
                 'market1': market1,
                 'market2': market2,
                 'interval': interval,
-                'count': len(spread_line_data),
-                'stats': {
-                    'avg': round(avg_spread, 4),
-                    'max': round(max_spread, 4),
-                    'min': round(min_spread, 4)
-                }
+                'period': period,
+                'hasMore': has_more,
+                'count': len(spread['time']),
+                'stats': stats
             }
             
         except Exception as e:
@@ -242,66 +231,128 @@ class ChartAPI:
             traceback.print_exc()
             return {'error': str(e), 'data': []}
     
-    def fetch_chart_data(self, exchange: str, symbol: str, interval: str, market: str) -> str:
+    def fetch_spread_matrix(self, symbol: str, interval: str, market: str = 'futures',
+                            exchanges: Optional[List[str]] = None, threshold: float = 0.0) -> str:
         """
-        Fetch chart data for a single exchange.
+        Historical spread statistics of every exchange pair for one symbol.
+        
+        Each exchange's klines are fetched once (concurrently, through the kline cache)
+        and all E x (E-1) directional spreads are computed in one vectorized pass.
+        Entry [i][j] is the spread of exchange i over exchange j, as in fetch_spread_data.
         """
+        return self._run('matrix', self._async_fetch_spread_matrix(symbol, interval, market, exchanges, threshold))
+    
+    async def _async_fetch_spread_matrix(self, symbol: str, interval: str, market: str,
+                                         exchanges: Optional[List[str]], threshold: float) -> dict:
+        """Async method to fetch every exchange once and compute the pairwise spread statistics"""
+        names = [name for name in (exchanges or EXCHANGES) if name in EXCHANGES]
+        
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                self._async_fetch_data(exchange, symbol, interval, market)
+            start, end, _ = self._history_range(interval, None)
+            results = await asyncio.gather(
+                *(self._get_klines(self._exchange(name), name, market, symbol, interval, start, end) for name in names),
+                return_exceptions=True
             )
-            loop.close()
-            return json.dumps(result)
+            available = [
+                (name, klines) for name, klines in zip(names, results)
+                if not isinstance(klines, Exception) and len(klines['time'])
+            ]
+            if len(available) < 2:
+                return {'error': f'Need data from at least 2 exchanges, got {len(available)}', 'data': []}
+            
+            names = [name for name, _ in available]
+            period_sec = INTERVAL_SECONDS.get(interval, 60)
+            _, closes = align_closes([klines for _, klines in available], period_sec)
+            percentiles = (5, 50, 95)
+            stats = spread_matrix_stats(closes, percentiles, threshold)
+            
+            def matrix(values: np.ndarray, digits: int = 4) -> List[List[Optional[float]]]:
+                return [[None if np.isnan(v) else round(float(v), digits) for v in row] for row in values]
+            
+            # Directional pairs, fastest mean reversion first
+            pairs = []
+            for i, j in zip(*np.nonzero(stats['count'] > 0)):
+                pairs.append({
+                    'exchange1': names[i],
+                    'exchange2': names[j],
+                    'count': int(stats['count'][i, j]),
+                    'mean': round(float(stats['mean'][i, j]), 4),
+                    'std': round(float(stats['std'][i, j]), 4),
+                    'above': round(float(stats['above'][i, j]), 2),
+                    'halfLife': None if np.isnan(stats['half_life'][i, j]) else round(float(stats['half_life'][i, j]), 2)
+                })
+            pairs.sort(key=lambda pair: (pair['halfLife'] is None, pair['halfLife'] or 0.0))
+            
+            return {
+                'error': None,
+                'symbol': symbol,
+                'interval': interval,
+                'market': market,
+                'threshold': threshold,
+                'exchanges': names,
+                'count': int(closes.shape[1]),
+                'matrix': {
+                    'count': stats['count'].tolist(),
+                    'mean': matrix(stats['mean']),
+                    'std': matrix(stats['std']),
+                    'above': matrix(stats['above'], 2),
+                    'halfLife': matrix(stats['half_life'], 2),
+                    **{f'p{p}': matrix(values) for p, values in zip(percentiles, stats['percentiles'])}
+                },
+                'pairs': pairs
+            }
+            
         except Exception as e:
-            return json.dumps({'error': str(e), 'data': []})
+            import traceback
+            traceback.print_exc()
+            return {'error': str(e), 'data': []}
+    
+    def fetch_chart_data(self, exchange: str, symbol: str, interval: str, market: str,
+                         end: Optional[int] = None, max_points: int = 0) -> str:
+        """
+        Fetch chart data for a single exchange.
+        `end` and `max_points` select an older chunk and downsample it, as in fetch_spread_data.
+        A newer request of the same kind cancels this one (returns {'cancelled': true}).
+        """
+        return self._run('chart' if end is None else 'history',
+                         self._async_fetch_data(exchange, symbol, interval, market, end, max_points))
     
-    async def _async_fetch_data(self, exchange: str, symbol: str, interval: str, market: str) -> dict:
+    async def _async_fetch_data(self, exchange: str, symbol: str, interval: str, market: str,
+                                end: Optional[int] = None, max_points: int = 0) -> dict:
         """Async method to fetch chart data from a single exchange"""
         if exchange not in EXCHANGES:
             return {'error': f'Unknown exchange: {exchange}', 'data': []}
         
         try:
-            # Create fresh exchange instance
-            ex = EXCHANGES[exchange]()
-            
-            # Fetch klines based on market type
-            if market == 'futures':
-                klines = await ex.get_klines_futures(symbol, interval)
-            else:
-                klines = await ex.get_klines_spot(symbol, interval)
+            # Pooled exchange instance keeps its session warm between calls
+            ex = self._exchange(exchange)
             
-            # Close the session
-            await ex.close()
+            # Fetch klines based on market type (cached, only missing ranges hit the API)
+            start, end, has_more = self._history_range(interval, end)
+            klines = await self._get_klines(ex, exchange, market, symbol, interval, start, end)
             
-            if not klines:
+            if not len(klines['time']):
                 return {'error': 'No data returned', 'data': []}
             
-            # Convert to TradingView format
-            chart_data = []
-            for k in klines:
-                chart_data.append({
-                    'time': int(k['time']),
-                    'open': k['open'],
-                    'high': k['high'],
-                    'low': k['low'],
-                    'close': k['close']
-                })
-            
-            # Sort by time
-            chart_data.sort(key=lambda x: x['time'])
+            # Downsample to the chart's pixel width (min-max candles)
+            period_sec = INTERVAL_SECONDS.get(interval, 60)
+            period = display_period(start, end, period_sec, max_points)
+            if period != period_sec:
+                klines = resample(klines, period)
             
-            self.current_data = chart_data
+            self.current_data = klines
             
+            # Columns are already sorted by time; sent as base64 typed arrays
             return {
                 'error': None,
-                'data': chart_data,
+                'candles': encode_columns(klines, CANDLE_DTYPES),
                 'symbol': symbol,
                 'exchange': exchange,
                 'market': market,
                 'interval': interval,
-                'count': len(chart_data)
+                'period': period,
+                'hasMore': has_more,
+                'count': len(klines['time'])
             }
             
         except Exception as e:
@@ -309,9 +360,60 @@ class ChartAPI:
             traceback.print_exc()
             return {'error': str(e), 'data': []}
     
+    def start_live(self, symbol: str, interval: str, exchange1: str, market1: str,
+                   exchange2: Optional[str] = None, market2: Optional[str] = None,
+                   last: Optional[dict] = None, period: int = 0) -> str:
+        """
+        Keep the loaded chart's last candle live from bookTicker WebSockets.
+        
+        One venue streams the price chart (mid price), two the spread of exchange1
+        over exchange2. `last` is the chart's last candle, continued while still
+        forming. `period` is the chart's candle width in seconds (the 'period' of
+        a downsampled response), defaulting to the interval's. Candles are pushed to the page's onLiveCandle() at most every
+        LIVE_PUSH_INTERVAL seconds. Replaces any running live stream.
+        """
+        venues = [(exchange1, market1)] + ([(exchange2, market2)] if exchange2 else [])
+        for exchange, market in venues:
+            if exchange not in EXCHANGES:
+                return json.dumps({'error': f'Unknown exchange: {exchange}'})
+            if market == 'spot' and exchange in FUTURES_ONLY_EXCHANGES:
+                return json.dumps({'error': f'No spot stream for {exchange}'})
+        period = int(period) or INTERVAL_SECONDS.get(interval, 60)
+        self.loop_thread.submit(self._start_live(venues, symbol, period, last))
+        return json.dumps({'error': None})
+    
+    def stop_live(self) -> str:
+        """Stop the live stream (if any)"""
+        self.loop_thread.submit(self._stop_live())
+        return json.dumps({'error': None})
+    
+    async def _start_live(self, venues: list, symbol: str, period: int, last: Optional[dict]):
+        await self._stop_live()
+        self.live_tail = LiveTail(venues, symbol, period, self._push_live, last, throttle=LIVE_PUSH_INTERVAL)
+        self.live_task = asyncio.ensure_future(self.live_tail.run())
+    
+    async def _stop_live(self):
+        if self.live_tail is not None:
+            await self.live_tail.stop()
+            self.live_task.cancel()
+        self.live_tail = None
+        self.live_task = None
+    
+    async def _push_live(self, candle: dict):
+        """Hand a live candle to the page (evaluate_js blocks until the page ran it)"""
+        if self._window is None:
+            return
+        script = f"onLiveCandle({json.dumps(candle)})"
+        await asyncio.get_running_loop().run_in_executor(None, self._window.evaluate_js, script)
+    
+    async def _shutdown(self):
+        await self._stop_live()
+        await self._close_exchanges()
+    
     def cleanup(self):
-        """Cleanup exchange instances"""
-        pass
+        """Cleanup exchange instances and live streams"""
+        self.loop_thread.stop(self._shutdown())
+        self.kline_cache.close()
 
 
 # HTML template with TradingView Lightweight Charts
@@ -409,6 +511,9 @@ HTML_TEMPLATE = """
             background: #ff9800;
             border-color: #ff9800;
         }
+        #liveBtn.active {
+            background: #26a69a;
+        }
         #chartContainer {
             flex: 1;
             background: #16213e;
@@ -592,6 +697,10 @@ HTML_TEMPLATE = """
                 <label>&nbsp;</label>
                 <button id="loadBtn" onclick="loadChart()">Load Chart</button>
             </div>
+            <div class="control-group">
+                <label>&nbsp;</label>
+                <button id="liveBtn" onclick="toggleLive()" disabled>Live</button>
+            </div>
         </div>
         
         <div id="chartContainer">
@@ -666,8 +775,68 @@ HTML_TEMPLATE = """
         let selectedMarket2 = 'futures';
         let selectedMode = 'price';
         let selectedSpreadChartType = 'baseline';
-        let currentSpreadLineData = [];
-        let currentSpreadCandleData = [];
+        let currentSpread = null;  // Columnar spread data from fetch_spread_data
+        let currentSpreadIndex = new Map();  // time -> row in currentSpread
+        let currentCandles = null;  // Columnar price candles from fetch_chart_data
+        let currentRequest = null;  // {mode, args, period, hasMore} of the loaded chart, for older history and live
+        let chartGeneration = 0;  // Bumped per chart load; older history of a previous chart is dropped
+        let loadingHistory = false;
+        let liveActive = false;
+        let liveCandle = null;  // Last candle pushed by the live stream (spreads carry ex1_close/ex2_close)
+
+        const BARS_PER_PIXEL = 8;  // Candles requested per pixel of chart width (room to zoom in)
+        const HISTORY_TRIGGER_BARS = 50;  // Load older history when the left edge is this close
+
+        // Decode {name: {type, data}} base64 typed arrays sent by the API into typed arrays
+        function decodeColumns(encoded) {
+            const columns = {};
+            for (const [name, column] of Object.entries(encoded)) {
+                const binary = atob(column.data);
+                const bytes = new Uint8Array(binary.length);
+                for (let i = 0; i < binary.length; i++) {
+                    bytes[i] = binary.charCodeAt(i);
+                }
+                columns[name] = new window[column.type](bytes.buffer);
+            }
+            return columns;
+        }
+
+        // Prepend older columns to newer ones, dropping older rows that overlap the newer range
+        function concatColumns(older, newer) {
+            let count = older.time.length;
+            while (count > 0 && older.time[count - 1] >= newer.time[0]) {
+                count--;
+            }
+            const columns = {};
+            for (const name of Object.keys(newer)) {
+                const column = new newer[name].constructor(count + newer[name].length);
+                column.set(older[name].subarray(0, count));
+                column.set(newer[name], count);
+                columns[name] = column;
+            }
+            return columns;
+        }
+
+        // Exchange prices of a spread candle: the live candle, or the loaded row at that time
+        function showSpreadPrices(time) {
+            let prices = null;
+            if (liveCandle && liveCandle.time === time) {
+                prices = [liveCandle.ex1_close, liveCandle.ex2_close];
+            } else {
+                const row = currentSpreadIndex.get(time);
+                if (row !== undefined) {
+                    prices = [currentSpread.ex1_close[row], currentSpread.ex2_close[row]];
+                }
+            }
+            if (prices) {
+                document.getElementById('infoEx1').textContent = prices[0].toFixed(4);
+                document.getElementById('infoEx2').textContent = prices[1].toFixed(4);
+            }
+        }
+
+        function maxPoints() {
+            return document.getElementById('chartContainer').clientWidth * BARS_PER_PIXEL;
+        }
 
         // Format timestamp for display (local time)
         function formatTime(timestamp) {
@@ -789,12 +958,8 @@ HTML_TEMPLATE = """
                                 spreadEl.textContent = spreadVal.toFixed(4) + '%';
                                 spreadEl.className = 'price-value ' + (spreadVal >= 0 ? 'spread-positive' : 'spread-negative');
                                 
-                                // Find matching data for exchange prices
-                                const matchingPoint = currentSpreadLineData.find(d => d.time === param.time);
-                                if (matchingPoint) {
-                                    document.getElementById('infoEx1').textContent = matchingPoint.ex1_close.toFixed(4);
-                                    document.getElementById('infoEx2').textContent = matchingPoint.ex2_close.toFixed(4);
-                                }
+                                // Find matching row for exchange prices
+                                showSpreadPrices(param.time);
                             }
                         } else {
                             // Candlestick spread
@@ -805,11 +970,7 @@ HTML_TEMPLATE = """
                                 spreadEl.textContent = `O:${data.open.toFixed(3)}% H:${data.high.toFixed(3)}% L:${data.low.toFixed(3)}% C:${data.close.toFixed(3)}%`;
                                 spreadEl.className = 'price-value ' + (spreadVal >= 0 ? 'spread-positive' : 'spread-negative');
                                 
-                                const matchingPoint = currentSpreadCandleData.find(d => d.time === param.time);
-                                if (matchingPoint && matchingPoint.ex1_prices && matchingPoint.ex2_prices) {
-                                    document.getElementById('infoEx1').textContent = matchingPoint.ex1_prices.close.toFixed(4);
-                                    document.getElementById('infoEx2').textContent = matchingPoint.ex2_prices.close.toFixed(4);
-                                }
+                                showSpreadPrices(param.time);
                             }
                         }
                     }
@@ -818,6 +979,14 @@ HTML_TEMPLATE = """
                 }
             });
 
+            // Older history streams in when the left edge comes into view. This also fires
+            // right after a load that fits the screen, prefetching one older chunk.
+            chart.timeScale().subscribeVisibleLogicalRangeChange((range) => {
+                if (range && range.from < HISTORY_TRIGGER_BARS) {
+                    loadOlderHistory();
+                }
+            });
+
             // Resize handler
             window.addEventListener('resize', () => {
                 chart.applyOptions({
@@ -902,7 +1071,7 @@ HTML_TEMPLATE = """
                 document.querySelectorAll('#spreadChartTypeGroup .chart-type-btn').forEach(b => b.classList.remove('active'));
                 btn.classList.add('active');
                 selectedSpreadChartType = btn.dataset.charttype;
-                if (currentSpreadLineData.length > 0 || currentSpreadCandleData.length > 0) {
+                if (currentSpread && currentSpread.time.length > 0) {
                     updateSpreadChartVisibility();
                 }
             });
@@ -935,6 +1104,10 @@ HTML_TEMPLATE = """
             loadBtn.disabled = true;
             loading.style.display = 'block';
             statusEl.textContent = 'Loading...';
+            chartGeneration++;
+            currentRequest = null;
+            await stopLive();
+            document.getElementById('liveBtn').disabled = true;
 
             try {
                 if (selectedMode === 'price') {
@@ -948,7 +1121,70 @@ HTML_TEMPLATE = """
             } finally {
                 loadBtn.disabled = false;
                 loading.style.display = 'none';
+                document.getElementById('liveBtn').disabled = !currentRequest;
+            }
+        }
+
+        // Live mode: the backend streams the venues' book tickers and pushes the forming candle
+        async function toggleLive() {
+            if (liveActive) {
+                await stopLive();
+            } else {
+                await startLive();
+            }
+        }
+
+        async function startLive() {
+            const request = currentRequest;
+            if (!request) {
+                return;
+            }
+            const columns = request.mode === 'price' ? currentCandles : currentSpread;
+            const row = columns.time.length - 1;
+            const last = {
+                time: columns.time[row],
+                open: columns.open[row],
+                high: columns.high[row],
+                low: columns.low[row],
+                close: columns.close[row]
+            };
+            const args = request.args;
+            const resultStr = request.mode === 'price'
+                ? await pywebview.api.start_live(args[1], args[2], args[0], args[3], null, null, last, request.period)
+                : await pywebview.api.start_live(args[2], args[3], args[0], args[4], args[1], args[5], last, request.period);
+            const result = JSON.parse(resultStr);
+            if (result.error) {
+                document.getElementById('status').innerHTML = `<span class="error">Error: ${result.error}</span>`;
+                return;
+            }
+            liveActive = true;
+            document.getElementById('liveBtn').classList.add('active');
+        }
+
+        async function stopLive() {
+            if (!liveActive) {
+                return;
+            }
+            liveActive = false;
+            liveCandle = null;
+            document.getElementById('liveBtn').classList.remove('active');
+            await pywebview.api.stop_live();
+        }
+
+        // Called by the backend (throttled) with the forming candle of the live chart
+        function onLiveCandle(candle) {
+            if (!liveActive || !currentRequest) {
+                return;
             }
+            liveCandle = candle;
+            const bar = { time: candle.time, open: candle.open, high: candle.high, low: candle.low, close: candle.close };
+            if (currentRequest.mode === 'price') {
+                candlestickSeries.update(bar);
+            } else {
+                spreadBaselineSeries.update({ time: candle.time, value: candle.close });
+                spreadCandlestickSeries.update(bar);
+            }
+            document.getElementById('latestTime').textContent = new Date(candle.time * 1000).toLocaleString();
         }
         
         async function loadPriceChart(symbol, interval, statusEl) {
@@ -959,34 +1195,59 @@ HTML_TEMPLATE = """
             spreadBaselineSeries.applyOptions({ visible: false });
             spreadCandlestickSeries.applyOptions({ visible: false });
             
-            const resultStr = await pywebview.api.fetch_chart_data(exchange, symbol, interval, selectedMarket);
+            const args = [exchange, symbol, interval, selectedMarket];
+            const resultStr = await pywebview.api.fetch_chart_data(...args, null, maxPoints());
             const result = JSON.parse(resultStr);
 
+            // Superseded by a newer chart request
+            if (result.cancelled) {
+                return;
+            }
+
             if (result.error) {
                 throw new Error(result.error);
             }
 
-            if (!result.data || result.data.length === 0) {
+            if (!result.candles) {
+                throw new Error('No data returned from exchange');
+            }
+
+            const candles = decodeColumns(result.candles);
+            if (candles.time.length === 0) {
                 throw new Error('No data returned from exchange');
             }
+            currentCandles = candles;
 
             // Update chart
-            candlestickSeries.setData(result.data);
+            renderPriceChart();
             spreadBaselineSeries.setData([]);
             spreadCandlestickSeries.setData([]);
             chart.timeScale().fitContent();
 
             // Update status
             statusEl.textContent = `Loaded: ${exchange.toUpperCase()} ${symbol} ${selectedMarket.toUpperCase()}`;
-            document.getElementById('dataPoints').textContent = result.count;
+            updateRangeInfo(candles.time);
+            currentRequest = { mode: 'price', args: args, period: result.period, hasMore: result.hasMore };
+        }
 
-            // Time range
-            if (result.data.length > 0) {
-                const firstDate = new Date(result.data[0].time * 1000).toLocaleString();
-                const lastDate = new Date(result.data[result.data.length - 1].time * 1000).toLocaleString();
-                document.getElementById('timeRange').textContent = `${new Date(result.data[0].time * 1000).toLocaleDateString()} - ${new Date(result.data[result.data.length - 1].time * 1000).toLocaleDateString()}`;
-                document.getElementById('latestTime').textContent = lastDate;
-            }
+        // Build TradingView series from the price columns
+        function renderPriceChart() {
+            const candles = currentCandles;
+            candlestickSeries.setData(Array.from(candles.time, (t, i) => ({
+                time: t,
+                open: candles.open[i],
+                high: candles.high[i],
+                low: candles.low[i],
+                close: candles.close[i]
+            })));
+        }
+
+        function updateRangeInfo(times) {
+            const firstTime = times[0];
+            const lastTime = times[times.length - 1];
+            document.getElementById('dataPoints').textContent = times.length;
+            document.getElementById('timeRange').textContent = `${new Date(firstTime * 1000).toLocaleDateString()} - ${new Date(lastTime * 1000).toLocaleDateString()}`;
+            document.getElementById('latestTime').textContent = new Date(lastTime * 1000).toLocaleString();
         }
         
         async function loadSpreadChart(symbol, interval, statusEl) {
@@ -1007,61 +1268,114 @@ HTML_TEMPLATE = """
             // Hide regular candlestick
             candlestickSeries.applyOptions({ visible: false });
             
-            const resultStr = await pywebview.api.fetch_spread_data(
-                exchange1, exchange2, symbol, interval, selectedMarket1, selectedMarket2
-            );
+            const args = [exchange1, exchange2, symbol, interval, selectedMarket1, selectedMarket2];
+            const resultStr = await pywebview.api.fetch_spread_data(...args, null, maxPoints());
             const result = JSON.parse(resultStr);
 
+            // Superseded by a newer chart request
+            if (result.cancelled) {
+                return;
+            }
+
             if (result.error) {
                 throw new Error(result.error);
             }
 
-            if (!result.lineData || result.lineData.length === 0) {
+            const spread = result.spread ? decodeSpread(result.spread) : null;
+            if (!spread || spread.time.length === 0) {
                 throw new Error('No matching data between exchanges');
             }
-
-            // Store data for crosshair
-            currentSpreadLineData = result.lineData;
-            currentSpreadCandleData = result.candleData || [];
-            
-            // Prepare clean data for TradingView
-            const cleanLineData = currentSpreadLineData
-                .map(d => ({ time: d.time, value: d.value }))
-                .sort((a, b) => a.time - b.time);
-            
-            const cleanCandleData = currentSpreadCandleData
-                .map(d => ({
-                    time: d.time,
-                    open: d.open,
-                    high: d.high,
-                    low: d.low,
-                    close: d.close
-                }))
-                .sort((a, b) => a.time - b.time);
+            currentSpread = spread;
             
             // Set data
             candlestickSeries.setData([]);
-            spreadBaselineSeries.setData(cleanLineData);
-            spreadCandlestickSeries.setData(cleanCandleData);
+            renderSpreadChart();
             
             updateSpreadChartVisibility();
             chart.timeScale().fitContent();
 
             // Update status
             statusEl.textContent = `Spread: ${exchange1.toUpperCase()} (${selectedMarket1}) vs ${exchange2.toUpperCase()} (${selectedMarket2}) - ${symbol}`;
-            document.getElementById('dataPoints').textContent = result.count;
             
             if (result.stats) {
                 document.getElementById('spreadStats').textContent = 
                     `${result.stats.avg}% / ${result.stats.min}% / ${result.stats.max}%`;
             }
 
-            // Time range
-            if (result.lineData.length > 0) {
-                const firstDate = new Date(result.lineData[0].time * 1000).toLocaleString();
-                const lastDate = new Date(result.lineData[result.lineData.length - 1].time * 1000).toLocaleString();
-                document.getElementById('timeRange').textContent = `${new Date(result.lineData[0].time * 1000).toLocaleDateString()} - ${new Date(result.lineData[result.lineData.length - 1].time * 1000).toLocaleDateString()}`;
-                document.getElementById('latestTime').textContent = lastDate;
+            updateRangeInfo(spread.time);
+            currentRequest = { mode: 'spread', args: args, period: result.period, hasMore: result.hasMore };
+        }
+
+        // Downsampled ranges carry LTTB-selected line points, full resolution ranges plot the closes
+        function decodeSpread(encoded) {
+            const spread = decodeColumns(encoded);
+            if (!spread.line) {
+                spread.line = spread.close;
+            }
+            return spread;
+        }
+
+        // Build TradingView series from the spread columns
+        function renderSpreadChart() {
+            const spread = currentSpread;
+            // Store rows for crosshair lookups (rows are sorted by time)
+            currentSpreadIndex = new Map(Array.from(spread.time, (t, i) => [t, i]));
+            spreadBaselineSeries.setData(Array.from(spread.time, (t, i) => ({ time: t, value: spread.line[i] })));
+            spreadCandlestickSeries.setData(Array.from(spread.time, (t, i) => ({
+                time: t,
+                open: spread.open[i],
+                high: spread.high[i],
+                low: spread.low[i],
+                close: spread.close[i]
+            })));
+        }
+
+        // Load the chunk before the oldest loaded candle and prepend it, keeping the view in place
+        async function loadOlderHistory() {
+            const request = currentRequest;
+            if (!request || !request.hasMore || loadingHistory) {
+                return;
+            }
+            const columns = request.mode === 'price' ? currentCandles : currentSpread;
+            const generation = chartGeneration;
+            loadingHistory = true;
+
+            try {
+                const end = columns.time[0];
+                const resultStr = request.mode === 'price'
+                    ? await pywebview.api.fetch_chart_data(...request.args, end, maxPoints())
+                    : await pywebview.api.fetch_spread_data(...request.args, end, maxPoints());
+                const result = JSON.parse(resultStr);
+
+                // A new chart was loaded meanwhile, or superseded by a newer history request
+                if (generation !== chartGeneration || result.cancelled) {
+                    return;
+                }
+                if (result.error) {
+                    request.hasMore = false;  // No data that far back
+                    return;
+                }
+                request.hasMore = result.hasMore;
+
+                const range = chart.timeScale().getVisibleLogicalRange();
+                let added;
+                if (request.mode === 'price') {
+                    currentCandles = concatColumns(decodeColumns(result.candles), currentCandles);
+                    added = currentCandles.time.length - columns.time.length;
+                    renderPriceChart();
+                } else {
+                    currentSpread = concatColumns(decodeSpread(result.spread), currentSpread);
+                    added = currentSpread.time.length - columns.time.length;
+                    renderSpreadChart();
+                }
+                if (range && added > 0) {
+                    chart.timeScale().setVisibleLogicalRange({ from: range.from + added, to: range.to + added });
+                }
+                updateRangeInfo(request.mode === 'price' ? currentCandles.time : currentSpread.time);
+            } catch (error) {
+                console.error('Error loading history:', error);
+            } finally {
+                loadingHistory = false;
             }
         }
 
@@ -1088,6 +1402,7 @@ def main():
         min_size=(1000, 700),
         resizable=True
     )
+    api._window = window
     
     webview.start(debug=False)
     api.cleanup()
@@ -0,0 +1,46 @@
+"""
+Shared collector daemon.
+
+Polls every exchange once per cadence and serves the snapshot to the Telegram
+bot and API server over a local socket. Frontends connect to it when
+"collector_address" is set in config.json.
+
+Run with: python collector.py
+"""
+import asyncio
+import logging
+import sys
+
+from exchanges.collector import CollectorServer, DEFAULT_COLLECTOR_ADDRESS
+from exchanges.funding_rates import FundingRateManager
+from utils.config_loader import ConfigLoader
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger = logging.getLogger(__name__)
+
+    config = ConfigLoader()
+    address = config.collector_address or DEFAULT_COLLECTOR_ADDRESS
+
+    server = CollectorServer(
+        FundingRateManager(),
+        address=address,
+        interval=config.collector_interval,
+        funding_interval=config.collector_funding_interval,
+    )
+
+    try:
+        asyncio.run(server.run())
+    except KeyboardInterrupt:
+        logger.info("Collector stopped")
+    except Exception as e:
+        logger.error(f"Collector failed: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
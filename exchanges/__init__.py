@@ -1,6 +1,7 @@
-from .base import BaseExchange, FundingInfo
+from .base import BaseExchange, FundingInfo, DepthBook
 
 __all__ = [
     'BaseExchange',
     'FundingInfo',
+    'DepthBook',
 ]
@@ -0,0 +1,515 @@
+"""
+Backtester for spread thresholds and alert/entry/exit policies
+
+Streams snapshots recorded by utils/snapshot_store.py chunk by chunk and
+evaluates the same futures-futures spread rules as the live engine
+(SymbolExchangeGraph.build_all_paths + SpreadStateStore) with NumPy:
+
+- every chunk is prefiltered to the (symbol, ts) groups whose max bid / min
+  ask can beat the grid's smallest min_spread, pivoted to dense (group x
+  exchange) bid/ask/volume/funding arrays and the gross and net spread of
+  every directional pair is computed as one (group x E x E) tensor, shared
+  by all parameter sets
+- per parameter set, passing paths are turned into episodes (a path closes
+  after more than `close_after_cycles` snapshots without it, as in
+  SpreadStateStore) with open/increase alerts and lifetimes
+- every episode opening enters a simulated convergence trade (buy the ask on
+  the cheap venue, sell the bid on the rich one), exited when the reverse
+  spread falls to `exit_spread` or after `max_hold_seconds`
+
+Only episode state and open positions are carried between chunks, so memory
+does not grow with the backtest range. run_sweep() evaluates a parameter grid
+in parallel processes; each process reads the store once for its share of
+the grid.
+"""
+
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.snapshot_store import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+MIN_PRICE = 0.0000001  # Same validity floor as _get_futures_futures_spreads
+READ_COLUMNS = ['ts', 'exchange_id', 'symbol_id', 'bid', 'ask', 'volume', 'funding_rate']
+
+
+@dataclass
+class BacktestParams:
+    min_spread: float = 0.1
+    max_spread: float = 50.0
+    min_net_spread: Optional[float] = None  # None = don't filter on net spread
+    min_volume_usdt: float = 250000
+    increase_ratio: float = 1.5   # Re-alert when spread reaches alerted level * ratio
+    rearm_ratio: float = 2.0      # Lower the alert baseline when spread falls below alerted / ratio
+    close_after_cycles: int = 3
+    exit_spread: float = 0.0      # Exit when (ask on sell venue - bid on buy venue) % is at most this
+    max_hold_seconds: float = 86400.0
+
+    @classmethod
+    def from_config(cls, config, **overrides) -> 'BacktestParams':
+        """Current live settings (config.json + FundingRateManager defaults)"""
+        params = cls(
+            min_spread=config.min_spread,
+            max_spread=config.max_spread,
+            min_net_spread=config.min_net_spread,
+        )
+        return replace(params, **overrides)
+
+
+@dataclass
+class BacktestResult:
+    params: BacktestParams
+    snapshots: int = 0
+    spread_events: int = 0      # (snapshot, path) pairs passing the thresholds
+    episodes: int = 0
+    open_alerts: int = 0
+    increase_alerts: int = 0
+    trades: int = 0
+    wins: int = 0
+    open_positions: int = 0     # Entered but not exited by the end of the range
+    lifetimes: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)  # Closed episodes, seconds
+    trade_pnls: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)  # Percent, after fees
+    hold_times: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)  # Seconds
+
+    @property
+    def alerts(self) -> int:
+        return self.open_alerts + self.increase_alerts
+
+    @property
+    def hit_rate(self) -> float:
+        return self.wins / self.trades if self.trades else 0.0
+
+    @property
+    def total_pnl(self) -> float:
+        return float(self.trade_pnls.sum())
+
+    def summary(self) -> Dict:
+        lifetimes = self.lifetimes
+        return {
+            'snapshots': self.snapshots,
+            'spread_events': self.spread_events,
+            'episodes': self.episodes,
+            'alerts': self.alerts,
+            'increase_alerts': self.increase_alerts,
+            'lifetime_mean': float(lifetimes.mean()) if len(lifetimes) else 0.0,
+            'lifetime_median': float(np.median(lifetimes)) if len(lifetimes) else 0.0,
+            'lifetime_p90': float(np.percentile(lifetimes, 90)) if len(lifetimes) else 0.0,
+            'trades': self.trades,
+            'hit_rate': round(self.hit_rate, 4),
+            'total_pnl': round(self.total_pnl, 4),
+            'mean_pnl': round(float(self.trade_pnls.mean()), 4) if self.trades else 0.0,
+            'mean_hold': float(self.hold_times.mean()) if self.trades else 0.0,
+            'open_positions': self.open_positions,
+        }
+
+
+def param_grid(base: Optional[BacktestParams] = None, **ranges: Sequence) -> List[BacktestParams]:
+    """Cartesian product of parameter values, e.g. param_grid(min_spread=[0.1, 0.2], increase_ratio=[1.5, 2])"""
+    base = base or BacktestParams()
+    names = list(ranges)
+    return [replace(base, **dict(zip(names, values))) for values in itertools.product(*ranges.values())]
+
+
+@dataclass
+class _Snapshot:
+    """Dense view of one chunk: rows are (symbol, ts) groups sorted by symbol then ts"""
+    sym: np.ndarray      # (G,)
+    ts: np.ndarray       # (G,) epoch ms
+    cycle: np.ndarray    # (G,) global snapshot index
+    bid: np.ndarray      # (G, E)
+    ask: np.ndarray
+    volume: np.ndarray
+    funding: np.ndarray  # percent, 0 where unknown
+
+
+def _scan_alerts(values: np.ndarray, alerted: float, increase_ratio: float, rearm_ratio: float) -> Tuple[int, float]:
+    """SpreadStateStore increase/rearm rule over one episode segment.
+    Jumps between baseline changes with vectorized searches (plain loop for short segments)."""
+    alerts = 0
+    n = len(values)
+    if n <= 64:
+        for value in values.tolist():
+            if value >= alerted * increase_ratio:
+                alerts += 1
+                alerted = value
+            elif value <= alerted / rearm_ratio:
+                alerted = value
+        return alerts, alerted
+    k = 0
+    while k < n:
+        hits = np.flatnonzero((values[k:] >= alerted * increase_ratio) | (values[k:] <= alerted / rearm_ratio))
+        if len(hits) == 0:
+            break
+        k += int(hits[0])
+        if values[k] >= alerted * increase_ratio:
+            alerts += 1
+        alerted = float(values[k])
+        k += 1
+    return alerts, alerted
+
+
+class _PolicyState:
+    """Episode and position state of one parameter set, carried across chunks"""
+
+    def __init__(self, params: BacktestParams):
+        self.params = params
+        self.result = BacktestResult(params)
+        # Open episodes, sorted by path code
+        self.codes = np.empty(0, dtype=np.int64)
+        self.start_ts = np.empty(0, dtype=np.int64)
+        self.last_ts = np.empty(0, dtype=np.int64)
+        self.last_cycle = np.empty(0, dtype=np.int64)
+        self.alerted = np.empty(0)
+        # Open positions: (code, sym, buy ex, sell ex, entry ts, entry ask, entry bid, fee cost)
+        self.positions: List[Tuple] = []
+        self._lifetimes: List[np.ndarray] = []
+        self._pnls: List[float] = []
+        self._holds: List[float] = []
+
+    def process(self, snap: _Snapshot, gross: np.ndarray, net: Optional[np.ndarray], valid: np.ndarray,
+                leg_costs: np.ndarray, transfer_cost: float):
+        p = self.params
+        E = snap.bid.shape[1]
+
+        mask = valid & (gross > p.min_spread) & (gross <= p.max_spread)
+        volume_ok = np.isnan(snap.volume) | (snap.volume >= p.min_volume_usdt)
+        mask &= volume_ok[:, :, None] & volume_ok[:, None, :]
+        if net is not None and p.min_net_spread is not None:
+            mask &= net >= p.min_net_spread
+
+        g, i, j = np.nonzero(mask)
+        self.result.spread_events += len(g)
+        if len(g):
+            self._update_episodes(snap, g, i, j, gross[g, i, j], E, leg_costs, transfer_cost)
+        if self.positions:
+            self._check_exits(snap)
+
+    def _update_episodes(self, snap: _Snapshot, g, i, j, values, E, leg_costs, transfer_cost):
+        p = self.params
+        K = p.close_after_cycles
+        code = (snap.sym[g].astype(np.int64) * E + i) * E + j
+        order = np.lexsort((g, code))  # Groups are time-ordered within a symbol
+        code, g, i, j, values = code[order], g[order], i[order], j[order], values[order]
+        cycle = snap.cycle[g]
+        ts = snap.ts[g]
+        n = len(code)
+
+        first = np.r_[True, code[1:] != code[:-1]]
+        gap_break = np.r_[False, np.diff(cycle) > K] & ~first
+
+        # Continuation of episodes carried from earlier chunks
+        first_idx = np.flatnonzero(first)
+        pos = np.searchsorted(self.codes, code[first_idx])
+        pos_clipped = np.minimum(pos, max(len(self.codes) - 1, 0))
+        found = (pos < len(self.codes)) & (self.codes[pos_clipped] == code[first_idx]) if len(self.codes) else np.zeros(len(first_idx), bool)
+        carried_cycle = np.where(found, self.last_cycle[pos_clipped] if len(self.codes) else 0, 0)
+        cont = found & (cycle[first_idx] - carried_cycle <= K)
+
+        # Carried episodes broken by a long gap are closed
+        broken = pos_clipped[found & ~cont]
+        if len(broken):
+            self._lifetimes.append((self.last_ts[broken] - self.start_ts[broken]) / 1000.0)
+
+        seg_start = first | gap_break
+        seg_idx = np.flatnonzero(seg_start)
+        seg_end = np.r_[seg_idx[1:], n]
+        seg_code = code[seg_idx]
+        seg_cont = np.zeros(len(seg_idx), bool)
+        seg_carry = np.zeros(len(seg_idx), dtype=np.int64)
+        first_seg = np.searchsorted(seg_idx, first_idx)
+        seg_cont[first_seg] = cont
+        seg_carry[first_seg] = pos_clipped
+
+        seg_start_ts = ts[seg_idx].copy()
+        seg_base = values[seg_idx].copy()
+        if seg_cont.any():
+            seg_start_ts[seg_cont] = self.start_ts[seg_carry[seg_cont]]
+            seg_base[seg_cont] = self.alerted[seg_carry[seg_cont]]
+
+        new_episodes = ~seg_cont
+        self.result.episodes += int(new_episodes.sum())
+        self.result.open_alerts += int(new_episodes.sum())
+
+        # Increase re-alerts: only segments that cross a threshold need the sequential rule
+        seg_max = np.maximum.reduceat(values, seg_idx)
+        seg_min = np.minimum.reduceat(values, seg_idx)
+        seg_alerted = seg_base.copy()
+        needs_scan = (seg_max >= seg_base * p.increase_ratio) | (seg_min <= seg_base / p.rearm_ratio)
+        for k in np.flatnonzero(needs_scan):
+            start = seg_idx[k] + (0 if seg_cont[k] else 1)
+            alerts, seg_alerted[k] = _scan_alerts(values[start:seg_end[k]], seg_base[k], p.increase_ratio, p.rearm_ratio)
+            self.result.increase_alerts += alerts
+
+        # Segments followed by another episode of the same path are closed
+        last_of_path = np.r_[seg_code[1:] != seg_code[:-1], True]
+        seg_last = seg_end - 1
+        closed = ~last_of_path
+        if closed.any():
+            self._lifetimes.append((ts[seg_last[closed]] - seg_start_ts[closed]) / 1000.0)
+
+        # Replace carried state of every touched path with its last segment
+        keep = np.ones(len(self.codes), bool)
+        keep[pos_clipped[found]] = False
+        tail = last_of_path
+        codes = np.concatenate([self.codes[keep], seg_code[tail]])
+        order = np.argsort(codes, kind='stable')
+        self.codes = codes[order]
+        self.start_ts = np.concatenate([self.start_ts[keep], seg_start_ts[tail]])[order]
+        self.last_ts = np.concatenate([self.last_ts[keep], ts[seg_last[tail]]])[order]
+        self.last_cycle = np.concatenate([self.last_cycle[keep], cycle[seg_last[tail]]])[order]
+        self.alerted = np.concatenate([self.alerted[keep], seg_alerted[tail]])[order]
+
+        # Entries: one open position per path
+        open_codes = {position[0] for position in self.positions}
+        for k in np.flatnonzero(new_episodes):
+            c = int(seg_code[k])
+            if c in open_codes:
+                continue
+            open_codes.add(c)
+            e = seg_idx[k]
+            gi, buy, sell = g[e], i[e], j[e]
+            self.positions.append((
+                c, int(snap.sym[gi]), int(buy), int(sell), int(snap.ts[gi]),
+                float(snap.ask[gi, buy]), float(snap.bid[gi, sell]),
+                float(leg_costs[buy] + leg_costs[sell] + transfer_cost),
+            ))
+
+    def _check_exits(self, snap: _Snapshot):
+        p = self.params
+        positions = self.positions
+        pos_sym = np.array([pos[1] for pos in positions])
+        buy = np.array([pos[2] for pos in positions])
+        sell = np.array([pos[3] for pos in positions])
+        entry_ts = np.array([pos[4] for pos in positions], dtype=np.int64)
+
+        lo = np.searchsorted(snap.sym, pos_sym, 'left')
+        hi = np.searchsorted(snap.sym, pos_sym, 'right')
+        lens = hi - lo
+        total = int(lens.sum())
+        if total == 0:
+            return
+
+        owner = np.repeat(np.arange(len(positions)), lens)
+        offsets = np.cumsum(lens) - lens
+        rows = np.arange(total) - np.repeat(offsets, lens) + np.repeat(lo, lens)
+
+        exit_bid = snap.bid[rows, buy[owner]]    # Sell back on the buy venue
+        exit_ask = snap.ask[rows, sell[owner]]   # Buy back on the sell venue
+        priced = (exit_bid > MIN_PRICE) & (exit_ask > MIN_PRICE)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            reverse = (exit_ask - exit_bid) / exit_bid * 100
+        held = snap.ts[rows] - entry_ts[owner]
+        hit = priced & (held > 0) & ((reverse <= p.exit_spread) | (held >= p.max_hold_seconds * 1000))
+
+        candidates = np.where(hit, np.arange(total), total)
+        has_rows = lens > 0
+        first_hit = np.full(len(positions), total)
+        first_hit[has_rows] = np.minimum.reduceat(candidates, offsets[has_rows])
+
+        remaining = []
+        for k, position in enumerate(positions):
+            r = first_hit[k]
+            if r >= total:
+                remaining.append(position)
+                continue
+            _, _, _, _, ts0, entry_ask, entry_bid, fee = position
+            long_leg = (exit_bid[r] - entry_ask) / entry_ask * 100
+            short_leg = (entry_bid - exit_ask[r]) / entry_bid * 100
+            pnl = float(long_leg + short_leg - fee)
+            self._pnls.append(pnl)
+            self._holds.append(held[r] / 1000.0)
+        self.positions = remaining
+
+    def end_chunk(self, last_cycle: int):
+        """Close carried episodes absent for more than close_after_cycles snapshots"""
+        if not len(self.codes):
+            return
+        stale = last_cycle - self.last_cycle > self.params.close_after_cycles
+        if stale.any():
+            self._lifetimes.append((self.last_ts[stale] - self.start_ts[stale]) / 1000.0)
+            keep = ~stale
+            self.codes, self.start_ts = self.codes[keep], self.start_ts[keep]
+            self.last_ts, self.last_cycle = self.last_ts[keep], self.last_cycle[keep]
+            self.alerted = self.alerted[keep]
+
+    def finish(self, snapshots: int) -> BacktestResult:
+        result = self.result
+        result.snapshots = snapshots
+        # Episodes still open at the end count with their lifetime so far
+        self._lifetimes.append((self.last_ts - self.start_ts) / 1000.0)
+        result.lifetimes = np.concatenate(self._lifetimes) if self._lifetimes else np.empty(0)
+        result.trade_pnls = np.array(self._pnls)
+        result.hold_times = np.array(self._holds)
+        result.trades = len(self._pnls)
+        result.wins = int((result.trade_pnls > 0).sum())
+        result.open_positions = len(self.positions)
+        return result
+
+
+class Backtester:
+    """Evaluates several parameter sets in one pass over the store
+
+    Args:
+        root: SnapshotStore directory
+        params: parameter sets to evaluate
+        leg_costs: round-trip taker cost (percent) per store exchange id,
+            e.g. FeeTable.leg_costs(store.exchanges); None = no fees
+        transfer_cost: added per trade, percent
+        block_groups: (symbol, ts) groups evaluated at once, bounds the E x E tensors
+    """
+
+    def __init__(self, root: str, params: Sequence[BacktestParams], leg_costs: Optional[np.ndarray] = None,
+                 transfer_cost: float = 0.0, block_groups: int = 20000):
+        self.store = SnapshotStore(root)
+        self.params = list(params)
+        self.leg_costs = leg_costs
+        self.transfer_cost = transfer_cost
+        self.block_groups = block_groups
+
+    @staticmethod
+    def _live_rows(columns: Dict[str, np.ndarray], new_group: np.ndarray, min_spread: float,
+                   held: np.ndarray) -> Optional[np.ndarray]:
+        """Row mask of the (symbol, ts) groups worth pivoting, None when all of them are
+
+        A group's best directional gross spread is at most (max bid - min ask) /
+        min ask over its venues, so groups where that bound does not exceed the
+        smallest min_spread of the grid cannot pass. A symbol is kept from its
+        first possible pass on (a position opened there needs the later rows for
+        its exit) and throughout if it already holds a position.
+        """
+        starts = np.flatnonzero(new_group)
+        bid, ask = columns['bid'], columns['ask']
+        best_bid = np.maximum.reduceat(np.where(bid > MIN_PRICE, bid, -np.inf), starts)
+        best_ask = np.minimum.reduceat(np.where(ask > MIN_PRICE, ask, np.inf), starts)
+        with np.errstate(invalid='ignore'):
+            passing = (best_bid - best_ask) / best_ask * 100 > min_spread
+
+        g_sym = columns['symbol_id'][starts]
+        G = len(starts)
+        sym_starts = np.flatnonzero(np.r_[True, g_sym[1:] != g_sym[:-1]])
+        sym_lens = np.diff(np.r_[sym_starts, G])
+        first_pass = np.minimum.reduceat(np.where(passing, np.arange(G), G), sym_starts)
+        keep = np.arange(G) >= np.repeat(first_pass, sym_lens)
+        if len(held):
+            keep |= np.isin(g_sym, held)
+        if keep.all():
+            return None
+        return np.repeat(keep, np.diff(np.r_[starts, len(new_group)]))
+
+    def _snapshots(self, start: Optional[float], end: Optional[float], min_spread: Optional[float] = None,
+                   held: Optional[Callable[[], np.ndarray]] = None) -> Iterator[Tuple[_Snapshot, int, int]]:
+        """Yield dense blocks with the number of snapshots and the last global cycle
+        of their chunk (both only on the chunk's last block, 0 otherwise)
+
+        With min_spread, only groups that can pass it (see _live_rows; held()
+        is read at the start of every chunk) are pivoted; snapshot counts and
+        cycles still cover every row of the chunk.
+        """
+        E = len(self.store.exchanges)
+        cycle_offset = 0
+        for columns in self.store.iter_chunks(start, end, columns=READ_COLUMNS):
+            sym, ts = columns['symbol_id'], columns['ts']
+            if not len(ts):
+                continue
+            new_group = np.r_[True, (sym[1:] != sym[:-1]) | (ts[1:] != ts[:-1])]
+            snapshot_ts = np.unique(ts)
+
+            if min_spread is not None:
+                rows = self._live_rows(columns, new_group, min_spread,
+                                       held() if held is not None else np.empty(0, dtype=np.int64))
+                if rows is not None:
+                    columns = {name: values[rows] for name, values in columns.items()}
+                    sym, ts = columns['symbol_id'], columns['ts']
+                    new_group = np.r_[True, (sym[1:] != sym[:-1]) | (ts[1:] != ts[:-1])][:len(ts)]
+            ex = columns['exchange_id'].astype(np.int64)
+            group = np.cumsum(new_group) - 1
+            G = int(group[-1]) + 1 if len(group) else 0
+
+            def dense(values):
+                out = np.full((G, E), np.nan)
+                out[group, ex] = values
+                return out
+
+            g_ts = ts[new_group]
+            g_cycle = cycle_offset + np.searchsorted(snapshot_ts, g_ts)
+            cycle_offset += len(snapshot_ts)
+
+            funding = np.nan_to_num(dense(columns['funding_rate'])) * 100
+            bid, ask, volume = dense(columns['bid']), dense(columns['ask']), dense(columns['volume'])
+            g_sym = sym[new_group].astype(np.int64)
+
+            for lo in range(0, max(G, 1), self.block_groups):
+                hi = min(lo + self.block_groups, G)
+                yield _Snapshot(
+                    g_sym[lo:hi], g_ts[lo:hi], g_cycle[lo:hi],
+                    bid[lo:hi], ask[lo:hi], volume[lo:hi], funding[lo:hi],
+                ), (len(snapshot_ts) if hi == G else 0), cycle_offset - 1
+
+    def run(self, start: Optional[float] = None, end: Optional[float] = None) -> List[BacktestResult]:
+        """Backtest over [start, end] (epoch seconds, None = whole store)"""
+        self.store.reload_names()
+        E = len(self.store.exchanges)
+        leg_costs = self.leg_costs if self.leg_costs is not None else np.zeros(E)
+        if len(leg_costs) < E:
+            leg_costs = np.r_[leg_costs, np.zeros(E - len(leg_costs))]
+        states = [_PolicyState(params) for params in self.params]
+        need_net = any(params.min_net_spread is not None for params in self.params)
+        costs = leg_costs[:, None] + leg_costs[None, :] + self.transfer_cost
+        off_diagonal = ~np.eye(E, dtype=bool)
+
+        def held() -> np.ndarray:
+            return np.array(sorted({position[1] for state in states for position in state.positions}), dtype=np.int64)
+
+        min_spread = min((params.min_spread for params in self.params), default=None)
+        snapshots = 0
+        for snap, completed, last_cycle in self._snapshots(start, end, min_spread, held):
+            # Same spread and net spread as SymbolExchangeGraph.build_all_paths
+            priced_bid = snap.bid > MIN_PRICE
+            priced_ask = snap.ask > MIN_PRICE
+            valid = (priced_ask & priced_bid)[:, :, None] & (priced_ask & priced_bid)[:, None, :] & off_diagonal
+            with np.errstate(divide='ignore', invalid='ignore'):
+                gross = (snap.bid[:, None, :] - snap.ask[:, :, None]) / snap.ask[:, :, None] * 100
+            net = None
+            if need_net:
+                net = gross - costs + (snap.funding[:, None, :] - snap.funding[:, :, None])
+
+            for state in states:
+                state.process(snap, gross, net, valid, leg_costs, self.transfer_cost)
+            if completed:
+                snapshots += completed
+                for state in states:
+                    state.end_chunk(last_cycle)
+
+        return [state.finish(snapshots) for state in states]
+
+
+def _run_group(root, params, leg_costs, transfer_cost, start, end) -> List[BacktestResult]:
+    return Backtester(root, params, leg_costs, transfer_cost).run(start, end)
+
+
+def run_sweep(root: str, grid: Sequence[BacktestParams], leg_costs: Optional[np.ndarray] = None,
+              transfer_cost: float = 0.0, start: Optional[float] = None, end: Optional[float] = None,
+              processes: Optional[int] = None) -> List[BacktestResult]:
+    """Evaluate a parameter grid in parallel processes, results in grid order"""
+    grid = list(grid)
+    processes = max(1, min(processes or 4, len(grid)))
+    groups = [grid[k::processes] for k in range(processes)]
+    if processes == 1:
+        return _run_group(root, grid, leg_costs, transfer_cost, start, end)
+
+    results: List[Optional[BacktestResult]] = [None] * len(grid)
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [
+            pool.submit(_run_group, root, group, leg_costs, transfer_cost, start, end)
+            for group in groups
+        ]
+        for k, future in enumerate(futures):
+            for n, result in enumerate(future.result()):
+                results[k + n * processes] = result
+    return results
@@ -5,9 +5,11 @@ import logging
 import pytz
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+from utils.capture import REST, get_capture, get_replay, request_key
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -16,6 +18,7 @@ class FundingInfo:
     funding_rate: float
     next_funding_time: datetime
     predicted_rate: Optional[float] = None
+    interval_hours: Optional[float] = None  # Settlement interval; None = venue default (8h)
 
 @dataclass
 class MarginTokenInfo:
@@ -24,6 +27,14 @@ class MarginTokenInfo:
     is_borrowable: bool
     max_leverage: Optional[float] = None
 
+@dataclass
+class DepthBook:
+    """Top-N L2 levels for one symbol, best price first. Quantities in base asset."""
+    symbol: str
+    bids: List[Tuple[float, float]]  # [(price, quantity), ...] descending
+    asks: List[Tuple[float, float]]  # [(price, quantity), ...] ascending
+    timestamp: float = 0.0
+
 class BaseExchange(ABC):
     """Base class for all exchange implementations"""
     
@@ -35,6 +46,8 @@ class BaseExchange(ABC):
         self.last_request_time: float = 0.0
         self.rate_limit_ms: int = 0  # NO RATE LIMIT - maximum speed
         self.utc = pytz.UTC
+        self._contract_sizes: Dict[str, float] = {}  # exchange symbol -> base units per contract
+        self._contract_sizes_loaded: float = 0.0
     
     def _get_current_time(self) -> datetime:
         return datetime.now(self.utc)
@@ -95,6 +108,10 @@ class BaseExchange(ABC):
             self.session = None
     
     async def _make_request(self, method: str, url: str, params: Dict = None, headers: Dict = None, data: Dict = None) -> Dict:
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response(method, url, params)
+        
         await self._init_session()
         
         # NO RATE LIMITING - maximum speed
@@ -104,11 +121,13 @@ class BaseExchange(ABC):
             if current_time - self.last_request_time < self.rate_limit_ms:
                 await asyncio.sleep((self.rate_limit_ms - (current_time - self.last_request_time)) / 1000)
         
+        captured = False
         try:
             logger.debug(f"Making request to: {url}")
             
             async with self.session.request(method, url, params=params, headers=headers, json=data) as response:
                 self.last_request_time = time.time() * 1000
+                captured = await self._capture_response(method, url, params, response)
                 
                 if response.status == 200:
                     try:
@@ -124,8 +143,25 @@ class BaseExchange(ABC):
                     
         except Exception as e:
             logger.error(f"Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure(method, url, params)
             return {}
     
+    async def _capture_response(self, method: str, url: str, params: Optional[Dict], response) -> bool:
+        """Record the raw body (empty for non-200) when capture is on. Returns True if recorded."""
+        capture = get_capture()
+        if capture is None:
+            return False
+        body = await response.read()
+        capture.record(REST, request_key(method, url, params), body if response.status == 200 else b'')
+        return True
+    
+    def _capture_failure(self, method: str, url: str, params: Optional[Dict]):
+        """Record a failed request as an empty body so replay stays aligned"""
+        capture = get_capture()
+        if capture is not None:
+            capture.record(REST, request_key(method, url, params), b'')
+    
     @abstractmethod
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
         pass
@@ -157,10 +193,89 @@ class BaseExchange(ABC):
     
     async def fetch_order_book(self) -> Dict[str, Dict[str, float]]:
         """Fetch best bid/ask prices for all futures symbols.
-        Returns dict of symbols (e.g., 'BTCUSDT') to {'bid': price, 'ask': price}
+        Returns dict of symbols (e.g., 'BTCUSDT') to {'bid': price, 'ask': price},
+        plus 'bid_qty'/'ask_qty' in base asset where the bulk ticker has sizes
         This is used for accurate spread calculation in arbitrage."""
         return {}
     
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top `limit` order book levels for one futures symbol (e.g., 'BTCUSDT').
+        Override in exchanges that support it. Quantities must be in base asset,
+        use _contract_size() on venues that quote depth in contracts."""
+        return None
+
+    @property
+    def supports_depth(self) -> bool:
+        """Whether this exchange implements single-symbol fetch_depth()"""
+        return type(self).fetch_depth is not BaseExchange.fetch_depth
+
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch a fresh best bid/ask for one futures symbol (e.g., 'BTCUSDT').
+        Defaults to the top of fetch_depth(); override in exchanges without depth
+        that have a single-symbol book or ticker endpoint.
+        Returns {'bid': price, 'ask': price} or None"""
+        book = await self.fetch_depth(symbol, 5)
+        if book is None or not book.bids or not book.asks:
+            return None
+        return {'bid': book.bids[0][0], 'ask': book.asks[0][0]}
+
+    @property
+    def supports_book_ticker(self) -> bool:
+        """Whether this exchange can re-quote a single symbol (fetch_book_ticker)"""
+        return self.supports_depth or type(self).fetch_book_ticker is not BaseExchange.fetch_book_ticker
+
+    async def fetch_book_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, float]]:
+        """Fetch fresh best bid/ask for a few futures symbols (e.g., 'BTCUSDT').
+        Uses single-symbol fetch_book_ticker() requests in parallel. There is no
+        fallback to the bulk fetch_order_book() ticker: it can be as stale as
+        the quote being checked, so unsupported exchanges return {}.
+        Returns dict of symbol to {'bid': price, 'ask': price}"""
+        result = {}
+        if not self.supports_book_ticker:
+            return result
+        quotes = await asyncio.gather(*[self.fetch_book_ticker(symbol) for symbol in symbols], return_exceptions=True)
+        for symbol, quote in zip(symbols, quotes):
+            if isinstance(quote, dict) and quote.get('bid', 0) > 0 and quote.get('ask', 0) > 0:
+                result[symbol] = quote
+        return result
+
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch base units per contract for all futures (exchange symbol -> size).
+        Override in exchanges whose order books are quoted in contracts."""
+        return {}
+    
+    async def _contract_size(self, exchange_symbol: str) -> float:
+        """Cached contract size, reloaded at most every 10 minutes for new listings"""
+        if exchange_symbol not in self._contract_sizes and time.time() - self._contract_sizes_loaded > 600:
+            self._contract_sizes_loaded = time.time()
+            sizes = await self.fetch_contract_sizes()
+            if sizes:
+                self._contract_sizes = sizes
+        return self._contract_sizes.get(exchange_symbol, 0.0)
+    
+    @staticmethod
+    def _parse_depth_levels(levels, quantity_scale: float = 1.0) -> List[Tuple[float, float]]:
+        """Parse [[price, qty, ...], ...] levels, skipping malformed/empty ones"""
+        result = []
+        for level in levels or []:
+            try:
+                price = float(level[0])
+                qty = float(level[1]) * quantity_scale
+            except (TypeError, ValueError, IndexError):
+                continue
+            if price > 0 and qty > 0:
+                result.append((price, qty))
+        return result
+    
+    @staticmethod
+    def _top_of_book(bids, asks) -> Optional[Dict[str, float]]:
+        """{'bid': price, 'ask': price} from raw [[price, qty, ...], ...] levels in any order"""
+        bid_prices = [price for price, _ in BaseExchange._parse_depth_levels(bids)]
+        ask_prices = [price for price, _ in BaseExchange._parse_depth_levels(asks)]
+        if not bid_prices or not ask_prices:
+            return None
+        return {'bid': max(bid_prices), 'ask': min(ask_prices)}
+    
     async def close(self):
         """Close the exchange session properly"""
         await self._close_session()
\ No newline at end of file
@@ -2,10 +2,10 @@ import time
 import hmac
 import hashlib
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 import urllib.parse
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -104,7 +104,7 @@ class BinanceExchange(BaseExchange):
         return result
 
     async def fetch_order_book(self) -> Dict[str, Dict[str, float]]:
-        """Fetch best bid/ask prices using /fapi/v1/ticker/bookTicker"""
+        """Fetch best bid/ask prices and sizes (base asset) using /fapi/v1/ticker/bookTicker"""
         endpoint = "/fapi/v1/ticker/bookTicker"
         url = f"{self.base_url}{endpoint}"
         
@@ -118,7 +118,12 @@ class BinanceExchange(BaseExchange):
                     bid_price = float(item.get('bidPrice', 0))
                     ask_price = float(item.get('askPrice', 0))
                     if symbol and bid_price > 0 and ask_price > 0:
-                        result[symbol] = {'bid': bid_price, 'ask': ask_price}
+                        result[symbol] = {
+                            'bid': bid_price,
+                            'ask': ask_price,
+                            'bid_qty': float(item.get('bidQty', 0)),
+                            'ask_qty': float(item.get('askQty', 0)),
+                        }
                 except Exception as e:
                     logger.debug(f"Binance: Error processing order book item: {str(e)}")
                     continue
@@ -126,6 +131,25 @@ class BinanceExchange(BaseExchange):
         logger.info(f"Binance: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /fapi/v1/depth (quantities in base asset)"""
+        endpoint = "/fapi/v1/depth"
+        # Binance only accepts these limits
+        api_limit = next((l for l in (5, 10, 20, 50, 100, 500, 1000) if l >= limit), 1000)
+        params = {"symbol": symbol, "limit": api_limit}
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+        
+        if not isinstance(response, dict) or 'bids' not in response:
+            logger.debug(f"Binance: No depth for {symbol}")
+            return None
+        
+        return DepthBook(
+            symbol=symbol,
+            bids=self._parse_depth_levels(response.get('bids'))[:limit],
+            asks=self._parse_depth_levels(response.get('asks'))[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         now = self._get_current_time()
         next_hour = ((now.hour // 8) + 1) * 8
@@ -210,7 +234,7 @@ class BinanceExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps
+        from .klines_mixin import get_one_month_timestamps, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -218,27 +242,24 @@ class BinanceExchange(BaseExchange):
         endpoint = "/fapi/v1/klines"
         url = f"{self.base_url}{endpoint}"
         
-        all_klines = []
-        current_start = start_time
         max_limit = 1500
         
-        while current_start < end_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'interval': interval,
-                'startTime': current_start,
-                'endTime': end_time,
+                'startTime': window_start,
+                'endTime': window_end,
                 'limit': max_limit
             }
-            
             response = await self._make_request("GET", url, params=params)
+            if not isinstance(response, list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if not isinstance(response, list) or len(response) == 0:
-                break
-            
+            klines = []
             for kline in response:
                 try:
-                    all_klines.append({
+                    klines.append({
                         'time': int(kline[0]) / 1000,  # Convert to seconds
                         'open': float(kline[1]),
                         'high': float(kline[2]),
@@ -249,12 +270,11 @@ class BinanceExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Binance: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Move to next batch
-            if len(response) < max_limit:
-                break
-            last_time = int(response[-1][0])
-            current_start = last_time + 1
+            return klines
+        
+        # All pages are known up front, fetch them concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'binance')
         
         logger.info(f"Binance Futures: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
@@ -271,7 +291,7 @@ class BinanceExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps
+        from .klines_mixin import get_one_month_timestamps, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -279,27 +299,24 @@ class BinanceExchange(BaseExchange):
         endpoint = "/api/v3/klines"
         url = f"{self.spot_url}{endpoint}"
         
-        all_klines = []
-        current_start = start_time
         max_limit = 1000
         
-        while current_start < end_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'interval': interval,
-                'startTime': current_start,
-                'endTime': end_time,
+                'startTime': window_start,
+                'endTime': window_end,
                 'limit': max_limit
             }
-            
             response = await self._make_request("GET", url, params=params)
+            if not isinstance(response, list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if not isinstance(response, list) or len(response) == 0:
-                break
-            
+            klines = []
             for kline in response:
                 try:
-                    all_klines.append({
+                    klines.append({
                         'time': int(kline[0]) / 1000,  # Convert to seconds
                         'open': float(kline[1]),
                         'high': float(kline[2]),
@@ -310,12 +327,11 @@ class BinanceExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Binance: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Move to next batch
-            if len(response) < max_limit:
-                break
-            last_time = int(response[-1][0])
-            current_start = last_time + 1
+            return klines
+        
+        # All pages are known up front, fetch them concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'binance')
         
         logger.info(f"Binance Spot: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
\ No newline at end of file
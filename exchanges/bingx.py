@@ -1,8 +1,9 @@
 import time
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
+from utils.capture import get_replay
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -46,10 +47,16 @@ class BingXExchange(BaseExchange):
             'Accept-Encoding': 'gzip, deflate'
         }
 
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+
         await self._init_session()
 
+        captured = False
         try:
             async with self.session.request("GET", url, params=params, headers=headers) as response:
+                captured = await self._capture_response("GET", url, params, response)
                 if response.status == 200:
                     try:
                         result = await response.json()
@@ -63,6 +70,8 @@ class BingXExchange(BaseExchange):
                     return {}
         except Exception as e:
             logger.debug(f"BingX: Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure("GET", url, params)
             return {}
 
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
@@ -202,6 +211,25 @@ class BingXExchange(BaseExchange):
         logger.info(f"BingX: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch best bid/ask of one contract from /openApi/swap/v2/quote/bookTicker"""
+        bx_symbol = self._to_bingx_symbol(symbol)
+        response = await self._make_bingx_request("/openApi/swap/v2/quote/bookTicker", {'symbol': bx_symbol})
+
+        data = response.get('data') if response.get('code') == 0 else None
+        book = data.get('book_ticker') if isinstance(data, dict) else None
+        if not isinstance(book, dict):
+            logger.debug(f"BingX: No book ticker for {bx_symbol}: {str(response)[:200]}")
+            return None
+        try:
+            bid_price = float(book.get('bid_price', 0))
+            ask_price = float(book.get('ask_price', 0))
+        except (TypeError, ValueError):
+            return None
+        if bid_price > 0 and ask_price > 0:
+            return {'bid': bid_price, 'ask': ask_price}
+        return None
+
     async def get_next_funding_time(self) -> datetime:
         """Calculate next BingX funding time (8-hour cycle: 00:00, 08:00, 16:00 UTC)"""
         now = self._get_current_time()
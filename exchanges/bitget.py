@@ -3,10 +3,10 @@ import hmac
 import hashlib
 import logging
 import base64
-import asyncio
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
+from utils.capture import get_replay
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -33,10 +33,16 @@ class BitgetExchange(BaseExchange):
             'Accept-Encoding': 'gzip, deflate'  # Explicitly avoid brotli
         }
         
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+        
         await self._init_session()
         
+        captured = False
         try:
             async with self.session.request("GET", url, params=params, headers=headers) as response:
+                captured = await self._capture_response("GET", url, params, response)
                 if response.status == 200:
                     try:
                         result = await response.json()
@@ -50,6 +56,8 @@ class BitgetExchange(BaseExchange):
                     return {}
         except Exception as e:
             logger.debug(f"Bitget: Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure("GET", url, params)
             return {}
     
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
@@ -79,10 +87,14 @@ class BitgetExchange(BaseExchange):
                         if next_hour == 24:
                             next_funding_time = next_funding_time.replace(day=next_funding_time.day + 1)
                     
+                    # fundingRateInterval is the settlement interval in hours
+                    rate_interval = item.get('fundingRateInterval')
+                    
                     result[symbol] = FundingInfo(
                         symbol=symbol,
                         funding_rate=funding_rate,
-                        next_funding_time=next_funding_time
+                        next_funding_time=next_funding_time,
+                        interval_hours=float(rate_interval) if rate_interval else None
                     )
                     
                 except Exception as e:
@@ -176,6 +188,26 @@ class BitgetExchange(BaseExchange):
         logger.info(f"BitGet: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /api/v2/mix/market/merge-depth (quantities in base asset)"""
+        endpoint = "/api/v2/mix/market/merge-depth"
+        # Bitget only accepts these limits
+        api_limit = next((str(l) for l in (1, 5, 15, 50) if l >= limit), 'max')
+        params = {"symbol": symbol, "productType": "USDT-FUTURES", "limit": api_limit}
+        response = await self._make_bitget_request(endpoint, params=params)
+        
+        data = response.get('data') if isinstance(response, dict) else None
+        if not data or 'bids' not in data:
+            logger.debug(f"BitGet: No depth for {symbol}")
+            return None
+        
+        return DepthBook(
+            symbol=symbol,
+            bids=self._parse_depth_levels(data.get('bids'))[:limit],
+            asks=self._parse_depth_levels(data.get('asks'))[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         now = self._get_current_time()
         next_hour = ((now.hour // 8) + 1) * 8
@@ -246,7 +278,7 @@ class BitgetExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -261,40 +293,29 @@ class BitgetExchange(BaseExchange):
         
         endpoint = "/api/v2/mix/market/candles"
         
-        all_klines = []
         max_limit = 1000
         
-        # Calculate interval in milliseconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_ms = interval_minutes * 60 * 1000
-        
-        # Bitget returns most recent data first when endTime is specified
-        # We need to paginate backwards from end_time
-        current_end = end_time
-        
-        while current_end > start_time:
+        # Bitget returns the `limit` candles up to endTime; each window is exactly one page
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'productType': 'USDT-FUTURES',
                 'granularity': granularity,
-                'endTime': str(current_end),
+                'endTime': str(window_end),
                 'limit': str(max_limit)
             }
-            
             response = await self._make_bitget_request(endpoint, params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['data']:
                 try:
-                    kline_time = int(kline[0]) / 1000  # Convert to seconds
                     kline_time_ms = int(kline[0])
-                    # Only include if within our time range
-                    if kline_time_ms >= start_time:
-                        batch_klines.append({
-                            'time': kline_time,
+                    # Only include if within this window
+                    if window_start <= kline_time_ms <= window_end:
+                        klines.append({
+                            'time': kline_time_ms / 1000,  # Convert to seconds
                             'open': float(kline[1]),
                             'high': float(kline[2]),
                             'low': float(kline[3]),
@@ -304,24 +325,11 @@ class BitgetExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Bitget: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines.extend(batch_klines)
-            
-            # Move backwards - find earliest timestamp in this batch
-            earliest_time = min(int(k[0]) for k in response['data'])
-            if earliest_time <= start_time:
-                break
-            current_end = earliest_time - 1
-        
-        # Remove duplicates and sort
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
-        
-        unique_klines.sort(key=lambda x: x['time'])
+            return klines
+        
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'bitget')
+        
         logger.info(f"Bitget Futures: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
     
@@ -337,7 +345,7 @@ class BitgetExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -347,42 +355,27 @@ class BitgetExchange(BaseExchange):
         
         endpoint = "/api/v2/spot/market/history-candles"
         
-        all_klines = []
         max_limit = 200
         
-        # Calculate interval in milliseconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_ms = interval_minutes * 60 * 1000
-        
-        # Paginate backwards from end_time
-        current_end = end_time
-        max_iterations = 200  # Safety limit to prevent infinite loops
-        iteration = 0
-        
-        while current_end > start_time and iteration < max_iterations:
-            iteration += 1
-            
+        # Each window is exactly one page of `limit` candles up to endTime
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'granularity': granularity,
-                'endTime': str(current_end),
+                'endTime': str(window_end),
                 'limit': str(max_limit)
             }
-            
             response = await self._make_bitget_request(endpoint, params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                logger.debug(f"Bitget Spot: No more data at iteration {iteration}")
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['data']:
                 try:
-                    kline_time = int(kline[0]) / 1000  # Convert to seconds
                     kline_time_ms = int(kline[0])
-                    if kline_time_ms >= start_time:
-                        batch_klines.append({
-                            'time': kline_time,
+                    if window_start <= kline_time_ms <= window_end:
+                        klines.append({
+                            'time': kline_time_ms / 1000,  # Convert to seconds
                             'open': float(kline[1]),
                             'high': float(kline[2]),
                             'low': float(kline[3]),
@@ -392,30 +385,11 @@ class BitgetExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Bitget: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines.extend(batch_klines)
-            logger.debug(f"Bitget Spot: Iteration {iteration}, got {len(batch_klines)} klines, total: {len(all_klines)}")
-            
-            # Move backwards - find earliest timestamp in this batch
-            earliest_time = min(int(k[0]) for k in response['data'])
-            if earliest_time <= start_time:
-                logger.debug(f"Bitget Spot: Reached start_time at iteration {iteration}")
-                break
-            
-            # Move to just before the earliest time we got
-            current_end = earliest_time - 1
-            
-            # Add small delay to respect rate limits
-            await asyncio.sleep(0.05)
-        
-        # Remove duplicates and sort
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
-        
-        unique_klines.sort(key=lambda x: x['time'])
+            return klines
+        
+        # Concurrency is capped per venue instead of sleeping between pages
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'bitget')
+        
         logger.info(f"Bitget Spot: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
\ No newline at end of file
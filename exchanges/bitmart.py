@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -89,7 +89,8 @@ class BitMartExchange(BaseExchange):
                     symbol=normalized,
                     funding_rate=funding_rate,
                     next_funding_time=next_funding_time,
-                    predicted_rate=predicted_rate
+                    predicted_rate=predicted_rate,
+                    interval_hours=float(funding_interval)
                 )
             except Exception as e:
                 logger.debug(f"BitMart: Error processing funding rate {item.get('symbol', '?')}: {str(e)}")
@@ -189,6 +190,18 @@ class BitMartExchange(BaseExchange):
         logger.info(f"BitMart: Successfully fetched {len(result)} order books (last price as bid/ask)")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch the real best bid/ask of one contract from /contract/public/depth
+        (fetch_order_book only has last price)"""
+        url = f"{self.base_url}/contract/public/depth"
+        response = await self._make_request("GET", url, params={'symbol': symbol.upper()})
+
+        if not isinstance(response, dict) or response.get('code') != 1000:
+            logger.debug(f"BitMart: No depth for {symbol}: {str(response)[:200]}")
+            return None
+        data = response.get('data') or {}
+        return self._top_of_book(data.get('bids'), data.get('asks'))
+
     async def get_next_funding_time(self) -> datetime:
         """BitMart uses 8-hour funding intervals"""
         now = self._get_current_time()
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -141,6 +141,26 @@ class BloFinExchange(BaseExchange):
         logger.info(f"BloFin: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch best bid/ask of one USDT contract from the public API
+        (GET /api/v1/market/tickers?instId=BTC-USDT)"""
+        inst_id = symbol if '-' in symbol else f"{symbol[:-4]}-USDT"
+        url = "https://openapi.blofin.com/api/v1/market/tickers"
+        response = await self._make_request("GET", url, params={'instId': inst_id})
+
+        data = response.get('data') if isinstance(response, dict) else None
+        if not isinstance(data, list) or not data:
+            logger.debug(f"BloFin: No ticker for {inst_id}: {str(response)[:200]}")
+            return None
+        try:
+            bid_price = float(data[0].get('bidPrice', 0) or 0)
+            ask_price = float(data[0].get('askPrice', 0) or 0)
+        except (TypeError, ValueError):
+            return None
+        if bid_price > 0 and ask_price > 0:
+            return {'bid': bid_price, 'ask': ask_price}
+        return None
+
     async def get_next_funding_time(self) -> datetime:
         """BloFin uses 8-hour funding intervals"""
         now = self._get_current_time()
@@ -2,9 +2,9 @@ import time
 import hmac
 import hashlib
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -134,7 +134,7 @@ class BybitExchange(BaseExchange):
         return result
 
     async def fetch_order_book(self) -> Dict[str, Dict[str, float]]:
-        """Fetch best bid/ask prices using /v5/market/tickers"""
+        """Fetch best bid/ask prices and sizes (base asset) using /v5/market/tickers"""
         endpoint = "/v5/market/tickers"
         params = {"category": "linear"}
         response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
@@ -150,7 +150,12 @@ class BybitExchange(BaseExchange):
                     bid_price = float(item.get('bid1Price', 0))
                     ask_price = float(item.get('ask1Price', 0))
                     if bid_price > 0 and ask_price > 0:
-                        result[symbol] = {'bid': bid_price, 'ask': ask_price}
+                        result[symbol] = {
+                            'bid': bid_price,
+                            'ask': ask_price,
+                            'bid_qty': float(item.get('bid1Size', 0) or 0),
+                            'ask_qty': float(item.get('ask1Size', 0) or 0),
+                        }
                 except Exception as e:
                     logger.debug(f"Bybit: Error processing order book item: {str(e)}")
                     continue
@@ -158,6 +163,24 @@ class BybitExchange(BaseExchange):
         logger.info(f"Bybit: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /v5/market/orderbook (quantities in base asset)"""
+        endpoint = "/v5/market/orderbook"
+        params = {"category": "linear", "symbol": symbol, "limit": min(limit, 500)}
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+        
+        result = response.get('result') if isinstance(response, dict) else None
+        if not result or 'b' not in result:
+            logger.debug(f"Bybit: No depth for {symbol}")
+            return None
+        
+        return DepthBook(
+            symbol=symbol,
+            bids=self._parse_depth_levels(result.get('b'))[:limit],
+            asks=self._parse_depth_levels(result.get('a'))[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         """Calculate next funding time - Bybit uses 8-hour cycles"""
         now = self._get_current_time()
@@ -228,7 +251,7 @@ class BybitExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -238,30 +261,26 @@ class BybitExchange(BaseExchange):
         
         endpoint = "/v5/market/kline"
         
-        all_klines = []
-        current_end = end_time
         max_limit = 1000
         
-        while current_end > start_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'category': 'linear',
                 'symbol': symbol,
                 'interval': bybit_interval,
-                'start': start_time,
-                'end': current_end,
+                'start': window_start,
+                'end': window_end,
                 'limit': max_limit
             }
-            
             response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+            if 'result' not in response or 'list' not in response['result']:
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'result' not in response or 'list' not in response['result'] or len(response['result']['list']) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['result']['list']:
                 try:
-                    # Bybit returns: [startTime, openPrice, highPrice, lowPrice, closePrice, volume, turnover]
-                    batch_klines.append({
+                    # Bybit returns (newest first): [startTime, openPrice, highPrice, lowPrice, closePrice, volume, turnover]
+                    klines.append({
                         'time': int(kline[0]) / 1000,  # Convert to seconds
                         'open': float(kline[1]),
                         'high': float(kline[2]),
@@ -272,18 +291,12 @@ class BybitExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Bybit: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Bybit returns in descending order, so prepend
-            all_klines = batch_klines + all_klines
-            
-            if len(response['result']['list']) < max_limit:
-                break
-            # Get the earliest timestamp from this batch
-            earliest_time = int(response['result']['list'][-1][0])
-            current_end = earliest_time - 1
-        
-        # Sort by time ascending
-        all_klines.sort(key=lambda x: x['time'])
+            return klines
+        
+        # Pages are fetched concurrently and merged in ascending time order
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'bybit')
+        
         logger.info(f"Bybit Futures: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
     
@@ -299,7 +312,7 @@ class BybitExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -309,29 +322,26 @@ class BybitExchange(BaseExchange):
         
         endpoint = "/v5/market/kline"
         
-        all_klines = []
-        current_end = end_time
         max_limit = 1000
         
-        while current_end > start_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'category': 'spot',
                 'symbol': symbol,
                 'interval': bybit_interval,
-                'start': start_time,
-                'end': current_end,
+                'start': window_start,
+                'end': window_end,
                 'limit': max_limit
             }
-            
             response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+            if 'result' not in response or 'list' not in response['result']:
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'result' not in response or 'list' not in response['result'] or len(response['result']['list']) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['result']['list']:
                 try:
-                    batch_klines.append({
+                    # Bybit returns (newest first): [startTime, openPrice, highPrice, lowPrice, closePrice, volume, turnover]
+                    klines.append({
                         'time': int(kline[0]) / 1000,  # Convert to seconds
                         'open': float(kline[1]),
                         'high': float(kline[2]),
@@ -342,14 +352,11 @@ class BybitExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Bybit: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines = batch_klines + all_klines
-            
-            if len(response['result']['list']) < max_limit:
-                break
-            earliest_time = int(response['result']['list'][-1][0])
-            current_end = earliest_time - 1
+            return klines
+        
+        # Pages are fetched concurrently and merged in ascending time order
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'bybit')
         
-        all_klines.sort(key=lambda x: x['time'])
         logger.info(f"Bybit Spot: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
\ No newline at end of file
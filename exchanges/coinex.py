@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -132,6 +132,19 @@ class CoinExExchange(BaseExchange):
         logger.info(f"CoinEx: Successfully fetched {len(result)} order books (last price as bid/ask)")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch the real best bid/ask of one market from /futures/depth
+        (fetch_order_book only has last price)"""
+        url = f"{self.base_url}/futures/depth"
+        params = {'market': symbol.upper(), 'limit': 5, 'interval': '0'}
+        response = await self._make_request("GET", url, params=params)
+
+        if not isinstance(response, dict) or response.get('code') != 0:
+            logger.debug(f"CoinEx: No depth for {symbol}: {str(response)[:200]}")
+            return None
+        depth = (response.get('data') or {}).get('depth') or {}
+        return self._top_of_book(depth.get('bids'), depth.get('asks'))
+
     async def get_next_funding_time(self) -> datetime:
         """CoinEx uses 8-hour funding intervals"""
         now = self._get_current_time()
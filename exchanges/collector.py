@@ -0,0 +1,426 @@
+"""
+Shared market data collector
+
+One CollectorServer polls every exchange once per cadence and serves the
+latest snapshot to any number of local frontends (Telegram bot, API server,
+chart app) over a Unix socket. Messages are length-prefixed msgpack frames.
+
+On platforms without Unix sockets the address may be given as "host:port"
+and a loopback TCP socket is used instead.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+import time
+from typing import Dict, Optional, Tuple
+
+import msgpack
+import pytz
+from datetime import datetime
+
+from .base import FundingInfo, MarginTokenInfo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLLECTOR_ADDRESS = '/tmp/gtf-collector.sock'
+
+_HEADER = struct.Struct('>I')
+_MAX_FRAME_BYTES = 256 * 1024 * 1024
+# Update events are a few hundred bytes; a subscriber this far behind is stuck
+_MAX_SUBSCRIBER_BUFFER = 1024 * 1024
+
+
+def _parse_address(address: str) -> Tuple[Optional[str], Optional[int]]:
+    """Return (host, port) for TCP addresses, (None, None) for socket paths"""
+    if '/' not in address and '\\' not in address and ':' in address:
+        host, _, port = address.rpartition(':')
+        if port.isdigit():
+            return host or '127.0.0.1', int(port)
+    return None, None
+
+
+async def open_connection(address: str):
+    host, port = _parse_address(address)
+    if port is not None:
+        return await asyncio.open_connection(host, port)
+    return await asyncio.open_unix_connection(address)
+
+
+def pack_frame(obj) -> bytes:
+    body = msgpack.packb(obj, use_bin_type=True)
+    return _HEADER.pack(len(body)) + body
+
+
+async def read_frame(reader: asyncio.StreamReader):
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    if length > _MAX_FRAME_BYTES:
+        raise ValueError(f"Frame too large: {length} bytes")
+    body = await reader.readexactly(length)
+    return msgpack.unpackb(body, raw=False, strict_map_key=False)
+
+
+# ---------------------------------------------------------------------------
+# Snapshot encoding
+# FundingInfo/MarginTokenInfo are sent as compact lists instead of maps
+# ---------------------------------------------------------------------------
+
+def encode_funding_data(funding_data: Dict) -> Dict:
+    encoded = {}
+    for ex_name, ex_data in funding_data.items():
+        rates = {}
+        for symbol, info in ex_data.get('funding_rates', {}).items():
+            next_ts = int(info.next_funding_time.timestamp() * 1000) if info.next_funding_time else 0
+            rates[symbol] = [info.funding_rate, next_ts, info.predicted_rate, info.interval_hours]
+        encoded[ex_name] = {
+            'funding_rates': rates,
+            'order_books': ex_data.get('order_books', {}),
+            'volumes': ex_data.get('volumes', {}),
+        }
+    return encoded
+
+
+def decode_funding_data(encoded: Dict) -> Dict:
+    utc = pytz.UTC
+    funding_data = {}
+    for ex_name, ex_data in encoded.items():
+        rates = {}
+        for symbol, values in ex_data.get('funding_rates', {}).items():
+            rates[symbol] = FundingInfo(
+                symbol=symbol,
+                funding_rate=values[0],
+                next_funding_time=datetime.fromtimestamp(values[1] / 1000.0, utc),
+                predicted_rate=values[2],
+                interval_hours=values[3] if len(values) > 3 else None
+            )
+        funding_data[ex_name] = {
+            'funding_rates': rates,
+            'order_books': ex_data.get('order_books', {}),
+            'volumes': ex_data.get('volumes', {}),
+        }
+    return funding_data
+
+
+def encode_margin_data(margin_data: Dict) -> Dict:
+    encoded = {}
+    for ex_name, ex_data in margin_data.items():
+        tokens = {
+            token: [info.is_borrowable, info.max_leverage]
+            for token, info in ex_data.get('margin_tokens', {}).items()
+        }
+        encoded[ex_name] = {'margin_tokens': tokens, 'spot_prices': ex_data.get('spot_prices', {})}
+    return encoded
+
+
+def decode_margin_data(encoded: Dict) -> Dict:
+    margin_data = {}
+    for ex_name, ex_data in encoded.items():
+        tokens = {
+            token: MarginTokenInfo(symbol=token, is_borrowable=borrowable, max_leverage=leverage)
+            for token, (borrowable, leverage) in ex_data.get('margin_tokens', {}).items()
+        }
+        margin_data[ex_name] = {'margin_tokens': tokens, 'spot_prices': ex_data.get('spot_prices', {})}
+    return margin_data
+
+
+class CollectorServer:
+    """Polls all exchanges through a single FundingRateManager and serves snapshots
+
+    Requests (one frame each, answered with one frame):
+        {'op': 'snapshot'}  -> {'version', 'ts', 'funding_data'}
+        {'op': 'margin'}    -> {'version', 'ts', 'margin_data'}
+        {'op': 'status'}    -> {'version', 'ts', 'margin_version', 'clients'}
+        {'op': 'subscribe'} -> stream of {'event': 'update', ...} frames
+    """
+
+    def __init__(self, manager, address: str = DEFAULT_COLLECTOR_ADDRESS,
+                 interval: float = 1.0, funding_interval: float = 30.0,
+                 margin_interval: float = 10.0):
+        self.manager = manager
+        self.address = address
+        self.interval = interval
+        self.funding_interval = funding_interval
+        self.margin_interval = margin_interval
+
+        self.version = 0
+        self.updated_at = 0.0
+        self.margin_version = 0
+        self.margin_updated_at = 0.0
+        self.margin_requested_at = 0.0
+
+        # Encoded once per cycle, shared by every client
+        self._snapshot_frame = pack_frame({'version': 0, 'ts': 0.0, 'funding_data': {}})
+        self._margin_frame = pack_frame({'version': 0, 'ts': 0.0, 'margin_data': {}})
+        self._last_funding_poll = 0.0
+        self._subscribers = set()
+        self._clients = 0
+        self._server = None
+
+    async def start(self):
+        host, port = _parse_address(self.address)
+        if port is not None:
+            self._server = await asyncio.start_server(self._handle_client, host, port)
+        else:
+            if os.path.exists(self.address):
+                os.unlink(self.address)
+            self._server = await asyncio.start_unix_server(self._handle_client, self.address)
+        logger.info(f"Collector listening on {self.address}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for writer in list(self._subscribers):
+            writer.close()
+        self._subscribers.clear()
+        host, port = _parse_address(self.address)
+        if port is None and os.path.exists(self.address):
+            os.unlink(self.address)
+        for exchange in self.manager.exchanges.values():
+            await exchange.close()
+
+    async def run(self):
+        """Start serving and poll forever"""
+        await self.start()
+        try:
+            while True:
+                started = time.monotonic()
+                await self.poll_once()
+                elapsed = time.monotonic() - started
+                await asyncio.sleep(max(0.0, self.interval - elapsed))
+        finally:
+            await self.stop()
+
+    async def poll_once(self):
+        """Run one collection cycle and publish the result"""
+        now = time.monotonic()
+        fetch_funding = now - self._last_funding_poll >= self.funding_interval
+        margin_due = (
+            self.margin_requested_at
+            and now - self.margin_requested_at < self.margin_interval * 6
+            and time.time() - self.margin_updated_at >= self.margin_interval
+        )
+
+        tasks = [self.manager.update_funding_data(prices_only=not fetch_funding)]
+        if margin_due:
+            tasks.append(self.manager.update_margin_data())
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Price-only cycles keep the last known funding rates (see update_funding_data)
+        if fetch_funding:
+            self._last_funding_poll = now
+
+        self.version += 1
+        self.updated_at = time.time()
+        self._snapshot_frame = pack_frame({
+            'version': self.version,
+            'ts': self.updated_at,
+            'funding_data': encode_funding_data(self.manager.funding_data),
+        })
+
+        if margin_due:
+            self.margin_version += 1
+            self.margin_updated_at = time.time()
+            self._margin_frame = pack_frame({
+                'version': self.margin_version,
+                'ts': self.margin_updated_at,
+                'margin_data': encode_margin_data(self.manager.margin_data),
+            })
+
+        self._publish({
+            'event': 'update',
+            'version': self.version,
+            'ts': self.updated_at,
+            'margin_version': self.margin_version,
+            'funding_refreshed': fetch_funding,
+            'exchanges': {
+                ex_name: len(ex_data.get('order_books', {}))
+                for ex_name, ex_data in self.manager.funding_data.items()
+            },
+        })
+
+    def _publish(self, event: Dict):
+        """Queue an event to every subscriber without waiting on any of them;
+        subscribers that stop reading are dropped once their buffer passes
+        _MAX_SUBSCRIBER_BUFFER instead of stalling the polling loop"""
+        if not self._subscribers:
+            return
+        frame = pack_frame(event)
+        for writer in list(self._subscribers):
+            try:
+                if writer.transport.get_write_buffer_size() > _MAX_SUBSCRIBER_BUFFER:
+                    raise ConnectionError("subscriber not reading")
+                writer.write(frame)
+            except (ConnectionError, RuntimeError) as e:
+                logger.warning(f"Dropping collector subscriber: {str(e)}")
+                self._subscribers.discard(writer)
+                writer.close()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients += 1
+        try:
+            while True:
+                request = await read_frame(reader)
+                op = request.get('op') if isinstance(request, dict) else None
+
+                if op == 'snapshot':
+                    writer.write(self._snapshot_frame)
+                elif op == 'margin':
+                    # Margin endpoints are only polled while someone is asking for them
+                    first_request = not self.margin_requested_at
+                    self.margin_requested_at = time.monotonic()
+                    if first_request and not self.margin_version:
+                        self.margin_updated_at = time.time()
+                        await self.manager.update_margin_data()
+                        self.margin_version += 1
+                        self.margin_updated_at = time.time()
+                        self._margin_frame = pack_frame({
+                            'version': self.margin_version,
+                            'ts': self.margin_updated_at,
+                            'margin_data': encode_margin_data(self.manager.margin_data),
+                        })
+                    writer.write(self._margin_frame)
+                elif op == 'status':
+                    writer.write(pack_frame({
+                        'version': self.version,
+                        'ts': self.updated_at,
+                        'margin_version': self.margin_version,
+                        'clients': self._clients,
+                    }))
+                elif op == 'subscribe':
+                    self._subscribers.add(writer)
+                    writer.write(pack_frame({
+                        'event': 'update',
+                        'version': self.version,
+                        'ts': self.updated_at,
+                        'margin_version': self.margin_version,
+                        'funding_refreshed': False,
+                        'exchanges': {},
+                    }))
+                else:
+                    writer.write(pack_frame({'error': f"unknown op: {op}"}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"Collector client error: {str(e)}")
+        finally:
+            self._clients -= 1
+            self._subscribers.discard(writer)
+            writer.close()
+
+
+class CollectorClient:
+    """Thin client used by frontends instead of owning exchange sessions"""
+
+    def __init__(self, address: str = DEFAULT_COLLECTOR_ADDRESS, timeout: float = 30.0):
+        self.address = address
+        self.timeout = timeout
+        self.version = 0
+        self.margin_version = 0
+        self.updated_at = 0.0
+
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._events_task: Optional[asyncio.Task] = None
+        self._update_event = asyncio.Event()
+
+    @classmethod
+    def from_config(cls, config=None) -> Optional['CollectorClient']:
+        """Build a client if a collector address is configured, else None"""
+        if config is None:
+            from utils.config_loader import ConfigLoader
+            config = ConfigLoader()
+        address = config.collector_address
+        return cls(address) if address else None
+
+    async def _request(self, op: str) -> Dict:
+        async with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._writer is None:
+                        self._reader, self._writer = await open_connection(self.address)
+                    self._writer.write(pack_frame({'op': op}))
+                    await self._writer.drain()
+                    return await asyncio.wait_for(read_frame(self._reader), self.timeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, OSError):
+                    # A late reply would answer the next request; never reuse the stream
+                    self._drop_connection()
+                    if attempt:
+                        raise
+        return {}
+
+    def _drop_connection(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
+
+    async def fetch_snapshot(self) -> Dict:
+        """Return {'version', 'ts', 'funding_data'} with FundingInfo objects restored"""
+        response = await self._request('snapshot')
+        self.version = max(self.version, response.get('version', 0))
+        self.updated_at = response.get('ts', 0.0)
+        response['funding_data'] = decode_funding_data(response.get('funding_data', {}))
+        return response
+
+    async def fetch_margin(self) -> Dict:
+        """Return {'version', 'ts', 'margin_data'} with MarginTokenInfo objects restored"""
+        response = await self._request('margin')
+        response['margin_data'] = decode_margin_data(response.get('margin_data', {}))
+        return response
+
+    async def status(self) -> Dict:
+        return await self._request('status')
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await open_connection(self.address)
+                writer.write(pack_frame({'op': 'subscribe'}))
+                await writer.drain()
+                try:
+                    while True:
+                        event = await read_frame(reader)
+                        if event.get('event') == 'update':
+                            self.version = max(self.version, event.get('version', 0))
+                            self.margin_version = event.get('margin_version', self.margin_version)
+                            self.updated_at = event.get('ts', self.updated_at)
+                            self._update_event.set()
+                            self._update_event = asyncio.Event()
+                finally:
+                    writer.close()
+            except asyncio.CancelledError:
+                raise
+            except (asyncio.IncompleteReadError, ConnectionError, OSError) as e:
+                logger.debug(f"Collector event stream lost: {str(e)}")
+            await asyncio.sleep(1.0)
+
+    async def wait_for_update(self, after_version: int, timeout: Optional[float] = None) -> int:
+        """Block until the collector publishes a version newer than after_version"""
+        if self._events_task is None or self._events_task.done():
+            self._events_task = asyncio.create_task(self._listen())
+        deadline = time.monotonic() + (timeout if timeout is not None else self.timeout)
+        while self.version <= after_version:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._update_event.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+        return self.version
+
+    async def close(self):
+        if self._events_task is not None:
+            self._events_task.cancel()
+            try:
+                await self._events_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._events_task = None
+        self._drop_connection()
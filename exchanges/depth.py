@@ -0,0 +1,205 @@
+"""
+Executable (depth-aware) spread calculation
+
+Top-of-book spreads assume unlimited size. Given L2 depth for both legs this
+module walks the buy venue's asks and the sell venue's bids with equal coin
+quantities (same sizing as the Telegram alerts) and reports VWAP prices,
+slippage and the largest size at which the spread still clears min_spread.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .base import DepthBook
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExecutableSpread:
+    """Result of walking both books for a buy-ask / sell-bid path"""
+    symbol: str
+    notional: float             # Requested size in USDT (buy leg cost)
+    filled_notional: float      # Size actually fillable within fetched depth
+    quantity: float             # Coins bought and sold
+    buy_vwap: float
+    sell_vwap: float
+    buy_slippage: float         # % worse than best ask
+    sell_slippage: float        # % worse than best bid
+    top_spread: float           # Top-of-book spread %
+    spread: float               # VWAP spread % at filled size
+    max_notional: float         # Largest size (USDT) keeping spread >= min_spread
+    depth_limited: bool         # True if fetched depth ran out before notional
+
+    def to_dict(self) -> Dict:
+        return {
+            'exec_notional': self.filled_notional,
+            'exec_quantity': self.quantity,
+            'exec_buy_vwap': self.buy_vwap,
+            'exec_sell_vwap': self.sell_vwap,
+            'exec_buy_slippage': self.buy_slippage,
+            'exec_sell_slippage': self.sell_slippage,
+            'exec_spread': self.spread,
+            'exec_max_notional': self.max_notional,
+            'exec_depth_limited': self.depth_limited,
+        }
+
+
+def walk_book(levels: List[Tuple[float, float]], notional: float) -> Tuple[float, float, float]:
+    """Consume levels until `notional` USDT is filled
+
+    Returns:
+        (vwap, quantity, filled_notional)
+    """
+    remaining = notional
+    quantity = 0.0
+    cost = 0.0
+    for price, qty in levels:
+        level_notional = price * qty
+        if level_notional >= remaining:
+            take = remaining / price
+            quantity += take
+            cost += remaining
+            remaining = 0.0
+            break
+        quantity += qty
+        cost += level_notional
+        remaining -= level_notional
+    vwap = cost / quantity if quantity > 0 else 0.0
+    return vwap, quantity, cost
+
+
+def _max_quantity(asks: List[Tuple[float, float]], bids: List[Tuple[float, float]], min_spread: float) -> Tuple[float, float]:
+    """Largest equal quantity Q with (proceeds - cost) / cost >= min_spread%
+
+    Walks both books level by level. Within a segment where ask a and bid b are
+    constant, cost and proceeds grow linearly so the break-even point solves
+    exactly: P0 + b*q = k*(C0 + a*q) with k = 1 + min_spread/100.
+
+    Returns:
+        (quantity, cost)
+    """
+    k = 1 + min_spread / 100
+    i = j = 0
+    ask_left = asks[0][1] if asks else 0.0
+    bid_left = bids[0][1] if bids else 0.0
+    quantity = cost = proceeds = 0.0
+
+    while i < len(asks) and j < len(bids):
+        a = asks[i][0]
+        b = bids[j][0]
+        step = min(ask_left, bid_left)
+
+        denominator = k * a - b
+        if denominator > 0:
+            # Marginal spread is below threshold - find where the average hits it
+            q = (proceeds - k * cost) / denominator
+            if q < step:
+                q = max(q, 0.0)
+                return quantity + q, cost + a * q
+
+        quantity += step
+        cost += a * step
+        proceeds += b * step
+        ask_left -= step
+        bid_left -= step
+        if ask_left <= 0:
+            i += 1
+            if i < len(asks):
+                ask_left = asks[i][1]
+        if bid_left <= 0:
+            j += 1
+            if j < len(bids):
+                bid_left = bids[j][1]
+
+    return quantity, cost
+
+
+def calculate_executable_spread(buy_book: DepthBook, sell_book: DepthBook,
+                                notional: float, min_spread: float = 0.0) -> Optional[ExecutableSpread]:
+    """Evaluate buying `notional` USDT on buy_book asks and selling the same coins on sell_book bids"""
+    if not buy_book or not sell_book or not buy_book.asks or not sell_book.bids:
+        return None
+
+    best_ask = buy_book.asks[0][0]
+    best_bid = sell_book.bids[0][0]
+
+    buy_vwap, quantity, cost = walk_book(buy_book.asks, notional)
+    if quantity <= 0:
+        return None
+
+    # Sell exactly the coins bought
+    proceeds = 0.0
+    sold = 0.0
+    for price, qty in sell_book.bids:
+        take = min(qty, quantity - sold)
+        proceeds += price * take
+        sold += take
+        if sold >= quantity:
+            break
+    depth_limited = cost < notional * 0.999 or sold < quantity * 0.999
+    if sold < quantity:
+        # Sell side ran out: scale the buy leg down to what can be sold
+        quantity = sold
+        buy_vwap, quantity, cost = _vwap_for_quantity(buy_book.asks, sold)
+    sell_vwap = proceeds / sold if sold > 0 else 0.0
+    if quantity <= 0 or buy_vwap <= 0:
+        return None
+
+    max_quantity, max_cost = _max_quantity(buy_book.asks, sell_book.bids, min_spread)
+
+    return ExecutableSpread(
+        symbol=buy_book.symbol,
+        notional=notional,
+        filled_notional=cost,
+        quantity=quantity,
+        buy_vwap=buy_vwap,
+        sell_vwap=sell_vwap,
+        buy_slippage=(buy_vwap - best_ask) / best_ask * 100,
+        sell_slippage=(best_bid - sell_vwap) / best_bid * 100,
+        top_spread=(best_bid - best_ask) / best_ask * 100,
+        spread=(sell_vwap - buy_vwap) / buy_vwap * 100,
+        max_notional=max_cost,
+        depth_limited=depth_limited,
+    )
+
+
+def _vwap_for_quantity(levels: List[Tuple[float, float]], quantity: float) -> Tuple[float, float, float]:
+    filled = cost = 0.0
+    for price, qty in levels:
+        take = min(qty, quantity - filled)
+        cost += price * take
+        filled += take
+        if filled >= quantity:
+            break
+    return (cost / filled if filled > 0 else 0.0), filled, cost
+
+
+async def fetch_depths(exchanges: Dict, requests: List[Tuple[str, str]], limit: int = 20,
+                       timeout: Optional[float] = None, live_books=None) -> Dict[Tuple[str, str], DepthBook]:
+    """Fetch depth for unique (exchange_name, symbol) pairs in parallel
+
+    Pairs with a synced book in `live_books` (LiveBooks) are read from it
+    without a request. Exchanges without fetch_depth are skipped; with
+    `timeout`, slower requests are abandoned so callers in the monitoring
+    loop are never held longer.
+    """
+    books = {}
+    unique = []
+    for key in dict.fromkeys(requests):
+        book = live_books.depth(key[0], key[1], limit) if live_books is not None else None
+        if book is not None:
+            books[key] = book
+        elif key[0] in exchanges and exchanges[key[0]].supports_depth:
+            unique.append(key)
+    tasks = [asyncio.wait_for(exchanges[ex_name].fetch_depth(symbol, limit), timeout) for ex_name, symbol in unique]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for key, result in zip(unique, results):
+        if isinstance(result, Exception):
+            logger.debug(f"Depth fetch failed for {key}: {str(result)}")
+        elif result is not None and result.bids and result.asks:
+            books[key] = result
+    return books
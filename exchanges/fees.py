@@ -0,0 +1,116 @@
+"""
+Trading fee schedules and net-edge costs
+
+Public USDT-margined futures fee schedules (percent) per venue and tier.
+The tier in use per venue is set with "fee_tiers" in config.json
+(e.g. {"Binance": "VIP1"}), and "fee_overrides" can pin exact rates
+(e.g. {"MEXC": {"maker": 0.0, "taker": 0.01}}) for negotiated or
+rebate-adjusted accounts.
+
+Round-trip cost of a two-leg path = taker fees to open and close both legs
+plus the configured transfer cost ("transfer_cost_percent") for rebalancing
+capital between venues.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class FeeSchedule:
+    exchange: str
+    tier: str
+    maker: float  # percent
+    taker: float  # percent
+
+
+DEFAULT_TIER = 'VIP0'
+
+# (maker %, taker %) per tier
+DEFAULT_FEE_SCHEDULES: Dict[str, Dict[str, Tuple[float, float]]] = {
+    'Binance': {'VIP0': (0.02, 0.05), 'VIP1': (0.016, 0.04), 'VIP2': (0.014, 0.035), 'VIP3': (0.012, 0.032)},
+    'OKX': {'VIP0': (0.02, 0.05), 'VIP1': (0.015, 0.045), 'VIP2': (0.01, 0.04)},
+    'Bybit': {'VIP0': (0.02, 0.055), 'VIP1': (0.018, 0.04), 'VIP2': (0.016, 0.0375)},
+    'Gate.io': {'VIP0': (0.02, 0.05), 'VIP1': (0.015, 0.05), 'VIP2': (0.01, 0.045)},
+    'BitGet': {'VIP0': (0.02, 0.06), 'VIP1': (0.018, 0.054), 'VIP2': (0.016, 0.048)},
+    'KuCoin': {'VIP0': (0.02, 0.06), 'VIP1': (0.015, 0.05)},
+    'MEXC': {'VIP0': (0.0, 0.02)},
+    'HTX': {'VIP0': (0.02, 0.05)},
+    'BingX': {'VIP0': (0.02, 0.05)},
+    'CoinEx': {'VIP0': (0.03, 0.05)},
+    'XT': {'VIP0': (0.04, 0.06)},
+    'BitMart': {'VIP0': (0.02, 0.06)},
+    'LBank': {'VIP0': (0.02, 0.06)},
+    'OurBit': {'VIP0': (0.0, 0.02)},
+    'BloFin': {'VIP0': (0.02, 0.06)},
+}
+
+# Used for venues missing from the table - deliberately pessimistic
+FALLBACK_FEES = (0.05, 0.08)
+
+
+class FeeTable:
+    """Resolved per-venue fee schedules, cached for `ttl` seconds"""
+
+    def __init__(self, config, ttl: float = 3600.0):
+        self.config = config
+        self.ttl = ttl
+        self._schedules: Dict[str, FeeSchedule] = {}
+        self._vectors: Dict[Tuple[str, ...], np.ndarray] = {}
+        self._loaded_at = 0.0
+
+    def _load(self):
+        tiers = self.config.fee_tiers
+        overrides = self.config.fee_overrides
+        schedules = {}
+        for exchange, table in DEFAULT_FEE_SCHEDULES.items():
+            tier = tiers.get(exchange, DEFAULT_TIER)
+            maker, taker = table.get(tier, table[DEFAULT_TIER])
+            schedules[exchange] = FeeSchedule(exchange, tier, maker, taker)
+        for exchange, fees in overrides.items():
+            base = schedules.get(exchange) or FeeSchedule(exchange, 'custom', *FALLBACK_FEES)
+            schedules[exchange] = FeeSchedule(
+                exchange, 'custom',
+                float(fees.get('maker', base.maker)),
+                float(fees.get('taker', base.taker)),
+            )
+        self._schedules = schedules
+        self._vectors = {}
+        self._loaded_at = time.time()
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    def _ensure_loaded(self):
+        if time.time() - self._loaded_at > self.ttl:
+            self._load()
+
+    def get(self, exchange: str) -> FeeSchedule:
+        self._ensure_loaded()
+        schedule = self._schedules.get(exchange)
+        if schedule is None:
+            schedule = FeeSchedule(exchange, 'fallback', *FALLBACK_FEES)
+            self._schedules[exchange] = schedule
+        return schedule
+
+    @property
+    def transfer_cost(self) -> float:
+        return self.config.transfer_cost_percent
+
+    def leg_costs(self, exchanges: List[str]) -> np.ndarray:
+        """Per-venue round-trip cost of one leg (taker to open + taker to close), percent"""
+        self._ensure_loaded()
+        key = tuple(exchanges)
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = np.array([2 * self.get(ex).taker for ex in exchanges], dtype=np.float64)
+            self._vectors[key] = vector
+        return vector
+
+    def round_trip_cost(self, buy_exchange: str, sell_exchange: str, transfer: Optional[float] = None) -> float:
+        """Total cost in percent to open and close a buy/sell pair"""
+        transfer = self.transfer_cost if transfer is None else transfer
+        return 2 * (self.get(buy_exchange).taker + self.get(sell_exchange).taker) + transfer
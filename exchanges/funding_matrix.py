@@ -0,0 +1,127 @@
+"""
+Vectorized funding-rate arbitrage
+
+FundingMatrix holds one snapshot as dense (symbols x exchanges) arrays of
+funding rate, settlement interval, bid, ask and next funding time. Ranking
+builds the (S x E x E) short/long funding differential in one NumPy pass,
+with every rate scaled to a common horizon so 1h/4h venues compare fairly
+with 8h venues, subtracts round-trip fees and takes the best pair per symbol.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_INTERVAL_HOURS = 8.0
+
+
+@dataclass
+class FundingMatrix:
+    symbols: List[str]
+    exchanges: List[str]
+    rates: np.ndarray           # (S, E) funding rate per settlement, NaN = not listed
+    interval_hours: np.ndarray  # (S, E)
+    bids: np.ndarray            # (S, E)
+    asks: np.ndarray            # (S, E)
+    next_funding: np.ndarray    # (S, E) object array of datetimes
+
+    @classmethod
+    def from_funding_data(cls, funding_data: Dict, min_volume: float = 0.0) -> 'FundingMatrix':
+        """Build from manager.funding_data, keeping exchanges with rates and order books.
+
+        A (symbol, exchange) cell is filled only if the symbol has both a funding
+        rate and bid/ask there and its 24h volume is >= min_volume (missing
+        volume data is not filtered).
+        """
+        exchanges = [
+            ex_name for ex_name, ex_data in funding_data.items()
+            if ex_data.get('funding_rates') and ex_data.get('order_books')
+        ]
+        symbol_set = set()
+        for ex_name in exchanges:
+            symbol_set.update(funding_data[ex_name]['funding_rates'].keys())
+        symbols = sorted(symbol_set)
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+
+        shape = (len(symbols), len(exchanges))
+        rates = np.full(shape, np.nan)
+        interval_hours = np.full(shape, DEFAULT_INTERVAL_HOURS)
+        bids = np.zeros(shape)
+        asks = np.zeros(shape)
+        next_funding = np.empty(shape, dtype=object)
+
+        for e, ex_name in enumerate(exchanges):
+            ex_data = funding_data[ex_name]
+            order_books = ex_data['order_books']
+            volumes = ex_data.get('volumes', {})
+            for symbol, info in ex_data['funding_rates'].items():
+                book = order_books.get(symbol)
+                if book is None:
+                    continue
+                if volumes.get(symbol, float('inf')) < min_volume:
+                    continue
+                s = index[symbol]
+                rates[s, e] = info.funding_rate
+                if info.interval_hours:
+                    interval_hours[s, e] = info.interval_hours
+                bids[s, e] = book.get('bid', 0)
+                asks[s, e] = book.get('ask', 0)
+                next_funding[s, e] = info.next_funding_time
+
+        return cls(symbols, exchanges, rates, interval_hours, bids, asks, next_funding)
+
+    def rank(self, leg_costs: Optional[np.ndarray] = None, transfer_cost: float = 0.0,
+             horizon_hours: float = DEFAULT_INTERVAL_HOURS, min_profit: float = 0.0001) -> List[Dict]:
+        """Best SHORT/LONG pair per symbol, sorted by profit after fees
+
+        Args:
+            leg_costs: per-exchange round-trip taker cost in percent (FeeTable.leg_costs)
+            horizon_hours: rates are scaled to this many hours of funding
+            min_profit: minimum normalized funding differential (fraction, 0.0001 = 0.01%)
+        """
+        S, E = self.rates.shape
+        if S == 0 or E < 2:
+            return []
+
+        listed = ~np.isnan(self.rates)
+        normalized = np.where(listed, self.rates * (horizon_hours / self.interval_hours), 0.0)
+
+        # profit[s, i, j]: SHORT on exchange i (receive), LONG on exchange j (pay)
+        profit = normalized[:, :, None] - normalized[:, None, :]
+        candidate = listed[:, :, None] & listed[:, None, :] & (profit > min_profit)
+        candidate &= ~np.eye(E, dtype=bool)[None, :, :]
+
+        if leg_costs is None:
+            leg_costs = np.zeros(E)
+        fee_cost = leg_costs[:, None] + leg_costs[None, :] + transfer_cost
+        net_profit = profit * 100 - fee_cost[None, :, :]
+
+        score = np.where(candidate, net_profit, -np.inf).reshape(S, E * E)
+        best = np.argmax(score, axis=1)
+        rows = np.nonzero(np.isfinite(score[np.arange(S), best]))[0]
+
+        opportunities = []
+        for s in rows:
+            short, long = divmod(int(best[s]), E)
+            bid_short = float(self.bids[s, short])   # We sell at bid
+            ask_long = float(self.asks[s, long])     # We buy at ask
+            price_spread = (bid_short - ask_long) / ask_long * 100 if ask_long > 0 else 0.0
+            opportunities.append({
+                'symbol': self.symbols[s],
+                'funding_rate_high': round(float(self.rates[s, short]) * 100, 4),  # SHORT here (high funding)
+                'funding_rate_low': round(float(self.rates[s, long]) * 100, 4),    # LONG here (low funding)
+                'funding_interval_high': float(self.interval_hours[s, short]),
+                'funding_interval_low': float(self.interval_hours[s, long]),
+                'exchange_high': self.exchanges[short],
+                'exchange_low': self.exchanges[long],
+                'price_spread': round(price_spread, 4),
+                'bid_price': bid_short,
+                'ask_price': ask_long,
+                'next_funding': self.next_funding[s, short],
+                'spread_magnitude': round(float(profit[s, short, long]) * 100, 4),
+                'fee_cost': round(float(fee_cost[short, long]), 4),
+                'net_profit': round(float(net_profit[s, short, long]), 4),  # For sorting
+            })
+
+        return sorted(opportunities, key=lambda x: x['net_profit'], reverse=True)
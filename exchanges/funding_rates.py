@@ -3,7 +3,8 @@ import logging
 import pytz
 import concurrent.futures
 import threading
-from typing import Dict, List, Set, Tuple
+import numpy as np
+from typing import Dict, List, Optional, Set, Tuple
 from datetime import datetime
 from dataclasses import dataclass, field
 from .binance import BinanceExchange
@@ -21,7 +22,15 @@ from .bitmart import BitMartExchange
 from .lbank import LBankExchange
 from .ourbit import OurBitExchange
 from .blofin import BloFinExchange
+from .spread_state import SessionLog, SpreadStateStore, spread_path_id
+from .depth import calculate_executable_spread, fetch_depths
+from .live_books import LiveBooks
+from .fees import FeeTable
+from .funding_matrix import FundingMatrix
+from .path_stats import PathStats
 from utils.config_loader import ConfigLoader
+from utils.capture import get_capture, start_capture
+from utils.snapshot_store import SnapshotRecorder
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +48,9 @@ class ExchangePath:
     sell_market: str = 'futures'
     buy_volume: float = 0
     sell_volume: float = 0
+    net_spread: Optional[float] = None  # After round-trip fees and next funding settlement
+    fee_cost: float = 0.0
+    funding_edge: float = 0.0  # Funding received on the short leg minus paid on the long leg, %
     
     @property
     def path_id(self) -> str:
@@ -52,64 +64,100 @@ class SymbolExchangeGraph:
     symbol: str
     exchanges: Dict[str, Dict] = field(default_factory=dict)  # {exchange: {bid, ask, volume, market}}
     paths: List[ExchangePath] = field(default_factory=list)  # All directional paths
+    spread_matrix: Optional[np.ndarray] = None  # Gross spread % of every (buy, sell) pair from the last build
+    priced: Optional[np.ndarray] = None  # Pairs of spread_matrix with valid prices on both legs
     
-    def add_exchange(self, exchange: str, bid: float, ask: float, volume: float, market: str = 'futures'):
-        """Add an exchange node to the graph with bid/ask prices"""
+    def add_exchange(self, exchange: str, bid: float, ask: float, volume: float, market: str = 'futures',
+                     funding: float = 0.0):
+        """Add an exchange node to the graph with bid/ask prices and next funding rate (%)"""
         self.exchanges[exchange] = {
             'bid': bid,
             'ask': ask,
             'volume': volume,
-            'market': market
+            'market': market,
+            'funding': funding
         }
     
-    def build_all_paths(self, min_spread: float = 0, max_spread: float = 100) -> List[ExchangePath]:
-        """Build all possible bidirectional paths between exchanges using bid/ask"""
+    def build_all_paths(self, min_spread: float = 0, max_spread: float = 100,
+                        fee_table: Optional[FeeTable] = None, min_net_spread: Optional[float] = None) -> List[ExchangePath]:
+        """Build all possible bidirectional paths between exchanges using bid/ask
+        
+        Gross and net spreads are computed for every (buy, sell) pair at once as
+        NumPy matrices; only pairs passing both the gross limits and, when a fee
+        table is given, min_net_spread are materialized as ExchangePath objects.
+        """
         self.paths = []
         exchange_list = list(self.exchanges.keys())
-        
-        # Generate all directional pairs (A→B and B→A are distinct)
-        for i, ex_a in enumerate(exchange_list):
-            for j, ex_b in enumerate(exchange_list):
-                if i == j:
-                    continue
-                
-                data_a = self.exchanges[ex_a]
-                data_b = self.exchanges[ex_b]
-                
-                # Path: Buy on A (at ASK), Sell on B (at BID)
-                # We BUY at the ASK price, we SELL at the BID price
-                buy_price = data_a['ask']   # Buy at ask on exchange A
-                sell_price = data_b['bid']   # Sell at bid on exchange B
-                
-                if buy_price <= 0 or sell_price <= 0:
-                    continue
-                
-                # Spread = (sell_bid - buy_ask) / buy_ask * 100
-                # This is the REAL spread accounting for bid/ask
-                spread = ((sell_price - buy_price) / buy_price) * 100
-                
-                # Only include profitable paths (sell > buy) within limits
-                if spread > min_spread and spread <= max_spread:
-                    path = ExchangePath(
-                        symbol=self.symbol,
-                        buy_exchange=ex_a,
-                        sell_exchange=ex_b,
-                        buy_price=buy_price,
-                        sell_price=sell_price,
-                        spread_percentage=round(spread, 4),
-                        buy_market=data_a['market'],
-                        sell_market=data_b['market'],
-                        buy_volume=data_a['volume'],
-                        sell_volume=data_b['volume']
-                    )
-                    self.paths.append(path)
+        if len(exchange_list) < 2:
+            return self.paths
+        
+        nodes = [self.exchanges[ex] for ex in exchange_list]
+        # Row i = buy on exchange i (at ASK), column j = sell on exchange j (at BID)
+        asks = np.array([node['ask'] for node in nodes], dtype=np.float64)
+        bids = np.array([node['bid'] for node in nodes], dtype=np.float64)
+        
+        valid = (asks > 0)[:, None] & (bids > 0)[None, :]
+        np.fill_diagonal(valid, False)
+        
+        # Spread = (sell_bid - buy_ask) / buy_ask * 100
+        # This is the REAL spread accounting for bid/ask
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gross = (bids[None, :] - asks[:, None]) / asks[:, None] * 100
+        self.spread_matrix = gross
+        self.priced = valid
+        
+        # Only include profitable paths (sell > buy) within limits
+        mask = valid & (gross > min_spread) & (gross <= max_spread)
+        
+        if fee_table is not None:
+            leg_costs = fee_table.leg_costs(exchange_list)
+            costs = leg_costs[:, None] + leg_costs[None, :] + fee_table.transfer_cost
+            funding = np.array([node.get('funding', 0.0) for node in nodes], dtype=np.float64)
+            # Long on the buy venue pays its rate, short on the sell venue receives its rate
+            funding_edge = funding[None, :] - funding[:, None]
+            net = gross - costs + funding_edge
+            if min_net_spread is not None:
+                mask &= net >= min_net_spread
+        
+        for i, j in zip(*np.nonzero(mask)):
+            data_a = nodes[i]
+            data_b = nodes[j]
+            path = ExchangePath(
+                symbol=self.symbol,
+                buy_exchange=exchange_list[i],
+                sell_exchange=exchange_list[j],
+                buy_price=data_a['ask'],
+                sell_price=data_b['bid'],
+                spread_percentage=round(float(gross[i, j]), 4),
+                buy_market=data_a['market'],
+                sell_market=data_b['market'],
+                buy_volume=data_a['volume'],
+                sell_volume=data_b['volume']
+            )
+            if fee_table is not None:
+                path.net_spread = round(float(net[i, j]), 4)
+                path.fee_cost = round(float(costs[i, j]), 4)
+                path.funding_edge = round(float(funding_edge[i, j]), 4)
+            self.paths.append(path)
         
         return self.paths
 
 class FundingRateManager:
-    def __init__(self):
+    def __init__(self, collector=None):
         self.config = ConfigLoader()
         
+        # Optional CollectorClient - when set, data comes from the shared collector
+        # daemon instead of polling the exchanges from this process
+        self.collector = collector
+        self._collector_version = 0
+        
+        # Optional SnapshotRecorder - persists every polled snapshot for analysis/backtests
+        self.recorder = SnapshotRecorder.from_config(self.config)
+        
+        # Raw payload capture for replay (utils/replay.py)
+        if self.config.capture_path:
+            start_capture(self.config.capture_path)
+        
         # All 8 exchanges enabled (LBank disabled due to data quality)
         self.exchanges = {
             'Binance': BinanceExchange(),
@@ -131,6 +179,23 @@ class FundingRateManager:
         # Minimum 24h volume in USDT to include a token
         self.min_volume_usdt = 250000  # 50k USDT
         
+        # Depth-aware spreads: only the top candidates get L2 depth fetched
+        self.depth_levels = 20
+        self.depth_notional_usd = 50.0
+        self.depth_candidates = 10
+        # Local L2 books (WebSocket) for the legs of alerted spreads, read by
+        # confirmation and depth sizing before falling back to REST
+        self.live_books = LiveBooks(max_books=self.config.live_books)
+        
+        # Fee schedules for net-edge ranking (cached, reloaded hourly)
+        self.fee_table = FeeTable(self.config)
+        
+        # Two-leg confirmation: re-quote buy/sell venues before alerting;
+        # rejected paths are not re-quoted again for a few monitor cycles
+        self.confirm_timeout = 3.0
+        self.confirm_backoff_cycles = 5
+        self._confirm_backoff: Dict[str, int] = {}  # path_id -> spread-state cycle to retry from
+        
         # Exchanges that support margin trading (have margin API implemented)
         self.margin_exchanges = ['Binance', 'Bybit', 'BitGet']
 
@@ -141,6 +206,7 @@ class FundingRateManager:
 
         self.last_update = None
         self.last_margin_update = None
+        self.last_funding_update = None  # Last update that included funding rates
         self.update_interval = 0  # NO INTERVAL - always fetch fresh
         self.funding_data = {}
         self.margin_data = {}  # New: stores margin tokens and spot prices
@@ -150,25 +216,88 @@ class FundingRateManager:
         self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=32)
         self._fetch_lock = threading.Lock()
         
-        # Monitoring: Track known paths to detect new spreads
-        self.known_spread_paths: Set[str] = set()  # Set of path_ids we've seen
-        self.last_spreads: Dict[str, float] = {}  # path_id -> last spread percentage
+        # Snapshots: every completed update swaps in a new funding_data dict and
+        # bumps the version, so readers holding an older dict keep a consistent view
+        self.snapshot_version = 0
+        self._refresh_lock = asyncio.Lock()
+        self._spread_cache: Dict[Tuple, Tuple] = {}  # (mode, min, max) -> (version, margin_update, spreads)
+        self._funding_matrix: Optional[Tuple[int, FundingMatrix]] = None
+        
+        # Path sessions per spread mode, advanced once per computed snapshot:
+        # open time, peak and last seen per path, new/reappearing spread alerts
+        self.spread_states: Dict[str, SpreadStateStore] = {}
+        self.session_log = SessionLog.from_config(self.config)
+        self.closed_spreads: List[Dict] = []  # Close events from the last tracked cycle
+        self._new_spreads: Dict[str, Dict[str, Dict]] = {}  # mode -> path_id -> alert not yet taken by detect_new_spreads
+        
+        # Streaming EWMA/quantile history of every priced futures-futures path,
+        # advanced once per snapshot; spreads get zscore/spread_mean/spread_pNN
+        self.path_stats = PathStats(halflife=300, quantiles=(0.5, 0.9), min_count=30)
 
     def _get_current_time(self) -> datetime:
         return datetime.now(self.utc)
 
+    @property
+    def spread_state(self) -> SpreadStateStore:
+        """Path sessions of the monitored spread mode"""
+        return self._spread_state(self.config.spread_mode)
+
+    def _spread_state(self, mode: str) -> SpreadStateStore:
+        state = self.spread_states.get(mode)
+        if state is None:
+            # Path stats (and so z-scores) exist for futures-futures paths only
+            zscore = self.config.alert_zscore if mode == 'futures-futures' else 0
+            state = self.spread_states[mode] = SpreadStateStore(
+                ttl_seconds=self.config.spread_ttl_seconds,
+                close_after_cycles=self.config.spread_close_after_cycles,
+                open_zscore=zscore or None,
+            )
+        # min_spread can change at runtime (/setspread), so re-read the thresholds
+        state.open_threshold, state.close_threshold = self._session_thresholds()
+        return state
+    
+    def _session_thresholds(self) -> Tuple[float, float]:
+        """(open, close) spread % of path sessions: alerts need the open level,
+        paths stay open down to the close level (never above min_spread)"""
+        min_spread = self.config.min_spread
+        open_threshold = max(self.config.spread_open_threshold, min_spread)
+        close_threshold = self.config.spread_close_threshold or open_threshold / 2
+        return open_threshold, min(close_threshold, min_spread)
+
+    def _track_sessions(self, mode: str, spreads: List[Dict]):
+        """Advance the path sessions of `mode` by one cycle (annotates the spreads)"""
+        alerts, closed = self._spread_state(mode).update(spreads)
+        # Merge - snapshots computed outside the monitor (refresh buttons) must
+        # not drop alerts the monitoring loop has not taken yet
+        pending = self._new_spreads.setdefault(mode, {})
+        pending.update((spread_path_id(s), s) for s in alerts)
+        for event in closed:
+            pending.pop(event['path_id'], None)
+            self._confirm_backoff.pop(event['path_id'], None)
+        self.closed_spreads = closed
+        if self.session_log is not None:
+            self.session_log.append(closed)
+
     async def update_funding_data(self, prices_only: bool = False):
         """Fetch funding data from all exchanges EXTREMELY FAST with parallel execution
         
         Args:
             prices_only: If True, only fetch order books (for spread calculations)
         """
+        if self.collector is not None:
+            await self._update_from_collector()
+            return
+        
         current_time = self._get_current_time()
         
+        capture = get_capture()
+        if capture is not None:
+            capture.mark(f"update_funding_data prices_only={int(prices_only)}")
+        
         # NO INTERVAL CHECK - always fetch fresh data
         
-        # Initialize funding data dict first
-        self.funding_data = {}
+        # Build the new snapshot separately and swap it in when complete
+        funding_data = {}
         
         # Create all tasks for MAXIMUM parallel execution
         all_tasks = []
@@ -198,21 +327,35 @@ class FundingRateManager:
                 original_task = all_tasks[i] 
                 exchange_name, data_type = task_map[original_task]
                 
-                if exchange_name not in self.funding_data:
-                    self.funding_data[exchange_name] = {'funding_rates': {}, 'order_books': {}, 'volumes': {}}
+                if exchange_name not in funding_data:
+                    funding_data[exchange_name] = {'funding_rates': {}, 'order_books': {}, 'volumes': {}}
                 
                 if isinstance(res_or_exc, Exception):
                     logger.debug(f"{exchange_name} {data_type} failed: {str(res_or_exc)}")
                 elif res_or_exc:
                     if len(res_or_exc) > 0:
-                        self.funding_data[exchange_name][data_type] = res_or_exc
+                        funding_data[exchange_name][data_type] = res_or_exc
                 else:
                     logger.debug(f"{exchange_name} {data_type} returned empty result")
 
         except Exception as e:
             logger.error(f"Error updating funding data: {str(e)}", exc_info=True)
         finally:
+            if prices_only:
+                # Keep the last known funding rates on price-only refreshes
+                for ex_name, ex_data in funding_data.items():
+                    previous = self.funding_data.get(ex_name, {}).get('funding_rates')
+                    if previous and not ex_data['funding_rates']:
+                        ex_data['funding_rates'] = previous
+            else:
+                self.last_funding_update = current_time
+            
+            self.funding_data = funding_data
             self.last_update = current_time
+            self.snapshot_version += 1
+            
+            if self.recorder is not None:
+                self.recorder.record(funding_data, current_time.timestamp())
             
             # Create a clear status summary
             successful_exchanges = []
@@ -253,122 +396,95 @@ class FundingRateManager:
             
             logger.info(f"Update complete: {len(successful_exchanges)}/{len(self.exchanges)} exchanges operational")
 
-    async def get_funding_opportunities(self) -> List[Dict]:
-        """Get funding opportunities - PRIORITIZE BY HIGHEST RATE EXCHANGE FUNDING TIME"""
-        await self.update_funding_data()
+    def snapshot_age(self, need_funding: bool = False) -> float:
+        """Seconds since the last update (with funding rates if need_funding), None if never"""
+        reference = self.last_funding_update if need_funding else self.last_update
+        if reference is None:
+            return None
+        return (self._get_current_time() - reference).total_seconds()
+
+    async def refresh_snapshot(self, max_age: float = None, need_funding: bool = False):
+        """Update funding data unless the current snapshot is younger than max_age seconds
         
-        # Get exchanges that have BOTH funding rates AND order_books
-        working_exchanges = []
-        for ex_name, ex_data in self.funding_data.items():
-            if len(ex_data.get('funding_rates', {})) > 0 and len(ex_data.get('order_books', {})) > 0:
-                working_exchanges.append(ex_name)
+        Concurrent callers share one refresh: whoever waits on the lock reuses
+        the snapshot produced while it was waiting.
+        """
+        if max_age is not None:
+            age = self.snapshot_age(need_funding)
+            if age is not None and age <= max_age:
+                return
+        
+        requested_at = self._get_current_time()
+        async with self._refresh_lock:
+            reference = self.last_funding_update if need_funding else self.last_update
+            if reference is not None and reference >= requested_at:
+                return
+            await self.update_funding_data(prices_only=not need_funding)
+
+    async def refresh_margin(self, max_age: float = None):
+        """Update margin data unless it is younger than max_age seconds"""
+        if max_age is not None and self.last_margin_update is not None:
+            if (self._get_current_time() - self.last_margin_update).total_seconds() <= max_age:
+                return
+        await self.update_margin_data()
+
+    async def _update_from_collector(self):
+        """Load the latest snapshot from the collector daemon
         
-        logger.info(f"Working exchanges with complete data: {working_exchanges}")
+        If this process already consumed the current version, wait for the next
+        collection cycle instead of re-reading identical data.
+        """
+        try:
+            if self._collector_version:
+                await self.collector.wait_for_update(self._collector_version)
+            snapshot = await self.collector.fetch_snapshot()
+            self.funding_data = snapshot['funding_data']
+            self._collector_version = snapshot.get('version', 0)
+            self.last_update = datetime.fromtimestamp(snapshot.get('ts', 0), self.utc)
+            self.last_funding_update = self.last_update
+            self.snapshot_version += 1
+        except Exception as e:
+            logger.error(f"Error reading snapshot from collector: {str(e)}")
+
+    async def get_funding_opportunities(self, max_age: float = None) -> List[Dict]:
+        """Get funding opportunities - PRIORITIZE BY HIGHEST RATE EXCHANGE FUNDING TIME
         
-        if len(working_exchanges) < 2:
-            logger.error(f"Not enough exchanges with data: {working_exchanges}")
-            return []
-            
-        opportunities = []
+        Strategy: go SHORT on the exchange with the highest funding rate (receive)
+        and LONG on the one with the lowest (pay). Rates are normalized to
+        funding_horizon_hours so 1h/4h venues compare with 8h venues, and the
+        best pair per symbol is chosen by profit after round-trip fees.
         
-        # Get all symbols that exist on at least 2 exchanges
-        all_symbols = set()
-        for ex_name in working_exchanges:
-            rates = self.funding_data[ex_name].get('funding_rates', {})
-            all_symbols.update(rates.keys())
+        Args:
+            max_age: Reuse the current snapshot if it is at most this many seconds old
+        """
+        await self.refresh_snapshot(max_age, need_funding=True)
         
-        logger.info(f"Processing {len(all_symbols)} unique symbols across {len(working_exchanges)} exchanges")
+        matrix = self._get_funding_matrix()
+        logger.info(f"Working exchanges with complete data: {matrix.exchanges}")
         
-        # For each symbol, find the MAXIMUM arbitrage profit
-        for symbol in all_symbols:
-            symbol_rates = {}
-            symbol_order_books = {}
-            
-            # Collect funding rates and order books for this symbol from all exchanges
-            for ex_name in working_exchanges:
-                rates = self.funding_data[ex_name].get('funding_rates', {})
-                order_books = self.funding_data[ex_name].get('order_books', {})
-                volumes = self.funding_data[ex_name].get('volumes', {})
-                
-                if symbol in rates and symbol in order_books:
-                    # Smart volume filtering - only filter if we have actual volume data
-                    volume = volumes.get(symbol, float('inf'))  # Default to infinity if no volume data
-                    if volume >= self.min_volume_usdt or volume == float('inf'):
-                        symbol_rates[ex_name] = rates[symbol]
-                        symbol_order_books[ex_name] = order_books[symbol]
-            
-            # Need at least 2 exchanges for this symbol
-            if len(symbol_rates) < 2:
-                continue
-            
-            # Find the MAXIMUM arbitrage profit for this symbol
-            max_profit = 0
-            best_opportunity = None
-            
-            # Strategy: Go LONG on exchange with LOWEST funding rate (receive less negative funding)
-            #          Go SHORT on exchange with HIGHEST funding rate (receive more positive funding)
-            # Profit = (SHORT_exchange_funding) - (LONG_exchange_funding)
-            
-            exchange_names = list(symbol_rates.keys())
-            for i in range(len(exchange_names)):
-                for j in range(len(exchange_names)):
-                    if i == j:
-                        continue
-                    
-                    # Exchange i = SHORT position (receive funding)
-                    # Exchange j = LONG position (pay funding)
-                    ex_short = exchange_names[i]
-                    ex_long = exchange_names[j]
-                    
-                    rate_short = symbol_rates[ex_short].funding_rate  # We RECEIVE this
-                    rate_long = symbol_rates[ex_long].funding_rate    # We PAY this
-                    
-                    # Use bid/ask for accurate spread calculation:
-                    # SHORT on ex_short: we sell, so we hit the BID price
-                    # LONG on ex_long: we buy, so we hit the ASK price
-                    bid_short = symbol_order_books[ex_short]['bid']  # We sell at bid
-                    ask_long = symbol_order_books[ex_long]['ask']     # We buy at ask
-                    
-                    # Net profit = funding_received - funding_paid
-                    # For arbitrage, we want: rate_short - rate_long > 0
-                    # This means: rate_short > rate_long (short on high funding, long on low funding)
-                    profit = rate_short - rate_long
-                    
-                    # Only consider if profit is positive and meaningful
-                    if profit > max_profit and profit > 0.0001:  # 0.01% minimum
-                        max_profit = profit
-                        
-                        # Price spread using bid/ask: we buy at ask on ex_long, sell at bid on ex_short
-                        # Spread = (bid_short - ask_long) / ask_long * 100
-                        # Positive = profitable price spread, Negative = cost to enter
-                        price_spread = ((bid_short - ask_long) / ask_long) * 100
-                        
-                        # PRIORITIZE BY HIGHEST RATE EXCHANGE FUNDING TIME
-                        # Use the funding time from the exchange with the higher rate (SHORT position)
-                        priority_funding_time = symbol_rates[ex_short].next_funding_time
-                        
-                        best_opportunity = {
-                            'symbol': symbol,
-                            'funding_rate_high': round(rate_short * 100, 4),    # SHORT here (high funding)
-                            'funding_rate_low': round(rate_long * 100, 4),     # LONG here (low funding)
-                            'exchange_high': ex_short,  # SHORT position exchange
-                            'exchange_low': ex_long,    # LONG position exchange  
-                            'price_spread': round(price_spread, 4),
-                            'bid_price': bid_short,
-                            'ask_price': ask_long,
-                            'next_funding': priority_funding_time,  # Use highest rate exchange funding time
-                            'spread_magnitude': round(max_profit * 100, 4)  # For sorting
-                        }
-            
-            # Add the best opportunity for this symbol
-            if best_opportunity:
-                opportunities.append(best_opportunity)
-                logger.debug(f"Best opportunity for {symbol}: SHORT {best_opportunity['exchange_high']} ({best_opportunity['funding_rate_high']}%) - LONG {best_opportunity['exchange_low']} ({best_opportunity['funding_rate_low']}%) = {best_opportunity['spread_magnitude']}%")
+        if len(matrix.exchanges) < 2:
+            logger.error(f"Not enough exchanges with data: {matrix.exchanges}")
+            return []
         
-        logger.info(f"Found {len(opportunities)} funding opportunities")
+        logger.info(f"Processing {len(matrix.symbols)} unique symbols across {len(matrix.exchanges)} exchanges")
         
-        # Sort by profit magnitude (largest first)
-        return sorted(opportunities, key=lambda x: x['spread_magnitude'], reverse=True)
+        opportunities = matrix.rank(
+            leg_costs=self.fee_table.leg_costs(matrix.exchanges),
+            transfer_cost=self.fee_table.transfer_cost,
+            horizon_hours=self.config.funding_horizon_hours,
+        )
+        
+        logger.info(f"Found {len(opportunities)} funding opportunities")
+        return opportunities
+    
+    def _get_funding_matrix(self) -> FundingMatrix:
+        """Dense funding/bid/ask arrays for the current snapshot, built once per version"""
+        if self._funding_matrix is None or self._funding_matrix[0] != self.snapshot_version:
+            self._funding_matrix = (
+                self.snapshot_version,
+                FundingMatrix.from_funding_data(self.funding_data, self.min_volume_usdt),
+            )
+        return self._funding_matrix[1]
 
     async def get_price_spreads(self) -> List[Dict]:
         """Get price spreads between exchanges for spot arbitrage opportunities - USING BID/ASK"""
@@ -452,9 +568,9 @@ class FundingRateManager:
         # Sort by spread percentage (largest first)
         return sorted(spreads, key=lambda x: x['spread_percentage'], reverse=True)
 
-    async def get_next_funding_times(self) -> Dict[str, datetime]:
+    async def get_next_funding_times(self, max_age: float = None) -> Dict[str, datetime]:
         """Get next funding times from all exchanges"""
-        await self.update_funding_data()
+        await self.refresh_snapshot(max_age, need_funding=True)
         
         times = {}
         for exchange_name, data in self.funding_data.items():
@@ -468,6 +584,15 @@ class FundingRateManager:
 
     async def update_margin_data(self):
         """Fetch margin tokens and spot prices from all supported exchanges - NO INTERVAL CHECK"""
+        if self.collector is not None:
+            try:
+                snapshot = await self.collector.fetch_margin()
+                self.margin_data = snapshot['margin_data']
+                self.last_margin_update = datetime.fromtimestamp(snapshot.get('ts', 0), self.utc)
+            except Exception as e:
+                logger.error(f"Error reading margin data from collector: {str(e)}")
+            return
+        
         current_time = self._get_current_time()
         
         # NO INTERVAL CHECK - always fetch fresh data
@@ -525,7 +650,7 @@ class FundingRateManager:
             print(f"\n📊 MARGIN DATA: {', '.join(successful) if successful else 'None'}\n")
             logger.info(f"Margin update complete: {len(successful)}/{len(self.margin_exchanges)} exchanges")
 
-    async def get_margin_opportunities(self) -> List[Dict]:
+    async def get_margin_opportunities(self, max_age: float = None) -> List[Dict]:
         """
         Get futures-margin arbitrage opportunities (spot-futures spread).
         Strategy: For NEGATIVE funding rates:
@@ -535,8 +660,8 @@ class FundingRateManager:
         Returns grouped opportunities by token with all exchange combinations.
         Best margin exchange is the one with price spread closest to 0%.
         """
-        await self.update_funding_data()
-        await self.update_margin_data()
+        await self.refresh_snapshot(max_age, need_funding=True)
+        await self.refresh_margin(max_age)
         
         # Get all exchanges with complete futures data (using order_books now)
         futures_exchanges = []
@@ -712,7 +837,7 @@ class FundingRateManager:
         # Sort by funding profit (highest absolute negative rate first)
         return sorted(opportunities, key=lambda x: x['spread_magnitude'], reverse=True)
 
-    async def get_cross_market_spreads(self, mode: str = 'futures-futures') -> List[Dict]:
+    async def get_cross_market_spreads(self, mode: str = 'futures-futures', max_age: float = None) -> List[Dict]:
         """
         Get price spreads across different market types - OPTIMIZED FOR SPEED.
         Only fetches the data needed for the specific mode.
@@ -723,34 +848,51 @@ class FundingRateManager:
         - futures-margin: Same as margin-futures but reversed perspective
         
         Returns list of best spread opportunities.
+        If max_age is given, a snapshot at most that many seconds old is reused
+        and spreads already computed for it are returned without recomputing.
         """
         if mode == 'futures-futures':
             # SPEED OPTIMIZATION: Only fetch prices for futures-futures mode
-            await self.update_funding_data(prices_only=True)
+            await self.refresh_snapshot(max_age)
         else:
             # For margin modes, need both futures and margin data
             await asyncio.gather(
-                self.update_funding_data(prices_only=True),
-                self.update_margin_data()
+                self.refresh_snapshot(max_age),
+                self.refresh_margin(max_age)
             )
         
+        cache_key = (mode, self.config.min_spread, self.config.max_spread)
+        margin_update = None if mode == 'futures-futures' else self.last_margin_update
+        cached = self._spread_cache.get(cache_key)
+        if cached and cached[0] == self.snapshot_version and cached[1] == margin_update:
+            return cached[2]
+        
         if mode == 'futures-futures':
-            return await self._get_futures_futures_spreads()
+            spreads = await self._get_futures_futures_spreads()
         elif mode in ['margin-futures', 'futures-margin']:
-            return await self._get_margin_futures_spreads(mode)
+            spreads = await self._get_margin_futures_spreads(mode)
         else:
             return []
+        
+        # Spreads come down to the close threshold for session tracking only
+        self._track_sessions(mode, spreads)
+        min_spread = self.config.min_spread
+        spreads = [s for s in spreads if s['spread_percentage'] >= min_spread]
+        self._spread_cache[cache_key] = (self.snapshot_version, margin_update, spreads)
+        return spreads
     
     async def _get_futures_futures_spreads(self) -> List[Dict]:
         """
         Build complete bidirectional exchange-pair mapping for all symbols.
         Generates ALL possible directional arbitrage paths (A→B and B→A are distinct).
         Uses bid/ask prices for accurate spread calculation.
-        Returns all feasible arbitrage routes per symbol.
+        Returns all feasible arbitrage routes per symbol, down to the session
+        close threshold (get_cross_market_spreads applies min_spread).
         """
         # Get min/max spread limits from config
-        min_spread = self.config.min_spread
+        min_spread = self._session_thresholds()[1]
         max_spread = self.config.max_spread
+        min_net_spread = self.config.min_net_spread
         
         # Get exchanges that have order book data
         working_exchanges = []
@@ -783,6 +925,7 @@ class FundingRateManager:
             for ex_name in working_exchanges:
                 order_books = self.funding_data[ex_name].get('order_books', {})
                 volumes = self.funding_data[ex_name].get('volumes', {})
+                rates = self.funding_data[ex_name].get('funding_rates', {})
                 
                 if symbol in order_books:
                     ob = order_books[symbol]
@@ -795,7 +938,8 @@ class FundingRateManager:
                         # Only filter by volume if we have actual volume data
                         if volume < self.min_volume_usdt and volume != float('inf'):
                             continue
-                        graph.add_exchange(ex_name, bid, ask, volume, 'futures')
+                        funding = rates[symbol].funding_rate * 100 if symbol in rates else 0.0
+                        graph.add_exchange(ex_name, bid, ask, volume, 'futures', funding)
             
             # Only keep graphs with 2+ exchanges
             if len(graph.exchanges) >= 2:
@@ -814,22 +958,25 @@ class FundingRateManager:
         
         for symbol, graph in symbol_graphs.items():
             # Build all directional paths for this symbol
-            paths = graph.build_all_paths(min_spread, max_spread)
+            paths = graph.build_all_paths(min_spread, max_spread, self.fee_table, min_net_spread)
             all_paths.extend(paths)
             
+            if not paths:
+                continue
+            
+            # Build all_prices in consistent format with bid/ask (shared by the symbol's paths)
+            all_prices_formatted = {}
+            for ex_name, data in graph.exchanges.items():
+                all_prices_formatted[f"{ex_name}_{data['market']}"] = {
+                    'exchange': ex_name,
+                    'market': data['market'],
+                    'bid': data['bid'],
+                    'ask': data['ask'],
+                    'symbol': symbol
+                }
+            
             # Convert paths to spread format for compatibility
             for path in paths:
-                # Build all_prices in consistent format with bid/ask
-                all_prices_formatted = {}
-                for ex_name, data in graph.exchanges.items():
-                    all_prices_formatted[f"{ex_name}_{data['market']}"] = {
-                        'exchange': ex_name,
-                        'market': data['market'],
-                        'bid': data['bid'],
-                        'ask': data['ask'],
-                        'symbol': symbol
-                    }
-                
                 spreads.append({
                     'symbol': symbol,
                     'spread_percentage': path.spread_percentage,
@@ -847,11 +994,18 @@ class FundingRateManager:
                     'path_id': path.path_id,
                     'buy_volume': path.buy_volume,
                     'sell_volume': path.sell_volume,
+                    'net_spread': path.net_spread,
+                    'fee_cost': path.fee_cost,
+                    'funding_edge': path.funding_edge,
                     # Include full graph data for analysis
                     'all_exchanges': list(graph.exchanges.keys()),
                     'all_paths_count': len(paths)
                 })
         
+        # Path history covers every priced pair, not only those within the limits
+        self._update_path_stats(symbol_graphs)
+        self.path_stats.annotate(spreads)
+        
         print(f"   Total profitable paths found: {len(all_paths)}")
         print(f"   Spreads within limits ({min_spread}% - {max_spread}%): {len(spreads)}")
         
@@ -859,35 +1013,188 @@ class FundingRateManager:
         self._symbol_graphs = symbol_graphs
         
         logger.info(f"Found {len(spreads)} futures-futures spread paths")
-        return sorted(spreads, key=lambda x: x['spread_percentage'], reverse=True)
+        return sorted(spreads, key=lambda x: x['net_spread'], reverse=True)
+    
+    def _update_path_stats(self, symbol_graphs: Dict[str, SymbolExchangeGraph]):
+        """Feed the gross spread of every priced (symbol, buy, sell) pair to path_stats in one batch"""
+        slots, values = [], []
+        for symbol, graph in symbol_graphs.items():
+            if graph.spread_matrix is None:
+                continue
+            slot_matrix = self.path_stats.slots(symbol, list(graph.exchanges))
+            slots.append(slot_matrix[graph.priced])
+            values.append(graph.spread_matrix[graph.priced])
+        if slots:
+            self.path_stats.update(np.concatenate(slots), np.concatenate(values))
     
     def detect_new_spreads(self, spreads: List[Dict]) -> List[Dict]:
         """
-        Compare current spreads against known spreads to detect new opportunities.
-        Returns list of newly appearing spreads.
+        Return the spreads (out of `spreads`) that opened a path session in the
+        last computed cycle, including paths that closed and reappeared, or grew
+        50%+ above their last alerted level. With alert_zscore set in config,
+        futures-futures alerts also need a z-score of at least that much against
+        the path's own history (path_stats). Sessions advance once per snapshot
+        in get_cross_market_spreads and alerts stay pending per path_id until
+        a detect_new_spreads call with that path takes them, so each alert is
+        returned only once whichever snapshot computed it.
+        Paths that disappeared are reported in self.closed_spreads.
         """
         new_spreads = []
-        
         for spread in spreads:
-            path_id = spread.get('path_id')
-            if not path_id:
-                # Generate path_id for legacy format
-                path_id = f"{spread['symbol']}:{spread['lowest_exchange']}_futures->{spread['highest_exchange']}_futures"
-            
-            # Check if this is a new path we haven't seen
-            if path_id not in self.known_spread_paths:
+            path_id = spread_path_id(spread)
+            for pending in self._new_spreads.values():
+                alert = pending.pop(path_id, None)
+                if alert is None:
+                    continue
+                if alert is not spread and 'spread_increase' in alert:
+                    # Keep the increase relative to the old baseline (see revert_alert)
+                    baseline = alert['spread_percentage'] - alert['spread_increase']
+                    spread = dict(spread, spread_increase=spread['spread_percentage'] - baseline)
                 new_spreads.append(spread)
-                self.known_spread_paths.add(path_id)
-                self.last_spreads[path_id] = spread['spread_percentage']
+                break
+        return new_spreads
+    
+    async def confirm_spreads(self, spreads: List[Dict]) -> List[Dict]:
+        """
+        Re-check flagged futures spreads against fresh quotes from just their buy
+        and sell venues (one parallel request per venue) before alerting.
+        Spreads that still clear min_spread get buy_ask/sell_bid/spread_percentage
+        refreshed ('detected_spread' keeps the bulk value). Spreads that vanished
+        or could not be re-quoted are dropped and their paths re-armed, and are
+        dropped without re-quoting for confirm_backoff_cycles cycles after that.
+        Spreads with a leg on an exchange without single-symbol quotes are
+        dropped, or returned with unconfirmable=True when alert_unconfirmable
+        is set in config. Non futures-futures spreads are returned unchanged.
+        """
+        candidates = []
+        backed_off = set()
+        unconfirmable = {}
+        for spread in spreads:
+            if spread.get('lowest_market', 'futures') != 'futures' or spread.get('highest_market', 'futures') != 'futures':
+                continue
+            path_id = spread_path_id(spread)
+            retry_at = self._confirm_backoff.get(path_id)
+            if retry_at is not None:
+                if self._spread_state(spread.get('mode', 'futures-futures')).cycle < retry_at:
+                    backed_off.add(id(spread))  # Rejected below without quotes
+                else:
+                    del self._confirm_backoff[path_id]
+            if id(spread) in backed_off or all(
+                    name in self.exchanges and self.exchanges[name].supports_book_ticker
+                    for name in (spread['lowest_exchange'], spread['highest_exchange'])):
+                candidates.append(spread)
             else:
-                # Check if spread has significantly increased (optional: alert on large changes)
-                last_spread = self.last_spreads.get(path_id, 0)
-                if spread['spread_percentage'] > last_spread * 1.5:  # 50% increase
-                    spread['spread_increase'] = spread['spread_percentage'] - last_spread
-                    new_spreads.append(spread)
-                self.last_spreads[path_id] = spread['spread_percentage']
+                unconfirmable[id(spread)] = dict(spread, unconfirmable=True)
+        if unconfirmable and not self.config.alert_unconfirmable:
+            # Held: the path stays alerted, so it does not come back every cycle
+            logger.info(f"Confirmation dropped {len(unconfirmable)} spreads on venues without single-symbol quotes")
+            spreads = [s for s in spreads if id(s) not in unconfirmable]
+            unconfirmable = {}
+        if not candidates:
+            return [unconfirmable.get(id(s), s) for s in spreads]
+        
+        wanted: Dict[str, Set[str]] = {}
+        for spread in candidates:
+            if id(spread) in backed_off:
+                continue
+            wanted.setdefault(spread['lowest_exchange'], set()).add(spread['symbol'])
+            wanted.setdefault(spread['highest_exchange'], set()).add(spread['symbol'])
+        
+        quotes = {}
+        for name, symbols in list(wanted.items()):
+            for symbol in list(symbols):
+                book = self.live_books.book_ticker(name, symbol)
+                if book is not None:
+                    quotes[(name, symbol)] = book
+                    symbols.discard(symbol)
+            if not symbols:
+                del wanted[name]
+        
+        names = list(wanted)
+        results = await asyncio.gather(*[
+            asyncio.wait_for(self.exchanges[name].fetch_book_tickers(sorted(wanted[name])), self.confirm_timeout)
+            for name in names
+        ], return_exceptions=True)
+        
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.debug(f"Confirmation quotes failed for {name}: {str(result)}")
+                continue
+            for symbol, book in result.items():
+                quotes[(name, symbol)] = book
         
-        return new_spreads
+        min_spread = self.config.min_spread
+        max_spread = self.config.max_spread
+        confirmed = {}
+        for spread in candidates:
+            buy = quotes.get((spread['lowest_exchange'], spread['symbol']))
+            sell = quotes.get((spread['highest_exchange'], spread['symbol']))
+            if buy and sell and buy.get('ask', 0) > 0 and sell.get('bid', 0) > 0:
+                fresh = (sell['bid'] - buy['ask']) / buy['ask'] * 100
+                if min_spread <= fresh <= max_spread:
+                    # Copy - the original dict may be shared with the spread cache
+                    confirmed[id(spread)] = dict(
+                        spread,
+                        detected_spread=spread['spread_percentage'],
+                        spread_percentage=round(fresh, 4),
+                        buy_ask=buy['ask'],
+                        sell_bid=sell['bid'],
+                        confirmed=True,
+                    )
+                    if spread.get('net_spread') is not None:
+                        confirmed[id(spread)]['net_spread'] = round(fresh - spread['fee_cost'] + spread['funding_edge'], 4)
+                    continue
+            state = self._spread_state(spread.get('mode', 'futures-futures'))
+            state.revert_alert(spread)
+            if id(spread) not in backed_off:
+                self._confirm_backoff[spread_path_id(spread)] = state.cycle + self.confirm_backoff_cycles
+        
+        rejected = len(candidates) - len(confirmed)
+        if rejected:
+            logger.info(f"Confirmation rejected {rejected}/{len(candidates)} flagged spreads "
+                        f"({len(backed_off)} backing off)")
+        candidate_ids = {id(s) for s in candidates}
+        return [confirmed.get(id(s)) or unconfirmable.get(id(s), s) for s in spreads
+                if id(s) not in candidate_ids or id(s) in confirmed]
+    
+    async def evaluate_executable_spreads(self, spreads: List[Dict], notional: float = None) -> List[Dict]:
+        """
+        Fetch L2 depth for the top candidates (by spread) and add executable
+        spread fields (exec_spread, exec_buy_vwap, exec_max_notional, ...) in place.
+        Only futures legs on exchanges with fetch_depth are evaluated, each
+        request bounded by confirm_timeout; other spreads are returned unchanged.
+        Evaluated legs are streamed into live_books, which later confirmation
+        and depth reads use instead of REST.
+        """
+        notional = notional or self.depth_notional_usd
+        candidates = [
+            s for s in spreads
+            if s.get('lowest_market', 'futures') == 'futures' and s.get('highest_market', 'futures') == 'futures'
+            and all(name in self.exchanges and self.exchanges[name].supports_depth
+                    for name in (s['lowest_exchange'], s['highest_exchange']))
+        ]
+        candidates = sorted(candidates, key=lambda s: s['spread_percentage'], reverse=True)[:self.depth_candidates]
+        if not candidates:
+            return spreads
+        
+        requests = []
+        for spread in candidates:
+            requests.append((spread['lowest_exchange'], spread['symbol']))
+            requests.append((spread['highest_exchange'], spread['symbol']))
+        books = await fetch_depths(self.exchanges, requests, self.depth_levels,
+                                   timeout=self.confirm_timeout, live_books=self.live_books)
+        # Stream these legs from now on, the next alerts on them need no REST
+        for name, symbol in requests:
+            self.live_books.track(name, symbol)
+        
+        for spread in candidates:
+            buy_book = books.get((spread['lowest_exchange'], spread['symbol']))
+            sell_book = books.get((spread['highest_exchange'], spread['symbol']))
+            result = calculate_executable_spread(buy_book, sell_book, notional, self.config.min_spread)
+            if result is not None:
+                spread.update(result.to_dict())
+        
+        return spreads
     
     def get_exchange_pair_summary(self) -> Dict:
         """
@@ -917,10 +1224,11 @@ class FundingRateManager:
         """
         Get price spreads between margin (spot) and futures markets.
         Compares all combinations of margin exchanges with futures exchanges.
-        Uses order book data (bid/ask) for futures.
+        Uses order book data (bid/ask) for futures. Like the futures-futures
+        spreads these go down to the session close threshold.
         """
         # Get min/max spread limits from config
-        min_spread = self.config.min_spread
+        min_spread = self._session_thresholds()[1]
         max_spread = self.config.max_spread
         
         # Get futures exchanges with order book data
@@ -4,9 +4,10 @@ import hashlib
 import logging
 import asyncio
 import aiohttp
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timedelta
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
+from utils.capture import get_replay
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -37,11 +38,17 @@ class GateioExchange(BaseExchange):
             'Accept-Encoding': 'gzip, deflate'
         }
         
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+        
         await self._init_session()
         
+        captured = False
         try:
             # NO TIMEOUT - let it take as long as it needs
             async with self.session.request("GET", url, params=params, headers=headers) as response:
+                captured = await self._capture_response("GET", url, params, response)
                 if response.status == 200:
                     result = await response.json()
                     return result if result is not None else {}
@@ -51,6 +58,8 @@ class GateioExchange(BaseExchange):
                     return {}
         except Exception as e:
             logger.debug(f"Gate.io: Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure("GET", url, params)
             return {}
     
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
@@ -159,7 +168,8 @@ class GateioExchange(BaseExchange):
         return result
 
     async def fetch_order_book(self) -> Dict[str, Dict[str, float]]:
-        """Fetch best bid/ask prices using tickers endpoint"""
+        """Fetch best bid/ask prices using tickers endpoint, with sizes converted
+        from contracts to base asset where quanto_multiplier is known"""
         endpoint = "/api/v4/futures/usdt/tickers"
         response = await self._make_gateio_request(endpoint)
         
@@ -179,6 +189,11 @@ class GateioExchange(BaseExchange):
                     
                     if bid_price > 0 and ask_price > 0:
                         result[symbol] = {'bid': bid_price, 'ask': ask_price}
+                        contract_size = await self._contract_size(gate_symbol)
+                        if contract_size > 0:
+                            # highest_size/lowest_size: contracts at the best bid/ask
+                            result[symbol]['bid_qty'] = float(item.get('highest_size', 0) or 0) * contract_size
+                            result[symbol]['ask_qty'] = float(item.get('lowest_size', 0) or 0) * contract_size
                 except Exception as e:
                     logger.debug(f"Gate.io: Error processing order book item: {str(e)}")
                     continue
@@ -186,6 +201,43 @@ class GateioExchange(BaseExchange):
         logger.info(f"Gate.io: Successfully fetched {len(result)} order books")
         return result
     
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch quanto_multiplier (base units per contract) for all USDT futures"""
+        response = await self._make_gateio_request("/api/v4/futures/usdt/contracts")
+        
+        sizes = {}
+        for item in response if isinstance(response, list) else []:
+            try:
+                if item.get('name') and item.get('quanto_multiplier'):
+                    sizes[item['name']] = float(item['quanto_multiplier'])
+            except (TypeError, ValueError):
+                continue
+        return sizes
+
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /futures/usdt/order_book (converted from contracts)"""
+        contract = symbol if '_' in symbol else f"{symbol[:-4]}_USDT"
+        contract_size = await self._contract_size(contract)
+        if contract_size <= 0:
+            return None
+        
+        endpoint = "/api/v4/futures/usdt/order_book"
+        response = await self._make_gateio_request(endpoint, params={"contract": contract, "limit": min(limit, 100)})
+        
+        if not isinstance(response, dict) or 'bids' not in response:
+            logger.debug(f"Gate.io: No depth for {contract}")
+            return None
+        
+        # Levels are objects: {"p": price, "s": size}
+        bids = [[level.get('p'), level.get('s')] for level in response.get('bids', [])]
+        asks = [[level.get('p'), level.get('s')] for level in response.get('asks', [])]
+        return DepthBook(
+            symbol=self._normalize_symbol(contract),
+            bids=self._parse_depth_levels(bids, contract_size)[:limit],
+            asks=self._parse_depth_levels(asks, contract_size)[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         """Get next funding time - 8-hour cycle"""
         now = self._get_current_time()
@@ -269,7 +321,7 @@ class GateioExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps_seconds()
@@ -285,36 +337,24 @@ class GateioExchange(BaseExchange):
         
         endpoint = "/api/v4/futures/usdt/candlesticks"
         
-        all_klines = []
-        current_end = end_time
         max_limit = 2000
         
-        # Calculate interval in seconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_seconds = interval_minutes * 60
-        
-        # Work backwards to get all data
-        while current_end > start_time:
-            # Calculate how far back to request (max 2000 candles)
-            chunk_start = max(start_time, current_end - (max_limit * interval_seconds))
-            
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'contract': symbol,
                 'interval': gateio_interval,
-                'from': chunk_start,
-                'to': current_end
+                'from': window_start,
+                'to': window_end
             }
-            
             response = await self._make_gateio_request(endpoint, params=params)
+            if not isinstance(response, list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if not isinstance(response, list) or len(response) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response:
                 try:
                     # Gate.io returns: {t, v, c, h, l, o, sum}
-                    batch_klines.append({
+                    klines.append({
                         'time': float(kline['t']),  # Already in seconds
                         'open': float(kline['o']),
                         'high': float(kline['h']),
@@ -325,26 +365,11 @@ class GateioExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Gate.io: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Prepend to maintain order (oldest first)
-            all_klines = batch_klines + all_klines
-            
-            # If we got less than max, we have all the data
-            if len(response) < max_limit:
-                break
-            
-            # Move backwards - set end to before the earliest kline we received
-            earliest_time = min(float(k['t']) for k in response)
-            current_end = int(earliest_time) - 1
-        
-        # Sort by time ascending and remove duplicates
-        all_klines.sort(key=lambda x: x['time'])
-        seen = set()
-        unique_klines = []
-        for k in all_klines:
-            if k['time'] not in seen:
-                seen.add(k['time'])
-                unique_klines.append(k)
+            return klines
+        
+        # Windows of at most 2000 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit, milliseconds=False)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'gateio')
         
         logger.info(f"Gate.io Futures: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
@@ -364,7 +389,7 @@ class GateioExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps_seconds()
@@ -380,33 +405,28 @@ class GateioExchange(BaseExchange):
         
         endpoint = "/api/v4/spot/candlesticks"
         
-        all_klines = []
-        current_end = end_time
         max_limit = 1000  # Gate.io spot max is 1000
         
-        # Work backwards using 'to' and 'limit' (NOT 'from')
-        while current_end > start_time:
-            # Gate.io spot: "limit conflicts with from and to"
-            # So we use 'to' and 'limit' only
+        # Gate.io spot: "limit conflicts with from and to", so each window is
+        # requested as the `limit` candles up to its end
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'currency_pair': symbol,
                 'interval': gateio_interval,
-                'to': current_end,
+                'to': window_end,
                 'limit': max_limit
             }
-            
             response = await self._make_gateio_request(endpoint, params=params)
+            if not isinstance(response, list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if not isinstance(response, list) or len(response) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response:
                 try:
                     kline_time = float(kline[0])
-                    # Only include klines within our time range
-                    if kline_time >= start_time:
-                        batch_klines.append({
+                    # Only include klines within this window
+                    if window_start <= kline_time <= window_end:
+                        klines.append({
                             'time': kline_time,  # Already in seconds
                             'open': float(kline[5]),
                             'high': float(kline[3]),
@@ -417,26 +437,10 @@ class GateioExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"Gate.io: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines.extend(batch_klines)
-            
-            if len(response) < max_limit:
-                break
-            
-            # Move backwards - use the earliest timestamp from response minus 1 second
-            earliest_time = min(float(k[0]) for k in response)
-            if earliest_time <= start_time:
-                break
-            current_end = int(earliest_time) - 1
-        
-        # Sort and remove duplicates
-        all_klines.sort(key=lambda x: x['time'])
-        seen = set()
-        unique_klines = []
-        for k in all_klines:
-            if k['time'] not in seen:
-                seen.add(k['time'])
-                unique_klines.append(k)
+            return klines
+        
+        windows = kline_windows(start_time, end_time, interval, max_limit, milliseconds=False)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'gateio')
         
         logger.info(f"Gate.io Spot: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
@@ -3,9 +3,10 @@ import time
 import hmac
 import hashlib
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timedelta
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
+from utils.capture import get_replay
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -35,10 +36,16 @@ class HTXExchange(BaseExchange):
             'Content-Type': 'application/json'
         }
         
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+        
         await self._init_session()
         
+        captured = False
         try:
             async with self.session.request("GET", url, params=params, headers=headers) as response:
+                captured = await self._capture_response("GET", url, params, response)
                 if response.status == 200:
                     # HTX returns text/plain but it's actually JSON
                     text = await response.text()
@@ -55,6 +62,8 @@ class HTXExchange(BaseExchange):
                     return {}
         except Exception as e:
             logger.debug(f"HTX: Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure("GET", url, params)
             return {}
     
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
@@ -189,6 +198,43 @@ class HTXExchange(BaseExchange):
         logger.info(f"HTX: Successfully fetched {len(result)} order books")
         return result
     
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch contract_size (base units per contract) for all linear swaps"""
+        response = await self._make_htx_request("/linear-swap-api/v1/swap_contract_info")
+        
+        sizes = {}
+        for item in response.get('data', []) if isinstance(response, dict) else []:
+            try:
+                if item.get('contract_code') and item.get('contract_size'):
+                    sizes[item['contract_code']] = float(item['contract_size'])
+            except (TypeError, ValueError):
+                continue
+        return sizes
+
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /linear-swap-ex/market/depth (converted from contracts)"""
+        contract_code = symbol if '-' in symbol else f"{symbol[:-4]}-USDT"
+        contract_size = await self._contract_size(contract_code)
+        if contract_size <= 0:
+            return None
+        
+        endpoint = "/linear-swap-ex/market/depth"
+        # step6 = top 20 levels, step0 = top 150 levels (no aggregation)
+        params = {"contract_code": contract_code, "type": "step6" if limit <= 20 else "step0"}
+        response = await self._make_htx_request(endpoint, params=params)
+        
+        tick = response.get('tick') if isinstance(response, dict) else None
+        if not tick or 'bids' not in tick:
+            logger.debug(f"HTX: No depth for {contract_code}")
+            return None
+        
+        return DepthBook(
+            symbol=self._normalize_symbol(contract_code),
+            bids=self._parse_depth_levels(tick.get('bids'), contract_size)[:limit],
+            asks=self._parse_depth_levels(tick.get('asks'), contract_size)[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         now = self._get_current_time()
         next_hour = ((now.hour // 8) + 1) * 8
@@ -299,7 +345,7 @@ class HTXExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps_seconds()
@@ -316,34 +362,21 @@ class HTXExchange(BaseExchange):
         
         endpoint = "/linear-swap-ex/market/history/kline"
         
-        all_klines = []
         max_size = 2000
+        # HTX futures accepts from/to ranges of about one day of candles
+        page_limit = 1440
         
-        # Calculate interval in seconds
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_seconds = interval_minutes * 60
-        
-        # Start by getting most recent data, then paginate backwards
-        current_to = end_time
-        
-        while current_to > start_time:
-            # HTX: use 'to' and 'size' to get data ending at current_to
-            # Unfortunately HTX doesn't support 'to' alone, so we use a short from/to range
-            # Use a range of ~1 day which is within HTX's limits
-            range_seconds = min(1440 * interval_seconds, current_to - start_time)  # Max ~1 day of candles
-            current_from = max(start_time, current_to - range_seconds)
-            
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'contract_code': symbol,
                 'period': htx_interval,
-                'from': current_from,
-                'to': current_to
+                'from': window_start,
+                'to': window_end
             }
-            
             response = await self._make_htx_request(endpoint, params=params)
             
             if not isinstance(response, dict) or response.get('status') != 'ok' or 'data' not in response:
-                # If from/to fails, try using size parameter alone
+                # If from/to fails, try using size parameter alone (most recent candles)
                 params = {
                     'contract_code': symbol,
                     'period': htx_interval,
@@ -351,17 +384,14 @@ class HTXExchange(BaseExchange):
                 }
                 response = await self._make_htx_request(endpoint, params=params)
                 if not isinstance(response, dict) or response.get('status') != 'ok' or 'data' not in response:
-                    break
-            
-            data = response['data']
-            if len(data) == 0:
-                break
+                    return None  # Request failed, retried by fetch_kline_windows
             
-            for kline in data:
+            klines = []
+            for kline in response['data']:
                 try:
                     kline_time = float(kline['id'])
-                    if start_time <= kline_time <= end_time:
-                        all_klines.append({
+                    if window_start <= kline_time <= window_end:
+                        klines.append({
                             'time': kline_time,  # Already in seconds
                             'open': float(kline['open']),
                             'high': float(kline['high']),
@@ -372,33 +402,10 @@ class HTXExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"HTX: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Move backwards
-            earliest_time = min(float(k['id']) for k in data)
-            if earliest_time <= start_time:
-                break
-            current_to = int(earliest_time) - 1
-        
-        # Sort by time ascending and remove duplicates
-        all_klines.sort(key=lambda x: x['time'])
-        seen = set()
-        unique_klines = []
-        for k in all_klines:
-            if k['time'] not in seen:
-                seen.add(k['time'])
-                unique_klines.append(k)
+            return klines
         
-        logger.info(f"HTX Futures: Fetched {len(unique_klines)} klines for {symbol}")
-        return unique_klines
-        
-        # Sort by time ascending and remove duplicates
-        all_klines.sort(key=lambda x: x['time'])
-        seen = set()
-        unique_klines = []
-        for k in all_klines:
-            if k['time'] not in seen:
-                seen.add(k['time'])
-                unique_klines.append(k)
+        windows = kline_windows(start_time, end_time, interval, page_limit, milliseconds=False)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'htx')
         
         logger.info(f"HTX Futures: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
@@ -0,0 +1,253 @@
+"""
+Persistent kline cache with incremental tail fetching
+
+Candles are stored in SQLite keyed by (exchange, market, symbol, interval, time)
+together with the time range each series has been fetched for. A request for
+a window that is already covered is served from disk; otherwise only the
+missing head and the tail since the last fetch are requested from the
+exchange. The last cached candle is always refetched because it may have
+been stored while still open.
+
+get_arrays() serves every interval up to 1d from one cached base series
+(the venue's finest native interval, usually 1m) by resampling locally; long
+ranges may be capped to a coarser base (max_base_candles).
+
+Times are in seconds throughout; KLINE_TIME_UNITS lists the adapters whose
+get_klines_futures/get_klines_spot take milliseconds.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .kline_engine import FIELDS, klines_to_arrays, resample
+from .klines_mixin import INTERVAL_MINUTES, IncompleteKlines, resample_base_interval
+
+logger = logging.getLogger(__name__)
+
+# (exchange, market) -> unit of the start_time/end_time arguments of the adapter
+KLINE_TIME_UNITS = {
+    ('binance', 'futures'): 'ms', ('binance', 'spot'): 'ms',
+    ('bitget', 'futures'): 'ms', ('bitget', 'spot'): 'ms',
+    ('bybit', 'futures'): 'ms', ('bybit', 'spot'): 'ms',
+    ('gateio', 'futures'): 's', ('gateio', 'spot'): 's',
+    ('htx', 'futures'): 's', ('htx', 'spot'): 's',
+    ('kucoin', 'futures'): 'ms', ('kucoin', 'spot'): 's',
+    ('mexc', 'futures'): 's', ('mexc', 'spot'): 'ms',
+    ('okx', 'futures'): 'ms', ('okx', 'spot'): 'ms',
+}
+
+# Venues whose kline endpoint only returns the most recent candles (no time range),
+# so a fine base interval would not reach back far enough to resample from
+UNPAGED_KLINES = {('htx', 'spot')}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS klines (
+    exchange TEXT NOT NULL,
+    market TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    time INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (exchange, market, symbol, interval, time)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    exchange TEXT NOT NULL,
+    market TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (exchange, market, symbol, interval)
+) WITHOUT ROWID;
+"""
+
+
+class KlineCache:
+    """SQLite-backed kline store shared by all chart requests of a process
+
+    Args:
+        path: database file (directories are created)
+        retention_days: candles older than this are pruned when a series is written
+    """
+
+    def __init__(self, path: str, retention_days: float = 30.0):
+        self.path = path
+        self.retention_days = retention_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ── Storage ──────────────────────────────────────────────────────
+
+    def coverage(self, key: Tuple[str, str, str, str]) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start, end FROM coverage WHERE exchange=? AND market=? AND symbol=? AND interval=?", key
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def read(self, key: Tuple[str, str, str, str], start: int, end: int) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT time, open, high, low, close, volume FROM klines "
+                "WHERE exchange=? AND market=? AND symbol=? AND interval=? AND time BETWEEN ? AND ? ORDER BY time",
+                (*key, start, end),
+            ).fetchall()
+        return [
+            {'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in rows
+        ]
+
+    def read_arrays(self, key: Tuple[str, str, str, str], start: int, end: int) -> Dict[str, np.ndarray]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT time, open, high, low, close, volume FROM klines "
+                "WHERE exchange=? AND market=? AND symbol=? AND interval=? AND time BETWEEN ? AND ? ORDER BY time",
+                (*key, start, end),
+            ).fetchall()
+        values = np.array(rows, dtype=np.float64).reshape(-1, len(FIELDS))
+        return {field: values[:, i] for i, field in enumerate(FIELDS)}
+
+    def write(self, key: Tuple[str, str, str, str], klines: List[Dict],
+              start: Optional[int] = None, end: Optional[int] = None):
+        """Upsert candles and record [start, end] as fetched (merged with touching existing coverage).
+        Without a range only the candles are stored and coverage is left unchanged."""
+        rows = [
+            (*key, int(k['time']), k['open'], k['high'], k['low'], k['close'], k.get('volume', 0.0))
+            for k in klines
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO klines VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            if start is None:
+                return
+            row = self._conn.execute(
+                "SELECT start, end FROM coverage WHERE exchange=? AND market=? AND symbol=? AND interval=?", key
+            ).fetchone()
+            # Overlapping or adjacent ranges (e.g. an older chunk ending just before the cached one)
+            if row and row[0] <= end + 1 and start <= row[1] + 1:
+                start, end = min(start, row[0]), max(end, row[1])
+            if self.retention_days:
+                cutoff = int(time.time() - self.retention_days * 86400)
+                self._conn.execute(
+                    "DELETE FROM klines WHERE exchange=? AND market=? AND symbol=? AND interval=? AND time < ?",
+                    (*key, cutoff),
+                )
+                start = max(start, cutoff)
+            self._conn.execute("INSERT OR REPLACE INTO coverage VALUES (?, ?, ?, ?, ?, ?)", (*key, start, end))
+
+    # ── Fetching ─────────────────────────────────────────────────────
+
+    async def _fetch(self, ex, exchange: str, market: str, symbol: str, interval: str,
+                     start: int, end: int) -> Tuple[List[Dict], bool]:
+        """Candles of [start, end] and whether every page of the range was fetched"""
+        scale = 1000 if KLINE_TIME_UNITS.get((exchange, market), 'ms') == 'ms' else 1
+        try:
+            if market == 'futures':
+                klines = await ex.get_klines_futures(symbol, interval, start * scale, end * scale)
+            else:
+                klines = await ex.get_klines_spot(symbol, interval, start * scale, end * scale)
+        except IncompleteKlines as e:
+            return e.klines, False
+        return klines or [], True
+
+    async def ensure(self, ex, exchange: str, market: str, symbol: str, interval: str,
+                     start: int, end: int) -> bool:
+        """Fetch whatever part of [start, end] is not cached yet. Returns False if nothing is available.
+
+        Coverage only grows over the candles that came back, so an empty or short
+        page, or a fetch with failed pages, leaves its gap uncovered and it is
+        requested again next time.
+        """
+        key = (exchange, market, symbol, interval)
+        period = INTERVAL_MINUTES.get(interval, 60) * 60
+
+        covered = self.coverage(key)
+        if covered is None or covered[1] < start or covered[0] > end:
+            missing = [(start, end)]
+        else:
+            missing = []
+            if start < covered[0]:
+                missing.append((start, covered[0]))
+            if end > covered[1]:
+                # From the last stored candle, which may have been stored while still open
+                missing.append((max(start, covered[1] - covered[1] % period), end))
+
+        for gap_start, gap_end in missing:
+            klines, complete = await self._fetch(ex, exchange, market, symbol, interval, gap_start, gap_end)
+            if not klines:
+                continue  # Nothing came back; leave the gap uncovered so it is fetched again
+            if not complete:
+                # Some pages failed: keep the candles but not the range, so the gap is retried
+                self.write(key, klines)
+                continue
+            covered_start, covered_end = self._returned_range(klines, gap_start, gap_end, period)
+            if covered_start <= covered_end:
+                self.write(key, klines, covered_start, covered_end)
+
+        if missing:
+            logger.info(f"Kline cache: {exchange} {market} {symbol} {interval} fetched {len(missing)} range(s)")
+        return self.coverage(key) is not None
+
+    @staticmethod
+    def _returned_range(klines: List[Dict], gap_start: int, gap_end: int, period: int) -> Tuple[int, int]:
+        """Part of [gap_start, gap_end] the candles actually cover, snapped to the period:
+        an edge counts as covered only if the nearest candle is within one period of it"""
+        times = [int(k['time']) for k in klines]
+        first, last = min(times), max(times)
+        covered_start = gap_start if first - gap_start < period else first
+        covered_end = gap_end if gap_end - last < period else last + period - 1
+        return max(gap_start, covered_start), min(gap_end, covered_end)
+
+    async def get_klines(self, ex, exchange: str, market: str, symbol: str, interval: str,
+                         start: int, end: Optional[int] = None) -> List[Dict]:
+        """Candles of [start, end] (seconds, end defaults to now), fetching only what is not cached
+
+        Args:
+            ex: exchange adapter instance used for missing ranges
+            exchange: chart exchange key (e.g. 'binance'), market: 'futures' or 'spot'
+        """
+        end = int(time.time()) if end is None else int(end)
+        start = int(start)
+        if not await self.ensure(ex, exchange, market, symbol, interval, start, end):
+            return []
+        return self.read((exchange, market, symbol, interval), start, end)
+
+    async def get_arrays(self, ex, exchange: str, market: str, symbol: str, interval: str,
+                         start: int, end: Optional[int] = None, max_base_candles: int = 0) -> Dict[str, np.ndarray]:
+        """Columnar candles of [start, end], derived locally from the venue's finest native interval
+
+        Only the base series (usually 1m) is fetched and cached; every other interval
+        up to 1d is resampled from it, so switching intervals needs no new downloads.
+        With max_base_candles, a range that would need more base candles than that
+        uses the finest base that fits (e.g. 15m candles for months of 1h history).
+        Venues without paginated history (UNPAGED_KLINES) are fetched natively.
+        """
+        end = int(time.time()) if end is None else int(end)
+        start = int(start)
+        base = interval
+        if (exchange, market) not in UNPAGED_KLINES:
+            base = resample_base_interval(exchange, market, interval, end - start, max_base_candles)
+        period = INTERVAL_MINUTES.get(interval, 60) * 60
+        if base != interval:
+            # Start on a bucket boundary so the first resampled candle is complete
+            start -= start % period
+
+        if not await self.ensure(ex, exchange, market, symbol, base, start, end):
+            return klines_to_arrays([])
+        columns = self.read_arrays((exchange, market, symbol, base), start, end)
+        return resample(columns, period) if base != interval else columns
@@ -1,11 +1,18 @@
 """
 Klines Mixin - Provides kline/candlestick fetching functionality with 7-day historical data support.
-This module contains helper functions for calculating timestamps and intervals.
+This module contains helper functions for calculating timestamps and intervals, and the shared
+pagination engine: a time range is split into page-sized windows up front (kline_windows) and
+the windows are fetched concurrently under a per-venue concurrency and request-rate limit,
+retrying failed pages (fetch_kline_windows).
 """
 
+import asyncio
+import logging
 import time
 from datetime import datetime, timedelta, timezone
-from typing import Tuple, Dict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Standard interval mappings for each exchange
 INTERVAL_MAPPINGS = {
@@ -78,6 +85,82 @@ INTERVAL_MINUTES = {
 }
 
 
+# Concurrent kline page requests per venue
+KLINE_CONCURRENCY = {
+    'binance': 10,
+    'bitget': 5,
+    'bybit': 10,
+    'gateio': 5,
+    'htx': 5,
+    'kucoin': 4,
+    'mexc': 5,
+    'okx': 5
+}
+
+# Kline page requests per second per venue, shared by all fetches of the process
+# (kept under each venue's public market-data limit, e.g. OKX history-candles 20 per 2s)
+KLINE_RATE_LIMITS = {
+    'binance': 4,
+    'bitget': 10,
+    'bybit': 20,
+    'gateio': 10,
+    'htx': 10,
+    'kucoin': 8,
+    'mexc': 10,
+    'okx': 8
+}
+
+# Attempts per kline page before the fetch is reported incomplete, and the first retry delay
+KLINE_ATTEMPTS = 3
+KLINE_RETRY_DELAY = 1.0
+
+
+class IncompleteKlines(Exception):
+    """Raised by fetch_kline_windows when some windows still failed after retries.
+
+    `klines` holds the merged candles of the windows that succeeded and `failed`
+    the windows that did not, so callers can keep the candles without treating
+    the whole range as fetched.
+    """
+
+    def __init__(self, klines: List[Dict], failed: List[Tuple[int, int]]):
+        super().__init__(f"{len(failed)} kline window(s) failed")
+        self.klines = klines
+        self.failed = failed
+
+
+class KlineRateLimiter:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        # Reserve a token now; a negative balance is the wait until it is available
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+_rate_limiters: Dict[str, KlineRateLimiter] = {}
+
+
+def kline_rate_limiter(venue: str) -> KlineRateLimiter:
+    """Shared rate limiter of a venue, see KLINE_RATE_LIMITS"""
+    limiter = _rate_limiters.get(venue)
+    if limiter is None:
+        limiter = _rate_limiters[venue] = KlineRateLimiter(
+            KLINE_RATE_LIMITS.get(venue, 5), KLINE_CONCURRENCY.get(venue, 5)
+        )
+    return limiter
+
+
 def get_seven_day_timestamps(interval: str = '1h') -> Tuple[int, int]:
     """
     Calculate start and end timestamps for 7 days of data.
@@ -123,6 +206,24 @@ def get_seven_day_timestamps_seconds(interval: str = '1h') -> Tuple[int, int]:
     return start_sec, end_sec
 
 
+def get_history_timestamps_seconds(days: float, end: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Calculate start and end timestamps in SECONDS for `days` of data ending at `end`.
+    Used for range-on-demand loading, where older ranges are requested as the chart scrolls.
+    
+    Args:
+        days: Length of the range in days
+        end: Range end in seconds (defaults to now)
+        
+    Returns:
+        Tuple of (start_timestamp_sec, end_timestamp_sec)
+    """
+    end_sec = int(datetime.now(timezone.utc).timestamp()) if end is None else int(end)
+    start_sec = end_sec - int(days * 86400)
+    
+    return start_sec, end_sec
+
+
 # Keep old functions for backwards compatibility
 def get_one_month_timestamps(interval: str = '1h') -> Tuple[int, int]:
     """Alias for get_seven_day_timestamps for backwards compatibility"""
@@ -163,3 +264,135 @@ def get_exchange_interval(exchange: str, interval: str) -> str:
     """
     mappings = INTERVAL_MAPPINGS.get(exchange, {})
     return mappings.get(interval, interval)
+
+
+
+def kline_windows(start: int, end: int, interval: str, page_limit: int,
+                  milliseconds: bool = True) -> List[Tuple[int, int]]:
+    """
+    Split [start, end] into consecutive inclusive windows holding at most page_limit candles each.
+    
+    Args:
+        start: Range start (milliseconds or seconds, see `milliseconds`)
+        end: Range end, same unit
+        interval: Standard interval, sizes the windows via INTERVAL_MINUTES
+        page_limit: Candles the venue returns per request
+        milliseconds: Whether start/end (and the windows) are in milliseconds
+        
+    Returns:
+        List of (window_start, window_end) tuples, oldest first
+    """
+    step = INTERVAL_MINUTES.get(interval, 60) * 60 * (1000 if milliseconds else 1)
+    span = step * page_limit
+    windows = []
+    window_start = start
+    while window_start <= end:
+        window_end = min(end, window_start + span - 1)
+        windows.append((window_start, window_end))
+        window_start = window_end + 1
+    return windows
+
+
+def merge_klines(batches: List[List[Dict]]) -> List[Dict]:
+    """Merge kline batches into one list sorted by time, dropping duplicate timestamps"""
+    merged = {}
+    for batch in batches:
+        for kline in batch:
+            merged.setdefault(kline['time'], kline)
+    return [merged[t] for t in sorted(merged)]
+
+
+async def fetch_kline_windows(fetch_page: Callable[[int, int], Awaitable[Optional[List[Dict]]]],
+                              windows: List[Tuple[int, int]], venue: str) -> List[Dict]:
+    """
+    Fetch all windows concurrently and merge the pages.
+    
+    At most KLINE_CONCURRENCY[venue] requests are in flight and KLINE_RATE_LIMITS[venue]
+    are started per second. A page that fails (fetch_page returns None or raises) is
+    retried with exponential backoff, up to KLINE_ATTEMPTS attempts.
+    
+    Args:
+        fetch_page: Coroutine function (window_start, window_end) -> list of kline dicts,
+            or None when the request failed (an empty list means the venue has no candles there)
+        windows: Windows from kline_windows()
+        venue: Exchange key of the limits (e.g. 'okx')
+        
+    Returns:
+        Klines sorted by time with duplicates removed
+        
+    Raises:
+        IncompleteKlines: if some windows failed on every attempt
+    """
+    semaphore = asyncio.Semaphore(KLINE_CONCURRENCY.get(venue, 5))
+    limiter = kline_rate_limiter(venue)
+    
+    async def fetch(window: Tuple[int, int]) -> Optional[List[Dict]]:
+        for attempt in range(KLINE_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(KLINE_RETRY_DELAY * 2 ** (attempt - 1))
+            async with semaphore:
+                await limiter.acquire()
+                try:
+                    klines = await fetch_page(*window)
+                except Exception as e:
+                    logger.debug(f"{venue} kline page {window} failed: {str(e)}")
+                    klines = None
+            if klines is not None:
+                return klines
+        return None
+    
+    batches = await asyncio.gather(*(fetch(window) for window in windows))
+    klines = merge_klines([batch for batch in batches if batch is not None])
+    failed = [window for window, batch in zip(windows, batches) if batch is None]
+    if failed:
+        logger.warning(f"{venue}: {len(failed)} of {len(windows)} kline pages failed after {KLINE_ATTEMPTS} attempts")
+        raise IncompleteKlines(klines, failed)
+    return klines
+
+
+def native_intervals(exchange: str, market: str) -> List[str]:
+    """
+    Standard intervals the venue serves natively, from INTERVAL_MAPPINGS.
+    
+    Args:
+        exchange: Chart exchange key (e.g. 'binance', 'htx')
+        market: 'futures' or 'spot'
+        
+    Returns:
+        List of standard interval names
+    """
+    mappings = INTERVAL_MAPPINGS.get(f"{exchange}_{market}", INTERVAL_MAPPINGS.get(exchange, {}))
+    return list(mappings.keys())
+
+
+def resample_base_interval(exchange: str, market: str, interval: str,
+                           span: int = 0, max_candles: int = 0) -> str:
+    """
+    Finest native interval of the venue that `interval` can be derived from.
+    
+    Intervals up to 1d are fixed-length and UTC-aligned, so any of them is an exact
+    multiple of a finer native interval; weeks and months are always fetched natively.
+    
+    Args:
+        span: Length in seconds of the requested range (with max_candles)
+        max_candles: If set, the finest base that covers `span` in at most this many
+            candles, so months of 1h history are not downloaded as 1m candles
+    
+    Returns:
+        The base interval, or `interval` itself when it should not be resampled
+    """
+    target = INTERVAL_MINUTES.get(interval)
+    if target is None or target > 1440:
+        return interval
+    candidates = [
+        name for name in native_intervals(exchange, market)
+        if name in INTERVAL_MINUTES and target % INTERVAL_MINUTES[name] == 0
+    ]
+    if not candidates:
+        return interval
+    if span and max_candles:
+        fitting = [name for name in candidates if span // (INTERVAL_MINUTES[name] * 60) <= max_candles]
+        if not fitting:
+            return max(candidates, key=lambda name: INTERVAL_MINUTES[name])
+        candidates = fitting
+    return min(candidates, key=lambda name: INTERVAL_MINUTES[name])
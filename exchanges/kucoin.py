@@ -3,9 +3,9 @@ import hmac
 import hashlib
 import base64
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime, timedelta
-from .base import BaseExchange, FundingInfo, MarginTokenInfo
+from .base import BaseExchange, FundingInfo, MarginTokenInfo, DepthBook
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -91,10 +91,14 @@ class KucoinExchange(BaseExchange):
                     else:
                         next_funding_time = self._calculate_next_kucoin_funding_time()
                     
+                    # fundingRateGranularity is the settlement interval in milliseconds
+                    granularity = item.get('fundingRateGranularity')
+                    
                     result[symbol] = FundingInfo(
                         symbol=symbol,
                         funding_rate=funding_rate,
-                        next_funding_time=next_funding_time
+                        next_funding_time=next_funding_time,
+                        interval_hours=int(granularity) / 3600000 if granularity else None
                     )
                     
                     logger.debug(f"KuCoin {symbol}: rate={funding_rate:.6f}, next_time={next_funding_time}")
@@ -188,6 +192,48 @@ class KucoinExchange(BaseExchange):
         logger.info(f"KuCoin: Successfully fetched {len(result)} order books")
         return result
 
+    def _to_kucoin_symbol(self, symbol: str) -> str:
+        """Convert standard symbol (BTCUSDT) to KuCoin futures format (XBTUSDTM)"""
+        if symbol == 'BTCUSDT':
+            return 'XBTUSDTM'
+        return symbol if symbol.endswith('M') else f"{symbol}M"
+
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch lot multiplier (base units per lot) for all active futures"""
+        endpoint = "/api/v1/contracts/active"
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}")
+        
+        sizes = {}
+        for item in response.get('data', []) if isinstance(response, dict) else []:
+            try:
+                if item.get('symbol') and item.get('multiplier'):
+                    sizes[item['symbol']] = abs(float(item['multiplier']))
+            except (TypeError, ValueError):
+                continue
+        return sizes
+
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /api/v1/level2/depth20|100 (converted from lots)"""
+        kc_symbol = self._to_kucoin_symbol(symbol)
+        contract_size = await self._contract_size(kc_symbol)
+        if contract_size <= 0:
+            return None
+        
+        endpoint = "/api/v1/level2/depth20" if limit <= 20 else "/api/v1/level2/depth100"
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}", params={"symbol": kc_symbol})
+        
+        data = response.get('data') if isinstance(response, dict) else None
+        if not data or 'bids' not in data:
+            logger.debug(f"KuCoin: No depth for {kc_symbol}")
+            return None
+        
+        return DepthBook(
+            symbol=self._normalize_symbol(kc_symbol),
+            bids=self._parse_depth_levels(data.get('bids'), contract_size)[:limit],
+            asks=self._parse_depth_levels(data.get('asks'), contract_size)[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         return self._calculate_next_kucoin_funding_time()
     
@@ -282,7 +328,7 @@ class KucoinExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -298,36 +344,24 @@ class KucoinExchange(BaseExchange):
         
         endpoint = "/api/v1/kline/query"
         
-        all_klines = []
         max_limit = 200  # KuCoin actually returns max 200 per request
         
-        # Calculate interval in milliseconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_ms = interval_minutes * 60 * 1000
-        
-        # Work forwards from start_time to end_time
-        current_start = start_time
-        
-        while current_start < end_time:
-            # Calculate chunk end (max 200 candles)
-            chunk_end = min(end_time, current_start + (max_limit * interval_ms))
-            
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'granularity': kucoin_granularity,
-                'from': current_start,
-                'to': chunk_end
+                'from': window_start,
+                'to': window_end
             }
-            
             response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                break
-            
+            klines = []
             for kline in response['data']:
                 try:
                     # KuCoin futures returns: [timestamp, open, high, low, close, volume, turnover]
-                    all_klines.append({
+                    klines.append({
                         'time': float(kline[0]) / 1000,  # Convert to seconds
                         'open': float(kline[1]),
                         'high': float(kline[2]),
@@ -338,22 +372,12 @@ class KucoinExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"KuCoin: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            # Move forward based on last timestamp received
-            last_time = max(int(k[0]) for k in response['data'])
-            if last_time >= end_time:
-                break
-            current_start = last_time + interval_ms
+            return klines
         
-        # Remove duplicates by timestamp
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
+        # Windows of 200 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'kucoin')
         
-        unique_klines.sort(key=lambda x: x['time'])
         logger.info(f"KuCoin Futures: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
     
@@ -371,7 +395,7 @@ class KucoinExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps_seconds()
@@ -389,34 +413,24 @@ class KucoinExchange(BaseExchange):
         spot_url = "https://api.kucoin.com"
         endpoint = "/api/v1/market/candles"
         
-        all_klines = []
         max_limit = 1500
         
-        # Calculate interval in seconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_seconds = interval_minutes * 60
-        
-        # KuCoin spot returns data in descending order (newest first)
-        # So we need to paginate backwards from end_time
-        current_end = end_time
-        
-        while current_end > start_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'type': kucoin_interval,
-                'startAt': start_time,
-                'endAt': current_end
+                'startAt': window_start,
+                'endAt': window_end
             }
-            
             response = await self._make_request("GET", f"{spot_url}{endpoint}", params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                break
-            
+            klines = []
             for kline in response['data']:
                 try:
-                    # KuCoin spot returns: [timestamp, open, close, high, low, volume, turnover]
-                    all_klines.append({
+                    # KuCoin spot returns (newest first): [timestamp, open, close, high, low, volume, turnover]
+                    klines.append({
                         'time': float(kline[0]),  # Already in seconds
                         'open': float(kline[1]),
                         'high': float(kline[3]),
@@ -427,22 +441,11 @@ class KucoinExchange(BaseExchange):
                 except Exception as e:
                     logger.debug(f"KuCoin: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            if len(response['data']) < max_limit:
-                break
-            
-            # KuCoin returns in descending order, so the last item is the oldest
-            earliest_time = int(response['data'][-1][0])
-            current_end = earliest_time - 1
-        
-        # Remove duplicates and sort by time ascending
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
-        
-        unique_klines.sort(key=lambda x: x['time'])
+            return klines
+        
+        # Pages are fetched concurrently and merged in ascending time order
+        windows = kline_windows(start_time, end_time, interval, max_limit, milliseconds=False)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'kucoin')
+        
         logger.info(f"KuCoin Spot: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -154,6 +154,21 @@ class LBankExchange(BaseExchange):
         logger.info(f"LBank: Successfully fetched {len(result)} order books (last price as bid/ask)")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch the real best bid/ask of one contract from the public perpetual
+        API (GET /cfd/openApi/v1/pub/marketOrder) - the bulk ticker only has last price"""
+        url = "https://lbkperp.lbank.com/cfd/openApi/v1/pub/marketOrder"
+        response = await self._make_request("GET", url, params={'symbol': symbol.upper(), 'depth': 5})
+
+        data = response.get('data') if isinstance(response, dict) else None
+        if not isinstance(data, dict):
+            logger.debug(f"LBank: No book for {symbol}: {str(response)[:200]}")
+            return None
+        # Levels are objects: {"price": ..., "volume": ..., "orders": ...}
+        bids = [[level.get('price'), level.get('volume')] for level in data.get('bids') or []]
+        asks = [[level.get('price'), level.get('volume')] for level in data.get('asks') or []]
+        return self._top_of_book(bids, asks)
+
     async def get_next_funding_time(self) -> datetime:
         """Calculate next funding time (8-hour cycles)."""
         now = self._get_current_time()
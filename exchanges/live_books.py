@@ -0,0 +1,122 @@
+"""
+Live L2 books for the paths being alerted
+
+REST depth for confirmation and executable-spread sizing costs one request
+per leg per alert. For the legs we actually alert on, LiveBooks keeps a local
+OrderBook from the venue's snapshot + diff stream (ws_providers L2 providers,
+Binance/OKX/Bybit/Gate.io futures) and serves top-of-book and depth from it:
+
+- track(): start (or keep alive) the book of one (exchange, symbol) leg
+- depth() / book_ticker(): read a synced book, None when there is none yet
+- books idle for `idle_seconds` are stopped; at most `max_books` run at once,
+  least recently used first out
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from .base import DepthBook
+from .ws_providers import L2BookProvider, MarketType, get_l2_provider
+
+logger = logging.getLogger(__name__)
+
+# FundingRateManager exchange name -> ws_providers name
+L2_EXCHANGES = {
+    'Binance': 'binance',
+    'OKX': 'okx',
+    'Bybit': 'bybit',
+    'Gate.io': 'gateio',
+}
+
+
+class LiveBook:
+    """One running L2 provider and its task"""
+
+    def __init__(self, provider: L2BookProvider, task: asyncio.Task):
+        self.provider = provider
+        self.task = task
+        self.last_used = time.time()
+
+
+class LiveBooks:
+    """Bounded set of live futures L2 books keyed by (exchange, symbol)
+
+    Args:
+        max_books: most books streamed at once (0 = disabled)
+        idle_seconds: stop books not read or tracked for this long
+    """
+
+    def __init__(self, max_books: int = 20, idle_seconds: float = 600.0):
+        self.max_books = max_books
+        self.idle_seconds = idle_seconds
+        self._books: 'OrderedDict[Tuple[str, str], LiveBook]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def supports(self, exchange: str) -> bool:
+        return self.max_books > 0 and exchange in L2_EXCHANGES
+
+    def track(self, exchange: str, symbol: str):
+        """Keep the book of (exchange, symbol) streaming; must run on the event loop"""
+        if not self.supports(exchange):
+            return
+        key = (exchange, symbol)
+        live = self._books.get(key)
+        if live is not None and not live.task.done():
+            live.last_used = time.time()
+            self._books.move_to_end(key)
+            return
+        provider = get_l2_provider(L2_EXCHANGES[exchange])
+        task = asyncio.ensure_future(provider.connect(symbol, MarketType.FUTURES))
+        self._books[key] = LiveBook(provider, task)
+        self._books.move_to_end(key)
+        logger.info(f"Live book started: {exchange} {symbol}")
+        self.expire()
+
+    def depth(self, exchange: str, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Top `limit` levels (quantities in coins) of a synced live book, else None"""
+        live = self._books.get((exchange, symbol))
+        if live is None or live.task.done():
+            return None
+        book = live.provider.book
+        if book is None or not book.synced or book.is_crossed():
+            return None
+        live.last_used = time.time()
+        depth = book.to_depth_book(limit)
+        if not depth.bids or not depth.asks:
+            return None
+        return depth
+
+    def book_ticker(self, exchange: str, symbol: str) -> Optional[Dict[str, float]]:
+        """{'bid': price, 'ask': price} of a synced live book, else None"""
+        depth = self.depth(exchange, symbol, 1)
+        if depth is None:
+            return None
+        return {'bid': depth.bids[0][0], 'ask': depth.asks[0][0]}
+
+    def expire(self):
+        """Stop idle books and the least recently used ones above max_books"""
+        now = time.time()
+        for key in [key for key, live in self._books.items()
+                    if now - live.last_used > self.idle_seconds or live.task.done()]:
+            self._stop(key)
+        while len(self._books) > self.max_books:
+            self._stop(next(iter(self._books)))
+
+    def _stop(self, key: Tuple[str, str]):
+        live = self._books.pop(key)
+        live.provider.running = False
+        asyncio.ensure_future(live.provider.disconnect())
+        live.task.cancel()
+        logger.info(f"Live book stopped: {key[0]} {key[1]}")
+
+    async def close(self):
+        for live in self._books.values():
+            live.provider.running = False
+            live.task.cancel()
+            await live.provider.disconnect()
+        self._books.clear()
@@ -0,0 +1,129 @@
+"""
+Live candle tail from WebSocket book tickers
+
+Keeps the forming candle of a loaded chart up to date from the venues'
+bookTicker streams (see ws_providers), so a live price or spread chart costs
+one socket per venue instead of repeated kline downloads:
+
+- LiveCandle: OHLC of the forming candle, rolled over on UTC period boundaries
+- LiveTail: mid prices of one venue (price chart) or two venues (spread of the
+  first over the second, as in kline_engine.spread_candles) folded into a
+  LiveCandle and pushed to a callback at most once per throttle interval
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .ws_providers import BookTicker, MarketType, WebSocketProvider, get_provider
+
+
+class LiveCandle:
+    """The forming candle of one series
+
+    Args:
+        period: candle length in seconds
+        continuous: open each new candle at the previous close (spread charts)
+        last: the chart's last candle {time, open, high, low, close}, continued
+            while its period is still forming
+    """
+
+    def __init__(self, period: int, continuous: bool = False, last: Optional[Dict] = None):
+        self.period = period
+        self.continuous = continuous
+        self.time: Optional[int] = None
+        self.open = self.high = self.low = self.close = None
+        if last:
+            self.time = int(last['time'])
+            self.open, self.high, self.low, self.close = (
+                float(last['open']), float(last['high']), float(last['low']), float(last['close'])
+            )
+
+    def update(self, value: float, now: float):
+        bucket = int(now // self.period) * self.period
+        if self.time is None or bucket > self.time:
+            open_ = self.close if self.continuous and self.close is not None else value
+            self.time, self.open, self.high, self.low = bucket, open_, max(open_, value), min(open_, value)
+        else:
+            self.high = max(self.high, value)
+            self.low = min(self.low, value)
+        self.close = value
+
+    def as_dict(self) -> Dict:
+        return {'time': self.time, 'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close}
+
+
+class LiveTail:
+    """Streams the book tickers of a chart's venues into its forming candle
+
+    Args:
+        venues: [(exchange, market)] - one venue for a price chart, two for a spread
+        symbol: symbol as entered in the chart (providers normalize it)
+        period: candle length in seconds
+        on_candle: coroutine function receiving the candle dict (plus ex1_close /
+            ex2_close for spreads), awaited at most once per `throttle` seconds
+        last: the chart's last candle, see LiveCandle
+        throttle: minimum seconds between pushes
+    """
+
+    def __init__(self, venues: List[Tuple[str, str]], symbol: str, period: int,
+                 on_candle: Callable[[Dict], Awaitable[None]], last: Optional[Dict] = None,
+                 throttle: float = 0.25):
+        self.venues = venues
+        self.symbol = symbol
+        self.on_candle = on_candle
+        self.throttle = throttle
+        self.candle = LiveCandle(period, continuous=len(venues) == 2, last=last)
+        self.mids: List[Optional[float]] = [None] * len(venues)
+        self.providers: List[WebSocketProvider] = []
+        self.running = False
+        self._dirty = False
+
+    async def run(self):
+        """Connect all venues and push candle updates until stop()"""
+        self.running = True
+        self.providers = []
+        for index, (exchange, _) in enumerate(self.venues):
+            provider = get_provider(exchange)
+            provider.on_book_ticker = lambda ticker, index=index: self._on_ticker(index, ticker)
+            self.providers.append(provider)
+        await asyncio.gather(
+            *(provider.connect(self.symbol, MarketType(market))
+              for provider, (_, market) in zip(self.providers, self.venues)),
+            self._push_loop(),
+        )
+
+    async def stop(self):
+        self.running = False
+        for provider in self.providers:
+            try:
+                await provider.disconnect()
+            except Exception:
+                pass
+
+    def _on_ticker(self, index: int, ticker: BookTicker):
+        if ticker.bid_price <= 0 or ticker.ask_price <= 0:
+            return
+        self.mids[index] = (ticker.bid_price + ticker.ask_price) / 2
+        if any(mid is None for mid in self.mids):
+            return
+        if len(self.mids) == 2:
+            value = (self.mids[0] - self.mids[1]) / self.mids[1] * 100
+        else:
+            value = self.mids[0]
+        self.candle.update(value, time.time())
+        self._dirty = True
+
+    async def _push_loop(self):
+        while self.running:
+            await asyncio.sleep(self.throttle)
+            if not self._dirty:
+                continue
+            self._dirty = False
+            candle = self.candle.as_dict()
+            if len(self.mids) == 2:
+                candle['ex1_close'], candle['ex2_close'] = self.mids
+            try:
+                await self.on_candle(candle)
+            except Exception:
+                pass
@@ -2,10 +2,11 @@ import time
 import hmac
 import hashlib
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 import urllib.parse
-from .base import BaseExchange, FundingInfo
+from .base import BaseExchange, FundingInfo, DepthBook
+from utils.capture import get_replay
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -35,10 +36,16 @@ class MEXCExchange(BaseExchange):
             'Accept-Encoding': 'gzip, deflate'  # Explicitly avoid brotli
         }
         
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+        
         await self._init_session()
         
+        captured = False
         try:
             async with self.session.request("GET", url, params=params, headers=headers) as response:
+                captured = await self._capture_response("GET", url, params, response)
                 if response.status == 200:
                     try:
                         result = await response.json()
@@ -52,6 +59,8 @@ class MEXCExchange(BaseExchange):
                     return {}
         except Exception as e:
             logger.debug(f"MEXC: Request error for {url}: {str(e)}")
+            if not captured:
+                self._capture_failure("GET", url, params)
             return {}
     
     async def fetch_funding_rates(self) -> Dict[str, FundingInfo]:
@@ -105,10 +114,14 @@ class MEXCExchange(BaseExchange):
                         next_hour = ((now.hour // 8) + 1) * 8
                         next_funding_time = now.replace(hour=next_hour % 24, minute=0, second=0, microsecond=0)
                     
+                    # collectCycle is the settlement interval in hours
+                    collect_cycle = item.get('collectCycle')
+                    
                     result[symbol] = FundingInfo(
                         symbol=symbol,
                         funding_rate=funding_rate,
-                        next_funding_time=next_funding_time
+                        next_funding_time=next_funding_time,
+                        interval_hours=float(collect_cycle) if collect_cycle else None
                     )
                 except Exception as e:
                     logger.debug(f"MEXC: Error processing {item}: {str(e)}")
@@ -224,6 +237,42 @@ class MEXCExchange(BaseExchange):
         logger.info(f"MEXC: Successfully fetched {len(result)} order books")
         return result
     
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch contractSize (base units per contract) for all futures"""
+        response = await self._make_mexc_request("/api/v1/contract/detail")
+        
+        sizes = {}
+        data = response.get('data', []) if isinstance(response, dict) else []
+        for item in data if isinstance(data, list) else []:
+            try:
+                if item.get('symbol') and item.get('contractSize'):
+                    sizes[item['symbol']] = float(item['contractSize'])
+            except (TypeError, ValueError):
+                continue
+        return sizes
+
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /api/v1/contract/depth (converted from contracts)"""
+        mexc_symbol = symbol if '_' in symbol else f"{symbol[:-4]}_USDT"
+        contract_size = await self._contract_size(mexc_symbol)
+        if contract_size <= 0:
+            return None
+        
+        endpoint = f"/api/v1/contract/depth/{mexc_symbol}"
+        response = await self._make_mexc_request(endpoint, params={"limit": limit})
+        
+        data = response.get('data') if isinstance(response, dict) else None
+        if not data or 'bids' not in data:
+            logger.debug(f"MEXC: No depth for {mexc_symbol}")
+            return None
+        
+        return DepthBook(
+            symbol=self._normalize_symbol(mexc_symbol),
+            bids=self._parse_depth_levels(data.get('bids'), contract_size)[:limit],
+            asks=self._parse_depth_levels(data.get('asks'), contract_size)[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         now = self._get_current_time()
         next_hour = ((now.hour // 8) + 1) * 8
@@ -243,7 +292,7 @@ class MEXCExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps_seconds, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps_seconds()
@@ -260,74 +309,42 @@ class MEXCExchange(BaseExchange):
         
         endpoint = f"/api/v1/contract/kline/{symbol}"
         
-        all_klines = []
         max_limit = 2000  # MEXC returns max 2000 per request
         
-        # Calculate interval in seconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_seconds = interval_minutes * 60
-        
-        # Work forwards from start_time to end_time
-        current_start = start_time
-        
-        while current_start < end_time:
-            # Calculate chunk end (max 2000 candles)
-            chunk_end = min(end_time, current_start + (max_limit * interval_seconds))
-            
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'interval': mexc_interval,
-                'start': current_start,
-                'end': chunk_end
+                'start': window_start,
+                'end': window_end
             }
-            
             response = await self._make_mexc_request(endpoint, params=params)
+            if not (isinstance(response, dict) and response.get('success') and 'data' in response):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            batch_klines = []
+            klines = []
             # MEXC returns data in a special format with separate arrays
-            if isinstance(response, dict):
-                if response.get('success') and 'data' in response:
-                    data = response['data']
-                    if all(key in data for key in ['time', 'open', 'high', 'low', 'close', 'vol']):
-                        times = data['time']
-                        opens = data['open']
-                        highs = data['high']
-                        lows = data['low']
-                        closes = data['close']
-                        volumes = data['vol']
-                        
-                        # Combine arrays into kline objects
-                        for i in range(len(times)):
-                            try:
-                                batch_klines.append({
-                                    'time': float(times[i]),  # Already in seconds
-                                    'open': float(opens[i]),
-                                    'high': float(highs[i]),
-                                    'low': float(lows[i]),
-                                    'close': float(closes[i]),
-                                    'volume': float(volumes[i])
-                                })
-                            except Exception as e:
-                                logger.debug(f"MEXC: Error processing kline at index {i}: {str(e)}")
-                                continue
-            
-            all_klines.extend(batch_klines)
-            
-            if len(batch_klines) == 0 or len(batch_klines) < max_limit:
-                break
-            
-            # Move forward
-            last_time = max(k['time'] for k in batch_klines)
-            current_start = int(last_time) + interval_seconds
-        
-        # Remove duplicates and sort
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
-        
-        unique_klines.sort(key=lambda x: x['time'])
+            data = response['data']
+            if all(key in data for key in ['time', 'open', 'high', 'low', 'close', 'vol']):
+                # Combine arrays into kline objects
+                for i in range(len(data['time'])):
+                    try:
+                        klines.append({
+                            'time': float(data['time'][i]),  # Already in seconds
+                            'open': float(data['open'][i]),
+                            'high': float(data['high'][i]),
+                            'low': float(data['low'][i]),
+                            'close': float(data['close'][i]),
+                            'volume': float(data['vol'][i])
+                        })
+                    except Exception as e:
+                        logger.debug(f"MEXC: Error processing kline at index {i}: {str(e)}")
+                        continue
+            return klines
+        
+        # Windows of 2000 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit, milliseconds=False)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'mexc')
+        
         logger.info(f"MEXC Futures: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
     
@@ -345,7 +362,7 @@ class MEXCExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, INTERVAL_MINUTES
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -360,77 +377,56 @@ class MEXCExchange(BaseExchange):
         spot_url = "https://api.mexc.com"
         endpoint = "/api/v3/klines"
         
-        all_klines = []
         max_limit = 500  # MEXC spot actually returns max 500 per request
         
-        # Calculate interval in milliseconds for pagination
-        interval_minutes = INTERVAL_MINUTES.get(interval, 60)
-        interval_ms = interval_minutes * 60 * 1000
-        
         await self._init_session()
         
-        # Work forwards from start_time to end_time
-        current_start = start_time
+        url = f"{spot_url}{endpoint}"
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        }
         
-        while current_start < end_time:
-            url = f"{spot_url}{endpoint}"
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'symbol': symbol,
                 'interval': mexc_interval,
-                'startTime': current_start,
-                'endTime': end_time,
+                'startTime': window_start,
+                'endTime': window_end,
                 'limit': max_limit
             }
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json',
-                'Accept-Encoding': 'gzip, deflate'
-            }
-            
+            klines = []
             try:
                 async with self.session.request("GET", url, params=params, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        if isinstance(data, list) and len(data) > 0:
-                            for kline in data:
-                                try:
-                                    # MEXC spot returns: [open_time, open, high, low, close, volume, close_time, ...]
-                                    all_klines.append({
-                                        'time': int(kline[0]) / 1000,  # Convert to seconds
-                                        'open': float(kline[1]),
-                                        'high': float(kline[2]),
-                                        'low': float(kline[3]),
-                                        'close': float(kline[4]),
-                                        'volume': float(kline[5])
-                                    })
-                                except Exception as e:
-                                    logger.debug(f"MEXC: Error processing spot kline {kline}: {str(e)}")
-                                    continue
-                            
-                            # Move forward based on last timestamp
-                            last_time = int(data[-1][0])
-                            if last_time >= end_time:
-                                break
-                            current_start = last_time + interval_ms
-                        else:
-                            break
-                    else:
+                    if response.status != 200:
                         logger.warning(f"MEXC: HTTP {response.status} for spot klines")
-                        break
+                        return None  # Retried by fetch_kline_windows
+                    data = await response.json()
             except Exception as e:
                 logger.debug(f"MEXC: Error fetching spot klines: {str(e)}")
-                break
+                return None
+            
+            if isinstance(data, list):
+                for kline in data:
+                    try:
+                        # MEXC spot returns: [open_time, open, high, low, close, volume, close_time, ...]
+                        klines.append({
+                            'time': int(kline[0]) / 1000,  # Convert to seconds
+                            'open': float(kline[1]),
+                            'high': float(kline[2]),
+                            'low': float(kline[3]),
+                            'close': float(kline[4]),
+                            'volume': float(kline[5])
+                        })
+                    except Exception as e:
+                        logger.debug(f"MEXC: Error processing spot kline {kline}: {str(e)}")
+                        continue
+            return klines
         
-        # Remove duplicates and sort
-        seen = set()
-        unique_klines = []
-        for kline in all_klines:
-            if kline['time'] not in seen:
-                seen.add(kline['time'])
-                unique_klines.append(kline)
+        # Windows of 500 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        unique_klines = await fetch_kline_windows(fetch_page, windows, 'mexc')
         
-        unique_klines.sort(key=lambda x: x['time'])
         logger.info(f"MEXC Spot: Fetched {len(unique_klines)} klines for {symbol}")
         return unique_klines
@@ -4,9 +4,9 @@ import hmac
 import base64
 import hashlib
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
-from .base import BaseExchange, FundingInfo
+from .base import BaseExchange, FundingInfo, DepthBook
 from utils.config_loader import ConfigLoader
 
 logger = logging.getLogger(__name__)
@@ -90,10 +90,18 @@ class OKXExchange(BaseExchange):
                 funding_rate = float(funding_item['fundingRate'])
                 next_funding_time = self._timestamp_to_datetime(int(funding_item['fundingTime']))
                 
+                # Interval = gap between the current and the following settlement
+                interval_hours = None
+                if funding_item.get('nextFundingTime'):
+                    gap_ms = int(funding_item['nextFundingTime']) - int(funding_item['fundingTime'])
+                    if gap_ms > 0:
+                        interval_hours = gap_ms / 3600000
+                
                 return FundingInfo(
                     symbol=symbol,
                     funding_rate=funding_rate,
-                    next_funding_time=next_funding_time
+                    next_funding_time=next_funding_time,
+                    interval_hours=interval_hours
                 )
             
         except Exception as e:
@@ -148,7 +156,8 @@ class OKXExchange(BaseExchange):
         return result
 
     async def fetch_order_book(self) -> Dict[str, Dict[str, float]]:
-        """Fetch best bid/ask prices using /api/v5/market/tickers"""
+        """Fetch best bid/ask prices using /api/v5/market/tickers, with sizes
+        converted from contracts to base asset where ctVal is known"""
         endpoint = "/api/v5/market/tickers"
         params = {"instType": "SWAP"}
         response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
@@ -164,6 +173,10 @@ class OKXExchange(BaseExchange):
                         ask_price = float(item.get('askPx', 0))
                         if bid_price > 0 and ask_price > 0:
                             result[symbol] = {'bid': bid_price, 'ask': ask_price}
+                            contract_size = await self._contract_size(inst_id)
+                            if contract_size > 0:
+                                result[symbol]['bid_qty'] = float(item.get('bidSz', 0) or 0) * contract_size
+                                result[symbol]['ask_qty'] = float(item.get('askSz', 0) or 0) * contract_size
                 except Exception as e:
                     logger.debug(f"OKX: Error processing order book item: {str(e)}")
                     continue
@@ -171,6 +184,45 @@ class OKXExchange(BaseExchange):
         logger.info(f"OKX: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_contract_sizes(self) -> Dict[str, float]:
+        """Fetch ctVal (base units per contract) for all USDT swaps"""
+        endpoint = "/api/v5/public/instruments"
+        params = {"instType": "SWAP"}
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+        
+        sizes = {}
+        for item in response.get('data', []) if isinstance(response, dict) else []:
+            try:
+                if item.get('instId', '').endswith('-USDT-SWAP') and item.get('ctVal'):
+                    sizes[item['instId']] = float(item['ctVal'])
+            except (TypeError, ValueError):
+                continue
+        return sizes
+
+    async def fetch_depth(self, symbol: str, limit: int = 20) -> Optional[DepthBook]:
+        """Fetch top order book levels using /api/v5/market/books (converted from contracts)"""
+        inst_id = symbol if symbol.endswith('-SWAP') else f"{symbol[:-4]}-USDT-SWAP"
+        contract_size = await self._contract_size(inst_id)
+        if contract_size <= 0:
+            return None
+        
+        endpoint = "/api/v5/market/books"
+        params = {"instId": inst_id, "sz": str(min(limit, 400))}
+        response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+        
+        data = response.get('data') if isinstance(response, dict) else None
+        if not data:
+            logger.debug(f"OKX: No depth for {inst_id}")
+            return None
+        
+        book = data[0]
+        return DepthBook(
+            symbol=self._normalize_symbol(inst_id),
+            bids=self._parse_depth_levels(book.get('bids'), contract_size)[:limit],
+            asks=self._parse_depth_levels(book.get('asks'), contract_size)[:limit],
+            timestamp=time.time()
+        )
+
     async def get_next_funding_time(self) -> datetime:
         now = self._get_current_time()
         next_hour = ((now.hour // 8) + 1) * 8
@@ -188,7 +240,7 @@ class OKXExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -206,50 +258,40 @@ class OKXExchange(BaseExchange):
         # Use history-candles endpoint for historical data
         endpoint = "/api/v5/market/history-candles"
         
-        all_klines = []
-        current_end = end_time
-        max_limit = 300  # OKX max limit is 300
+        max_limit = 100  # history-candles returns at most 100 candles per request
         
-        while current_end > start_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'instId': symbol,
                 'bar': okx_interval,
-                'after': str(current_end),  # Pagination: get data before this timestamp
+                'after': str(window_end + 1),  # Candles older than this timestamp
+                'before': str(window_start - 1),  # ...and newer than this one
                 'limit': str(max_limit)
             }
-            
             response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['data']:
                 try:
-                    kline_time = int(kline[0])
-                    if kline_time >= start_time:
-                        batch_klines.append({
-                            'time': kline_time / 1000,  # Convert to seconds
-                            'open': float(kline[1]),
-                            'high': float(kline[2]),
-                            'low': float(kline[3]),
-                            'close': float(kline[4]),
-                            'volume': float(kline[5])
-                        })
+                    klines.append({
+                        'time': int(kline[0]) / 1000,  # Convert to seconds
+                        'open': float(kline[1]),
+                        'high': float(kline[2]),
+                        'low': float(kline[3]),
+                        'close': float(kline[4]),
+                        'volume': float(kline[5])
+                    })
                 except Exception as e:
                     logger.debug(f"OKX: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines = batch_klines + all_klines  # Prepend since we're going backwards
-            
-            if len(response['data']) < max_limit:
-                break
-            # Get the earliest timestamp from this batch
-            earliest_time = int(response['data'][-1][0])
-            current_end = earliest_time
-        
-        # Sort by time ascending
-        all_klines.sort(key=lambda x: x['time'])
+            return klines
+        
+        # Windows of 100 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'okx')
+        
         logger.info(f"OKX Futures: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
     
@@ -265,7 +307,7 @@ class OKXExchange(BaseExchange):
         Returns:
             List of klines: [{time, open, high, low, close, volume}, ...]
         """
-        from .klines_mixin import get_one_month_timestamps, get_exchange_interval
+        from .klines_mixin import get_one_month_timestamps, get_exchange_interval, kline_windows, fetch_kline_windows
         
         if start_time is None or end_time is None:
             start_time, end_time = get_one_month_timestamps()
@@ -285,47 +327,39 @@ class OKXExchange(BaseExchange):
         # Use history-candles endpoint for historical data
         endpoint = "/api/v5/market/history-candles"
         
-        all_klines = []
-        current_end = end_time
-        max_limit = 300
+        max_limit = 100  # history-candles returns at most 100 candles per request
         
-        while current_end > start_time:
+        async def fetch_page(window_start: int, window_end: int) -> Optional[list]:
             params = {
                 'instId': symbol,
                 'bar': okx_interval,
-                'after': str(current_end),
+                'after': str(window_end + 1),  # Candles older than this timestamp
+                'before': str(window_start - 1),  # ...and newer than this one
                 'limit': str(max_limit)
             }
-            
             response = await self._make_request("GET", f"{self.base_url}{endpoint}", params=params)
+            if 'data' not in response or not isinstance(response['data'], list):
+                return None  # Request failed, retried by fetch_kline_windows
             
-            if 'data' not in response or not isinstance(response['data'], list) or len(response['data']) == 0:
-                break
-            
-            batch_klines = []
+            klines = []
             for kline in response['data']:
                 try:
-                    kline_time = int(kline[0])
-                    if kline_time >= start_time:
-                        batch_klines.append({
-                            'time': kline_time / 1000,  # Convert to seconds
-                            'open': float(kline[1]),
-                            'high': float(kline[2]),
-                            'low': float(kline[3]),
-                            'close': float(kline[4]),
-                            'volume': float(kline[5])
-                        })
+                    klines.append({
+                        'time': int(kline[0]) / 1000,  # Convert to seconds
+                        'open': float(kline[1]),
+                        'high': float(kline[2]),
+                        'low': float(kline[3]),
+                        'close': float(kline[4]),
+                        'volume': float(kline[5])
+                    })
                 except Exception as e:
                     logger.debug(f"OKX: Error processing kline {kline}: {str(e)}")
                     continue
-            
-            all_klines = batch_klines + all_klines
-            
-            if len(response['data']) < max_limit:
-                break
-            earliest_time = int(response['data'][-1][0])
-            current_end = earliest_time
+            return klines
+        
+        # Windows of 100 candles, fetched concurrently
+        windows = kline_windows(start_time, end_time, interval, max_limit)
+        all_klines = await fetch_kline_windows(fetch_page, windows, 'okx')
         
-        all_klines.sort(key=lambda x: x['time'])
         logger.info(f"OKX Spot: Fetched {len(all_klines)} klines for {symbol}")
         return all_klines
\ No newline at end of file
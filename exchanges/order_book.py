@@ -0,0 +1,187 @@
+"""
+Local L2 order book
+===================
+
+Sorted price levels kept in flat Python lists. Each side stores a sort key
+(ask price, or negated bid price so both sides are ascending with the best
+level first), the size and the raw price/size strings as received (needed
+for exchange checksums). Level lookups are a bisect, O(log n); inserts and
+deletes shift the list tail with a single memmove, which for a few hundred
+levels is far cheaper than any tree structure in Python.
+
+Top-N and VWAP queries read straight from the head of the lists.
+"""
+
+import time
+import zlib
+from bisect import bisect_left
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .base import DepthBook
+from .depth import walk_book
+
+
+class OrderBookGap(Exception):
+    """Raised when a diff cannot be applied (sequence gap, bad checksum)"""
+
+
+class BookSide:
+    """One side of the book, best level at index 0"""
+
+    __slots__ = ('is_bid', 'keys', 'sizes', 'raw')
+
+    def __init__(self, is_bid: bool):
+        self.is_bid = is_bid
+        self.keys: List[float] = []
+        self.sizes: List[float] = []
+        self.raw: List[Tuple[str, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+        self.raw.clear()
+
+    def set(self, price: str, size: str):
+        """Insert, update or (size 0) delete a level"""
+        p = float(price)
+        s = float(size)
+        key = -p if self.is_bid else p
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if s <= 0:
+                del keys[i]
+                del self.sizes[i]
+                del self.raw[i]
+            else:
+                self.sizes[i] = s
+                self.raw[i] = (price, size)
+        elif s > 0:
+            keys.insert(i, key)
+            self.sizes.insert(i, s)
+            self.raw.insert(i, (price, size))
+
+    def truncate(self, depth: int):
+        if len(self.keys) > depth:
+            del self.keys[depth:]
+            del self.sizes[depth:]
+            del self.raw[depth:]
+
+    def price(self, i: int) -> float:
+        key = self.keys[i]
+        return -key if self.is_bid else key
+
+    def top(self, n: int, scale: float = 1.0) -> List[Tuple[float, float]]:
+        keys = self.keys[:n]
+        sizes = self.sizes[:n]
+        if self.is_bid:
+            return [(-k, s * scale) for k, s in zip(keys, sizes)]
+        return [(k, s * scale) for k, s in zip(keys, sizes)]
+
+
+class OrderBook:
+    """Locally maintained L2 book for one symbol on one venue
+
+    Sizes are stored as the venue sends them (contracts on OKX/Gate);
+    `quantity_scale` converts them to coins for queries.
+    """
+
+    def __init__(self, exchange: str, symbol: str, quantity_scale: float = 1.0,
+                 max_depth: Optional[int] = None):
+        self.exchange = exchange
+        self.symbol = symbol
+        self.quantity_scale = quantity_scale
+        self.max_depth = max_depth
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.last_update_id: Optional[int] = None
+        self.timestamp = 0.0          # Exchange timestamp of the last update (ms)
+        self.synced = False
+        self.updates = 0
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = None
+        self.synced = False
+
+    def load_snapshot(self, bids: Iterable[Sequence], asks: Iterable[Sequence],
+                      update_id: Optional[int] = None, timestamp: Optional[float] = None):
+        """Replace the book with a full snapshot; levels are [price, size, ...]"""
+        self.bids.clear()
+        self.asks.clear()
+        self.apply(bids, asks, update_id, timestamp)
+        self.synced = True
+
+    def apply(self, bids: Iterable[Sequence], asks: Iterable[Sequence],
+              update_id: Optional[int] = None, timestamp: Optional[float] = None):
+        """Apply absolute level updates; size 0 removes the level"""
+        for level in bids:
+            self.bids.set(level[0], level[1])
+        for level in asks:
+            self.asks.set(level[0], level[1])
+        if self.max_depth:
+            self.bids.truncate(self.max_depth)
+            self.asks.truncate(self.max_depth)
+        if update_id is not None:
+            self.last_update_id = update_id
+        self.timestamp = timestamp if timestamp is not None else time.time() * 1000
+        self.updates += 1
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        if not self.bids.keys:
+            return None
+        return -self.bids.keys[0], self.bids.sizes[0] * self.quantity_scale
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        if not self.asks.keys:
+            return None
+        return self.asks.keys[0], self.asks.sizes[0] * self.quantity_scale
+
+    def mid(self) -> Optional[float]:
+        if not self.bids.keys or not self.asks.keys:
+            return None
+        return (self.asks.keys[0] - self.bids.keys[0]) / 2
+
+    def is_crossed(self) -> bool:
+        return bool(self.bids.keys and self.asks.keys) and -self.bids.keys[0] >= self.asks.keys[0]
+
+    def top_n(self, n: int = 20) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+        """(bids, asks) as (price, quantity in coins), best first"""
+        return self.bids.top(n, self.quantity_scale), self.asks.top(n, self.quantity_scale)
+
+    def vwap(self, side: str, notional: float) -> Tuple[float, float, float]:
+        """Walk asks ('buy') or bids ('sell') for `notional` USDT
+
+        Returns:
+            (vwap, quantity, filled_notional)
+        """
+        book_side = self.asks if side == 'buy' else self.bids
+        # Walk level by level without materialising the whole side
+        n = 20
+        while True:
+            levels = book_side.top(n, self.quantity_scale)
+            vwap, quantity, filled = walk_book(levels, notional)
+            if filled >= notional or n >= len(book_side):
+                return vwap, quantity, filled
+            n *= 4
+
+    def to_depth_book(self, limit: int = 20) -> DepthBook:
+        bids, asks = self.top_n(limit)
+        return DepthBook(symbol=self.symbol, bids=bids, asks=asks, timestamp=self.timestamp)
+
+    def checksum(self, levels: int = 25) -> int:
+        """OKX-style CRC32 over interleaved bid/ask price:size strings (signed)"""
+        parts = []
+        bids = self.bids.raw
+        asks = self.asks.raw
+        for i in range(levels):
+            if i < len(bids):
+                parts.extend(bids[i])
+            if i < len(asks):
+                parts.extend(asks[i])
+        crc = zlib.crc32(':'.join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -148,6 +148,18 @@ class OurBitExchange(BaseExchange):
         logger.info(f"OurBit: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch best bid/ask of one contract from /api/v1/contract/depth/{symbol}"""
+        ourbit_symbol = symbol if '_' in symbol else f"{symbol[:-4]}_USDT"
+        url = f"{self.base_url}/api/v1/contract/depth/{ourbit_symbol}"
+        response = await self._make_request("GET", url, params={'limit': 5})
+
+        data = response.get('data') if isinstance(response, dict) else None
+        if not isinstance(data, dict):
+            logger.debug(f"OurBit: No depth for {ourbit_symbol}: {str(response)[:200]}")
+            return None
+        return self._top_of_book(data.get('bids'), data.get('asks'))
+
     async def get_next_funding_time(self) -> datetime:
         """OurBit uses 8-hour funding intervals"""
         now = self._get_current_time()
@@ -0,0 +1,233 @@
+"""
+Streaming per-path spread statistics
+
+Constant-memory history of every directional (symbol, buy, sell) spread, so a
+path that is structurally rich (a venue that always trades 0.3% above another)
+can be told apart from a real dislocation:
+
+- EWMA mean and variance with a half-life in scan cycles, and the z-score of
+  the latest spread against the history before it
+- P² (Jain & Chlamtac) streaming quantile estimates, five markers per quantile
+
+All state lives in preallocated NumPy arrays indexed by a path slot, and one
+update() call advances every path of a scan cycle at once. Slots are looked up
+through a small (exchange x exchange) slot matrix per symbol, so a whole
+symbol graph maps to slots with one fancy-indexing operation.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class PathStats:
+    """Preallocated EWMA/P² statistics for directional spread paths
+
+    Args:
+        halflife: EWMA half-life in updates (scan cycles)
+        quantiles: quantiles tracked with P² markers
+        min_count: observations before a z-score is reported
+        capacity: initial number of path slots (grows by doubling)
+    """
+
+    def __init__(self, halflife: float = 300.0, quantiles: Sequence[float] = (0.5, 0.9),
+                 min_count: int = 30, capacity: int = 4096):
+        self.alpha = 1.0 - 0.5 ** (1.0 / halflife)
+        self.quantiles = np.asarray(quantiles, dtype=np.float64)
+        self.min_count = min_count
+
+        # Desired marker position increments per quantile, (Q, 5)
+        p = self.quantiles[:, None]
+        self._dn = np.hstack([np.zeros_like(p), p / 2, p, (1 + p) / 2, np.ones_like(p)])
+
+        self._exchange_ids: Dict[str, int] = {}
+        self._symbol_slots: Dict[str, np.ndarray] = {}  # symbol -> (E_max, E_max) slot matrix, -1 = none
+        self._max_exchanges = 32
+        self.size = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int):
+        Q = len(self.quantiles)
+        old = self.size
+        arrays = {
+            'count': np.zeros(capacity, dtype=np.int64),
+            'mean': np.zeros(capacity),
+            'var': np.zeros(capacity),
+            'last': np.full(capacity, np.nan),
+            'zscore': np.full(capacity, np.nan),
+            'markers': np.zeros((capacity, Q, 5)),              # P² marker heights
+            'positions': np.zeros((capacity, Q, 5), dtype=np.int64),  # P² marker positions
+        }
+        if old:
+            for name, array in arrays.items():
+                array[:old] = getattr(self, name)[:old]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    # ── Slots ────────────────────────────────────────────────────────
+
+    def exchange_ids(self, names: Sequence[str]) -> np.ndarray:
+        ids = []
+        for name in names:
+            exchange_id = self._exchange_ids.get(name)
+            if exchange_id is None:
+                exchange_id = self._exchange_ids[name] = len(self._exchange_ids)
+                if exchange_id >= self._max_exchanges:
+                    raise ValueError(f"PathStats supports at most {self._max_exchanges} exchanges")
+            ids.append(exchange_id)
+        return np.array(ids, dtype=np.int64)
+
+    def slots(self, symbol: str, exchanges: Sequence[str]) -> np.ndarray:
+        """(len(exchanges) x len(exchanges)) slot matrix for buy (row) / sell (column) paths,
+        allocating slots for new paths. The diagonal is allocated too but never updated."""
+        ids = self.exchange_ids(exchanges)
+        matrix = self._symbol_slots.get(symbol)
+        if matrix is None:
+            matrix = self._symbol_slots[symbol] = np.full((self._max_exchanges, self._max_exchanges), -1, dtype=np.int64)
+        local = matrix[np.ix_(ids, ids)]
+        missing = local < 0
+        if missing.any():
+            n = int(missing.sum())
+            if self.size + n > self.capacity:
+                self._allocate(max(self.capacity * 2, self.size + n))
+            local[missing] = np.arange(self.size, self.size + n)
+            self.size += n
+            matrix[np.ix_(ids, ids)] = local
+        return local
+
+    def slot(self, symbol: str, buy_exchange: str, sell_exchange: str) -> Optional[int]:
+        matrix = self._symbol_slots.get(symbol)
+        buy = self._exchange_ids.get(buy_exchange)
+        sell = self._exchange_ids.get(sell_exchange)
+        if matrix is None or buy is None or sell is None or matrix[buy, sell] < 0:
+            return None
+        return int(matrix[buy, sell])
+
+    # ── Updates ──────────────────────────────────────────────────────
+
+    def update(self, slots: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Add one observation per slot (slots must be unique). Returns the
+        z-scores of the new values against the prior history (NaN until min_count)."""
+        slots = np.asarray(slots, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if not len(slots):
+            return np.empty(0)
+
+        count = self.count[slots]
+        mean = self.mean[slots]
+        var = self.var[slots]
+
+        delta = values - mean
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = np.where((count >= self.min_count) & (var > 0), delta / np.sqrt(var), np.nan)
+
+        first = count == 0
+        a = self.alpha
+        new_mean = np.where(first, values, mean + a * delta)
+        new_var = np.where(first, 0.0, (1 - a) * (var + a * delta * delta))
+
+        self.mean[slots] = new_mean
+        self.var[slots] = new_var
+        self.last[slots] = values
+        self.zscore[slots] = z
+        self.count[slots] = count + 1
+        self._update_quantiles(slots, values, count)
+        return z
+
+    def _update_quantiles(self, slots: np.ndarray, values: np.ndarray, count: np.ndarray):
+        # Warm-up: the first five observations are stored as the markers
+        warm = count < 5
+        if warm.any():
+            ws, wv, wc = slots[warm], values[warm], count[warm]
+            self.markers[ws, :, wc] = wv[:, None]
+            ready = wc == 4
+            if ready.any():
+                rs = ws[ready]
+                self.markers[rs] = np.sort(self.markers[rs], axis=2)
+                self.positions[rs] = np.arange(1, 6)
+
+        live = ~warm
+        if not live.any():
+            return
+        s, x = slots[live], values[live]
+        q = self.markers[s]        # (N, Q, 5)
+        n = self.positions[s]
+        x3 = x[:, None]            # broadcast over quantiles
+
+        q[:, :, 0] = np.minimum(q[:, :, 0], x3)
+        q[:, :, 4] = np.maximum(q[:, :, 4], x3)
+        cell = (x3[:, :, None] >= q[:, :, 1:4]).sum(axis=2)          # (N, Q) in 0..3
+        n += np.arange(5)[None, None, :] > cell[:, :, None]
+
+        total = count[live] + 1                                        # observations incl. this one
+        desired = 1 + (total[:, None, None] - 1) * self._dn[None, :, :]
+
+        # Only a few markers move per observation, adjust just those
+        for i in (1, 2, 3):
+            d = desired[:, :, i] - n[:, :, i]
+            up = (d >= 1) & (n[:, :, i + 1] - n[:, :, i] > 1)
+            down = (d <= -1) & (n[:, :, i - 1] - n[:, :, i] < -1)
+            rows, cols = np.nonzero(up | down)
+            if not len(rows):
+                continue
+            ds = np.where(up[rows, cols], 1, -1)
+            qi, qp, qm = q[rows, cols, i], q[rows, cols, i + 1], q[rows, cols, i - 1]
+            ni, np_, nm = n[rows, cols, i], n[rows, cols, i + 1], n[rows, cols, i - 1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                parabolic = qi + ds / (np_ - nm) * (
+                    (ni - nm + ds) * (qp - qi) / (np_ - ni) + (np_ - ni - ds) * (qi - qm) / (ni - nm)
+                )
+                neighbour_q = np.where(ds > 0, qp, qm)
+                neighbour_n = np.where(ds > 0, np_, nm)
+                linear = qi + ds * (neighbour_q - qi) / (neighbour_n - ni)
+            q[rows, cols, i] = np.where((qm < parabolic) & (parabolic < qp), parabolic, linear)
+            n[rows, cols, i] = ni + ds
+
+        self.markers[s] = q
+        self.positions[s] = n
+
+    # ── Reads ────────────────────────────────────────────────────────
+
+    def quantile_values(self, slots: np.ndarray) -> np.ndarray:
+        """(len(slots), Q) quantile estimates; exact over the stored values during warm-up"""
+        slots = np.asarray(slots, dtype=np.int64)
+        result = self.markers[slots, :, 2].copy()
+        for k in np.flatnonzero(self.count[slots] < 5):
+            c = self.count[slots[k]]
+            result[k] = np.quantile(self.markers[slots[k], 0, :c], self.quantiles) if c else np.nan
+        return result
+
+    def describe(self, slot: int) -> Dict:
+        """Stats of one path: count, EWMA mean/std, last z-score and quantiles"""
+        quantiles = self.quantile_values(np.array([slot]))[0]
+        stats = {
+            'count': int(self.count[slot]),
+            'mean': float(self.mean[slot]),
+            'std': float(np.sqrt(self.var[slot])),
+            'zscore': None if np.isnan(self.zscore[slot]) else float(self.zscore[slot]),
+        }
+        for p, value in zip(self.quantiles, quantiles):
+            stats[f"p{int(round(p * 100))}"] = float(value)
+        return stats
+
+    def annotate(self, spreads: List[Dict]):
+        """Attach spread_mean, spread_std, zscore and quantiles (spread_p50, ...) to spread dicts"""
+        found = []
+        for spread in spreads:
+            slot = self.slot(spread['symbol'], spread['lowest_exchange'], spread['highest_exchange'])
+            if slot is not None:
+                found.append((spread, slot))
+        if not found:
+            return
+        slots = np.array([slot for _, slot in found])
+        quantiles = self.quantile_values(slots)
+        std = np.sqrt(self.var[slots])
+        labels = [f"spread_p{int(round(p * 100))}" for p in self.quantiles]
+        for k, (spread, slot) in enumerate(found):
+            z = self.zscore[slot]
+            spread['spread_mean'] = round(float(self.mean[slot]), 4)
+            spread['spread_std'] = round(float(std[k]), 4)
+            spread['zscore'] = None if np.isnan(z) else round(float(z), 2)
+            for label, value in zip(labels, quantiles[k]):
+                spread[label] = round(float(value), 4)
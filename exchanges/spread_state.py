@@ -0,0 +1,301 @@
+"""
+Bounded state store for monitored spread paths
+
+Tracks every open path_id with first/last seen times and the spread level at
+which it was last alerted. Paths missing for `close_after_cycles` consecutive
+scans (or not seen for `ttl_seconds`) are closed and forgotten, so a path that
+reappears later is reported as new again. With `close_threshold` below
+`open_threshold`, spreads between the two keep a path open without alerting,
+so a spread hovering around the open level does not close and re-alert. Memory is capped at `max_paths`
+entries with least-recently-seen eviction.
+
+Every spread passed to update() is annotated with its path session
+(opened_at, cycles_seen, peak_spread), and close events can be appended to
+a SessionLog on disk for later analysis (written on a background thread).
+
+With `open_zscore` set, alerts are gated on the spread's z-score against the
+path's own history (the 'zscore' key set by PathStats.annotate) instead of
+the raw level alone.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PathState:
+    """Live state of one directional spread path"""
+    path_id: str
+    symbol: str
+    opened_at: float
+    last_seen: float
+    last_cycle: int
+    last_spread: float
+    peak_spread: float
+    alerted_spread: float = 0.0  # 0 = tracked but not alerted yet (below open threshold)
+    cycles_seen: int = 1
+
+    def to_event(self, closed_at: float, reason: str) -> Dict:
+        return {
+            'path_id': self.path_id,
+            'symbol': self.symbol,
+            'opened_at': self.opened_at,
+            'last_seen': self.last_seen,
+            'closed_at': closed_at,
+            'duration': closed_at - self.opened_at,
+            'cycles_seen': self.cycles_seen,
+            'last_spread': self.last_spread,
+            'peak_spread': self.peak_spread,
+            'alerted': self.alerted_spread > 0,
+            'reason': reason,
+        }
+
+
+class SpreadStateStore:
+    """LRU/TTL path store with open/increase/close hysteresis
+
+    Args:
+        max_paths: hard ceiling on tracked paths (oldest evicted first)
+        ttl_seconds: close paths not seen for this long regardless of cycles
+        close_after_cycles: consecutive scans a path may be absent before closing
+        open_threshold: minimum spread % for the first alert of a path (None = any)
+        close_threshold: spreads below this % count as absent (None = any)
+        increase_ratio: re-alert when spread reaches alerted level * ratio
+        rearm_ratio: lower the alert baseline when spread falls below alerted / ratio
+        open_zscore: minimum path z-score for any alert (None = level only);
+            spreads without a z-score yet never alert
+    """
+
+    def __init__(self, max_paths: int = 20000, ttl_seconds: float = 3600.0,
+                 close_after_cycles: int = 3, open_threshold: Optional[float] = None,
+                 close_threshold: Optional[float] = None, increase_ratio: float = 1.5, rearm_ratio: float = 2.0,
+                 open_zscore: Optional[float] = None):
+        self.max_paths = max_paths
+        self.ttl_seconds = ttl_seconds
+        self.close_after_cycles = close_after_cycles
+        self.open_threshold = open_threshold
+        self.close_threshold = close_threshold
+        self.increase_ratio = increase_ratio
+        self.rearm_ratio = rearm_ratio
+        self.open_zscore = open_zscore
+
+        # Ordered by last_cycle: paths seen this cycle are moved to the end
+        self._paths: 'OrderedDict[str, PathState]' = OrderedDict()
+        self.cycle = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, path_id: str) -> bool:
+        return path_id in self._paths
+
+    def get(self, path_id: str) -> Optional[PathState]:
+        return self._paths.get(path_id)
+
+    def update(self, spreads: List[Dict], now: Optional[float] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Apply one scan cycle and annotate spreads with opened_at/cycles_seen/peak_spread
+
+        Spreads below close_threshold are skipped (not annotated) as if absent.
+
+        Returns:
+            (alerts, closed) - alerts are the spread dicts that opened or grew
+            past the increase threshold ('spread_increase' is set on growth),
+            closed are path close events
+        """
+        now = time.time() if now is None else now
+        self.cycle += 1
+        alerts = []
+        closed = []
+
+        for spread in spreads:
+            path_id = spread_path_id(spread)
+            value = spread['spread_percentage']
+            if self.close_threshold is not None and value < self.close_threshold:
+                continue
+            state = self._paths.get(path_id)
+
+            if state is None:
+                state = PathState(
+                    path_id=path_id,
+                    symbol=spread['symbol'],
+                    opened_at=now,
+                    last_seen=now,
+                    last_cycle=self.cycle,
+                    last_spread=value,
+                    peak_spread=value,
+                )
+                self._paths[path_id] = state
+            else:
+                if state.last_cycle == self.cycle:
+                    continue  # duplicate path in the same scan
+                state.last_seen = now
+                state.last_cycle = self.cycle
+                state.last_spread = value
+                state.cycles_seen += 1
+                if value > state.peak_spread:
+                    state.peak_spread = value
+                self._paths.move_to_end(path_id)
+
+            spread['opened_at'] = state.opened_at
+            spread['cycles_seen'] = state.cycles_seen
+            spread['peak_spread'] = state.peak_spread
+
+            if state.alerted_spread <= 0:
+                if (self.open_threshold is None or value >= self.open_threshold) and self._zscore_ok(spread):
+                    state.alerted_spread = value
+                    alerts.append(spread)
+            elif value >= state.alerted_spread * self.increase_ratio and self._zscore_ok(spread):
+                spread['spread_increase'] = value - state.alerted_spread
+                state.alerted_spread = value
+                alerts.append(spread)
+            elif value <= state.alerted_spread / self.rearm_ratio:
+                state.alerted_spread = value
+
+        # Absent paths sit at the front in last_cycle order
+        while self._paths:
+            state = next(iter(self._paths.values()))
+            if self.cycle - state.last_cycle >= self.close_after_cycles:
+                reason = 'absent'
+            elif now - state.last_seen > self.ttl_seconds:
+                reason = 'expired'
+            else:
+                break
+            self._paths.popitem(last=False)
+            closed.append(state.to_event(now, reason))
+
+        while len(self._paths) > self.max_paths:
+            _, state = self._paths.popitem(last=False)
+            self.evicted += 1
+            closed.append(state.to_event(now, 'evicted'))
+
+        return alerts, closed
+
+    def _zscore_ok(self, spread: Dict) -> bool:
+        if self.open_zscore is None:
+            return True
+        zscore = spread.get('zscore')
+        return zscore is not None and zscore >= self.open_zscore
+
+    def revert_alert(self, spread: Dict):
+        """Undo the alert baseline set by update() for an alert that was not sent
+        (e.g. failed confirmation) so the path can alert again next cycle"""
+        state = self._paths.get(spread_path_id(spread))
+        if state is not None:
+            state.alerted_spread = spread['spread_percentage'] - spread.get('spread_increase', spread['spread_percentage'])
+
+    def clear(self):
+        self._paths.clear()
+
+
+class SessionLog:
+    """Background writer appending closed path sessions as JSON lines to one file per UTC day
+
+    Args:
+        root: log directory
+        flush_size: write once this many events are buffered
+        flush_interval: or once the oldest buffered event is this old (seconds)
+        max_pending: event batches queued for the writer thread before new ones are dropped
+    """
+
+    def __init__(self, root: str, flush_size: int = 500, flush_interval: float = 60.0,
+                 max_pending: int = 1000):
+        self.root = root
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['SessionLog']:
+        """SessionLog for config.session_log_path, or None when disabled"""
+        path = config.session_log_path
+        return cls(path) if path else None
+
+    def append(self, events: List[Dict]):
+        """Queue close events (never blocks). The dicts must not be mutated afterwards."""
+        if not events:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='session-log', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        try:
+            self._queue.put_nowait(events)
+        except queue.Full:
+            self.dropped += len(events)
+            logger.warning("Session log is falling behind, dropping close events")
+
+    def close(self, timeout: float = 30.0):
+        """Write buffered events and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        buffer: List[Dict] = []
+        oldest = None
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = ()
+
+            if item:
+                buffer.extend(item)
+                oldest = oldest or time.monotonic()
+
+            stop = item is None
+            if buffer and (stop or len(buffer) >= self.flush_size or time.monotonic() - oldest >= self.flush_interval):
+                try:
+                    self._write(buffer)
+                except Exception as e:
+                    logger.error(f"Error writing session log: {str(e)}")
+                buffer = []
+                oldest = None
+            if stop:
+                break
+
+    def _write(self, events: List[Dict]):
+        by_day: Dict[str, List[str]] = {}
+        for event in events:
+            day = datetime.fromtimestamp(event['closed_at'], timezone.utc).strftime('%Y-%m-%d')
+            by_day.setdefault(day, []).append(json.dumps(event))
+        for day, lines in by_day.items():
+            with open(os.path.join(self.root, f"sessions-{day}.jsonl"), 'a') as f:
+                f.write('\n'.join(lines) + '\n')
+
+
+def format_duration(seconds: float) -> str:
+    """Compact duration for display: 45s, 3m 12s, 1h 05m, 2d 4h"""
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    if seconds < 86400:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    return f"{seconds // 86400}d {seconds % 86400 // 3600}h"
+
+
+def spread_path_id(spread: Dict) -> str:
+    """path_id of a spread dict, generated for legacy formats without one"""
+    path_id = spread.get('path_id')
+    if not path_id:
+        path_id = f"{spread['symbol']}:{spread['lowest_exchange']}_futures->{spread['highest_exchange']}_futures"
+    return path_id
@@ -0,0 +1,1425 @@
+"""
+WebSocket market data providers
+================================
+
+Per-exchange WebSocket protocol handling (subscribe, ping, parse) for the
+real-time spread visualizer and other streaming consumers. Ticker providers
+emit BookTicker updates; L2 providers maintain a local OrderBook from
+snapshot + diff streams.
+"""
+
+import asyncio
+import json
+import time
+import ssl
+import certifi
+import gzip
+from dataclasses import dataclass, field
+from typing import Optional, Callable, List, Tuple
+from enum import Enum
+
+import aiohttp
+
+from .order_book import OrderBook, OrderBookGap
+from utils.capture import REST, WS_BINARY, WS_TEXT, get_capture, get_replay, request_key, stream_key
+
+
+# ============================================================================
+# Data Structures
+# ============================================================================
+
+class MarketType(Enum):
+    SPOT = "spot"
+    FUTURES = "futures"
+
+
+@dataclass
+class BookTicker:
+    exchange: str
+    symbol: str
+    market_type: MarketType
+    bid_price: float
+    bid_qty: float
+    ask_price: float
+    ask_qty: float
+    exchange_timestamp: float  # Exchange's timestamp in ms
+    local_timestamp: float = field(default_factory=lambda: time.time() * 1000)
+    
+    @property
+    def latency_ms(self) -> float:
+        """Calculate latency from exchange to local receipt"""
+        return self.local_timestamp - self.exchange_timestamp
+
+
+# Exchanges with margin = support spot
+EXCHANGES_WITH_SPOT = {"binance", "bybit", "gateio", "bitget", "htx", "kucoin"}
+FUTURES_ONLY_EXCHANGES = {"okx", "mexc"}
+
+
+# ============================================================================
+# SSL Context - Properly configured
+# ============================================================================
+
+def create_ssl_context():
+    """Create SSL context with certifi certificates"""
+    ssl_ctx = ssl.create_default_context(cafile=certifi.where())
+    ssl_ctx.check_hostname = True
+    ssl_ctx.verify_mode = ssl.CERT_REQUIRED
+    return ssl_ctx
+
+
+# ============================================================================
+# WebSocket Provider Base Class
+# ============================================================================
+
+class WebSocketProvider:
+    EXCHANGE_NAME = "base"
+    
+    def __init__(self):
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self.running = False
+        self.on_book_ticker: Optional[Callable[[BookTicker], None]] = None
+        self._reconnect_delay = 1.0
+        self._max_reconnect_delay = 30.0
+        
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            ssl_ctx = create_ssl_context()
+            connector = aiohttp.TCPConnector(ssl=ssl_ctx, limit=10)
+            # Disable auto-decompression to avoid Brotli issues
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    "Accept-Encoding": "gzip, deflate",  # Exclude br (Brotli)
+                    "User-Agent": "Mozilla/5.0"
+                },
+                auto_decompress=True
+            )
+        return self.session
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        raise NotImplementedError
+    
+    def _capture(self, symbol: str, market_type: MarketType, msg: aiohttp.WSMessage):
+        """Record the raw frame when capture is on (see utils/capture.py)"""
+        capture = get_capture()
+        if capture is None:
+            return
+        if msg.type == aiohttp.WSMsgType.TEXT:
+            capture.record(WS_TEXT, stream_key(self.EXCHANGE_NAME, market_type, symbol), msg.data)
+        elif msg.type == aiohttp.WSMsgType.BINARY:
+            capture.record(WS_BINARY, stream_key(self.EXCHANGE_NAME, market_type, symbol), msg.data)
+    
+    async def disconnect(self):
+        self.running = False
+        if self.ws and not self.ws.closed:
+            await self.ws.close()
+        if self.session and not self.session.closed:
+            await self.session.close()
+            self.session = None
+    
+    def _extract_base_quote(self, symbol: str) -> Tuple[str, str]:
+        """
+        Extract base and quote from symbol.
+        BTCUSDT -> (BTC, USDT)
+        ETH-USDT -> (ETH, USDT)
+        """
+        # Clean the symbol
+        symbol = symbol.upper().strip()
+        
+        # Handle already separated formats
+        if "-" in symbol:
+            parts = symbol.split("-")
+            if len(parts) >= 2:
+                return (parts[0], parts[1])
+        if "_" in symbol:
+            parts = symbol.split("_")
+            if len(parts) >= 2:
+                return (parts[0], parts[1])
+        if "/" in symbol:
+            parts = symbol.split("/")
+            if len(parts) >= 2:
+                return (parts[0], parts[1])
+        
+        # For concatenated format like BTCUSDT
+        # Quote currencies in order of priority (longest first to avoid partial matches)
+        quotes = ["USDT", "USDC", "BUSD", "TUSD", "USDP", "USD", "BTC", "ETH", "BNB"]
+        
+        for quote in quotes:
+            if symbol.endswith(quote):
+                base = symbol[:-len(quote)]
+                if len(base) >= 2:  # Valid base like BTC, ETH, etc.
+                    return (base, quote)
+        
+        # Fallback: assume last 4 chars are quote if symbol is long enough
+        if len(symbol) > 4:
+            return (symbol[:-4], symbol[-4:])
+        
+        return (symbol, "USDT")
+
+
+# ============================================================================
+# Binance WebSocket Provider
+# ============================================================================
+
+class BinanceWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "binance"
+    SPOT_WS_URL = "wss://stream.binance.com:9443/ws"
+    FUTURES_WS_URL = "wss://fstream.binance.com/ws"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}{quote}".lower()
+        
+        base_url = self.FUTURES_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
+        ws_url = f"{base_url}/{normalized}@bookTicker"
+        
+        print(f"[Binance] Connecting to {ws_url}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=20) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    print(f"[Binance] Connected!")
+                    
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(msg.data)
+                            book_ticker = self._parse(data, symbol, market_type)
+                            if book_ticker and self.on_book_ticker:
+                                self.on_book_ticker(book_ticker)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[Binance] Error: {e}, reconnecting in {self._reconnect_delay}s...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=float(data['b']),
+                bid_qty=float(data['B']),
+                ask_price=float(data['a']),
+                ask_qty=float(data['A']),
+                exchange_timestamp=float(data.get('T', data.get('E', time.time() * 1000)))
+            )
+        except (KeyError, ValueError) as e:
+            return None
+
+
+# ============================================================================
+# OKX WebSocket Provider
+# ============================================================================
+
+class OKXWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "okx"
+    WS_URL = "wss://ws.okx.com:8443/ws/v5/public"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        
+        # OKX format: BTC-USDT-SWAP
+        inst_id = f"{base}-{quote}-SWAP"
+        
+        print(f"[OKX] Connecting, instId: {inst_id}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(self.WS_URL, heartbeat=25) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    
+                    subscribe_msg = {
+                        "op": "subscribe",
+                        "args": [{"channel": "bbo-tbt", "instId": inst_id}]
+                    }
+                    await ws.send_json(subscribe_msg)
+                    print(f"[OKX] Subscribed to {inst_id}")
+                    
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(msg.data)
+                            
+                            if data.get('event') == 'error':
+                                print(f"[OKX] Error: {data.get('msg')}")
+                                continue
+                            if data.get('event') == 'subscribe':
+                                print(f"[OKX] Confirmed!")
+                                continue
+                            
+                            if 'data' in data:
+                                for item in data['data']:
+                                    bt = self._parse(item, symbol, market_type)
+                                    if bt and self.on_book_ticker:
+                                        self.on_book_ticker(bt)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[OKX] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            asks = data.get('asks', [])
+            bids = data.get('bids', [])
+            if not asks or not bids:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=float(bids[0][0]),
+                bid_qty=float(bids[0][1]),
+                ask_price=float(asks[0][0]),
+                ask_qty=float(asks[0][1]),
+                exchange_timestamp=float(data.get('ts', time.time() * 1000))
+            )
+        except (KeyError, ValueError, IndexError):
+            return None
+
+
+# ============================================================================
+# Bybit WebSocket Provider
+# ============================================================================
+
+class BybitWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "bybit"
+    SPOT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
+    LINEAR_WS_URL = "wss://stream.bybit.com/v5/public/linear"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}{quote}"
+        
+        ws_url = self.LINEAR_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
+        
+        print(f"[Bybit] Connecting, symbol: {normalized}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=20) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    
+                    subscribe_msg = {
+                        "op": "subscribe",
+                        "args": [f"orderbook.1.{normalized}"]
+                    }
+                    await ws.send_json(subscribe_msg)
+                    print(f"[Bybit] Subscribed to {normalized}")
+                    
+                    ping_task = asyncio.create_task(self._ping_loop(ws))
+                    
+                    try:
+                        async for msg in ws:
+                            self._capture(symbol, market_type, msg)
+                            if not self.running:
+                                break
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                data = json.loads(msg.data)
+                                
+                                if data.get('success') is True:
+                                    print(f"[Bybit] Confirmed!")
+                                    continue
+                                
+                                if 'topic' in data and data['topic'].startswith('orderbook'):
+                                    bt = self._parse(data, symbol, market_type)
+                                    if bt and self.on_book_ticker:
+                                        self.on_book_ticker(bt)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                    finally:
+                        ping_task.cancel()
+                        try:
+                            await ping_task
+                        except asyncio.CancelledError:
+                            pass
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[Bybit] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    async def _ping_loop(self, ws):
+        while self.running:
+            try:
+                await asyncio.sleep(20)
+                if not ws.closed:
+                    await ws.send_json({"op": "ping"})
+            except:
+                break
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            orderbook = data.get('data', {})
+            bids = orderbook.get('b', [])
+            asks = orderbook.get('a', [])
+            
+            if not bids or not asks:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=float(bids[0][0]),
+                bid_qty=float(bids[0][1]),
+                ask_price=float(asks[0][0]),
+                ask_qty=float(asks[0][1]),
+                exchange_timestamp=float(data.get('ts', time.time() * 1000))
+            )
+        except (KeyError, ValueError, IndexError):
+            return None
+
+
+# ============================================================================
+# Gate.io WebSocket Provider
+# ============================================================================
+
+class GateIOWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "gateio"
+    SPOT_WS_URL = "wss://api.gateio.ws/ws/v4/"
+    FUTURES_WS_URL = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}_{quote}"
+        
+        ws_url = self.FUTURES_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
+        channel = "futures.book_ticker" if market_type == MarketType.FUTURES else "spot.book_ticker"
+        
+        print(f"[Gate.io] Connecting, symbol: {normalized}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=25) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    
+                    subscribe_msg = {
+                        "time": int(time.time()),
+                        "channel": channel,
+                        "event": "subscribe",
+                        "payload": [normalized]
+                    }
+                    await ws.send_json(subscribe_msg)
+                    print(f"[Gate.io] Subscribed to {normalized}")
+                    
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(msg.data)
+                            
+                            if data.get('event') == 'subscribe':
+                                print(f"[Gate.io] Confirmed!")
+                                continue
+                            
+                            if data.get('event') == 'update':
+                                bt = self._parse(data, symbol, market_type)
+                                if bt and self.on_book_ticker:
+                                    self.on_book_ticker(bt)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[Gate.io] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            result = data.get('result', {})
+            
+            bid = float(result.get('b', 0))
+            ask = float(result.get('a', 0))
+            if bid <= 0 or ask <= 0:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=bid,
+                bid_qty=float(result.get('B', 0)),
+                ask_price=ask,
+                ask_qty=float(result.get('A', 0)),
+                exchange_timestamp=float(data.get('time_ms', time.time() * 1000))
+            )
+        except (KeyError, ValueError):
+            return None
+
+
+# ============================================================================
+# Bitget WebSocket Provider
+# ============================================================================
+
+class BitgetWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "bitget"
+    WS_URL = "wss://ws.bitget.com/v2/ws/public"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}{quote}"
+        
+        inst_type = "USDT-FUTURES" if market_type == MarketType.FUTURES else "SPOT"
+        
+        print(f"[Bitget] Connecting, instType: {inst_type}, instId: {normalized}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(self.WS_URL, heartbeat=25) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    
+                    subscribe_msg = {
+                        "op": "subscribe",
+                        "args": [{
+                            "instType": inst_type,
+                            "channel": "ticker",
+                            "instId": normalized
+                        }]
+                    }
+                    await ws.send_json(subscribe_msg)
+                    print(f"[Bitget] Subscribed to {normalized}")
+                    
+                    ping_task = asyncio.create_task(self._ping_loop(ws))
+                    
+                    try:
+                        async for msg in ws:
+                            self._capture(symbol, market_type, msg)
+                            if not self.running:
+                                break
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                data = json.loads(msg.data)
+                                
+                                if data.get('event') == 'error':
+                                    print(f"[Bitget] Error: {data.get('msg')}")
+                                    continue
+                                if data.get('event') == 'subscribe':
+                                    print(f"[Bitget] Confirmed!")
+                                    continue
+                                
+                                if 'data' in data and data.get('action') in ['snapshot', 'update']:
+                                    for item in data['data']:
+                                        bt = self._parse(item, symbol, market_type)
+                                        if bt and self.on_book_ticker:
+                                            self.on_book_ticker(bt)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                    finally:
+                        ping_task.cancel()
+                        try:
+                            await ping_task
+                        except asyncio.CancelledError:
+                            pass
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[Bitget] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    async def _ping_loop(self, ws):
+        while self.running:
+            try:
+                await asyncio.sleep(25)
+                if not ws.closed:
+                    await ws.send_str("ping")
+            except:
+                break
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            bid = float(data.get('bidPr', 0))
+            ask = float(data.get('askPr', 0))
+            if bid <= 0 or ask <= 0:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=bid,
+                bid_qty=float(data.get('bidSz', 0)),
+                ask_price=ask,
+                ask_qty=float(data.get('askSz', 0)),
+                exchange_timestamp=float(data.get('ts', time.time() * 1000))
+            )
+        except (KeyError, ValueError):
+            return None
+
+
+# ============================================================================
+# HTX WebSocket Provider - Fixed SSL
+# ============================================================================
+
+class HTXWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "htx"
+    SPOT_WS_URL = "wss://api.huobi.pro/ws"
+    FUTURES_WS_URL = "wss://api.hbdm.com/linear-swap-ws"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        
+        if market_type == MarketType.FUTURES:
+            normalized = f"{base}-{quote}"
+            ws_url = self.FUTURES_WS_URL
+            sub_topic = f"market.{normalized}.depth.step0"
+        else:
+            normalized = f"{base}{quote}".lower()
+            ws_url = self.SPOT_WS_URL
+            sub_topic = f"market.{normalized}.depth.step0"
+        
+        print(f"[HTX] Connecting to {ws_url}, topic: {sub_topic}")
+        
+        while self.running:
+            try:
+                # Create session with proper SSL for HTX
+                ssl_ctx = ssl.create_default_context()
+                ssl_ctx.check_hostname = False
+                ssl_ctx.verify_mode = ssl.CERT_NONE  # HTX has certificate issues
+                
+                connector = aiohttp.TCPConnector(ssl=ssl_ctx)
+                async with aiohttp.ClientSession(connector=connector) as session:
+                    async with session.ws_connect(ws_url, heartbeat=None) as ws:
+                        self.ws = ws
+                        self._reconnect_delay = 1.0
+                        
+                        subscribe_msg = {
+                            "sub": sub_topic,
+                            "id": f"id{int(time.time())}"
+                        }
+                        await ws.send_json(subscribe_msg)
+                        print(f"[HTX] Subscribed to {sub_topic}")
+                        
+                        async for msg in ws:
+                            self._capture(symbol, market_type, msg)
+                            if not self.running:
+                                break
+                            
+                            if msg.type == aiohttp.WSMsgType.BINARY:
+                                try:
+                                    decompressed = gzip.decompress(msg.data)
+                                    data = json.loads(decompressed.decode('utf-8'))
+                                except:
+                                    continue
+                                
+                                if 'ping' in data:
+                                    await ws.send_json({"pong": data['ping']})
+                                    continue
+                                
+                                if 'subbed' in data:
+                                    print(f"[HTX] Confirmed!")
+                                    continue
+                                
+                                if 'tick' in data and 'ch' in data:
+                                    bt = self._parse(data, symbol, market_type)
+                                    if bt and self.on_book_ticker:
+                                        self.on_book_ticker(bt)
+                                        
+                            elif msg.type == aiohttp.WSMsgType.TEXT:
+                                data = json.loads(msg.data)
+                                if 'ping' in data:
+                                    await ws.send_json({"pong": data['ping']})
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[HTX] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            tick = data.get('tick', {})
+            bids = tick.get('bids', [])
+            asks = tick.get('asks', [])
+            
+            if not bids or not asks:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=float(bids[0][0]),
+                bid_qty=float(bids[0][1]),
+                ask_price=float(asks[0][0]),
+                ask_qty=float(asks[0][1]),
+                exchange_timestamp=float(data.get('ts', time.time() * 1000))
+            )
+        except (KeyError, ValueError, IndexError):
+            return None
+
+
+# ============================================================================
+# KuCoin WebSocket Provider - Fixed Brotli
+# ============================================================================
+
+class KuCoinWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "kucoin"
+    SPOT_TOKEN_URL = "https://api.kucoin.com/api/v1/bullet-public"
+    FUTURES_TOKEN_URL = "https://api-futures.kucoin.com/api/v1/bullet-public"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        
+        if market_type == MarketType.FUTURES:
+            normalized = f"{base}{quote}M"
+            token_url = self.FUTURES_TOKEN_URL
+        else:
+            normalized = f"{base}-{quote}"
+            token_url = self.SPOT_TOKEN_URL
+        
+        print(f"[KuCoin] Getting token for {normalized}")
+        
+        while self.running:
+            try:
+                # Create session with explicit headers to avoid Brotli
+                ssl_ctx = create_ssl_context()
+                connector = aiohttp.TCPConnector(ssl=ssl_ctx)
+                
+                async with aiohttp.ClientSession(
+                    connector=connector,
+                    headers={
+                        "Accept-Encoding": "gzip, deflate",  # NO Brotli
+                        "Accept": "application/json",
+                        "User-Agent": "Mozilla/5.0"
+                    }
+                ) as session:
+                    # Get WebSocket token
+                    async with session.post(token_url) as resp:
+                        token_data = await resp.json()
+                        
+                        if token_data.get('code') != '200000':
+                            print(f"[KuCoin] Token error: {token_data}")
+                            await asyncio.sleep(5)
+                            continue
+                        
+                        ws_data = token_data['data']
+                        token = ws_data['token']
+                        servers = ws_data['instanceServers']
+                        ws_endpoint = servers[0]['endpoint']
+                        ping_interval = servers[0].get('pingInterval', 18000) // 1000
+                    
+                    ws_url = f"{ws_endpoint}?token={token}"
+                    print(f"[KuCoin] Connecting to WebSocket")
+                    
+                    async with session.ws_connect(ws_url, heartbeat=None) as ws:
+                        self.ws = ws
+                        self._reconnect_delay = 1.0
+                        
+                        # Wait for welcome
+                        welcome = await ws.receive_json()
+                        if welcome.get('type') != 'welcome':
+                            print(f"[KuCoin] Bad welcome: {welcome}")
+                        
+                        # Subscribe to BBO (Best Bid/Offer) for better latency
+                        if market_type == MarketType.FUTURES:
+                            # For futures, use tickerV2 which has timestamps
+                            topic = f"/contractMarket/tickerV2:{normalized}"
+                        else:
+                            # For spot, use ticker which is faster
+                            topic = f"/market/ticker:{normalized}"
+                        
+                        subscribe_msg = {
+                            "id": str(int(time.time() * 1000)),
+                            "type": "subscribe",
+                            "topic": topic,
+                            "privateChannel": False,
+                            "response": True
+                        }
+                        await ws.send_json(subscribe_msg)
+                        print(f"[KuCoin] Subscribed to {topic}")
+                        
+                        ping_task = asyncio.create_task(self._ping_loop(ws, ping_interval))
+                        
+                        try:
+                            async for msg in ws:
+                                self._capture(symbol, market_type, msg)
+                                if not self.running:
+                                    break
+                                if msg.type == aiohttp.WSMsgType.TEXT:
+                                    data = json.loads(msg.data)
+                                    
+                                    msg_type = data.get('type')
+                                    if msg_type == 'pong':
+                                        continue
+                                    if msg_type == 'ack':
+                                        print(f"[KuCoin] Confirmed!")
+                                        continue
+                                    if msg_type == 'message' and 'data' in data:
+                                        bt = self._parse(data, symbol, market_type)
+                                        if bt and self.on_book_ticker:
+                                            self.on_book_ticker(bt)
+                                elif msg.type == aiohttp.WSMsgType.ERROR:
+                                    break
+                        finally:
+                            ping_task.cancel()
+                            try:
+                                await ping_task
+                            except asyncio.CancelledError:
+                                pass
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[KuCoin] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    async def _ping_loop(self, ws, interval: int):
+        while self.running:
+            try:
+                await asyncio.sleep(interval)
+                if not ws.closed:
+                    await ws.send_json({
+                        "id": str(int(time.time() * 1000)),
+                        "type": "ping"
+                    })
+            except:
+                break
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            tick = data.get('data', {})
+            local_ts = time.time() * 1000
+            
+            if market_type == MarketType.FUTURES:
+                bid = float(tick.get('bestBidPrice', 0))
+                ask = float(tick.get('bestAskPrice', 0))
+                # KuCoin futures uses 'ts' field in nanoseconds, convert to ms
+                raw_ts = tick.get('ts', 0)
+                if raw_ts > 1e15:  # Nanoseconds
+                    exchange_ts = raw_ts / 1e6
+                elif raw_ts > 1e12:  # Microseconds  
+                    exchange_ts = raw_ts / 1e3
+                else:  # Already milliseconds or seconds
+                    exchange_ts = raw_ts if raw_ts > 1e10 else raw_ts * 1000
+            else:
+                bid = float(tick.get('bestBid', 0))
+                ask = float(tick.get('bestAsk', 0))
+                # KuCoin spot uses 'time' field in milliseconds
+                raw_ts = tick.get('time', 0)
+                if raw_ts > 1e12:  # Milliseconds
+                    exchange_ts = raw_ts
+                else:  # Seconds
+                    exchange_ts = raw_ts * 1000
+            
+            if bid <= 0 or ask <= 0:
+                return None
+            
+            # If exchange timestamp is invalid/zero, use local time
+            if exchange_ts <= 0 or exchange_ts > local_ts + 60000:  # Allow 1 min future
+                exchange_ts = local_ts
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=bid,
+                bid_qty=float(tick.get('bestBidSize', tick.get('size', 0))),
+                ask_price=ask,
+                ask_qty=float(tick.get('bestAskSize', tick.get('size', 0))),
+                exchange_timestamp=exchange_ts,
+                local_timestamp=local_ts
+            )
+        except (KeyError, ValueError) as e:
+            print(f"[KuCoin] Parse error: {e}")
+            return None
+
+
+# ============================================================================
+# MEXC WebSocket Provider
+# ============================================================================
+
+class MEXCWebSocketProvider(WebSocketProvider):
+    EXCHANGE_NAME = "mexc"
+    FUTURES_WS_URL = "wss://contract.mexc.com/edge"
+    
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}_{quote}"
+        
+        print(f"[MEXC] Connecting, symbol: {normalized}")
+        
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(self.FUTURES_WS_URL, heartbeat=None) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    
+                    subscribe_msg = {
+                        "method": "sub.depth",
+                        "param": {"symbol": normalized}
+                    }
+                    await ws.send_json(subscribe_msg)
+                    print(f"[MEXC] Subscribed to {normalized}")
+                    
+                    ping_task = asyncio.create_task(self._ping_loop(ws))
+                    
+                    try:
+                        async for msg in ws:
+                            self._capture(symbol, market_type, msg)
+                            if not self.running:
+                                break
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                data = json.loads(msg.data)
+                                
+                                if data.get('channel') == 'pong':
+                                    continue
+                                if data.get('channel') == 'rs.sub.depth':
+                                    print(f"[MEXC] Confirmed!")
+                                    continue
+                                
+                                if data.get('channel') == 'push.depth':
+                                    bt = self._parse(data, symbol, market_type)
+                                    if bt and self.on_book_ticker:
+                                        self.on_book_ticker(bt)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                    finally:
+                        ping_task.cancel()
+                        try:
+                            await ping_task
+                        except asyncio.CancelledError:
+                            pass
+                            
+            except Exception as e:
+                if self.running:
+                    print(f"[MEXC] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+    
+    async def _ping_loop(self, ws):
+        while self.running:
+            try:
+                await asyncio.sleep(20)
+                if not ws.closed:
+                    await ws.send_json({"method": "ping"})
+            except:
+                break
+    
+    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
+        try:
+            depth = data.get('data', {})
+            asks = depth.get('asks', [])
+            bids = depth.get('bids', [])
+            
+            if not asks or not bids:
+                return None
+            
+            return BookTicker(
+                exchange=self.EXCHANGE_NAME,
+                symbol=symbol,
+                market_type=market_type,
+                bid_price=float(bids[0][0]),
+                bid_qty=float(bids[0][1]),
+                ask_price=float(asks[0][0]),
+                ask_qty=float(asks[0][1]),
+                exchange_timestamp=float(depth.get('timestamp', time.time() * 1000))
+            )
+        except (KeyError, ValueError, IndexError):
+            return None
+
+
+# ============================================================================
+# Provider Factory
+# ============================================================================
+
+def get_provider(exchange: str) -> WebSocketProvider:
+    providers = {
+        "binance": BinanceWebSocketProvider,
+        "okx": OKXWebSocketProvider,
+        "bybit": BybitWebSocketProvider,
+        "gateio": GateIOWebSocketProvider,
+        "bitget": BitgetWebSocketProvider,
+        "htx": HTXWebSocketProvider,
+        "kucoin": KuCoinWebSocketProvider,
+        "mexc": MEXCWebSocketProvider,
+    }
+    provider_class = providers.get(exchange.lower())
+    if not provider_class:
+        raise ValueError(f"Unknown exchange: {exchange}")
+    return provider_class()
+
+
+# ============================================================================
+# L2 Order Book Providers (snapshot + diff streams)
+# ============================================================================
+
+class L2BookProvider(WebSocketProvider):
+    """Base for providers that maintain a local OrderBook from diff streams
+
+    Venues with a REST snapshot (Binance, Gate) buffer diffs while the
+    snapshot downloads, then replay the buffer. Venues that push their own
+    snapshot (OKX, Bybit) validate sequence ids / checksums on every update.
+    Any gap raises OrderBookGap and the connect loop resyncs from scratch.
+    """
+    SNAPSHOT_LIMIT = 1000
+
+    def __init__(self):
+        super().__init__()
+        self.book: Optional[OrderBook] = None
+        self.on_book_update: Optional[Callable[[OrderBook], None]] = None
+        self.resyncs = 0
+        self._buffer: List[dict] = []
+
+    async def _fetch_json(self, url: str, params: Optional[dict] = None):
+        replay = get_replay()
+        if replay is not None:
+            return await replay.response("GET", url, params)
+        session = await self._get_session()
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            capture = get_capture()
+            if capture is not None:
+                capture.record(REST, request_key("GET", url, params), await resp.read())
+            return await resp.json(content_type=None)
+
+    def _resync(self, reason: str):
+        self.resyncs += 1
+        print(f"[{self.EXCHANGE_NAME}] Order book out of sync ({reason}), resyncing...")
+        if self.book:
+            self.book.clear()
+        self._buffer = []
+
+    def _publish(self, symbol: str, market_type: MarketType):
+        book = self.book
+        if self.on_book_update:
+            self.on_book_update(book)
+        if self.on_book_ticker:
+            bid = book.best_bid()
+            ask = book.best_ask()
+            if bid and ask:
+                self.on_book_ticker(BookTicker(
+                    exchange=self.EXCHANGE_NAME,
+                    symbol=symbol,
+                    market_type=market_type,
+                    bid_price=bid[0],
+                    bid_qty=bid[1],
+                    ask_price=ask[0],
+                    ask_qty=ask[1],
+                    exchange_timestamp=book.timestamp,
+                ))
+
+    def _on_diff(self, event: dict, snapshot_task: asyncio.Task) -> bool:
+        """Buffer diffs until the REST snapshot is loaded, then apply them
+
+        Returns True if the book changed.
+        """
+        if self.book.synced:
+            return self._apply_diff(event)
+
+        self._buffer.append(event)
+        if not snapshot_task.done():
+            return False
+        snapshot = snapshot_task.result()
+        if not snapshot:
+            raise OrderBookGap("snapshot request failed")
+        self._load_snapshot(snapshot)
+        buffered, self._buffer = self._buffer, []
+        for item in buffered:
+            self._apply_diff(item)
+        return True
+
+    def _load_snapshot(self, snapshot: dict):
+        raise NotImplementedError
+
+    def _apply_diff(self, event: dict) -> bool:
+        raise NotImplementedError
+
+    async def _ping_loop(self, ws, payload: dict, interval: float = 20):
+        while self.running:
+            try:
+                await asyncio.sleep(interval)
+                if not ws.closed:
+                    await ws.send_json(payload)
+            except:
+                break
+
+
+class BinanceL2Provider(L2BookProvider):
+    """depth@100ms diffs sequenced by U/u (spot) or pu (futures)"""
+    EXCHANGE_NAME = "binance"
+    SPOT_WS_URL = "wss://stream.binance.com:9443/ws"
+    FUTURES_WS_URL = "wss://fstream.binance.com/ws"
+    SPOT_DEPTH_URL = "https://api.binance.com/api/v3/depth"
+    FUTURES_DEPTH_URL = "https://fapi.binance.com/fapi/v1/depth"
+
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}{quote}"
+
+        futures = market_type == MarketType.FUTURES
+        ws_url = f"{self.FUTURES_WS_URL if futures else self.SPOT_WS_URL}/{normalized.lower()}@depth@100ms"
+        depth_url = self.FUTURES_DEPTH_URL if futures else self.SPOT_DEPTH_URL
+        self.book = OrderBook(self.EXCHANGE_NAME, symbol)
+
+        print(f"[Binance L2] Connecting to {ws_url}")
+
+        while self.running:
+            snapshot_task = None
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=20) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    self.book.clear()
+                    self._buffer = []
+                    snapshot_task = asyncio.create_task(self._fetch_json(
+                        depth_url, {"symbol": normalized, "limit": self.SNAPSHOT_LIMIT}
+                    ))
+
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            event = json.loads(msg.data)
+                            if event.get('e') != 'depthUpdate':
+                                continue
+                            if self._on_diff(event, snapshot_task):
+                                self._publish(symbol, market_type)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+
+            except OrderBookGap as e:
+                self._resync(str(e))
+            except Exception as e:
+                if self.running:
+                    print(f"[Binance L2] Error: {e}, reconnecting in {self._reconnect_delay}s...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+            finally:
+                if snapshot_task:
+                    snapshot_task.cancel()
+
+    def _load_snapshot(self, snapshot: dict):
+        if 'lastUpdateId' not in snapshot:
+            raise OrderBookGap(f"bad snapshot: {snapshot}")
+        self.book.load_snapshot(snapshot['bids'], snapshot['asks'], snapshot['lastUpdateId'],
+                                float(snapshot.get('E', time.time() * 1000)))
+        self._first_diff = True
+
+    def _apply_diff(self, event: dict) -> bool:
+        first_id, final_id = event['U'], event['u']
+        last = self.book.last_update_id
+        if final_id < last:
+            return False  # Already contained in the snapshot
+
+        if self._first_diff:
+            if first_id > last + 1:
+                raise OrderBookGap(f"first diff U={first_id} after snapshot {last}")
+            self._first_diff = False
+        elif 'pu' in event:
+            if event['pu'] != last:
+                raise OrderBookGap(f"pu={event['pu']} expected {last}")
+        elif first_id != last + 1:
+            raise OrderBookGap(f"U={first_id} expected {last + 1}")
+
+        self.book.apply(event['b'], event['a'], final_id, float(event.get('E', time.time() * 1000)))
+        return True
+
+
+class OKXL2Provider(L2BookProvider):
+    """books channel (400 levels) validated by seqId chain and CRC32 checksum"""
+    EXCHANGE_NAME = "okx"
+    WS_URL = "wss://ws.okx.com:8443/ws/v5/public"
+    INSTRUMENTS_URL = "https://www.okx.com/api/v5/public/instruments"
+
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        inst_id = f"{base}-{quote}-SWAP"
+        self.book = OrderBook(self.EXCHANGE_NAME, symbol)
+
+        print(f"[OKX L2] Connecting, instId: {inst_id}")
+
+        while self.running:
+            try:
+                # Sizes are in contracts; ctVal converts them to coins
+                if self.book.quantity_scale == 1.0:
+                    self.book.quantity_scale = await self._fetch_contract_value(inst_id)
+
+                session = await self._get_session()
+                async with session.ws_connect(self.WS_URL, heartbeat=25) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    self.book.clear()
+
+                    await ws.send_json({
+                        "op": "subscribe",
+                        "args": [{"channel": "books", "instId": inst_id}]
+                    })
+                    print(f"[OKX L2] Subscribed to {inst_id}")
+
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(msg.data)
+                            if data.get('event') == 'error':
+                                print(f"[OKX L2] Error: {data.get('msg')}")
+                                continue
+                            action = data.get('action')
+                            if action and 'data' in data:
+                                for item in data['data']:
+                                    self._apply_message(action, item)
+                                self._publish(symbol, market_type)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+
+            except OrderBookGap as e:
+                self._resync(str(e))
+            except Exception as e:
+                if self.running:
+                    print(f"[OKX L2] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+
+    async def _fetch_contract_value(self, inst_id: str) -> float:
+        data = await self._fetch_json(self.INSTRUMENTS_URL, {"instType": "SWAP", "instId": inst_id})
+        items = data.get('data') or []
+        if not items or not items[0].get('ctVal'):
+            raise ValueError(f"no ctVal for {inst_id}")
+        return float(items[0]['ctVal'])
+
+    def _apply_message(self, action: str, item: dict):
+        book = self.book
+        seq_id = item.get('seqId')
+        timestamp = float(item.get('ts', time.time() * 1000))
+
+        if action == 'snapshot':
+            book.load_snapshot(item.get('bids', []), item.get('asks', []), seq_id, timestamp)
+        else:
+            if not book.synced:
+                raise OrderBookGap("update before snapshot")
+            prev_seq_id = item.get('prevSeqId')
+            if prev_seq_id is not None and book.last_update_id is not None and prev_seq_id != book.last_update_id:
+                raise OrderBookGap(f"prevSeqId={prev_seq_id} expected {book.last_update_id}")
+            book.apply(item.get('bids', []), item.get('asks', []), seq_id, timestamp)
+
+        checksum = item.get('checksum')
+        if checksum is not None and book.checksum() != checksum:
+            raise OrderBookGap(f"checksum mismatch at seqId={seq_id}")
+
+
+class BybitL2Provider(L2BookProvider):
+    """orderbook.50 snapshot/delta sequenced by update id u"""
+    EXCHANGE_NAME = "bybit"
+    SPOT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
+    LINEAR_WS_URL = "wss://stream.bybit.com/v5/public/linear"
+    DEPTH = 50
+
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        normalized = f"{base}{quote}"
+        ws_url = self.LINEAR_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
+        self.book = OrderBook(self.EXCHANGE_NAME, symbol, max_depth=self.DEPTH)
+
+        print(f"[Bybit L2] Connecting, symbol: {normalized}")
+
+        while self.running:
+            try:
+                session = await self._get_session()
+                async with session.ws_connect(ws_url, heartbeat=20) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    self.book.clear()
+
+                    await ws.send_json({
+                        "op": "subscribe",
+                        "args": [f"orderbook.{self.DEPTH}.{normalized}"]
+                    })
+                    print(f"[Bybit L2] Subscribed to {normalized}")
+
+                    ping_task = asyncio.create_task(self._ping_loop(ws, {"op": "ping"}))
+
+                    try:
+                        async for msg in ws:
+                            self._capture(symbol, market_type, msg)
+                            if not self.running:
+                                break
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                data = json.loads(msg.data)
+                                if data.get('topic', '').startswith('orderbook'):
+                                    self._apply_message(data)
+                                    self._publish(symbol, market_type)
+                            elif msg.type == aiohttp.WSMsgType.ERROR:
+                                break
+                    finally:
+                        ping_task.cancel()
+                        try:
+                            await ping_task
+                        except asyncio.CancelledError:
+                            pass
+
+            except OrderBookGap as e:
+                self._resync(str(e))
+            except Exception as e:
+                if self.running:
+                    print(f"[Bybit L2] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+
+    def _apply_message(self, data: dict):
+        book = self.book
+        item = data.get('data', {})
+        update_id = item.get('u')
+        timestamp = float(data.get('ts', time.time() * 1000))
+
+        # u == 1 is a fresh snapshot after a service restart
+        if data.get('type') == 'snapshot' or update_id == 1:
+            book.load_snapshot(item.get('b', []), item.get('a', []), update_id, timestamp)
+            return
+        if not book.synced:
+            raise OrderBookGap("delta before snapshot")
+        if update_id != book.last_update_id + 1:
+            raise OrderBookGap(f"u={update_id} expected {book.last_update_id + 1}")
+        book.apply(item.get('b', []), item.get('a', []), update_id, timestamp)
+
+
+class GateIOL2Provider(L2BookProvider):
+    """futures.order_book_update diffs sequenced by U/u against a REST snapshot"""
+    EXCHANGE_NAME = "gateio"
+    FUTURES_WS_URL = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+    DEPTH_URL = "https://api.gateio.ws/api/v4/futures/usdt/order_book"
+    CONTRACT_URL = "https://api.gateio.ws/api/v4/futures/usdt/contracts"
+    SNAPSHOT_LIMIT = 100
+
+    async def connect(self, symbol: str, market_type: MarketType):
+        self.running = True
+        base, quote = self._extract_base_quote(symbol)
+        contract = f"{base}_{quote}"
+        self.book = OrderBook(self.EXCHANGE_NAME, symbol)
+
+        print(f"[Gate.io L2] Connecting, contract: {contract}")
+
+        while self.running:
+            snapshot_task = None
+            try:
+                # Sizes are in contracts; quanto_multiplier converts them to coins
+                if self.book.quantity_scale == 1.0:
+                    info = await self._fetch_json(f"{self.CONTRACT_URL}/{contract}")
+                    self.book.quantity_scale = float(info['quanto_multiplier'])
+
+                session = await self._get_session()
+                async with session.ws_connect(self.FUTURES_WS_URL, heartbeat=25) as ws:
+                    self.ws = ws
+                    self._reconnect_delay = 1.0
+                    self.book.clear()
+                    self._buffer = []
+
+                    await ws.send_json({
+                        "time": int(time.time()),
+                        "channel": "futures.order_book_update",
+                        "event": "subscribe",
+                        "payload": [contract, "100ms", str(self.SNAPSHOT_LIMIT)]
+                    })
+                    print(f"[Gate.io L2] Subscribed to {contract}")
+                    snapshot_task = asyncio.create_task(self._fetch_json(
+                        self.DEPTH_URL, {"contract": contract, "limit": self.SNAPSHOT_LIMIT, "with_id": "true"}
+                    ))
+
+                    async for msg in ws:
+                        self._capture(symbol, market_type, msg)
+                        if not self.running:
+                            break
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            data = json.loads(msg.data)
+                            if data.get('event') == 'update' and data.get('channel') == 'futures.order_book_update':
+                                if self._on_diff(data['result'], snapshot_task):
+                                    self._publish(symbol, market_type)
+                        elif msg.type == aiohttp.WSMsgType.ERROR:
+                            break
+
+            except OrderBookGap as e:
+                self._resync(str(e))
+            except Exception as e:
+                if self.running:
+                    print(f"[Gate.io L2] Error: {e}, reconnecting...")
+                    await asyncio.sleep(self._reconnect_delay)
+                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
+            finally:
+                if snapshot_task:
+                    snapshot_task.cancel()
+
+    @staticmethod
+    def _levels(levels: List[dict]) -> List[Tuple[str, str]]:
+        return [(str(level['p']), str(abs(float(level['s'])))) for level in levels]
+
+    def _load_snapshot(self, snapshot: dict):
+        if 'id' not in snapshot:
+            raise OrderBookGap(f"bad snapshot: {snapshot}")
+        self.book.load_snapshot(self._levels(snapshot.get('bids', [])), self._levels(snapshot.get('asks', [])),
+                                snapshot['id'], float(snapshot.get('current', time.time())) * 1000)
+        self._first_diff = True
+
+    def _apply_diff(self, event: dict) -> bool:
+        first_id, final_id = event['U'], event['u']
+        last = self.book.last_update_id
+        if final_id <= last:
+            return False  # Already contained in the snapshot
+
+        if self._first_diff:
+            if first_id > last + 1:
+                raise OrderBookGap(f"first diff U={first_id} after snapshot {last}")
+            self._first_diff = False
+        elif first_id != last + 1:
+            raise OrderBookGap(f"U={first_id} expected {last + 1}")
+
+        self.book.apply(self._levels(event.get('b', [])), self._levels(event.get('a', [])),
+                        final_id, float(event.get('t', time.time() * 1000)))
+        return True
+
+
+def get_l2_provider(exchange: str) -> L2BookProvider:
+    providers = {
+        "binance": BinanceL2Provider,
+        "okx": OKXL2Provider,
+        "bybit": BybitL2Provider,
+        "gateio": GateIOL2Provider,
+    }
+    provider_class = providers.get(exchange.lower())
+    if not provider_class:
+        raise ValueError(f"No L2 order book stream for exchange: {exchange}")
+    return provider_class()
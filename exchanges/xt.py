@@ -1,5 +1,5 @@
 import logging
-from typing import Dict
+from typing import Dict, Optional
 from datetime import datetime
 from .base import BaseExchange, FundingInfo
 from utils.config_loader import ConfigLoader
@@ -162,6 +162,18 @@ class XTExchange(BaseExchange):
         logger.info(f"XT: Successfully fetched {len(result)} order books")
         return result
 
+    async def fetch_book_ticker(self, symbol: str) -> Optional[Dict[str, float]]:
+        """Fetch best bid/ask of one contract from /future/market/v1/public/q/depth"""
+        xt_symbol = symbol.lower() if '_' in symbol else f"{symbol[:-4].lower()}_usdt"
+        url = f"{self.base_url}/future/market/v1/public/q/depth"
+        response = await self._make_request("GET", url, params={'symbol': xt_symbol, 'level': 5})
+
+        if not isinstance(response, dict) or response.get('returnCode') != 0:
+            logger.debug(f"XT: No depth for {xt_symbol}: {str(response)[:200]}")
+            return None
+        data = response.get('result') or {}
+        return self._top_of_book(data.get('b'), data.get('a'))
+
     async def get_next_funding_time(self) -> datetime:
         """XT uses 8-hour funding intervals"""
         now = self._get_current_time()
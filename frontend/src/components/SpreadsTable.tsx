@@ -14,6 +14,11 @@ export interface Spread {
   status: 'active' | 'pending' | 'expired';
   funding: number;
   timeActive: string;
+  openedAt: number;
+  cyclesSeen: number;
+  peakSpread: number;
+  zScore: number | null;
+  spreadMean: number | null;
 }
 
 interface GroupedToken {
@@ -7,21 +7,16 @@ All 8 exchanges with WebSocket, true real-time updates, latency display.
 
 import sys
 import asyncio
-import json
 import time
-import ssl
-import certifi
-import gzip
-from collections import deque
-from dataclasses import dataclass, field
-from typing import Dict, Optional, Callable, Tuple, List
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 from datetime import datetime
-from enum import Enum
 import threading
 import re
 
+import numpy as np
+
 # Third-party imports
-import aiohttp
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QComboBox, QLabel, QPushButton, QFrame, QGroupBox, QGridLayout,
@@ -31,6 +26,10 @@ from PySide6.QtCore import Qt, QTimer, Signal, QObject
 from PySide6.QtGui import QPalette, QColor
 import pyqtgraph as pg
 
+from exchanges.ws_providers import (
+    MarketType, BookTicker, WebSocketProvider, FUTURES_ONLY_EXCHANGES, get_provider
+)
+
 # Configure pyqtgraph for performance
 pg.setConfigOptions(antialias=True, useOpenGL=True)
 
@@ -39,29 +38,6 @@ pg.setConfigOptions(antialias=True, useOpenGL=True)
 # Data Structures
 # ============================================================================
 
-class MarketType(Enum):
-    SPOT = "spot"
-    FUTURES = "futures"
-
-
-@dataclass
-class BookTicker:
-    exchange: str
-    symbol: str
-    market_type: MarketType
-    bid_price: float
-    bid_qty: float
-    ask_price: float
-    ask_qty: float
-    exchange_timestamp: float  # Exchange's timestamp in ms
-    local_timestamp: float = field(default_factory=lambda: time.time() * 1000)
-    
-    @property
-    def latency_ms(self) -> float:
-        """Calculate latency from exchange to local receipt"""
-        return self.local_timestamp - self.exchange_timestamp
-
-
 @dataclass
 class SpreadData:
     timestamp: float
@@ -71,917 +47,6 @@ class SpreadData:
     latency_b: float
 
 
-# Exchanges with margin = support spot
-EXCHANGES_WITH_SPOT = {"binance", "bybit", "gateio", "bitget", "htx", "kucoin"}
-FUTURES_ONLY_EXCHANGES = {"okx", "mexc"}
-
-
-# ============================================================================
-# SSL Context - Properly configured
-# ============================================================================
-
-def create_ssl_context():
-    """Create SSL context with certifi certificates"""
-    ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-    ssl_ctx.check_hostname = True
-    ssl_ctx.verify_mode = ssl.CERT_REQUIRED
-    return ssl_ctx
-
-
-# ============================================================================
-# WebSocket Provider Base Class
-# ============================================================================
-
-class WebSocketProvider:
-    EXCHANGE_NAME = "base"
-    
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
-        self.running = False
-        self.on_book_ticker: Optional[Callable[[BookTicker], None]] = None
-        self._reconnect_delay = 1.0
-        self._max_reconnect_delay = 30.0
-        
-    async def _get_session(self) -> aiohttp.ClientSession:
-        if self.session is None or self.session.closed:
-            ssl_ctx = create_ssl_context()
-            connector = aiohttp.TCPConnector(ssl=ssl_ctx, limit=10)
-            # Disable auto-decompression to avoid Brotli issues
-            self.session = aiohttp.ClientSession(
-                connector=connector,
-                headers={
-                    "Accept-Encoding": "gzip, deflate",  # Exclude br (Brotli)
-                    "User-Agent": "Mozilla/5.0"
-                },
-                auto_decompress=True
-            )
-        return self.session
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        raise NotImplementedError
-    
-    async def disconnect(self):
-        self.running = False
-        if self.ws and not self.ws.closed:
-            await self.ws.close()
-        if self.session and not self.session.closed:
-            await self.session.close()
-            self.session = None
-    
-    def _extract_base_quote(self, symbol: str) -> Tuple[str, str]:
-        """
-        Extract base and quote from symbol.
-        BTCUSDT -> (BTC, USDT)
-        ETH-USDT -> (ETH, USDT)
-        """
-        # Clean the symbol
-        symbol = symbol.upper().strip()
-        
-        # Handle already separated formats
-        if "-" in symbol:
-            parts = symbol.split("-")
-            if len(parts) >= 2:
-                return (parts[0], parts[1])
-        if "_" in symbol:
-            parts = symbol.split("_")
-            if len(parts) >= 2:
-                return (parts[0], parts[1])
-        if "/" in symbol:
-            parts = symbol.split("/")
-            if len(parts) >= 2:
-                return (parts[0], parts[1])
-        
-        # For concatenated format like BTCUSDT
-        # Quote currencies in order of priority (longest first to avoid partial matches)
-        quotes = ["USDT", "USDC", "BUSD", "TUSD", "USDP", "USD", "BTC", "ETH", "BNB"]
-        
-        for quote in quotes:
-            if symbol.endswith(quote):
-                base = symbol[:-len(quote)]
-                if len(base) >= 2:  # Valid base like BTC, ETH, etc.
-                    return (base, quote)
-        
-        # Fallback: assume last 4 chars are quote if symbol is long enough
-        if len(symbol) > 4:
-            return (symbol[:-4], symbol[-4:])
-        
-        return (symbol, "USDT")
-
-
-# ============================================================================
-# Binance WebSocket Provider
-# ============================================================================
-
-class BinanceWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "binance"
-    SPOT_WS_URL = "wss://stream.binance.com:9443/ws"
-    FUTURES_WS_URL = "wss://fstream.binance.com/ws"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        normalized = f"{base}{quote}".lower()
-        
-        base_url = self.FUTURES_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
-        ws_url = f"{base_url}/{normalized}@bookTicker"
-        
-        print(f"[Binance] Connecting to {ws_url}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(ws_url, heartbeat=20) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    print(f"[Binance] Connected!")
-                    
-                    async for msg in ws:
-                        if not self.running:
-                            break
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            book_ticker = self._parse(data, symbol, market_type)
-                            if book_ticker and self.on_book_ticker:
-                                self.on_book_ticker(book_ticker)
-                        elif msg.type == aiohttp.WSMsgType.ERROR:
-                            break
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[Binance] Error: {e}, reconnecting in {self._reconnect_delay}s...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=float(data['b']),
-                bid_qty=float(data['B']),
-                ask_price=float(data['a']),
-                ask_qty=float(data['A']),
-                exchange_timestamp=float(data.get('T', data.get('E', time.time() * 1000)))
-            )
-        except (KeyError, ValueError) as e:
-            return None
-
-
-# ============================================================================
-# OKX WebSocket Provider
-# ============================================================================
-
-class OKXWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "okx"
-    WS_URL = "wss://ws.okx.com:8443/ws/v5/public"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        
-        # OKX format: BTC-USDT-SWAP
-        inst_id = f"{base}-{quote}-SWAP"
-        
-        print(f"[OKX] Connecting, instId: {inst_id}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(self.WS_URL, heartbeat=25) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    
-                    subscribe_msg = {
-                        "op": "subscribe",
-                        "args": [{"channel": "bbo-tbt", "instId": inst_id}]
-                    }
-                    await ws.send_json(subscribe_msg)
-                    print(f"[OKX] Subscribed to {inst_id}")
-                    
-                    async for msg in ws:
-                        if not self.running:
-                            break
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            
-                            if data.get('event') == 'error':
-                                print(f"[OKX] Error: {data.get('msg')}")
-                                continue
-                            if data.get('event') == 'subscribe':
-                                print(f"[OKX] Confirmed!")
-                                continue
-                            
-                            if 'data' in data:
-                                for item in data['data']:
-                                    bt = self._parse(item, symbol, market_type)
-                                    if bt and self.on_book_ticker:
-                                        self.on_book_ticker(bt)
-                        elif msg.type == aiohttp.WSMsgType.ERROR:
-                            break
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[OKX] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            asks = data.get('asks', [])
-            bids = data.get('bids', [])
-            if not asks or not bids:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=float(bids[0][0]),
-                bid_qty=float(bids[0][1]),
-                ask_price=float(asks[0][0]),
-                ask_qty=float(asks[0][1]),
-                exchange_timestamp=float(data.get('ts', time.time() * 1000))
-            )
-        except (KeyError, ValueError, IndexError):
-            return None
-
-
-# ============================================================================
-# Bybit WebSocket Provider
-# ============================================================================
-
-class BybitWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "bybit"
-    SPOT_WS_URL = "wss://stream.bybit.com/v5/public/spot"
-    LINEAR_WS_URL = "wss://stream.bybit.com/v5/public/linear"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        normalized = f"{base}{quote}"
-        
-        ws_url = self.LINEAR_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
-        
-        print(f"[Bybit] Connecting, symbol: {normalized}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(ws_url, heartbeat=20) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    
-                    subscribe_msg = {
-                        "op": "subscribe",
-                        "args": [f"orderbook.1.{normalized}"]
-                    }
-                    await ws.send_json(subscribe_msg)
-                    print(f"[Bybit] Subscribed to {normalized}")
-                    
-                    ping_task = asyncio.create_task(self._ping_loop(ws))
-                    
-                    try:
-                        async for msg in ws:
-                            if not self.running:
-                                break
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                data = json.loads(msg.data)
-                                
-                                if data.get('success') is True:
-                                    print(f"[Bybit] Confirmed!")
-                                    continue
-                                
-                                if 'topic' in data and data['topic'].startswith('orderbook'):
-                                    bt = self._parse(data, symbol, market_type)
-                                    if bt and self.on_book_ticker:
-                                        self.on_book_ticker(bt)
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                break
-                    finally:
-                        ping_task.cancel()
-                        try:
-                            await ping_task
-                        except asyncio.CancelledError:
-                            pass
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[Bybit] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    async def _ping_loop(self, ws):
-        while self.running:
-            try:
-                await asyncio.sleep(20)
-                if not ws.closed:
-                    await ws.send_json({"op": "ping"})
-            except:
-                break
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            orderbook = data.get('data', {})
-            bids = orderbook.get('b', [])
-            asks = orderbook.get('a', [])
-            
-            if not bids or not asks:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=float(bids[0][0]),
-                bid_qty=float(bids[0][1]),
-                ask_price=float(asks[0][0]),
-                ask_qty=float(asks[0][1]),
-                exchange_timestamp=float(data.get('ts', time.time() * 1000))
-            )
-        except (KeyError, ValueError, IndexError):
-            return None
-
-
-# ============================================================================
-# Gate.io WebSocket Provider
-# ============================================================================
-
-class GateIOWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "gateio"
-    SPOT_WS_URL = "wss://api.gateio.ws/ws/v4/"
-    FUTURES_WS_URL = "wss://fx-ws.gateio.ws/v4/ws/usdt"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        normalized = f"{base}_{quote}"
-        
-        ws_url = self.FUTURES_WS_URL if market_type == MarketType.FUTURES else self.SPOT_WS_URL
-        channel = "futures.book_ticker" if market_type == MarketType.FUTURES else "spot.book_ticker"
-        
-        print(f"[Gate.io] Connecting, symbol: {normalized}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(ws_url, heartbeat=25) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    
-                    subscribe_msg = {
-                        "time": int(time.time()),
-                        "channel": channel,
-                        "event": "subscribe",
-                        "payload": [normalized]
-                    }
-                    await ws.send_json(subscribe_msg)
-                    print(f"[Gate.io] Subscribed to {normalized}")
-                    
-                    async for msg in ws:
-                        if not self.running:
-                            break
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            
-                            if data.get('event') == 'subscribe':
-                                print(f"[Gate.io] Confirmed!")
-                                continue
-                            
-                            if data.get('event') == 'update':
-                                bt = self._parse(data, symbol, market_type)
-                                if bt and self.on_book_ticker:
-                                    self.on_book_ticker(bt)
-                        elif msg.type == aiohttp.WSMsgType.ERROR:
-                            break
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[Gate.io] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            result = data.get('result', {})
-            
-            bid = float(result.get('b', 0))
-            ask = float(result.get('a', 0))
-            if bid <= 0 or ask <= 0:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=bid,
-                bid_qty=float(result.get('B', 0)),
-                ask_price=ask,
-                ask_qty=float(result.get('A', 0)),
-                exchange_timestamp=float(data.get('time_ms', time.time() * 1000))
-            )
-        except (KeyError, ValueError):
-            return None
-
-
-# ============================================================================
-# Bitget WebSocket Provider
-# ============================================================================
-
-class BitgetWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "bitget"
-    WS_URL = "wss://ws.bitget.com/v2/ws/public"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        normalized = f"{base}{quote}"
-        
-        inst_type = "USDT-FUTURES" if market_type == MarketType.FUTURES else "SPOT"
-        
-        print(f"[Bitget] Connecting, instType: {inst_type}, instId: {normalized}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(self.WS_URL, heartbeat=25) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    
-                    subscribe_msg = {
-                        "op": "subscribe",
-                        "args": [{
-                            "instType": inst_type,
-                            "channel": "ticker",
-                            "instId": normalized
-                        }]
-                    }
-                    await ws.send_json(subscribe_msg)
-                    print(f"[Bitget] Subscribed to {normalized}")
-                    
-                    ping_task = asyncio.create_task(self._ping_loop(ws))
-                    
-                    try:
-                        async for msg in ws:
-                            if not self.running:
-                                break
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                data = json.loads(msg.data)
-                                
-                                if data.get('event') == 'error':
-                                    print(f"[Bitget] Error: {data.get('msg')}")
-                                    continue
-                                if data.get('event') == 'subscribe':
-                                    print(f"[Bitget] Confirmed!")
-                                    continue
-                                
-                                if 'data' in data and data.get('action') in ['snapshot', 'update']:
-                                    for item in data['data']:
-                                        bt = self._parse(item, symbol, market_type)
-                                        if bt and self.on_book_ticker:
-                                            self.on_book_ticker(bt)
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                break
-                    finally:
-                        ping_task.cancel()
-                        try:
-                            await ping_task
-                        except asyncio.CancelledError:
-                            pass
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[Bitget] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    async def _ping_loop(self, ws):
-        while self.running:
-            try:
-                await asyncio.sleep(25)
-                if not ws.closed:
-                    await ws.send_str("ping")
-            except:
-                break
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            bid = float(data.get('bidPr', 0))
-            ask = float(data.get('askPr', 0))
-            if bid <= 0 or ask <= 0:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=bid,
-                bid_qty=float(data.get('bidSz', 0)),
-                ask_price=ask,
-                ask_qty=float(data.get('askSz', 0)),
-                exchange_timestamp=float(data.get('ts', time.time() * 1000))
-            )
-        except (KeyError, ValueError):
-            return None
-
-
-# ============================================================================
-# HTX WebSocket Provider - Fixed SSL
-# ============================================================================
-
-class HTXWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "htx"
-    SPOT_WS_URL = "wss://api.huobi.pro/ws"
-    FUTURES_WS_URL = "wss://api.hbdm.com/linear-swap-ws"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        
-        if market_type == MarketType.FUTURES:
-            normalized = f"{base}-{quote}"
-            ws_url = self.FUTURES_WS_URL
-            sub_topic = f"market.{normalized}.depth.step0"
-        else:
-            normalized = f"{base}{quote}".lower()
-            ws_url = self.SPOT_WS_URL
-            sub_topic = f"market.{normalized}.depth.step0"
-        
-        print(f"[HTX] Connecting to {ws_url}, topic: {sub_topic}")
-        
-        while self.running:
-            try:
-                # Create session with proper SSL for HTX
-                ssl_ctx = ssl.create_default_context()
-                ssl_ctx.check_hostname = False
-                ssl_ctx.verify_mode = ssl.CERT_NONE  # HTX has certificate issues
-                
-                connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-                async with aiohttp.ClientSession(connector=connector) as session:
-                    async with session.ws_connect(ws_url, heartbeat=None) as ws:
-                        self.ws = ws
-                        self._reconnect_delay = 1.0
-                        
-                        subscribe_msg = {
-                            "sub": sub_topic,
-                            "id": f"id{int(time.time())}"
-                        }
-                        await ws.send_json(subscribe_msg)
-                        print(f"[HTX] Subscribed to {sub_topic}")
-                        
-                        async for msg in ws:
-                            if not self.running:
-                                break
-                            
-                            if msg.type == aiohttp.WSMsgType.BINARY:
-                                try:
-                                    decompressed = gzip.decompress(msg.data)
-                                    data = json.loads(decompressed.decode('utf-8'))
-                                except:
-                                    continue
-                                
-                                if 'ping' in data:
-                                    await ws.send_json({"pong": data['ping']})
-                                    continue
-                                
-                                if 'subbed' in data:
-                                    print(f"[HTX] Confirmed!")
-                                    continue
-                                
-                                if 'tick' in data and 'ch' in data:
-                                    bt = self._parse(data, symbol, market_type)
-                                    if bt and self.on_book_ticker:
-                                        self.on_book_ticker(bt)
-                                        
-                            elif msg.type == aiohttp.WSMsgType.TEXT:
-                                data = json.loads(msg.data)
-                                if 'ping' in data:
-                                    await ws.send_json({"pong": data['ping']})
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                break
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[HTX] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            tick = data.get('tick', {})
-            bids = tick.get('bids', [])
-            asks = tick.get('asks', [])
-            
-            if not bids or not asks:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=float(bids[0][0]),
-                bid_qty=float(bids[0][1]),
-                ask_price=float(asks[0][0]),
-                ask_qty=float(asks[0][1]),
-                exchange_timestamp=float(data.get('ts', time.time() * 1000))
-            )
-        except (KeyError, ValueError, IndexError):
-            return None
-
-
-# ============================================================================
-# KuCoin WebSocket Provider - Fixed Brotli
-# ============================================================================
-
-class KuCoinWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "kucoin"
-    SPOT_TOKEN_URL = "https://api.kucoin.com/api/v1/bullet-public"
-    FUTURES_TOKEN_URL = "https://api-futures.kucoin.com/api/v1/bullet-public"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        
-        if market_type == MarketType.FUTURES:
-            normalized = f"{base}{quote}M"
-            token_url = self.FUTURES_TOKEN_URL
-        else:
-            normalized = f"{base}-{quote}"
-            token_url = self.SPOT_TOKEN_URL
-        
-        print(f"[KuCoin] Getting token for {normalized}")
-        
-        while self.running:
-            try:
-                # Create session with explicit headers to avoid Brotli
-                ssl_ctx = create_ssl_context()
-                connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-                
-                async with aiohttp.ClientSession(
-                    connector=connector,
-                    headers={
-                        "Accept-Encoding": "gzip, deflate",  # NO Brotli
-                        "Accept": "application/json",
-                        "User-Agent": "Mozilla/5.0"
-                    }
-                ) as session:
-                    # Get WebSocket token
-                    async with session.post(token_url) as resp:
-                        token_data = await resp.json()
-                        
-                        if token_data.get('code') != '200000':
-                            print(f"[KuCoin] Token error: {token_data}")
-                            await asyncio.sleep(5)
-                            continue
-                        
-                        ws_data = token_data['data']
-                        token = ws_data['token']
-                        servers = ws_data['instanceServers']
-                        ws_endpoint = servers[0]['endpoint']
-                        ping_interval = servers[0].get('pingInterval', 18000) // 1000
-                    
-                    ws_url = f"{ws_endpoint}?token={token}"
-                    print(f"[KuCoin] Connecting to WebSocket")
-                    
-                    async with session.ws_connect(ws_url, heartbeat=None) as ws:
-                        self.ws = ws
-                        self._reconnect_delay = 1.0
-                        
-                        # Wait for welcome
-                        welcome = await ws.receive_json()
-                        if welcome.get('type') != 'welcome':
-                            print(f"[KuCoin] Bad welcome: {welcome}")
-                        
-                        # Subscribe to BBO (Best Bid/Offer) for better latency
-                        if market_type == MarketType.FUTURES:
-                            # For futures, use tickerV2 which has timestamps
-                            topic = f"/contractMarket/tickerV2:{normalized}"
-                        else:
-                            # For spot, use ticker which is faster
-                            topic = f"/market/ticker:{normalized}"
-                        
-                        subscribe_msg = {
-                            "id": str(int(time.time() * 1000)),
-                            "type": "subscribe",
-                            "topic": topic,
-                            "privateChannel": False,
-                            "response": True
-                        }
-                        await ws.send_json(subscribe_msg)
-                        print(f"[KuCoin] Subscribed to {topic}")
-                        
-                        ping_task = asyncio.create_task(self._ping_loop(ws, ping_interval))
-                        
-                        try:
-                            async for msg in ws:
-                                if not self.running:
-                                    break
-                                if msg.type == aiohttp.WSMsgType.TEXT:
-                                    data = json.loads(msg.data)
-                                    
-                                    msg_type = data.get('type')
-                                    if msg_type == 'pong':
-                                        continue
-                                    if msg_type == 'ack':
-                                        print(f"[KuCoin] Confirmed!")
-                                        continue
-                                    if msg_type == 'message' and 'data' in data:
-                                        bt = self._parse(data, symbol, market_type)
-                                        if bt and self.on_book_ticker:
-                                            self.on_book_ticker(bt)
-                                elif msg.type == aiohttp.WSMsgType.ERROR:
-                                    break
-                        finally:
-                            ping_task.cancel()
-                            try:
-                                await ping_task
-                            except asyncio.CancelledError:
-                                pass
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[KuCoin] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    async def _ping_loop(self, ws, interval: int):
-        while self.running:
-            try:
-                await asyncio.sleep(interval)
-                if not ws.closed:
-                    await ws.send_json({
-                        "id": str(int(time.time() * 1000)),
-                        "type": "ping"
-                    })
-            except:
-                break
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            tick = data.get('data', {})
-            local_ts = time.time() * 1000
-            
-            if market_type == MarketType.FUTURES:
-                bid = float(tick.get('bestBidPrice', 0))
-                ask = float(tick.get('bestAskPrice', 0))
-                # KuCoin futures uses 'ts' field in nanoseconds, convert to ms
-                raw_ts = tick.get('ts', 0)
-                if raw_ts > 1e15:  # Nanoseconds
-                    exchange_ts = raw_ts / 1e6
-                elif raw_ts > 1e12:  # Microseconds  
-                    exchange_ts = raw_ts / 1e3
-                else:  # Already milliseconds or seconds
-                    exchange_ts = raw_ts if raw_ts > 1e10 else raw_ts * 1000
-            else:
-                bid = float(tick.get('bestBid', 0))
-                ask = float(tick.get('bestAsk', 0))
-                # KuCoin spot uses 'time' field in milliseconds
-                raw_ts = tick.get('time', 0)
-                if raw_ts > 1e12:  # Milliseconds
-                    exchange_ts = raw_ts
-                else:  # Seconds
-                    exchange_ts = raw_ts * 1000
-            
-            if bid <= 0 or ask <= 0:
-                return None
-            
-            # If exchange timestamp is invalid/zero, use local time
-            if exchange_ts <= 0 or exchange_ts > local_ts + 60000:  # Allow 1 min future
-                exchange_ts = local_ts
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=bid,
-                bid_qty=float(tick.get('bestBidSize', tick.get('size', 0))),
-                ask_price=ask,
-                ask_qty=float(tick.get('bestAskSize', tick.get('size', 0))),
-                exchange_timestamp=exchange_ts,
-                local_timestamp=local_ts
-            )
-        except (KeyError, ValueError) as e:
-            print(f"[KuCoin] Parse error: {e}")
-            return None
-
-
-# ============================================================================
-# MEXC WebSocket Provider
-# ============================================================================
-
-class MEXCWebSocketProvider(WebSocketProvider):
-    EXCHANGE_NAME = "mexc"
-    FUTURES_WS_URL = "wss://contract.mexc.com/edge"
-    
-    async def connect(self, symbol: str, market_type: MarketType):
-        self.running = True
-        base, quote = self._extract_base_quote(symbol)
-        normalized = f"{base}_{quote}"
-        
-        print(f"[MEXC] Connecting, symbol: {normalized}")
-        
-        while self.running:
-            try:
-                session = await self._get_session()
-                async with session.ws_connect(self.FUTURES_WS_URL, heartbeat=None) as ws:
-                    self.ws = ws
-                    self._reconnect_delay = 1.0
-                    
-                    subscribe_msg = {
-                        "method": "sub.depth",
-                        "param": {"symbol": normalized}
-                    }
-                    await ws.send_json(subscribe_msg)
-                    print(f"[MEXC] Subscribed to {normalized}")
-                    
-                    ping_task = asyncio.create_task(self._ping_loop(ws))
-                    
-                    try:
-                        async for msg in ws:
-                            if not self.running:
-                                break
-                            if msg.type == aiohttp.WSMsgType.TEXT:
-                                data = json.loads(msg.data)
-                                
-                                if data.get('channel') == 'pong':
-                                    continue
-                                if data.get('channel') == 'rs.sub.depth':
-                                    print(f"[MEXC] Confirmed!")
-                                    continue
-                                
-                                if data.get('channel') == 'push.depth':
-                                    bt = self._parse(data, symbol, market_type)
-                                    if bt and self.on_book_ticker:
-                                        self.on_book_ticker(bt)
-                            elif msg.type == aiohttp.WSMsgType.ERROR:
-                                break
-                    finally:
-                        ping_task.cancel()
-                        try:
-                            await ping_task
-                        except asyncio.CancelledError:
-                            pass
-                            
-            except Exception as e:
-                if self.running:
-                    print(f"[MEXC] Error: {e}, reconnecting...")
-                    await asyncio.sleep(self._reconnect_delay)
-                    self._reconnect_delay = min(self._reconnect_delay * 2, self._max_reconnect_delay)
-    
-    async def _ping_loop(self, ws):
-        while self.running:
-            try:
-                await asyncio.sleep(20)
-                if not ws.closed:
-                    await ws.send_json({"method": "ping"})
-            except:
-                break
-    
-    def _parse(self, data: dict, symbol: str, market_type: MarketType) -> Optional[BookTicker]:
-        try:
-            depth = data.get('data', {})
-            asks = depth.get('asks', [])
-            bids = depth.get('bids', [])
-            
-            if not asks or not bids:
-                return None
-            
-            return BookTicker(
-                exchange=self.EXCHANGE_NAME,
-                symbol=symbol,
-                market_type=market_type,
-                bid_price=float(bids[0][0]),
-                bid_qty=float(bids[0][1]),
-                ask_price=float(asks[0][0]),
-                ask_qty=float(asks[0][1]),
-                exchange_timestamp=float(depth.get('timestamp', time.time() * 1000))
-            )
-        except (KeyError, ValueError, IndexError):
-            return None
-
-
-# ============================================================================
-# Provider Factory
-# ============================================================================
-
-def get_provider(exchange: str) -> WebSocketProvider:
-    providers = {
-        "binance": BinanceWebSocketProvider,
-        "okx": OKXWebSocketProvider,
-        "bybit": BybitWebSocketProvider,
-        "gateio": GateIOWebSocketProvider,
-        "bitget": BitgetWebSocketProvider,
-        "htx": HTXWebSocketProvider,
-        "kucoin": KuCoinWebSocketProvider,
-        "mexc": MEXCWebSocketProvider,
-    }
-    provider_class = providers.get(exchange.lower())
-    if not provider_class:
-        raise ValueError(f"Unknown exchange: {exchange}")
-    return provider_class()
-
-
 # ============================================================================
 # Spread Calculator - Real-time (no aggregation)
 # ============================================================================
@@ -1040,28 +105,76 @@ class SpreadCalculator:
 # ============================================================================
 
 class SpreadBuffer:
+    """Preallocated NumPy ring buffer of (timestamp, entry, exit) ticks
+    
+    Every tick is written twice, at i and i + capacity, so the newest points are
+    always one contiguous, time-ordered slice and get_data() returns views
+    without copying. The capacity has SLACK slots more than max_points: the
+    writer keeps filling slots outside the returned window for a while, so a
+    view being plotted is not overwritten under it.
+    """
+    SLACK = 4096
+    
     def __init__(self, max_points: int = 1000):
         self.max_points = max_points
-        self.data: deque = deque(maxlen=max_points)
+        self.capacity = max_points + self.SLACK
+        self._data = np.zeros((3, 2 * self.capacity))
+        self._index = 0
+        self._count = 0
+        self.version = 0  # Bumped on every change, lets the chart skip frames without new data
         self._lock = threading.Lock()
     
     def add(self, spread: SpreadData):
         with self._lock:
-            self.data.append(spread)
+            i = self._index
+            self._data[:, i] = self._data[:, i + self.capacity] = (
+                spread.timestamp, spread.entry_spread, spread.exit_spread
+            )
+            self._index = (i + 1) % self.capacity
+            self._count = min(self._count + 1, self.max_points)
+            self.version += 1
     
-    def get_data(self) -> Tuple[List[float], List[float], List[float]]:
+    def get_data(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Views of the last max_points ticks (oldest first)"""
         with self._lock:
-            if not self.data:
-                return [], [], []
-            
-            timestamps = [d.timestamp for d in self.data]
-            entry = [d.entry_spread for d in self.data]
-            exit_s = [d.exit_spread for d in self.data]
-            return timestamps, entry, exit_s
+            end = self._index + self.capacity
+            window = self._data[:, end - self._count:end]
+            return window[0], window[1], window[2]
     
     def clear(self):
         with self._lock:
-            self.data.clear()
+            self._index = 0
+            self._count = 0
+            self.version += 1
+
+
+def decimate_minmax(x: np.ndarray, y: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Min/max decimation for line plots: at most 2 points per pixel column.
+    
+    Points are split into `width` equal buckets and each bucket is drawn as its minimum
+    and maximum in time order, so every spike stays visible.
+    
+    Args:
+        x: Sorted x values
+        y: Values at x
+        width: Plot width in pixels
+    
+    Returns:
+        (x, y) unchanged when they already fit, else decimated copies
+    """
+    count = len(x)
+    if width <= 0 or count <= 2 * width:
+        return x, y
+    bucket = -(-count // width)
+    full = count // bucket * bucket
+    blocks = y[:full].reshape(-1, bucket)
+    offsets = np.arange(0, full, bucket)
+    lows = offsets + blocks.argmin(axis=1)
+    highs = offsets + blocks.argmax(axis=1)
+    rows = np.sort(np.stack([lows, highs], axis=1), axis=1).ravel()
+    rows = np.r_[rows, np.arange(full, count)]
+    return x[rows], y[rows]
 
 
 # ============================================================================
@@ -1120,7 +233,9 @@ class MainWindow(QMainWindow):
         self.async_mgr = AsyncLoopManager()
         self.signals = SignalBridge()
         self.calculator = SpreadCalculator()
-        self.buffer = SpreadBuffer(max_points=2000)
+        # Hours of ticks: the chart is decimated to its pixel width when drawn
+        self.buffer = SpreadBuffer(max_points=500_000)
+        self._drawn_version = -1
         
         self.provider_a: Optional[WebSocketProvider] = None
         self.provider_b: Optional[WebSocketProvider] = None
@@ -1411,16 +526,28 @@ class MainWindow(QMainWindow):
         self.status_label.setText(f"Live • {datetime.now().strftime('%H:%M:%S.%f')[:-3]}")
     
     def _update_chart(self):
+        # Skip frames without new ticks
+        version = self.buffer.version
+        if version == self._drawn_version:
+            return
+        self._drawn_version = version
+        
         timestamps, entry, exit_s = self.buffer.get_data()
-        if not timestamps:
+        if not len(timestamps):
+            self.entry_curve.setData([], [])
+            self.exit_curve.setData([], [])
             return
         
         # Relative time from start
-        base = timestamps[0]
-        rel = [t - base for t in timestamps]
+        rel = timestamps - timestamps[0]
+        
+        # Entry and exit are decimated separately, each keeps its own extremes
+        width = int(self.chart.getPlotItem().vb.width())
+        entry_x, entry = decimate_minmax(rel, entry, width)
+        exit_x, exit_s = decimate_minmax(rel, exit_s, width)
         
-        self.entry_curve.setData(rel, entry)
-        self.exit_curve.setData(rel, exit_s)
+        self.entry_curve.setData(entry_x, entry)
+        self.exit_curve.setData(exit_x, exit_s)
     
     def closeEvent(self, event):
         self._disconnect()
@@ -31,6 +31,7 @@ apscheduler.util.astimezone = fixed_astimezone
 import logging
 import asyncio
 import json
+import time
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application,
@@ -40,7 +41,11 @@ from telegram.ext import (
     ContextTypes
 )
 from utils.config_loader import ConfigLoader
+from utils.alert_queue import AlertDispatcher
+from utils.subscriptions import Subscription, SubscriptionIndex
 from exchanges.funding_rates import FundingRateManager
+from exchanges.collector import CollectorClient
+from exchanges.spread_state import format_duration, spread_path_id
 from datetime import datetime
 
 # Configure logging - suppress verbose libraries
@@ -59,20 +64,34 @@ logger = logging.getLogger(__name__)
 class TelegramBot:
     """Telegram bot for monitoring funding rates across exchanges"""
     
+    SPREAD_MODE_DISPLAY = {
+        'futures-futures': 'Futures-Futures',
+        'margin-futures': 'Margin-Futures',
+        'futures-margin': 'Futures-Margin'
+    }
+
     def __init__(self):
         """Initialize bot with configuration and funding manager"""
         self.config = ConfigLoader()
-        self.funding_manager = FundingRateManager()
+        # Use the shared collector daemon if configured, otherwise poll exchanges directly
+        self.funding_manager = FundingRateManager(collector=CollectorClient.from_config(self.config))
         self.utc = pytz.UTC
         self.cached_opportunities = []  # Cache for callback handling
         self.cached_price_spreads = []  # Cache for price spread handling
         self.cached_margin_opportunities = []  # Cache for margin opportunities
         self.cached_cross_spreads = []  # Cache for cross-market spreads
+        # Snapshot versions the cached lists were built from - buttons carry the
+        # version so a stale button never resolves against a newer list
+        self.cached_opportunities_version = 0
+        self.cached_cross_spreads_version = 0
+        self.cached_funding_snapshot = {}  # funding_data dict behind cached_opportunities
         
         # Monitoring state
         self.monitoring_active = False
         self.monitoring_interval = 0  # NO INTERVAL - continuous monitoring
         self.monitoring_task = None
+        self.alert_dispatcher = AlertDispatcher(self._deliver_spread_alerts)
+        self.subscriptions = SubscriptionIndex.from_config(self.config)
         self.app = None  # Will be set in run()
         
         # Exchange URLs for linking
@@ -250,6 +269,10 @@ Alerts on NEW spread opportunities!
 
 **/pairs** - Show exchange pair coverage map
 
+**/subscribe** `[min] [max]` - Get monitor alerts in this chat
+**/subfilter** - Per-chat exchange/symbol/blocked filters
+**/unsubscribe** - Stop alerts in this chat
+
 **/next** - Countdown to next funding payments
 
 **Modes Explained:**
@@ -278,54 +301,94 @@ Binance, OKX, Bybit, MEXC, HTX, Gate.io, KuCoin, BitGet
             logger.error(f"Error in funding command: {str(e)}", exc_info=True)
             await update.message.reply_text(f"❌ Error fetching data: {str(e)}")
     
+    def _snapshot_footer(self, need_funding: bool = False) -> str:
+        """Describe the snapshot a reply was built from"""
+        age = self.funding_manager.snapshot_age(need_funding)
+        age_text = f"{age:.0f}s ago" if age is not None else "n/a"
+        return f"\n📸 _Snapshot #{self.funding_manager.snapshot_version} • updated {age_text}_"
+
+    def _refresh_markup(self, view: str, keyboard: List[list] = None) -> InlineKeyboardMarkup:
+        """Append a refresh button (forces a new fetch) to a keyboard"""
+        keyboard = list(keyboard or [])
+        keyboard.append([InlineKeyboardButton("🔄 Refresh", callback_data=f"refresh_{view}")])
+        return InlineKeyboardMarkup(keyboard)
+
+    def _parse_versioned_callback(self, data: str, cached_version: int):
+        """Parse `<prefix>_<version>_<index>` callback data, None if it is stale"""
+        parts = data.split("_")
+        if len(parts) != 3:
+            return None
+        version, index = int(parts[1]), int(parts[2])
+        if version != cached_version:
+            return None
+        return index
+
+    def _needs_fetch_notice(self, max_age: float, need_funding: bool = False) -> bool:
+        age = self.funding_manager.snapshot_age(need_funding)
+        return age is None or age > max_age
+
     async def _handle_futures_funding(self, update: Update) -> None:
         """Handle futures-futures funding mode"""
-        await update.message.reply_text("🔄 Fetching latest funding data from all 9 exchanges...")
+        max_age = self.config.snapshot_max_age
+        if self._needs_fetch_notice(max_age, need_funding=True):
+            await update.message.reply_text("🔄 Fetching latest funding data from all 9 exchanges...")
         
-        opportunities = await self.funding_manager.get_funding_opportunities()
+        message, reply_markup = await self._build_futures_funding_view(max_age)
+        await update.message.reply_text(
+            message, 
+            parse_mode='Markdown', 
+            reply_markup=reply_markup
+        )
+    
+    async def _build_futures_funding_view(self, max_age: float = None):
+        """Build the /funding reply from a snapshot at most max_age seconds old"""
+        opportunities = await self.funding_manager.get_funding_opportunities(max_age)
         if not opportunities:
-            await update.message.reply_text("❌ No funding opportunities found at the moment.")
-            return
+            return "❌ No funding opportunities found at the moment.", self._refresh_markup('funding')
 
         # Filter blocked tokens
         opportunities = [opp for opp in opportunities if not self._is_symbol_blocked(opp['symbol'])]
         
         if not opportunities:
-            await update.message.reply_text("❌ No opportunities found (all tokens blocked).")
-            return
+            return "❌ No opportunities found (all tokens blocked).", self._refresh_markup('funding')
 
-        # Cache opportunities for callback handling
+        # Cache opportunities (and the snapshot behind them) for callback handling
         self.cached_opportunities = opportunities
+        self.cached_opportunities_version = self.funding_manager.snapshot_version
+        self.cached_funding_snapshot = self.funding_manager.funding_data
         
-        # Create inline keyboard with opportunity buttons
+        return self._render_funding_list(), self._funding_list_markup()
+
+    def _funding_list_markup(self) -> InlineKeyboardMarkup:
+        """Create inline keyboard with opportunity buttons"""
         keyboard = []
-        for i, opp in enumerate(opportunities[:20], 1):  # Show top 20
+        for i, opp in enumerate(self.cached_opportunities[:20], 1):  # Show top 20
             spread = opp['spread_magnitude']
             button_text = f"{opp['symbol']} ({spread:.4f}%)"
-            callback_data = f"detail_{i-1}"  # Use index for callback
+            callback_data = f"detail_{self.cached_opportunities_version}_{i-1}"
             keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+        return self._refresh_markup('funding', keyboard)
+
+    def _render_funding_list(self) -> str:
         message = "💰 **Top Funding Opportunities (Futures-Futures):**\n\n"
         message += "Click any button to see detailed analysis:\n\n"
         
         # Show summary of top 5
-        for i, opp in enumerate(opportunities[:5], 1):
+        for i, opp in enumerate(self.cached_opportunities[:5], 1):
             spread = opp['spread_magnitude']
-            message += f"{i}. **{opp['symbol']}**: {spread:.4f}% profit\n"
+            net_info = f" ({opp['net_profit']:+.4f}% after fees)" if 'net_profit' in opp else ""
+            message += f"{i}. **{opp['symbol']}**: {spread:.4f}% profit{net_info}\n"
         
-        await update.message.reply_text(
-            message, 
-            parse_mode='Markdown', 
-            reply_markup=reply_markup
-        )
+        message += self._snapshot_footer(need_funding=True)
+        return message
     
     async def _handle_margin_funding(self, update: Update) -> None:
         """Handle futures-margin funding mode (similar to futures-futures display)"""
-        await update.message.reply_text("🔄 Fetching margin arbitrage data (futures + margin)...")
+        max_age = self.config.snapshot_max_age
+        if self._needs_fetch_notice(max_age, need_funding=True):
+            await update.message.reply_text("🔄 Fetching margin arbitrage data (futures + margin)...")
         
-        opportunities = await self.funding_manager.get_margin_opportunities()
+        opportunities = await self.funding_manager.get_margin_opportunities(max_age)
         if not opportunities:
             await update.message.reply_text(
                 "❌ No margin arbitrage opportunities found.\n\n"
@@ -416,84 +479,12 @@ Current mode: `{current_mode}`
         """Handle /spread command - show price spreads between exchanges based on spread mode"""
         try:
             spread_mode = self.config.spread_mode
-            mode_display = {
-                'futures-futures': 'Futures-Futures',
-                'margin-futures': 'Margin-Futures',
-                'futures-margin': 'Futures-Margin'
-            }
-            
-            await update.message.reply_text(f"⚡ Fetching {mode_display.get(spread_mode, spread_mode)} spreads (FAST - prices only)...")
-            
-            price_spreads = await self.funding_manager.get_cross_market_spreads(spread_mode)
-            if not price_spreads:
-                await update.message.reply_text(
-                    f"❌ No {mode_display.get(spread_mode, spread_mode)} spread data found.\n\n"
-                    "Try changing the mode with /setspreadmode"
-                )
-                return
-
-            # Filter out blocked tokens
-            filtered_spreads = [s for s in price_spreads if not self._is_symbol_blocked(s['symbol'])]
-            
-            # Group by symbol - keep only the best spread per symbol
-            symbol_best_spread: Dict[str, dict] = {}
-            for spread in filtered_spreads:
-                symbol = spread['symbol']
-                if symbol not in symbol_best_spread:
-                    symbol_best_spread[symbol] = spread
-                elif spread['spread_percentage'] > symbol_best_spread[symbol]['spread_percentage']:
-                    symbol_best_spread[symbol] = spread
-            
-            # Convert back to sorted list
-            grouped_spreads = sorted(
-                symbol_best_spread.values(), 
-                key=lambda x: x['spread_percentage'], 
-                reverse=True
-            )
+            max_age = self.config.snapshot_max_age
             
-            # Cache grouped spreads for callback handling
-            self.cached_cross_spreads = grouped_spreads
-            
-            # Create inline keyboard with price spread buttons (one per symbol)
-            keyboard = []
-            for i, spread in enumerate(grouped_spreads[:20], 1):  # Show top 20
-                spread_pct = spread['spread_percentage']
-                high_ex = spread['highest_exchange']
-                low_ex = spread['lowest_exchange']
-                high_market = spread.get('highest_market', 'futures')[0].upper()  # F or M
-                low_market = spread.get('lowest_market', 'futures')[0].upper()
-                
-                button_text = f"{spread['symbol']} ({spread_pct:.2f}%) [{high_ex[:3]}{high_market}→{low_ex[:3]}{low_market}]"
-                callback_data = f"cspread_{i-1}"  # Cross-spread index
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-            
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            # Get mode emoji
-            mode_emoji = "📈" if spread_mode == 'futures-futures' else "💹"
-            
-            blocked_tokens = self.config.blocked_tokens
-            blocked_info = f"\n🚫 Blocked: {len(blocked_tokens)} tokens" if blocked_tokens else ""
-            
-            total_found = len(filtered_spreads)
-            total_symbols = len(grouped_spreads)
-            message = f"{mode_emoji} **Top Price Spreads ({mode_display.get(spread_mode, spread_mode)}):**{blocked_info}\n"
-            message += f"📊 Found **{total_found}** spreads across **{total_symbols}** symbols\n\n"
-            message += "_Click any button to see detailed analysis:_\n\n"
-            
-            # Show summary of top 5
-            for i, spread in enumerate(grouped_spreads[:5], 1):
-                spread_pct = spread['spread_percentage']
-                high_ex = spread['highest_exchange']
-                low_ex = spread['lowest_exchange']
-                high_market = spread.get('highest_market', 'futures')
-                low_market = spread.get('lowest_market', 'futures')
-                all_paths = spread.get('all_paths_count', 0)
-                
-                paths_info = f" ({all_paths} paths)" if all_paths > 1 else ""
-                message += f"{i}. **{spread['symbol']}**: {spread_pct:.2f}%{paths_info}\n"
-                message += f"   └ {high_ex}({high_market}) → {low_ex}({low_market})\n"
+            if self._needs_fetch_notice(max_age):
+                await update.message.reply_text(f"⚡ Fetching {self.SPREAD_MODE_DISPLAY.get(spread_mode, spread_mode)} spreads (FAST - prices only)...")
             
+            message, reply_markup = await self._build_spreads_view(max_age)
             await update.message.reply_text(
                 message, 
                 parse_mode='Markdown', 
@@ -504,6 +495,85 @@ Current mode: `{current_mode}`
             logger.error(f"Error in spread command: {str(e)}", exc_info=True)
             await update.message.reply_text(f"❌ Error fetching spread data: {str(e)}")
 
+    async def _build_spreads_view(self, max_age: float = None):
+        """Build the /spread reply from a snapshot at most max_age seconds old"""
+        spread_mode = self.config.spread_mode
+        mode_display = self.SPREAD_MODE_DISPLAY
+        
+        price_spreads = await self.funding_manager.get_cross_market_spreads(spread_mode, max_age)
+        if not price_spreads:
+            return (
+                f"❌ No {mode_display.get(spread_mode, spread_mode)} spread data found.\n\n"
+                "Try changing the mode with /setspreadmode",
+                self._refresh_markup('spread')
+            )
+
+        # Filter out blocked tokens
+        filtered_spreads = [s for s in price_spreads if not self._is_symbol_blocked(s['symbol'])]
+        
+        # Group by symbol - keep only the best spread per symbol
+        symbol_best_spread: Dict[str, dict] = {}
+        for spread in filtered_spreads:
+            symbol = spread['symbol']
+            if symbol not in symbol_best_spread:
+                symbol_best_spread[symbol] = spread
+            elif spread['spread_percentage'] > symbol_best_spread[symbol]['spread_percentage']:
+                symbol_best_spread[symbol] = spread
+        
+        # Convert back to sorted list
+        grouped_spreads = sorted(
+            symbol_best_spread.values(), 
+            key=lambda x: x['spread_percentage'], 
+            reverse=True
+        )
+        
+        # Cache grouped spreads for callback handling
+        self.cached_cross_spreads = grouped_spreads
+        self.cached_cross_spreads_version = self.funding_manager.snapshot_version
+        
+        # Get mode emoji
+        mode_emoji = "📈" if spread_mode == 'futures-futures' else "💹"
+        
+        blocked_tokens = self.config.blocked_tokens
+        blocked_info = f"\n🚫 Blocked: {len(blocked_tokens)} tokens" if blocked_tokens else ""
+        
+        total_found = len(filtered_spreads)
+        total_symbols = len(grouped_spreads)
+        message = f"{mode_emoji} **Top Price Spreads ({mode_display.get(spread_mode, spread_mode)}):**{blocked_info}\n"
+        message += f"📊 Found **{total_found}** spreads across **{total_symbols}** symbols\n\n"
+        message += "_Click any button to see detailed analysis:_\n\n"
+        
+        # Show summary of top 5
+        for i, spread in enumerate(grouped_spreads[:5], 1):
+            spread_pct = spread['spread_percentage']
+            high_ex = spread['highest_exchange']
+            low_ex = spread['lowest_exchange']
+            high_market = spread.get('highest_market', 'futures')
+            low_market = spread.get('lowest_market', 'futures')
+            all_paths = spread.get('all_paths_count', 0)
+            
+            paths_info = f" ({all_paths} paths)" if all_paths > 1 else ""
+            message += f"{i}. **{spread['symbol']}**: {spread_pct:.2f}%{paths_info}\n"
+            message += f"   └ {high_ex}({high_market}) → {low_ex}({low_market})\n"
+        
+        message += self._snapshot_footer()
+        return message, self._cross_spread_markup()
+
+    def _cross_spread_markup(self) -> InlineKeyboardMarkup:
+        """Create inline keyboard with price spread buttons (one per symbol)"""
+        keyboard = []
+        for i, spread in enumerate(self.cached_cross_spreads[:20], 1):  # Show top 20
+            spread_pct = spread['spread_percentage']
+            high_ex = spread['highest_exchange']
+            low_ex = spread['lowest_exchange']
+            high_market = spread.get('highest_market', 'futures')[0].upper()  # F or M
+            low_market = spread.get('lowest_market', 'futures')[0].upper()
+            
+            button_text = f"{spread['symbol']} ({spread_pct:.2f}%) [{high_ex[:3]}{high_market}→{low_ex[:3]}{low_market}]"
+            callback_data = f"cspread_{self.cached_cross_spreads_version}_{i-1}"  # Cross-spread index
+            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
+        return self._refresh_markup('spread', keyboard)
+
     async def setspreadmode_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /setspreadmode command - show spread mode selection buttons"""
         current_mode = self.config.spread_mode
@@ -668,6 +738,25 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
                 )
                 return
             
+            # Handle refresh buttons - the only place a fetch is forced
+            if query.data.startswith("refresh_"):
+                view = query.data.replace("refresh_", "")
+                builders = {
+                    'funding': self._build_futures_funding_view,
+                    'spread': self._build_spreads_view,
+                    'next': self._build_next_funding_view,
+                    'pairs': self._build_pairs_view,
+                }
+                if view not in builders:
+                    return
+                message, reply_markup = await builders[view](0)
+                await query.edit_message_text(
+                    message,
+                    parse_mode='Markdown',
+                    reply_markup=reply_markup
+                )
+                return
+            
             # Handle "Back to funding" button
             if query.data == "back_to_funding":
                 # Recreate the main funding opportunities list
@@ -675,28 +764,10 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
                     await query.edit_message_text("❌ No cached funding data. Please run /funding again.")
                     return
                 
-                # Create inline keyboard with opportunity buttons
-                keyboard = []
-                for i, opp in enumerate(self.cached_opportunities[:20], 1):  # Show top 20
-                    spread = opp['spread_magnitude']
-                    button_text = f"{opp['symbol']} ({spread:.4f}%)"
-                    callback_data = f"detail_{i-1}"  # Use index for callback
-                    keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                message = "💰 **Top Funding Opportunities:**\n\n"
-                message += "Click any button to see detailed analysis:\n\n"
-                
-                # Show summary of top 5
-                for i, opp in enumerate(self.cached_opportunities[:5], 1):
-                    spread = opp['spread_magnitude']
-                    message += f"{i}. **{opp['symbol']}**: {spread:.4f}% profit\n"
-                
                 await query.edit_message_text(
-                    message, 
+                    self._render_funding_list(), 
                     parse_mode='Markdown', 
-                    reply_markup=reply_markup
+                    reply_markup=self._funding_list_markup()
                 )
                 return
             
@@ -772,25 +843,7 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
                     return
                 
                 spread_mode = self.config.spread_mode
-                mode_display = {
-                    'futures-futures': 'Futures-Futures',
-                    'margin-futures': 'Margin-Futures',
-                    'futures-margin': 'Futures-Margin'
-                }
-                
-                keyboard = []
-                for i, spread in enumerate(self.cached_cross_spreads[:20], 1):
-                    spread_pct = spread['spread_percentage']
-                    high_ex = spread['highest_exchange']
-                    low_ex = spread['lowest_exchange']
-                    high_market = spread.get('highest_market', 'futures')[0].upper()
-                    low_market = spread.get('lowest_market', 'futures')[0].upper()
-                    
-                    button_text = f"{spread['symbol']} ({spread_pct:.2f}%) [{high_ex[:3]}{high_market}→{low_ex[:3]}{low_market}]"
-                    callback_data = f"cspread_{i-1}"
-                    keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-                
-                reply_markup = InlineKeyboardMarkup(keyboard)
+                mode_display = self.SPREAD_MODE_DISPLAY
                 
                 mode_emoji = "📈" if spread_mode == 'futures-futures' else "💹"
                 message = f"{mode_emoji} **Top Price Spreads ({mode_display.get(spread_mode, spread_mode)}):**\n\n"
@@ -811,22 +864,22 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
                 await query.edit_message_text(
                     message,
                     parse_mode='Markdown',
-                    reply_markup=reply_markup
+                    reply_markup=self._cross_spread_markup()
                 )
                 return
             
             # Parse callback data for funding details
             if query.data.startswith("detail_"):
-                index = int(query.data.split("_")[1])
+                index = self._parse_versioned_callback(query.data, self.cached_opportunities_version)
                 
-                if index >= len(self.cached_opportunities):
+                if index is None or index >= len(self.cached_opportunities):
                     await query.edit_message_text("❌ Opportunity data expired. Please run /funding again.")
                     return
                 
                 opp = self.cached_opportunities[index]
                 
-                # Get all exchange data for this symbol
-                all_exchange_data = await self._get_all_exchange_data_for_symbol(opp['symbol'])
+                # Get all exchange data for this symbol from the snapshot the list was built from
+                all_exchange_data = await self._get_all_exchange_data_for_symbol(opp['symbol'], self.cached_funding_snapshot)
                 
                 # Format detailed message
                 detailed_msg = self._format_detailed_opportunity(opp, all_exchange_data)
@@ -895,9 +948,9 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
             
             # Parse callback data for cross-market spread details
             elif query.data.startswith("cspread_"):
-                index = int(query.data.split("_")[1])
+                index = self._parse_versioned_callback(query.data, self.cached_cross_spreads_version)
                 
-                if index >= len(self.cached_cross_spreads):
+                if index is None or index >= len(self.cached_cross_spreads):
                     await query.edit_message_text("❌ Spread data expired. Please run /spread again.")
                     return
                 
@@ -921,11 +974,14 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
             logger.error(f"Error in button callback: {str(e)}", exc_info=True)
             await query.edit_message_text(f"❌ Error loading details: {str(e)}")
 
-    async def _get_all_exchange_data_for_symbol(self, symbol: str) -> dict:
+    async def _get_all_exchange_data_for_symbol(self, symbol: str, funding_data: dict = None) -> dict:
         """Get funding rates and bid/ask prices for a symbol from all exchanges"""
         result = {}
         
-        for ex_name, ex_data in self.funding_manager.funding_data.items():
+        if funding_data is None:
+            funding_data = self.funding_manager.funding_data
+        
+        for ex_name, ex_data in funding_data.items():
             rates = ex_data.get('funding_rates', {})
             order_books = ex_data.get('order_books', {})
             
@@ -968,6 +1024,8 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
         # Spreads - CORRECTED
         profit = opp['spread_magnitude']
         msg += f"**Спред ставок:** {profit:.4f}%\n"
+        if 'net_profit' in opp:
+            msg += f"**После комиссий:** {opp['net_profit']:+.4f}% (комиссии {opp['fee_cost']:.4f}%)\n"
         msg += f"**Спред цен:** {opp['price_spread']:+.4f}%\n\n"
         
         # All exchanges table
@@ -1295,24 +1353,29 @@ _Higher max values include potentially bad data (e.g., exchanges with price 0)_
     async def next_funding_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /next command"""
         try:
-            next_fundings = await self.funding_manager.get_next_funding_times()
-            
-            if not next_fundings:
-                await update.message.reply_text("❌ No funding time data available.")
-                return
-                
-            message = "⏰ **Next Funding Payments (All Exchanges):**\n\n"
-            
-            for exchange, funding_time in sorted(next_fundings.items()):
-                time_remaining = self._calculate_time_remaining(funding_time)
-                message += f"🏛️ **{exchange}**: {time_remaining}\n"
-
-            await update.message.reply_text(message, parse_mode='Markdown')
+            message, reply_markup = await self._build_next_funding_view(self.config.snapshot_max_age)
+            await update.message.reply_text(message, parse_mode='Markdown', reply_markup=reply_markup)
             
         except Exception as e:
             logger.error(f"Error in next funding command: {str(e)}", exc_info=True)
             await update.message.reply_text(f"❌ Error fetching funding times: {str(e)}")
 
+    async def _build_next_funding_view(self, max_age: float = None):
+        """Build the /next reply from a snapshot at most max_age seconds old"""
+        next_fundings = await self.funding_manager.get_next_funding_times(max_age)
+        
+        if not next_fundings:
+            return "❌ No funding time data available.", self._refresh_markup('next')
+            
+        message = "⏰ **Next Funding Payments (All Exchanges):**\n\n"
+        
+        for exchange, funding_time in sorted(next_fundings.items()):
+            time_remaining = self._calculate_time_remaining(funding_time)
+            message += f"🏛️ **{exchange}**: {time_remaining}\n"
+        
+        message += self._snapshot_footer(need_funding=True)
+        return message, self._refresh_markup('next')
+
     async def block_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /block command - block/unblock tokens from spread results"""
         try:
@@ -1385,6 +1448,137 @@ No tokens blocked.
             logger.error(f"Error in block command: {str(e)}", exc_info=True)
             await update.message.reply_text(f"❌ Error: {str(e)}")
 
+    def _format_subscription(self, sub: Subscription) -> str:
+        """Format a subscriber's alert filters"""
+        exchanges = ", ".join(sub.exchanges) if sub.exchanges else "all"
+        symbols = ", ".join(sub.symbols) if sub.symbols else "all"
+        blocked = ", ".join(sub.blocked) if sub.blocked else "none"
+        return (
+            f"• Spread: `{sub.min_spread}%` - `{sub.max_spread}%`\n"
+            f"• Exchanges: `{exchanges}`\n"
+            f"• Symbols: `{symbols}`\n"
+            f"• Blocked: `{blocked}`"
+        )
+
+    async def subscribe_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /subscribe command - subscribe this chat to monitor alerts"""
+        try:
+            args = context.args if context.args else []
+            chat_id = str(update.effective_chat.id)
+            sub = self.subscriptions.get(chat_id) or Subscription(chat_id=chat_id)
+            
+            if args:
+                try:
+                    min_spread = float(args[0])
+                    max_spread = float(args[1]) if len(args) > 1 else sub.max_spread
+                except ValueError:
+                    await update.message.reply_text("❌ Invalid numbers. Usage: `/subscribe <min> <max>`", parse_mode='Markdown')
+                    return
+                if min_spread < 0 or min_spread >= max_spread:
+                    await update.message.reply_text("❌ Min spread must be positive and less than max spread.")
+                    return
+                sub.min_spread = min_spread
+                sub.max_spread = max_spread
+            
+            self.subscriptions.upsert(sub)
+            if not self.subscriptions.save(self.config):
+                await update.message.reply_text("❌ Failed to save subscription. Please try again.")
+                return
+            
+            await update.message.reply_text(
+                f"🔔 **Subscribed to spread alerts**\n\n"
+                f"{self._format_subscription(sub)}\n\n"
+                f"`/subscribe <min> <max>` - Change spread range\n"
+                f"`/subfilter exchanges Binance,OKX` - Exchange allowlist\n"
+                f"`/subfilter symbols BTC,ETH` - Symbol allowlist\n"
+                f"`/subfilter block PEPE` - Toggle blocked token\n"
+                f"`/subfilter <exchanges|symbols|block> clear` - Reset filter\n"
+                f"`/unsubscribe` - Stop alerts",
+                parse_mode='Markdown'
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in subscribe command: {str(e)}", exc_info=True)
+            await update.message.reply_text(f"❌ Error: {str(e)}")
+
+    async def unsubscribe_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /unsubscribe command"""
+        try:
+            chat_id = str(update.effective_chat.id)
+            if not self.subscriptions.remove(chat_id):
+                await update.message.reply_text("ℹ️ This chat is not subscribed.")
+                return
+            self.subscriptions.save(self.config)
+            await update.message.reply_text("🔕 **Unsubscribed from spread alerts**", parse_mode='Markdown')
+            
+        except Exception as e:
+            logger.error(f"Error in unsubscribe command: {str(e)}", exc_info=True)
+            await update.message.reply_text(f"❌ Error: {str(e)}")
+
+    async def subfilter_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /subfilter command - per-chat exchange/symbol/blocked filters"""
+        try:
+            args = context.args if context.args else []
+            chat_id = str(update.effective_chat.id)
+            sub = self.subscriptions.get(chat_id)
+            
+            if sub is None:
+                await update.message.reply_text("ℹ️ Use /subscribe first.")
+                return
+            
+            if len(args) < 2 or args[0].lower() not in ('exchanges', 'symbols', 'block'):
+                await update.message.reply_text(
+                    f"⚙️ **Alert Filters**\n\n{self._format_subscription(sub)}\n\n"
+                    f"**Usage:**\n"
+                    f"`/subfilter exchanges Binance,OKX`\n"
+                    f"`/subfilter symbols BTC,ETH`\n"
+                    f"`/subfilter block PEPE`\n"
+                    f"`/subfilter <exchanges|symbols|block> clear`",
+                    parse_mode='Markdown'
+                )
+                return
+            
+            kind = args[0].lower()
+            values = [v.strip() for v in " ".join(args[1:]).split(',') if v.strip()]
+            clear = len(values) == 1 and values[0].lower() == 'clear'
+            
+            if kind == 'exchanges':
+                if clear:
+                    sub.exchanges = []
+                else:
+                    known = {name.lower(): name for name in self.funding_manager.exchanges}
+                    unknown = [v for v in values if v.lower() not in known]
+                    if unknown:
+                        await update.message.reply_text(
+                            f"❌ Unknown exchange(s): `{', '.join(unknown)}`\n"
+                            f"Available: `{', '.join(self.funding_manager.exchanges)}`",
+                            parse_mode='Markdown'
+                        )
+                        return
+                    sub.exchanges = [known[v.lower()] for v in values]
+            elif kind == 'symbols':
+                sub.symbols = [] if clear else [v.upper() for v in values]
+            else:
+                if clear:
+                    sub.blocked = []
+                else:
+                    for token in (v.upper() for v in values):
+                        if token in sub.blocked:
+                            sub.blocked.remove(token)
+                        else:
+                            sub.blocked.append(token)
+            
+            self.subscriptions.upsert(sub)
+            self.subscriptions.save(self.config)
+            await update.message.reply_text(
+                f"✅ **Alert filters updated**\n\n{self._format_subscription(sub)}",
+                parse_mode='Markdown'
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in subfilter command: {str(e)}", exc_info=True)
+            await update.message.reply_text(f"❌ Error: {str(e)}")
+
     async def monitor_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /monitor command - start/stop spread monitoring"""
         try:
@@ -1478,8 +1672,14 @@ Mode: `⚡ NO INTERVAL - Maximum Speed`
                     new_spreads = self.funding_manager.detect_new_spreads(spreads)
                     
                     if new_spreads:
-                        # Send alerts for new spreads
-                        await self._send_new_spread_alerts(new_spreads)
+                        # Re-quote both legs so stale bulk tickers don't produce fake alerts
+                        new_spreads = await self.funding_manager.confirm_spreads(new_spreads)
+                    
+                    if new_spreads:
+                        # Depth-aware sizing for the top candidates only
+                        await self.funding_manager.evaluate_executable_spreads(new_spreads)
+                        # Hand off to the alert dispatcher - detection never waits on Telegram
+                        self._queue_new_spread_alerts(new_spreads)
                 
                 # MINIMAL delay just to yield control - effectively continuous
                 await asyncio.sleep(0.1)
@@ -1490,135 +1690,160 @@ Mode: `⚡ NO INTERVAL - Maximum Speed`
         
         logger.info("Monitoring loop stopped")
 
-    async def _send_new_spread_alerts(self, new_spreads: List[dict]) -> None:
-        """Send Telegram alerts for new spread opportunities"""
-        if not self.app:
+    def _queue_new_spread_alerts(self, new_spreads: List[dict]) -> None:
+        """Queue alerts for every matching subscriber - never blocks on Telegram I/O"""
+        if not self.app or not len(self.subscriptions):
             return
         
-        chat_id = self.config.telegram_chat_id
-        if not chat_id:
-            return
+        self.alert_dispatcher.start()
+        for spread in new_spreads:
+            path_id = spread_path_id(spread)
+            priority = spread.get('spread_percentage', 0)
+            for chat_id in self.subscriptions.match_spread(spread):
+                self.alert_dispatcher.submit(chat_id, path_id, spread, priority=priority)
+
+    async def _deliver_spread_alerts(self, chat_id, spreads: List[dict]) -> None:
+        """Alert dispatcher callback: one message per alert, or one combined message under burst"""
+        if len(spreads) == 1:
+            msg = self._format_spread_alert(spreads[0])
+        else:
+            msg = self._format_spread_alert_batch(spreads)
         
+        await self.app.bot.send_message(
+            chat_id=chat_id,
+            text=msg,
+            parse_mode='Markdown',
+            disable_web_page_preview=True
+        )
+
+    def _format_spread_alert(self, spread: dict) -> str:
+        """Format a single spread alert message"""
         # Position sizing
-        TOTAL_POSITION_USD = 50.0
+        TOTAL_POSITION_USD = self.funding_manager.depth_notional_usd
         NUM_PARTS = 4
         
-        # Send summary if many new spreads found
-        if len(new_spreads) > 10:
-            try:
-                summary_msg = f"🔔 **{len(new_spreads)} new spread opportunities found!**\n"
-                summary_msg += f"Showing top 10 alerts below."
-                await self.app.bot.send_message(
-                    chat_id=chat_id, text=summary_msg,
-                    parse_mode='Markdown', disable_web_page_preview=True
-                )
-            except Exception:
-                pass
+        is_increase = 'spread_increase' in spread
         
-        for spread in new_spreads[:10]:  # Limit to 10 alerts at once
-            try:
-                is_increase = 'spread_increase' in spread
-                
-                if is_increase:
-                    emoji = "📈"
-                    title = "Spread Increased!"
-                    extra_info = f"Increased by: **+{spread['spread_increase']:.2f}%**"
-                else:
-                    emoji = "🆕"
-                    title = "New Spread Detected!"
-                    extra_info = ""
-                
-                # Get prices - support both futures-futures keys (buy_ask/sell_bid)
-                # and margin keys (lowest_price/highest_price)
-                buy_price = spread.get('buy_ask') or spread.get('lowest_price', 0)
-                sell_price = spread.get('sell_bid') or spread.get('highest_price', 0)
-                
-                buy_exchange = spread.get('lowest_exchange', '')
-                sell_exchange = spread.get('highest_exchange', '')
-                buy_market = spread.get('lowest_market', 'futures')
-                sell_market = spread.get('highest_market', 'futures')
-                
-                if buy_price > 0 and sell_price > 0:
-                    coins_on_buy_exchange = TOTAL_POSITION_USD / buy_price
-                    coins_on_sell_exchange = TOTAL_POSITION_USD / sell_price
-                    max_equal_coins = min(coins_on_buy_exchange, coins_on_sell_exchange)
-                    part_coins = max_equal_coins / NUM_PARTS
-                    usd_needed_buy = max_equal_coins * buy_price
-                    usd_needed_sell = max_equal_coins * sell_price
-                else:
-                    max_equal_coins = 0
-                    part_coins = 0
-                    usd_needed_buy = 0
-                    usd_needed_sell = 0
-                
-                msg = f"{emoji} **{title}**\n\n"
-                msg += f"`{spread['symbol']}` — **{spread['spread_percentage']:.2f}%**\n\n"
-                
-                msg += f"📉 **BUY** on {buy_exchange} ({buy_market})\n"
-                msg += f"   Ask: `${buy_price:.6f}`\n\n"
-                msg += f"📈 **SELL** on {sell_exchange} ({sell_market})\n"
-                msg += f"   Bid: `${sell_price:.6f}`\n\n"
-                
-                msg += f"💰 **Position (equal coins, ~${TOTAL_POSITION_USD:.0f}):**\n"
-                msg += f"   Full: `{max_equal_coins:.6f}` coins\n"
-                msg += f"   ÷4:   `{part_coins:.6f}` coins\n"
-                msg += f"   📊 BUY: ${usd_needed_buy:.2f} | SELL: ${usd_needed_sell:.2f}\n\n"
-                
-                if extra_info:
-                    msg += f"ℹ️ {extra_info}\n\n"
-                
-                buy_url = self._format_exchange_url(buy_exchange, spread['symbol'])
-                sell_url = self._format_exchange_url(sell_exchange, spread['symbol'])
-                
-                msg += f"🔗 [Open {buy_exchange}]({buy_url}) | [Open {sell_exchange}]({sell_url})"
-                
-                await self.app.bot.send_message(
-                    chat_id=chat_id,
-                    text=msg,
-                    parse_mode='Markdown',
-                    disable_web_page_preview=True
-                )
-                
-                await asyncio.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"Error sending spread alert for {spread.get('symbol', '?')}: {str(e)}")
+        if is_increase:
+            emoji = "📈"
+            title = "Spread Increased!"
+            extra_info = f"Increased by: **+{spread['spread_increase']:.2f}%**"
+        else:
+            emoji = "🆕"
+            title = "New Spread Detected!"
+            extra_info = ""
+        
+        # Get prices - support both futures-futures keys (buy_ask/sell_bid)
+        # and margin keys (lowest_price/highest_price)
+        buy_price = spread.get('buy_ask') or spread.get('lowest_price', 0)
+        sell_price = spread.get('sell_bid') or spread.get('highest_price', 0)
+        
+        buy_exchange = spread.get('lowest_exchange', '')
+        sell_exchange = spread.get('highest_exchange', '')
+        buy_market = spread.get('lowest_market', 'futures')
+        sell_market = spread.get('highest_market', 'futures')
+        
+        if buy_price > 0 and sell_price > 0:
+            coins_on_buy_exchange = TOTAL_POSITION_USD / buy_price
+            coins_on_sell_exchange = TOTAL_POSITION_USD / sell_price
+            max_equal_coins = min(coins_on_buy_exchange, coins_on_sell_exchange)
+            part_coins = max_equal_coins / NUM_PARTS
+            usd_needed_buy = max_equal_coins * buy_price
+            usd_needed_sell = max_equal_coins * sell_price
+        else:
+            max_equal_coins = 0
+            part_coins = 0
+            usd_needed_buy = 0
+            usd_needed_sell = 0
+        
+        msg = f"{emoji} **{title}**\n\n"
+        msg += f"`{spread['symbol']}` — **{spread['spread_percentage']:.2f}%**\n"
+        if spread.get('net_spread') is not None:
+            msg += f"💵 Net after fees/funding: **{spread['net_spread']:.2f}%** (fees {spread['fee_cost']:.2f}%, funding {spread['funding_edge']:+.3f}%)\n"
+        if spread.get('confirmed'):
+            msg += f"✅ Confirmed on fresh quotes (detected {spread['detected_spread']:.2f}%)\n"
+        elif spread.get('unconfirmable'):
+            msg += "⚠️ Unconfirmed - no single-symbol quotes on this venue pair\n"
+        if spread.get('opened_at') and spread.get('cycles_seen', 0) > 1:
+            msg += f"⏱ Open for {format_duration(time.time() - spread['opened_at'])} (peak {spread['peak_spread']:.2f}%)\n"
+        msg += "\n"
+        
+        msg += f"📉 **BUY** on {buy_exchange} ({buy_market})\n"
+        msg += f"   Ask: `${buy_price:.6f}`\n\n"
+        msg += f"📈 **SELL** on {sell_exchange} ({sell_market})\n"
+        msg += f"   Bid: `${sell_price:.6f}`\n\n"
+        
+        msg += f"💰 **Position (equal coins, ~${TOTAL_POSITION_USD:.0f}):**\n"
+        msg += f"   Full: `{max_equal_coins:.6f}` coins\n"
+        msg += f"   ÷4:   `{part_coins:.6f}` coins\n"
+        msg += f"   📊 BUY: ${usd_needed_buy:.2f} | SELL: ${usd_needed_sell:.2f}\n\n"
+        
+        if 'exec_spread' in spread:
+            depth_note = " ⚠️ thin book" if spread.get('exec_depth_limited') else ""
+            msg += f"📏 **Executable (${spread['exec_notional']:.0f}):** **{spread['exec_spread']:.2f}%**{depth_note}\n"
+            msg += f"   VWAP: `${spread['exec_buy_vwap']:.6f}` → `${spread['exec_sell_vwap']:.6f}`\n"
+            msg += f"   Slippage: {spread['exec_buy_slippage']:.3f}% / {spread['exec_sell_slippage']:.3f}%\n"
+            msg += f"   Max size ≥ min spread: ${spread['exec_max_notional']:,.0f}\n\n"
+        
+        if extra_info:
+            msg += f"ℹ️ {extra_info}\n\n"
+        
+        buy_url = self._format_exchange_url(buy_exchange, spread['symbol'])
+        sell_url = self._format_exchange_url(sell_exchange, spread['symbol'])
+        
+        msg += f"🔗 [Open {buy_exchange}]({buy_url}) | [Open {sell_exchange}]({sell_url})"
+        return msg
+
+    def _format_spread_alert_batch(self, spreads: List[dict]) -> str:
+        """Format several alerts as one compact message (used when alerts pile up)"""
+        msg = f"🔔 **{len(spreads)} spread alerts**\n\n"
+        for spread in spreads:
+            emoji = "📈" if 'spread_increase' in spread else "🆕"
+            buy_price = spread.get('buy_ask') or spread.get('lowest_price', 0)
+            sell_price = spread.get('sell_bid') or spread.get('highest_price', 0)
+            exec_info = f" (exec {spread['exec_spread']:.2f}%)" if 'exec_spread' in spread else ""
+            msg += f"{emoji} `{spread['symbol']}` — **{spread['spread_percentage']:.2f}%**{exec_info}\n"
+            msg += f"   📉 {spread.get('lowest_exchange', '')} ({spread.get('lowest_market', 'futures')}) `${buy_price:.6f}`"
+            msg += f" → 📈 {spread.get('highest_exchange', '')} ({spread.get('highest_market', 'futures')}) `${sell_price:.6f}`\n\n"
+        return msg
 
     async def pairs_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /pairs command - show exchange pair coverage map"""
         try:
-            await update.message.reply_text("🔄 Building exchange-pair map...")
+            max_age = self.config.snapshot_max_age
+            if self._needs_fetch_notice(max_age):
+                await update.message.reply_text("🔄 Building exchange-pair map...")
             
-            # Get the pair summary from funding manager
-            pair_map = self.funding_manager.get_exchange_pair_summary()
-            
-            if not pair_map:
-                # Need to fetch data first
-                await self.funding_manager.get_cross_market_spreads('futures-futures')
-                pair_map = self.funding_manager.get_exchange_pair_summary()
-            
-            if not pair_map:
-                await update.message.reply_text("❌ No pair data available. Try `/spread` first.", parse_mode='Markdown')
-                return
-            
-            # Sort by number of symbols
-            sorted_pairs = sorted(pair_map.items(), key=lambda x: len(x[1]), reverse=True)
-            
-            message = "🔀 **Exchange Pair Coverage Map**\n\n"
-            message += "Shows how many symbols are tradable between each exchange pair:\n\n"
-            
-            # Show top 20 pairs
-            for pair_key, symbols in sorted_pairs[:20]:
-                message += f"**{pair_key}**: {len(symbols)} symbols\n"
-            
-            message += f"\n📊 Total exchange pairs: {len(pair_map)}"
-            
-            await update.message.reply_text(message, parse_mode='Markdown')
+            message, reply_markup = await self._build_pairs_view(max_age)
+            await update.message.reply_text(message, parse_mode='Markdown', reply_markup=reply_markup)
             
         except Exception as e:
             logger.error(f"Error in pairs command: {str(e)}", exc_info=True)
             await update.message.reply_text(f"❌ Error: {str(e)}")
 
+    async def _build_pairs_view(self, max_age: float = None):
+        """Build the /pairs reply from a snapshot at most max_age seconds old"""
+        # Reuses futures spreads already computed for a fresh snapshot
+        await self.funding_manager.get_cross_market_spreads('futures-futures', max_age)
+        pair_map = self.funding_manager.get_exchange_pair_summary()
+        
+        if not pair_map:
+            return "❌ No pair data available. Try `/spread` first.", self._refresh_markup('pairs')
+        
+        # Sort by number of symbols
+        sorted_pairs = sorted(pair_map.items(), key=lambda x: len(x[1]), reverse=True)
+        
+        message = "🔀 **Exchange Pair Coverage Map**\n\n"
+        message += "Shows how many symbols are tradable between each exchange pair:\n\n"
+        
+        # Show top 20 pairs
+        for pair_key, symbols in sorted_pairs[:20]:
+            message += f"**{pair_key}**: {len(symbols)} symbols\n"
+        
+        message += f"\n📊 Total exchange pairs: {len(pair_map)}"
+        message += self._snapshot_footer()
+        return message, self._refresh_markup('pairs')
+
     def run(self) -> None:
         """Start the bot"""
         try:
@@ -1645,6 +1870,9 @@ Mode: `⚡ NO INTERVAL - Maximum Speed`
             app.add_handler(CommandHandler("block", self.block_command))
             app.add_handler(CommandHandler("monitor", self.monitor_command))
             app.add_handler(CommandHandler("pairs", self.pairs_command))
+            app.add_handler(CommandHandler("subscribe", self.subscribe_command))
+            app.add_handler(CommandHandler("unsubscribe", self.unsubscribe_command))
+            app.add_handler(CommandHandler("subfilter", self.subfilter_command))
             
             # Add callback query handler for buttons
             app.add_handler(CallbackQueryHandler(self.button_callback))
@@ -0,0 +1,66 @@
+import pytest
+
+from exchanges.base import DepthBook
+from exchanges.depth import calculate_executable_spread, walk_book
+
+
+def test_walk_book_partial_level_vwap():
+    vwap, quantity, filled = walk_book([(100.0, 1.0), (101.0, 1.0)], 150.0)
+    assert quantity == pytest.approx(1 + 50 / 101)
+    assert filled == pytest.approx(150.0)
+    assert vwap == pytest.approx(150.0 / quantity)
+
+
+def test_walk_book_runs_out_of_depth():
+    vwap, quantity, filled = walk_book([(100.0, 1.0), (102.0, 1.0)], 1000.0)
+    assert quantity == pytest.approx(2.0)
+    assert filled == pytest.approx(202.0)
+    assert vwap == pytest.approx(101.0)
+
+
+def test_walk_book_empty():
+    assert walk_book([], 100.0) == (0.0, 0.0, 0.0)
+
+
+def test_executable_spread_vwap_fill():
+    buy = DepthBook('BTCUSDT', bids=[(99.0, 5.0)], asks=[(100.0, 1.0), (102.0, 1.0)])
+    sell = DepthBook('BTCUSDT', bids=[(103.0, 1.0), (101.0, 1.0)], asks=[(104.0, 5.0)])
+    result = calculate_executable_spread(buy, sell, 200.0, min_spread=1.0)
+
+    quantity = 1 + 100 / 102
+    proceeds = 103.0 + 101.0 * (quantity - 1)
+    assert result.quantity == pytest.approx(quantity)
+    assert result.filled_notional == pytest.approx(200.0)
+    assert result.buy_vwap == pytest.approx(200.0 / quantity)
+    assert result.sell_vwap == pytest.approx(proceeds / quantity)
+    assert result.top_spread == pytest.approx(3.0)
+    assert result.spread == pytest.approx((proceeds - 200.0) / 200.0 * 100)
+    assert result.buy_slippage > 0 and result.sell_slippage > 0
+    assert not result.depth_limited
+
+
+def test_executable_spread_max_notional_break_even():
+    buy = DepthBook('BTCUSDT', bids=[], asks=[(100.0, 1.0), (102.0, 1.0)])
+    sell = DepthBook('BTCUSDT', bids=[(103.0, 1.0), (101.0, 1.0)], asks=[])
+    result = calculate_executable_spread(buy, sell, 50.0, min_spread=1.0)
+    # Past the first level the average spread decays to exactly 1% at q = 1 + 2 / 2.02
+    q = 2.0 / (1.01 * 102.0 - 101.0)
+    cost = 100.0 + 102.0 * q
+    assert result.max_notional == pytest.approx(cost)
+    assert (103.0 + 101.0 * q - cost) / cost * 100 == pytest.approx(1.0)
+
+
+def test_executable_spread_sell_side_limits_quantity():
+    buy = DepthBook('BTCUSDT', bids=[], asks=[(100.0, 10.0)])
+    sell = DepthBook('BTCUSDT', bids=[(103.0, 0.5)], asks=[])
+    result = calculate_executable_spread(buy, sell, 200.0)
+    assert result.depth_limited
+    assert result.quantity == pytest.approx(0.5)
+    assert result.filled_notional == pytest.approx(50.0)
+    assert result.spread == pytest.approx(3.0)
+
+
+def test_executable_spread_needs_both_sides():
+    buy = DepthBook('BTCUSDT', bids=[], asks=[])
+    sell = DepthBook('BTCUSDT', bids=[(103.0, 1.0)], asks=[])
+    assert calculate_executable_spread(buy, sell, 100.0) is None
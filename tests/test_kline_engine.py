@@ -0,0 +1,94 @@
+import numpy as np
+
+from exchanges.kline_engine import (
+    align_klines, display_period, klines_to_arrays, lttb, resample, spread_candles,
+)
+
+
+def candles(times, closes, opens=None, highs=None, lows=None, volumes=None):
+    closes = np.asarray(closes, dtype=np.float64)
+    opens = closes if opens is None else np.asarray(opens, dtype=np.float64)
+    return {
+        'time': np.asarray(times, dtype=np.float64),
+        'open': opens,
+        'high': np.maximum(opens, closes) if highs is None else np.asarray(highs, dtype=np.float64),
+        'low': np.minimum(opens, closes) if lows is None else np.asarray(lows, dtype=np.float64),
+        'close': closes,
+        'volume': np.ones(len(closes)) if volumes is None else np.asarray(volumes, dtype=np.float64),
+    }
+
+
+def test_klines_to_arrays_sorts_and_keeps_last_duplicate():
+    columns = klines_to_arrays([
+        {'time': 120, 'open': 1, 'high': 1, 'low': 1, 'close': 1},
+        {'time': 60, 'open': 2, 'high': 2, 'low': 2, 'close': 2, 'volume': 5},
+        {'time': 120, 'open': 3, 'high': 3, 'low': 3, 'close': 3},
+    ])
+    assert columns['time'].tolist() == [60, 120]
+    assert columns['close'].tolist() == [2, 3]
+    assert columns['volume'].tolist() == [5, 0]
+
+
+def test_align_klines_rounds_drift_to_period():
+    a = candles([60.2, 120.0, 180.1, 300.0], [1, 2, 3, 4])
+    b = candles([59.9, 180.0, 240.0, 300.4], [5, 6, 7, 8])
+    times, ia, ib = align_klines(a, b, 60)
+    assert times.tolist() == [60, 180, 300]
+    assert a['close'][ia].tolist() == [1, 3, 4]
+    assert b['close'][ib].tolist() == [5, 6, 8]
+
+
+def test_spread_candles_are_continuous_and_skip_zero_prices():
+    a = candles([0, 60, 120, 180], [101, 102, 0, 104], opens=[100, 101, 102, 103])
+    b = candles([0, 60, 120, 180], [100, 100, 100, 100], opens=[100, 100, 100, 100])
+    spread = spread_candles(a, b, 60)
+    assert spread['time'].tolist() == [0, 60, 180]
+    np.testing.assert_allclose(spread['close'], [1.0, 2.0, 4.0])
+    # First open is the real open spread, later opens are the previous close
+    np.testing.assert_allclose(spread['open'], [0.0, 1.0, 2.0])
+    assert (spread['high'] >= np.maximum(spread['open'], spread['close'])).all()
+    assert (spread['low'] <= np.minimum(spread['open'], spread['close'])).all()
+    np.testing.assert_allclose(spread['ex1_close'], [101, 102, 104])
+
+
+def test_resample_aligns_to_utc_buckets():
+    base = candles(
+        [240, 300, 360, 420, 480, 540],
+        closes=[2, 3, 4, 5, 6, 7], opens=[1, 2, 3, 4, 5, 6],
+        highs=[9, 3, 4, 5, 8, 7], lows=[1, 0, 3, 4, 5, 6], volumes=[1, 2, 3, 4, 5, 6],
+    )
+    out = resample(base, 300)
+    assert out['time'].tolist() == [0, 300]
+    assert out['open'].tolist() == [1, 2]
+    assert out['close'].tolist() == [2, 7]
+    assert out['high'].tolist() == [9, 8]
+    assert out['low'].tolist() == [1, 0]
+    assert out['volume'].tolist() == [1, 20]
+
+
+def test_resample_keeps_last_value_of_extra_columns():
+    columns = dict(candles([0, 60, 120], [1, 2, 3]), ex1_close=np.array([10.0, 20.0, 30.0]))
+    assert resample(columns, 120)['ex1_close'].tolist() == [20, 30]
+
+
+def test_display_period():
+    assert display_period(0, 3600, 60, 0) == 60
+    assert display_period(0, 3600, 60, 100) == 60
+    assert display_period(0, 86400, 60, 500) == 180
+
+
+def test_lttb_one_point_per_bucket_keeps_ends_and_spikes():
+    times = np.arange(0, 1000, 1.0)
+    values = np.zeros(len(times))
+    values[437] = 50.0
+    selected = lttb(times, values, 100)
+    assert len(selected) == 10
+    assert selected[0] == 0 and selected[-1] == len(times) - 1
+    assert 437 in selected
+    assert (np.diff(selected) > 0).all()
+    # Every selection falls in its own bucket
+    assert ((times[selected[1:-1]] // 100) == np.arange(1, 9)).all()
+
+
+def test_lttb_empty():
+    assert len(lttb(np.empty(0), np.empty(0), 60)) == 0
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from exchanges.path_stats import PathStats
+
+
+def test_ewma_matches_scalar_recurrence():
+    stats = PathStats(halflife=10, min_count=3)
+    slot = stats.slots('BTCUSDT', ['Binance', 'OKX'])[0, 1]
+    values = np.random.default_rng(0).normal(0.3, 0.05, 200)
+
+    a = 1 - 0.5 ** (1 / 10)
+    mean, var = values[0], 0.0
+    stats.update([slot], [values[0]])
+    for k, x in enumerate(values[1:], start=1):
+        expected_z = (x - mean) / np.sqrt(var) if k >= 3 and var > 0 else np.nan
+        z = stats.update([slot], [x])[0]
+        if np.isnan(expected_z):
+            assert np.isnan(z)
+        else:
+            assert z == pytest.approx(expected_z)
+        delta = x - mean
+        mean += a * delta
+        var = (1 - a) * (var + a * delta * delta)
+
+    assert stats.mean[slot] == pytest.approx(mean)
+    assert stats.var[slot] == pytest.approx(var)
+    assert stats.count[slot] == len(values)
+
+
+def test_zscore_waits_for_min_count():
+    stats = PathStats(min_count=5)
+    slot = stats.slots('BTCUSDT', ['A', 'B'])[0, 1]
+    for x in (1.0, 2.0, 1.0, 2.0, 1.0):
+        assert np.isnan(stats.update([slot], [x])[0])
+    assert not np.isnan(stats.update([slot], [3.0])[0])
+
+
+@pytest.mark.parametrize('draw', [
+    lambda rng, n: rng.normal(0.2, 0.1, n),
+    lambda rng, n: rng.exponential(0.5, n),
+])
+def test_p2_quantiles_track_exact_quantiles(draw):
+    stats = PathStats(quantiles=(0.5, 0.9))
+    slot = stats.slots('ETHUSDT', ['A', 'B'])[0, 1]
+    values = draw(np.random.default_rng(1), 5000)
+    for x in values:
+        stats.update([slot], [x])
+    estimate = stats.quantile_values([slot])[0]
+    exact = np.quantile(values, [0.5, 0.9])
+    spread = np.quantile(values, 0.99) - np.quantile(values, 0.01)
+    assert np.abs(estimate - exact).max() < 0.02 * spread
+
+
+def test_quantiles_are_exact_during_warm_up():
+    stats = PathStats(quantiles=(0.5,))
+    slot = stats.slots('BTCUSDT', ['A', 'B'])[0, 1]
+    for x in (3.0, 1.0, 2.0):
+        stats.update([slot], [x])
+    assert stats.quantile_values([slot])[0, 0] == pytest.approx(2.0)
+
+
+def test_paths_update_independently_in_one_call():
+    stats = PathStats(halflife=5)
+    slots = stats.slots('BTCUSDT', ['A', 'B', 'C'])
+    paths = np.array([slots[0, 1], slots[1, 0], slots[2, 1]])
+    for _ in range(50):
+        stats.update(paths, [1.0, 2.0, 3.0])
+    np.testing.assert_allclose(stats.mean[paths], [1.0, 2.0, 3.0])
+    np.testing.assert_allclose(stats.quantile_values(paths)[:, 0], [1.0, 2.0, 3.0])
+
+
+def test_slots_are_stable_and_grow_capacity():
+    stats = PathStats(capacity=4)
+    first = stats.slots('BTCUSDT', ['A', 'B'])
+    again = stats.slots('BTCUSDT', ['B', 'A'])
+    assert again[1, 0] == first[0, 1]
+    more = stats.slots('ETHUSDT', ['A', 'B', 'C'])
+    assert stats.capacity >= stats.size == 4 + 9
+    assert len(set(first.ravel()) | set(more.ravel())) == 13
+    assert stats.slot('BTCUSDT', 'A', 'B') == first[0, 1]
+    assert stats.slot('BTCUSDT', 'A', 'Z') is None
+
+
+def test_annotate_adds_stats_to_known_paths():
+    stats = PathStats(quantiles=(0.5,), min_count=2)
+    slot = stats.slots('BTCUSDT', ['A', 'B'])[0, 1]
+    for x in (1.0, 2.0, 3.0):
+        stats.update([slot], [x])
+    known = {'symbol': 'BTCUSDT', 'lowest_exchange': 'A', 'highest_exchange': 'B'}
+    unknown = {'symbol': 'SOLUSDT', 'lowest_exchange': 'A', 'highest_exchange': 'B'}
+    stats.annotate([known, unknown])
+    assert known['spread_p50'] == pytest.approx(2.0)
+    assert known['zscore'] is not None and 'spread_mean' in known
+    assert 'spread_mean' not in unknown
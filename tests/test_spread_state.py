@@ -0,0 +1,95 @@
+from exchanges.spread_state import SpreadStateStore
+
+
+def spread(value, symbol='BTCUSDT', buy='Binance', sell='OKX'):
+    return {
+        'symbol': symbol,
+        'lowest_exchange': buy,
+        'highest_exchange': sell,
+        'spread_percentage': value,
+    }
+
+
+def test_new_path_alerts_once():
+    store = SpreadStateStore()
+    alerts, closed = store.update([spread(1.0)], now=0)
+    assert len(alerts) == 1 and not closed
+    alerts, _ = store.update([spread(1.2)], now=1)
+    assert alerts == []
+    assert store.get('BTCUSDT:Binance_futures->OKX_futures').cycles_seen == 2
+
+
+def test_increase_realert_and_rearm():
+    store = SpreadStateStore(increase_ratio=1.5, rearm_ratio=2.0)
+    store.update([spread(1.0)], now=0)
+    alerts, _ = store.update([spread(1.6)], now=1)
+    assert len(alerts) == 1
+    assert alerts[0]['spread_increase'] == 1.6 - 1.0
+    # Falling below alerted / rearm_ratio lowers the baseline without alerting
+    alerts, _ = store.update([spread(0.7)], now=2)
+    assert alerts == []
+    alerts, _ = store.update([spread(1.1)], now=3)
+    assert len(alerts) == 1
+
+
+def test_hysteresis_keeps_path_open_between_thresholds():
+    store = SpreadStateStore(open_threshold=1.0, close_threshold=0.5, close_after_cycles=2)
+    alerts, _ = store.update([spread(0.8)], now=0)
+    assert alerts == []  # Tracked below the open threshold
+    alerts, _ = store.update([spread(1.0)], now=1)
+    assert len(alerts) == 1
+    # Hovering between close and open threshold neither closes nor re-alerts
+    for t in range(2, 6):
+        alerts, closed = store.update([spread(0.6)], now=t)
+        assert alerts == [] and closed == []
+    alerts, _ = store.update([spread(1.0)], now=6)
+    assert alerts == []
+
+
+def test_absent_path_closes_after_cycles_and_reopens():
+    store = SpreadStateStore(close_threshold=0.5, close_after_cycles=2)
+    store.update([spread(1.0)], now=0)
+    _, closed = store.update([spread(0.4)], now=1)  # Below close threshold = absent
+    assert closed == []
+    _, closed = store.update([], now=2)
+    assert [event['reason'] for event in closed] == ['absent']
+    assert closed[0]['alerted'] and closed[0]['peak_spread'] == 1.0
+    alerts, _ = store.update([spread(1.0)], now=3)
+    assert len(alerts) == 1
+
+
+def test_ttl_expires_paths():
+    store = SpreadStateStore(ttl_seconds=10, close_after_cycles=100)
+    store.update([spread(1.0)], now=0)
+    _, closed = store.update([], now=5)
+    assert closed == []
+    _, closed = store.update([], now=11)
+    assert [event['reason'] for event in closed] == ['expired']
+
+
+def test_eviction_drops_least_recently_seen():
+    store = SpreadStateStore(max_paths=2)
+    store.update([spread(1.0, 'AUSDT'), spread(1.0, 'BUSDT')], now=0)
+    store.update([spread(1.0, 'AUSDT')], now=1)
+    _, closed = store.update([spread(1.0, 'AUSDT'), spread(1.0, 'CUSDT')], now=2)
+    assert [(event['symbol'], event['reason']) for event in closed] == [('BUSDT', 'evicted')]
+    assert store.evicted == 1
+    assert len(store) == 2
+
+
+def test_revert_alert_allows_alerting_again():
+    store = SpreadStateStore()
+    alerts, _ = store.update([spread(1.0)], now=0)
+    store.revert_alert(alerts[0])
+    alerts, _ = store.update([spread(1.0)], now=1)
+    assert len(alerts) == 1
+
+
+def test_zscore_gate():
+    store = SpreadStateStore(open_zscore=2.0)
+    alerts, _ = store.update([spread(1.0)], now=0)
+    assert alerts == []  # No z-score yet
+    high = spread(1.0)
+    high['zscore'] = 2.5
+    alerts, _ = store.update([high], now=1)
+    assert alerts == [high]
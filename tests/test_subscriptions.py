@@ -0,0 +1,79 @@
+from utils.subscriptions import Subscription, SubscriptionIndex
+
+
+def make_index(*subs):
+    return SubscriptionIndex(list(subs))
+
+
+def test_empty_index_matches_nothing():
+    assert make_index().match('BTCUSDT', 1.0, 'Binance', 'OKX') == set()
+
+
+def test_threshold_range_is_inclusive():
+    index = make_index(
+        Subscription('low', min_spread=0.5, max_spread=1.0),
+        Subscription('high', min_spread=1.0, max_spread=5.0),
+        Subscription('any'),
+    )
+    assert index.match('BTCUSDT', 0.4) == {'any'}
+    assert index.match('BTCUSDT', 0.5) == {'low', 'any'}
+    assert index.match('BTCUSDT', 1.0) == {'low', 'high', 'any'}
+    assert index.match('BTCUSDT', 5.0) == {'high', 'any'}
+    assert index.match('BTCUSDT', 50.0) == {'any'}
+
+
+def test_symbol_prefix_matching():
+    index = make_index(
+        Subscription('btc', symbols=['BTC']),
+        Subscription('b', symbols=['B']),
+        Subscription('eth', symbols=['ETH']),
+    )
+    assert index.match('BTCUSDT', 1.0) == {'btc', 'b'}
+    assert index.match('bnbusdt', 1.0) == {'b'}
+    assert index.match('ETHUSDT', 1.0) == {'eth'}
+    assert index.match('SOLUSDT', 1.0) == set()
+
+
+def test_blocked_prefix_removes_chat():
+    index = make_index(Subscription('a', blocked=['PEPE']), Subscription('b'))
+    assert index.match('PEPEUSDT', 1.0) == {'b'}
+    assert index.match('PEOPLEUSDT', 1.0) == {'a', 'b'}
+
+
+def test_both_legs_must_be_allowed_exchanges():
+    index = make_index(Subscription('pair', exchanges=['Binance', 'OKX']), Subscription('any'))
+    assert index.match('BTCUSDT', 1.0, 'binance', 'OKX') == {'pair', 'any'}
+    assert index.match('BTCUSDT', 1.0, 'Binance', 'Bybit') == {'any'}
+
+
+def test_rules_combine():
+    index = make_index(
+        Subscription('a', min_spread=1.0, max_spread=3.0, exchanges=['Binance', 'OKX'], symbols=['BTC']),
+        Subscription('b', min_spread=2.0, symbols=['ETH']),
+    )
+    assert index.match('BTCUSDT', 2.0, 'Binance', 'OKX') == {'a'}
+    assert index.match('BTCUSDT', 4.0, 'Binance', 'OKX') == set()
+    assert index.match('ETHUSDT', 2.5, 'Binance', 'OKX') == {'b'}
+    assert index.match('ETHUSDT', 1.5, 'Binance', 'OKX') == set()
+
+
+def test_upsert_and_remove_rebuild():
+    index = make_index(Subscription('a', min_spread=2.0))
+    assert index.match('BTCUSDT', 1.0) == set()
+    index.upsert(Subscription('a', min_spread=0.5))
+    assert index.match('BTCUSDT', 1.0) == {'a'}
+    assert index.remove('a')
+    assert not index.remove('a')
+    assert index.match('BTCUSDT', 1.0) == set()
+
+
+def test_match_spread_uses_path_legs():
+    index = make_index(Subscription('a', exchanges=['MEXC', 'Gate.io']))
+    spread = {'symbol': 'BTCUSDT', 'spread_percentage': 1.0, 'lowest_exchange': 'MEXC', 'highest_exchange': 'Gate.io'}
+    assert index.match_spread(spread) == {'a'}
+
+
+def test_from_dict_uppercases_tokens():
+    sub = Subscription.from_dict({'chat_id': 42, 'symbols': ['btc'], 'blocked': ['pepe']})
+    assert sub.chat_id == '42'
+    assert sub.symbols == ['BTC'] and sub.blocked == ['PEPE']
@@ -0,0 +1,284 @@
+"""
+Asynchronous alert dispatch
+
+Detection code calls AlertDispatcher.submit() which never awaits network I/O.
+A single worker drains a bounded priority queue and delivers alerts while
+respecting Telegram rate limits (about 1 message/second per chat, 30/second
+overall). Each chat has its own queue and a rate-limited chat never holds up
+the others. Repeated alerts for the same key are coalesced while still queued,
+and bursts are delivered as batched messages.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, up to `capacity` stored"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 if available now)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        """Drain the bucket so nothing is sent for `seconds` (e.g. after a 429)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class AlertDispatcher:
+    """Bounded priority queue with coalescing, batching and rate limiting
+
+    Args:
+        send: coroutine `send(chat_id, items)` - items is a list of payloads,
+              more than one when alerts were batched
+        max_size: maximum number of pending alerts (lowest priority dropped first)
+        batch_threshold: pending alerts for a chat at which batching kicks in
+        max_batch: maximum number of alerts combined into one message
+        chat_rate/chat_burst: per-chat token bucket
+        global_rate/global_burst: bot-wide token bucket
+    """
+
+    def __init__(self, send: Callable[[Any, List[Any]], Awaitable[None]],
+                 max_size: int = 200, batch_threshold: int = 3, max_batch: int = 10,
+                 chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 global_rate: float = 30.0, global_burst: float = 30.0):
+        self.send = send
+        self.max_size = max_size
+        self.batch_threshold = batch_threshold
+        self.max_batch = max_batch
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._chat_buckets: Dict[Any, TokenBucket] = {}
+
+        # (chat_id, key) -> [priority, seq, payload]; each chat has its own heap
+        # of (-priority, seq, key). Chats with capacity sit in the ready heap
+        # by their top priority, rate-limited ones in the waiting heap by the
+        # time their bucket refills. Stale heap items are skipped lazily.
+        self._pending: Dict[Tuple[Any, str], list] = {}
+        self._chat_heaps: Dict[Any, List[tuple]] = {}
+        self._ready: List[tuple] = []      # (-priority, seq, chat_id)
+        self._waiting: List[tuple] = []    # (ready_at, seq, chat_id)
+        self._waiting_chats = set()
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Start the sender worker (must be called from a running event loop)"""
+        if self._worker is None or self._worker.done():
+            self._wakeup = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    def submit(self, chat_id, key: str, payload, priority: float = 0.0) -> bool:
+        """Queue an alert without blocking. Returns False if it was dropped."""
+        entry_key = (chat_id, key)
+        entry = self._pending.get(entry_key)
+
+        if entry is not None:
+            # Coalesce: keep the newest payload, never lower the priority
+            entry[2] = payload
+            self.coalesced += 1
+            if priority <= entry[0]:
+                return True
+            priority_changed = True
+        else:
+            priority_changed = False
+            if len(self._pending) >= self.max_size and not self._evict_lowest(priority):
+                self.dropped += 1
+                return False
+
+        seq = next(self._counter)
+        self._pending[entry_key] = [priority, seq, payload]
+        heapq.heappush(self._chat_heaps.setdefault(chat_id, []), (-priority, seq, key))
+        if chat_id not in self._waiting_chats:
+            heapq.heappush(self._ready, (-priority, seq, chat_id))
+        if priority_changed:
+            self._maybe_compact(chat_id)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _evict_lowest(self, priority: float) -> bool:
+        """Drop the lowest priority pending alert if it ranks below `priority`"""
+        lowest_key = min(self._pending, key=lambda k: (self._pending[k][0], -self._pending[k][1]))
+        if self._pending[lowest_key][0] >= priority:
+            return False
+        del self._pending[lowest_key]
+        self.dropped += 1
+        self._maybe_compact(lowest_key[0])
+        return True
+
+    def _maybe_compact(self, chat_id):
+        # Rebuild a chat heap when stale items dominate it
+        heap = self._chat_heaps.get(chat_id)
+        if heap is not None and len(heap) > 2 * self.max_size:
+            heap[:] = [(-p, seq, key) for (c, key), (p, seq, _) in self._pending.items() if c == chat_id]
+            heapq.heapify(heap)
+
+    def _chat_top(self, chat_id) -> Optional[tuple]:
+        """(-priority, seq, key) of the chat's highest priority live entry"""
+        heap = self._chat_heaps.get(chat_id)
+        while heap:
+            _, seq, key = heap[0]
+            entry = self._pending.get((chat_id, key))
+            if entry is not None and entry[1] == seq:
+                return heap[0]
+            heapq.heappop(heap)
+        self._chat_heaps.pop(chat_id, None)
+        return None
+
+    def _schedule(self, chat_id, ready_at: float = 0.0):
+        """Put a chat with pending alerts in the ready heap, or the waiting heap until `ready_at`"""
+        top = self._chat_top(chat_id)
+        if top is None:
+            return
+        if ready_at > time.monotonic():
+            if chat_id not in self._waiting_chats:
+                self._waiting_chats.add(chat_id)
+                heapq.heappush(self._waiting, (ready_at, next(self._counter), chat_id))
+        elif chat_id not in self._waiting_chats:
+            heapq.heappush(self._ready, (top[0], top[1], chat_id))
+
+    def _release_waiting(self):
+        """Move chats whose bucket has refilled back to the ready heap"""
+        now = time.monotonic()
+        while self._waiting and self._waiting[0][0] <= now:
+            _, _, chat_id = heapq.heappop(self._waiting)
+            self._waiting_chats.discard(chat_id)
+            self._schedule(chat_id)
+
+    def _next_chat(self):
+        """Ready chat with the highest priority pending alert, or None"""
+        while self._ready:
+            _, seq, chat_id = heapq.heappop(self._ready)
+            if chat_id in self._waiting_chats:
+                continue
+            top = self._chat_top(chat_id)
+            if top is not None and top[1] == seq:
+                return chat_id
+        return None
+
+    def _pop(self, chat_id):
+        """Pop the highest priority live entry of one chat"""
+        top = self._chat_top(chat_id)
+        if top is None:
+            return None
+        heapq.heappop(self._chat_heaps[chat_id])
+        _, _, key = top
+        entry = self._pending.pop((chat_id, key))
+        return (chat_id, key, entry[0], entry[2])
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _idle(self):
+        """Sleep until an alert is submitted or the next rate-limited chat refills"""
+        self._wakeup.clear()
+        if not self._waiting:
+            await self._wakeup.wait()
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(0.0, self._waiting[0][0] - time.monotonic()))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self):
+        while True:
+            self._release_waiting()
+            chat_id = self._next_chat()
+            if chat_id is None:
+                await self._idle()
+                continue
+
+            # Wait for rate limit capacity before popping so that alerts
+            # arriving in the meantime still coalesce with queued ones.
+            # A rate-limited chat waits on its own; other chats go ahead.
+            bucket = self._chat_bucket(chat_id)
+            delay = bucket.delay()
+            if delay > 0:
+                self._schedule(chat_id, time.monotonic() + delay)
+                continue
+            delay = self._global_bucket.delay()
+            if delay > 0:
+                self._schedule(chat_id)
+                await asyncio.sleep(delay)
+                continue
+
+            _, key, priority, payload = self._pop(chat_id)
+            entries = [(key, priority, payload)]
+            chat_pending = sum(1 for (c, _) in self._pending if c == chat_id)
+            if chat_pending + 1 >= self.batch_threshold:
+                while len(entries) < self.max_batch:
+                    extra = self._pop(chat_id)
+                    if extra is None:
+                        break
+                    entries.append(extra[1:])
+
+            items = [entry[2] for entry in entries]
+            bucket.consume()
+            self._global_bucket.consume()
+            try:
+                await self.send(chat_id, items)
+                self.sent += len(items)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                retry_after = getattr(e, 'retry_after', None)
+                if retry_after:
+                    # Flood control - back off and put the alerts back
+                    seconds = getattr(retry_after, 'total_seconds', lambda: retry_after)()
+                    logger.warning(f"Telegram flood control, pausing {seconds}s")
+                    bucket.pause(float(seconds))
+                    for entry_key, entry_priority, item in entries:
+                        if (chat_id, entry_key) not in self._pending:
+                            self.submit(chat_id, entry_key, item, entry_priority)
+                else:
+                    logger.error(f"Error delivering alert: {str(e)}")
+            self._schedule(chat_id, time.monotonic() + bucket.delay())
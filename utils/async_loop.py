@@ -0,0 +1,71 @@
+"""
+Long-lived asyncio loop on a background thread
+
+Synchronous front ends (pywebview JS API calls, Qt slots) submit coroutines
+to one persistent loop instead of creating a loop per call, so aiohttp
+sessions, connection pools and DNS/TLS state stay warm between calls.
+Submissions may carry a key: a newer submission with the same key cancels
+the previous one (e.g. a chart reload superseding a slower earlier load).
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Dict, Optional
+
+
+class AsyncLoopThread:
+    """Runs an event loop forever on a daemon thread"""
+
+    def __init__(self, name: str = 'async-loop'):
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._latest: Dict[str, concurrent.futures.Future] = {}
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run_loop, name=self.name, daemon=True)
+        self.thread.start()
+        self._started.wait()
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._started.set()
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable, key: Optional[str] = None) -> concurrent.futures.Future:
+        """Schedule `coro` on the loop; with a key, cancel the pending submission of the same key"""
+        if self.loop is None:
+            self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if key is not None:
+            with self._lock:
+                previous = self._latest.get(key)
+                self._latest[key] = future
+            if previous is not None and not previous.done():
+                previous.cancel()
+        return future
+
+    def run(self, coro: Awaitable, key: Optional[str] = None, timeout: Optional[float] = None):
+        """Submit and block until done. Raises concurrent.futures.CancelledError if superseded."""
+        return self.submit(coro, key).result(timeout)
+
+    def stop(self, cleanup: Optional[Awaitable] = None, timeout: float = 5.0):
+        """Optionally run a final cleanup coroutine (e.g. closing sessions), then stop the loop"""
+        if self.loop is None:
+            return
+        if cleanup is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(cleanup, self.loop).result(timeout)
+            except Exception:
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.loop = None
+        self.thread = None
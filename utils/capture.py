@@ -0,0 +1,272 @@
+"""
+Raw market data capture
+
+Records the exact bytes received from every REST call (BaseExchange._make_request,
+L2BookProvider._fetch_json) and WebSocket receive loop (exchanges/ws_providers.py)
+together with the local receive time, so a session can be replayed later
+through the same parsers (utils/replay.py).
+
+On-disk layout of a capture directory:
+
+    segment-<first_ts_ms>.cap   concatenated compressed blocks of records
+    segment-<first_ts_ms>.idx   one fixed-size entry per block:
+                                first_ts, last_ts, offset, length, count, codec
+
+Records inside a block are framed as <ts:f64><kind:u8><key_len:u16><len:u32>
+followed by the key (utf-8) and the raw payload. Blocks are zstd-compressed
+when the "zstandard" package is installed, zlib otherwise; the codec is stored
+per block so mixed captures stay readable.
+
+Enable with "capture_path" in config.json (FundingRateManager calls
+start_capture()), or call start_capture() directly.
+"""
+
+import atexit
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Record kinds
+REST = 0
+WS_TEXT = 1
+WS_BINARY = 2
+MARK = 3  # Control points, e.g. the start of a FundingRateManager update cycle
+
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+
+RECORD_HEADER = struct.Struct('<dBHI')
+INDEX_ENTRY = struct.Struct('<ddQIIB3x')
+
+
+# Request parameters that change on every call (e.g. BingX signs public calls with a timestamp)
+VOLATILE_PARAMS = {'timestamp'}
+
+
+def request_key(method: str, url: str, params: Optional[Dict] = None) -> str:
+    """Stable key for a REST request, used to match captured responses on replay"""
+    if params:
+        query = urlencode(sorted((str(k), str(v)) for k, v in params.items() if k not in VOLATILE_PARAMS))
+        return f"{method.upper()} {url}?{query}"
+    return f"{method.upper()} {url}"
+
+
+def stream_key(exchange: str, market_type, symbol: str) -> str:
+    """Key for one WebSocket stream (provider EXCHANGE_NAME, MarketType, symbol)"""
+    return f"{exchange} {getattr(market_type, 'value', market_type)} {symbol}"
+
+
+@dataclass
+class Record:
+    ts: float
+    kind: int
+    key: str
+    payload: bytes
+
+
+def _compress(raw: bytes) -> Tuple[int, bytes]:
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=3).compress(raw)
+    return CODEC_ZLIB, zlib.compress(raw, 6)
+
+
+def _decompress(codec: int, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Capture block is zstd-compressed, install the 'zstandard' package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class CaptureWriter:
+    """Appends records to segment files; blocks are compressed and written when full
+
+    Args:
+        root: capture directory
+        block_bytes: uncompressed size at which a block is flushed
+        segment_bytes: compressed size at which a new segment file is started
+        flush_interval: also flush a non-empty block after this many seconds
+    """
+
+    def __init__(self, root: str, block_bytes: int = 1 << 20, segment_bytes: int = 256 << 20,
+                 flush_interval: float = 5.0):
+        self.root = root
+        self.block_bytes = block_bytes
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(root, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._block: List[bytes] = []
+        self._block_size = 0
+        self._block_first_ts = 0.0
+        self._block_last_ts = 0.0
+        self._segment = None
+        self._index = None
+        self._segment_offset = 0
+        self.records = 0
+        self.bytes_written = 0
+
+    def record(self, kind: int, key: str, payload, ts: Optional[float] = None):
+        """Append one record. payload may be bytes or str."""
+        if ts is None:
+            ts = time.time()
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        key_bytes = key.encode('utf-8')[:0xFFFF]
+        frame = RECORD_HEADER.pack(ts, kind, len(key_bytes), len(payload)) + key_bytes + payload
+
+        with self._lock:
+            if not self._block:
+                self._block_first_ts = ts
+            self._block.append(frame)
+            self._block_size += len(frame)
+            self._block_last_ts = ts
+            self.records += 1
+            if self._block_size >= self.block_bytes or ts - self._block_first_ts >= self.flush_interval:
+                self._flush_block()
+
+    def mark(self, key: str, ts: Optional[float] = None):
+        self.record(MARK, key, b'', ts)
+
+    def flush(self):
+        with self._lock:
+            self._flush_block()
+            if self._segment is not None:
+                self._segment.flush()
+                self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._flush_block()
+            self._close_segment()
+
+    def _flush_block(self):
+        if not self._block:
+            return
+        codec, data = _compress(b''.join(self._block))
+        if self._segment is None or self._segment_offset + len(data) > self.segment_bytes:
+            self._close_segment()
+            name = f"segment-{int(self._block_first_ts * 1000)}"
+            self._segment = open(os.path.join(self.root, f"{name}.cap"), 'ab')
+            self._index = open(os.path.join(self.root, f"{name}.idx"), 'ab')
+            self._segment_offset = self._segment.tell()
+
+        self._segment.write(data)
+        self._index.write(INDEX_ENTRY.pack(
+            self._block_first_ts, self._block_last_ts, self._segment_offset,
+            len(data), len(self._block), codec,
+        ))
+        self._segment_offset += len(data)
+        self.bytes_written += len(data)
+        self._block = []
+        self._block_size = 0
+
+    def _close_segment(self):
+        if self._segment is not None:
+            self._segment.close()
+            self._index.close()
+            self._segment = None
+            self._index = None
+
+
+class CaptureReader:
+    """Iterates records of a capture directory in receive order"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def segments(self) -> List[str]:
+        names = [f[:-4] for f in os.listdir(self.root) if f.startswith('segment-') and f.endswith('.cap')]
+        return [os.path.join(self.root, name) for name in sorted(names, key=lambda n: int(n.split('-')[1]))]
+
+    def index(self, segment: str) -> List[Tuple[float, float, int, int, int, int]]:
+        with open(f"{segment}.idx", 'rb') as f:
+            data = f.read()
+        usable = len(data) - len(data) % INDEX_ENTRY.size  # Ignore a torn trailing entry
+        return [INDEX_ENTRY.unpack_from(data, offset) for offset in range(0, usable, INDEX_ENTRY.size)]
+
+    def time_range(self) -> Tuple[Optional[float], Optional[float]]:
+        first, last = None, None
+        for segment in self.segments():
+            for first_ts, last_ts, *_ in self.index(segment):
+                first = first_ts if first is None else min(first, first_ts)
+                last = last_ts if last is None else max(last, last_ts)
+        return first, last
+
+    def __iter__(self) -> Iterator[Record]:
+        return self.records()
+
+    def records(self, start: Optional[float] = None, end: Optional[float] = None,
+                kinds: Optional[Sequence[int]] = None) -> Iterator[Record]:
+        """Yield records with start <= ts <= end, skipping blocks outside the range via the index"""
+        for segment in self.segments():
+            with open(f"{segment}.cap", 'rb') as f:
+                for first_ts, last_ts, offset, length, count, codec in self.index(segment):
+                    if (start is not None and last_ts < start) or (end is not None and first_ts > end):
+                        continue
+                    f.seek(offset)
+                    raw = _decompress(codec, f.read(length))
+                    pos = 0
+                    for _ in range(count):
+                        ts, kind, key_len, payload_len = RECORD_HEADER.unpack_from(raw, pos)
+                        pos += RECORD_HEADER.size
+                        key = raw[pos:pos + key_len].decode('utf-8')
+                        pos += key_len
+                        payload = raw[pos:pos + payload_len]
+                        pos += payload_len
+                        if (start is not None and ts < start) or (end is not None and ts > end):
+                            continue
+                        if kinds is not None and kind not in kinds:
+                            continue
+                        yield Record(ts, kind, key, payload)
+
+
+# ── Process-wide capture / replay state ──────────────────────────────
+
+_capture: Optional[CaptureWriter] = None
+_replay = None  # utils.replay.ReplaySource while a replay is running
+
+
+def start_capture(root: str, **kwargs) -> CaptureWriter:
+    """Start capturing raw payloads of this process to `root`"""
+    global _capture
+    if _capture is None:
+        _capture = CaptureWriter(root, **kwargs)
+        atexit.register(stop_capture)
+        logger.info(f"Capturing raw market data to {root}")
+    return _capture
+
+
+def stop_capture():
+    global _capture
+    if _capture is not None:
+        _capture.close()
+        _capture = None
+
+
+def get_capture() -> Optional[CaptureWriter]:
+    return _capture
+
+
+def set_replay(source):
+    """Install (or clear with None) the replay source that serves REST responses"""
+    global _replay
+    _replay = source
+
+
+def get_replay():
+    return _replay
@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class ConfigLoader:
     """Configuration loader that reads from config.json"""
@@ -63,6 +63,26 @@ class ConfigLoader:
         """Get proxy URL if configured"""
         return self._config.get('proxy_url', '')
     
+    @property
+    def collector_address(self) -> str:
+        """Get collector daemon address (socket path or host:port), empty = poll locally"""
+        return self._config.get('collector_address', '')
+    
+    @property
+    def collector_interval(self) -> float:
+        """Get collector bid/ask polling interval in seconds"""
+        return float(self._config.get('collector_interval', 1.0))
+    
+    @property
+    def collector_funding_interval(self) -> float:
+        """Get collector funding rate polling interval in seconds"""
+        return float(self._config.get('collector_funding_interval', 30.0))
+    
+    @property
+    def snapshot_max_age(self) -> float:
+        """Get max age in seconds of cached market data that bot commands may reuse"""
+        return float(self._config.get('snapshot_max_age', 15.0))
+    
     @property
     def arbitrage_mode(self) -> str:
         """Get current arbitrage mode (futures-futures, spot-futures, futures-margin)"""
@@ -139,6 +159,82 @@ class ConfigLoader:
         except Exception:
             return False
     
+    @property
+    def snapshot_store_path(self) -> str:
+        """Get directory for recorded market snapshots, empty = recording disabled"""
+        return self._config.get('snapshot_store_path', '')
+    
+    @property
+    def session_log_path(self) -> str:
+        """Get directory for closed spread path sessions (JSON lines), empty = not stored"""
+        return self._config.get('session_log_path', '')
+    
+    @property
+    def capture_path(self) -> str:
+        """Get directory for raw REST/WebSocket payload capture, empty = capture disabled"""
+        return self._config.get('capture_path', '')
+    
+    @property
+    def alert_zscore(self) -> float:
+        """Get minimum z-score of a spread against its path history for alerts, 0 = alert on level"""
+        return float(self._config.get('alert_zscore', 0.0))
+    
+    @property
+    def live_books(self) -> int:
+        """Get the most WebSocket L2 books kept for alerted legs, 0 = REST depth only"""
+        return int(self._config.get('live_books', 20))
+    
+    @property
+    def alert_unconfirmable(self) -> bool:
+        """Get whether spreads that cannot be re-quoted on both legs are alerted (marked unconfirmed)"""
+        return bool(self._config.get('alert_unconfirmable', False))
+    
+    @property
+    def spread_open_threshold(self) -> float:
+        """Get minimum spread percentage for the first alert of a path, 0 = min_spread"""
+        return float(self._config.get('spread_open_threshold', 0.0))
+    
+    @property
+    def spread_close_threshold(self) -> float:
+        """Get spread percentage below which a path counts as gone, 0 = half the open threshold"""
+        return float(self._config.get('spread_close_threshold', 0.0))
+    
+    @property
+    def spread_close_after_cycles(self) -> int:
+        """Get consecutive scans a path may be below the close threshold before its session closes"""
+        return int(self._config.get('spread_close_after_cycles', 3))
+    
+    @property
+    def spread_ttl_seconds(self) -> float:
+        """Get seconds after which a path not seen is closed regardless of scans"""
+        return float(self._config.get('spread_ttl_seconds', 3600.0))
+    
+    @property
+    def min_net_spread(self) -> Optional[float]:
+        """Get minimum spread percentage after fees and funding for a path to be kept (None = only rank by it)"""
+        value = self._config.get('min_net_spread')
+        return float(value) if value is not None else None
+
+    @property
+    def funding_horizon_hours(self) -> float:
+        """Get horizon in hours that funding rates of 1h/4h/8h venues are normalized to"""
+        return float(self._config.get('funding_horizon_hours', 8.0))
+
+    @property
+    def fee_tiers(self) -> dict:
+        """Get fee tier per exchange (e.g. {"Binance": "VIP1"}), default VIP0"""
+        return self._config.get('fee_tiers', {})
+
+    @property
+    def fee_overrides(self) -> dict:
+        """Get exact maker/taker percent per exchange, overriding the tier table"""
+        return self._config.get('fee_overrides', {})
+
+    @property
+    def transfer_cost_percent(self) -> float:
+        """Get amortized cost in percent of moving capital between venues per round trip"""
+        return float(self._config.get('transfer_cost_percent', 0.0))
+
     @property
     def blocked_tokens(self) -> list:
         """Get list of blocked tokens"""
@@ -168,6 +264,21 @@ class ConfigLoader:
         """Check if a token is blocked"""
         return symbol.upper() in self.blocked_tokens
     
+    @property
+    def subscribers(self) -> list:
+        """Get alert subscribers (list of dicts with chat_id and per-chat filters)"""
+        return self._config.get('subscribers', [])
+    
+    @property
+    def has_subscribers(self) -> bool:
+        """Check if a subscribers list has been saved (even an empty one)"""
+        return 'subscribers' in self._config
+    
+    def set_subscribers(self, subscribers: list) -> bool:
+        """Replace the alert subscriber list and save to config"""
+        self._config['subscribers'] = subscribers
+        return self._save_config()
+    
     def _save_config(self) -> bool:
         """Save config to file"""
         current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,314 @@
+"""
+Deterministic replay of captured market data (see utils/capture.py)
+
+ReplayDriver feeds a capture back through the unmodified code paths:
+
+- REST: while a replay runs, BaseExchange._make_request (and the venue-specific
+  request helpers) ask the installed ReplaySource for the next captured body of
+  the same request instead of hitting the network. Bodies are served per
+  request key in capture order, so every parser sees exactly what it saw live.
+- FundingRateManager: each captured update cycle (a MARK record written by
+  update_funding_data) is re-run with the REST bodies captured for it,
+  followed by an optional on_cycle() callback for the computations under test.
+- WebSocket providers: a ReplaySession is installed as the provider session,
+  its ws_connect() yields the captured frames of that stream to the provider's
+  own receive loop, one frame at a time in global capture order.
+
+Pacing is set by `speed`: 1.0 = real time, N = N times faster, 0 = as fast
+as possible (throughput benchmarks).
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import aiohttp
+
+from utils.capture import MARK, REST, WS_BINARY, WS_TEXT, CaptureReader, Record, request_key, set_replay, stream_key
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReplayStats:
+    cycles: int = 0
+    messages: int = 0
+    responses: int = 0
+    misses: int = 0
+    captured_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    @property
+    def cycles_per_second(self) -> float:
+        return self.cycles / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+
+class ReplayClock:
+    """Maps capture timestamps to wall time at the given speed"""
+
+    def __init__(self, speed: float = 1.0):
+        self.speed = speed
+        self._origin: Optional[float] = None
+        self._wall_origin = 0.0
+
+    async def wait_until(self, ts: float):
+        if self._origin is None:
+            self._origin = ts
+            self._wall_origin = time.monotonic()
+        if self.speed <= 0:
+            await asyncio.sleep(0)
+            return
+        delay = self._wall_origin + (ts - self._origin) / self.speed - time.monotonic()
+        await asyncio.sleep(max(delay, 0))
+
+
+class ReplaySource:
+    """Captured REST bodies, served per request key in capture order
+
+    A key that has been served before but has no newer body repeats its last
+    body. A key never seen either returns {} at once, or with
+    wait_for_missing=True waits until the driver reaches a body for it (used
+    for WebSocket replays, where e.g. an L2 snapshot request races the stream).
+    """
+
+    def __init__(self, wait_for_missing: bool = False):
+        self.wait_for_missing = wait_for_missing
+        self._pending: Dict[str, deque] = {}
+        self._last: Dict[str, bytes] = {}
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        self._closed = False
+        self.responses = 0
+        self.misses = 0
+
+    def add(self, record: Record):
+        waiters = self._waiters.pop(record.key, None)
+        if waiters:
+            self._last[record.key] = record.payload
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(record.payload)
+            return
+        self._pending.setdefault(record.key, deque()).append(record.payload)
+
+    def close(self):
+        """Release anything still waiting for a body"""
+        self._closed = True
+        for waiters in self._waiters.values():
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(b'')
+        self._waiters = {}
+
+    async def response(self, method: str, url: str, params: Optional[Dict] = None):
+        key = request_key(method, url, params)
+        pending = self._pending.get(key)
+        if pending:
+            payload = pending.popleft()
+            self._last[key] = payload
+        elif key in self._last:
+            payload = self._last[key]
+        elif self.wait_for_missing and not self._closed:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.setdefault(key, []).append(waiter)
+            payload = await waiter
+        else:
+            payload = b''
+
+        if not payload:
+            self.misses += 1
+            return {}
+        self.responses += 1
+        try:
+            result = json.loads(payload)
+        except ValueError:
+            return {}
+        return result if result is not None else {}
+
+
+class ReplayWebSocket:
+    """Stand-in for aiohttp.ClientWebSocketResponse that yields captured frames"""
+
+    def __init__(self):
+        self.closed = False
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._delivered = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        # Stay open across provider reconnects (resyncs); the stream ends with feed(None)
+        pass
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> aiohttp.WSMessage:
+        if self._delivered:
+            # The previous frame has been fully handled by the receive loop
+            self._delivered = False
+            self._queue.task_done()
+        msg = await self._queue.get()
+        if msg is None:
+            self._queue.task_done()
+            self.closed = True
+            raise StopAsyncIteration
+        self._delivered = True
+        return msg
+
+    async def receive_json(self):
+        msg = await self.__anext__()
+        return json.loads(msg.data)
+
+    async def feed(self, msg: Optional[aiohttp.WSMessage]):
+        """Hand over one frame (None = end of stream) and wait until it is processed"""
+        if self.closed:
+            return
+        await self._queue.put(msg)
+        await self._queue.join()
+
+    async def send_json(self, data):
+        pass
+
+    async def send_str(self, data):
+        pass
+
+    async def ping(self, message: bytes = b''):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class ReplaySession:
+    """Stand-in for the provider's aiohttp session; ws_connect returns the replay stream"""
+
+    def __init__(self, ws: ReplayWebSocket):
+        self.ws = ws
+        self.closed = False
+
+    def ws_connect(self, url: str, **kwargs) -> ReplayWebSocket:
+        return self.ws
+
+    async def close(self):
+        self.closed = True
+
+
+class ReplayDriver:
+    """Replays a capture directory through FundingRateManager or WebSocket providers
+
+    Args:
+        root: capture directory
+        speed: 1.0 = real time, N = N times faster, 0 = max speed
+        start/end: optional capture time range (epoch seconds)
+    """
+
+    def __init__(self, root: str, speed: float = 1.0, start: Optional[float] = None, end: Optional[float] = None):
+        self.reader = CaptureReader(root)
+        self.speed = speed
+        self.start = start
+        self.end = end
+
+    async def run_manager(self, manager,
+                          on_cycle: Optional[Callable[[object], Awaitable[None]]] = None) -> ReplayStats:
+        """Re-run every captured update_funding_data cycle on `manager`"""
+        source = ReplaySource()
+        clock = ReplayClock(self.speed)
+        stats = ReplayStats()
+        first_ts = last_ts = None
+
+        async def run_cycle(mark: Record):
+            await clock.wait_until(mark.ts)
+            await manager.update_funding_data(prices_only=mark.key.endswith('prices_only=1'))
+            if on_cycle is not None:
+                await on_cycle(manager)
+            stats.cycles += 1
+
+        set_replay(source)
+        wall_start = time.monotonic()
+        try:
+            pending_mark = None
+            for record in self.reader.records(self.start, self.end, kinds=(REST, MARK)):
+                first_ts = record.ts if first_ts is None else first_ts
+                last_ts = record.ts
+                if record.kind == REST:
+                    source.add(record)
+                elif record.key.startswith('update_funding_data'):
+                    # Bodies of a cycle are captured after its mark, run it once they are queued
+                    if pending_mark is not None:
+                        await run_cycle(pending_mark)
+                    pending_mark = record
+            if pending_mark is not None:
+                await run_cycle(pending_mark)
+        finally:
+            set_replay(None)
+            source.close()
+
+        stats.wall_seconds = time.monotonic() - wall_start
+        stats.captured_seconds = (last_ts - first_ts) if first_ts is not None else 0.0
+        stats.responses = source.responses
+        stats.misses = source.misses
+        return stats
+
+    async def run_providers(self, streams: Sequence[Tuple[object, str, object]]) -> ReplayStats:
+        """Replay captured frames into providers, given as (provider, symbol, MarketType) tuples
+
+        Providers are started with their normal connect() and stop when their
+        stream is exhausted. HTX and KuCoin providers open their own sessions
+        and cannot be replayed this way.
+        """
+        source = ReplaySource(wait_for_missing=True)
+        clock = ReplayClock(self.speed)
+        stats = ReplayStats()
+        sockets: Dict[str, ReplayWebSocket] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        set_replay(source)
+        for provider, symbol, market_type in streams:
+            key = stream_key(provider.EXCHANGE_NAME, market_type, symbol)
+            sockets[key] = ReplayWebSocket()
+            provider.session = ReplaySession(sockets[key])
+            tasks[key] = asyncio.create_task(provider.connect(symbol, market_type))
+
+        wall_start = time.monotonic()
+        first_ts = last_ts = None
+        try:
+            for record in self.reader.records(self.start, self.end, kinds=(REST, WS_TEXT, WS_BINARY)):
+                if record.kind == REST:
+                    source.add(record)
+                    continue
+                ws = sockets.get(record.key)
+                if ws is None or tasks[record.key].done():
+                    continue
+                first_ts = record.ts if first_ts is None else first_ts
+                last_ts = record.ts
+                await clock.wait_until(record.ts)
+                if record.kind == WS_TEXT:
+                    msg = aiohttp.WSMessage(aiohttp.WSMsgType.TEXT, record.payload.decode('utf-8'), None)
+                else:
+                    msg = aiohttp.WSMessage(aiohttp.WSMsgType.BINARY, record.payload, None)
+                await ws.feed(msg)
+                stats.messages += 1
+        finally:
+            for provider, _, _ in streams:
+                provider.running = False
+            source.close()
+            for key, ws in sockets.items():
+                if not tasks[key].done():
+                    await ws.feed(None)
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            set_replay(None)
+
+        stats.wall_seconds = time.monotonic() - wall_start
+        stats.captured_seconds = (last_ts - first_ts) if first_ts is not None else 0.0
+        stats.responses = source.responses
+        stats.misses = source.misses
+        return stats
@@ -0,0 +1,354 @@
+"""
+Columnar snapshot store
+
+Every funding_data snapshot is flattened to one row per (exchange, symbol):
+
+    ts, exchange_id, symbol_id, bid, ask, bid_qty, ask_qty, volume, funding_rate
+
+Rows are appended to per-day partitions (root/YYYY-MM-DD/) as compressed
+NumPy chunk files named "<first_ts>-<last_ts>.npz" (epoch ms), so a time
+range scan only opens the chunks it overlaps. Inside a chunk rows are sorted
+by (symbol_id, ts) and a small symbol index gives each symbol's row slice.
+Exchange and symbol names are mapped to integer ids in exchanges.json and
+symbols.json at the store root.
+
+SnapshotRecorder does the flattening, batching and file writes on a
+background thread; record() only enqueues a reference to the snapshot.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = {
+    'ts': np.int64,             # epoch milliseconds
+    'exchange_id': np.uint16,
+    'symbol_id': np.uint32,
+    'bid': np.float64,
+    'ask': np.float64,
+    'bid_qty': np.float64,      # Binance/Bybit/OKX/Gate.io bulk tickers only, NaN elsewhere
+    'ask_qty': np.float64,
+    'volume': np.float64,       # 24h volume in USDT, NaN if unknown
+    'funding_rate': np.float64, # NaN on venues without funding data
+}
+
+
+def _day(ts_ms: int) -> str:
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).strftime('%Y-%m-%d')
+
+
+class SnapshotStore:
+    """Reader/writer for the on-disk partitions"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self.exchanges: List[str] = self._load_names('exchanges.json')
+        self.symbols: List[str] = self._load_names('symbols.json')
+        self._exchange_ids = {name: i for i, name in enumerate(self.exchanges)}
+        self._symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+
+    # ── Dictionaries ─────────────────────────────────────────────────
+
+    def _load_names(self, filename: str) -> List[str]:
+        path = os.path.join(self.root, filename)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def _save_names(self, filename: str, names: List[str]):
+        path = os.path.join(self.root, filename)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(names, f)
+        os.replace(tmp, path)
+
+    def reload_names(self):
+        """Pick up ids added by a writer in another process"""
+        with self._lock:
+            self.exchanges = self._load_names('exchanges.json')
+            self.symbols = self._load_names('symbols.json')
+            self._exchange_ids = {name: i for i, name in enumerate(self.exchanges)}
+            self._symbol_ids = {name: i for i, name in enumerate(self.symbols)}
+
+    def exchange_id(self, name: str) -> Optional[int]:
+        return self._exchange_ids.get(name)
+
+    def symbol_id(self, name: str) -> Optional[int]:
+        return self._symbol_ids.get(name)
+
+    def _assign_ids(self, exchanges: Sequence[str], symbols: Sequence[str]):
+        with self._lock:
+            new_exchanges = [name for name in dict.fromkeys(exchanges) if name not in self._exchange_ids]
+            new_symbols = [name for name in dict.fromkeys(symbols) if name not in self._symbol_ids]
+            for name in new_exchanges:
+                self._exchange_ids[name] = len(self.exchanges)
+                self.exchanges.append(name)
+            for name in new_symbols:
+                self._symbol_ids[name] = len(self.symbols)
+                self.symbols.append(name)
+            if new_exchanges:
+                self._save_names('exchanges.json', self.exchanges)
+            if new_symbols:
+                self._save_names('symbols.json', self.symbols)
+
+    # ── Writing ──────────────────────────────────────────────────────
+
+    def encode_snapshot(self, ts: float, funding_data: Dict) -> Dict[str, np.ndarray]:
+        """Flatten one funding_data snapshot (ts in epoch seconds) to column arrays"""
+        ts_ms = int(ts * 1000)
+        symbols_seen = []
+        for ex_data in funding_data.values():
+            symbols_seen.extend(ex_data.get('order_books', {}).keys())
+        self._assign_ids(list(funding_data.keys()), symbols_seen)
+
+        exchange_ids, symbol_ids = [], []
+        bids, asks, bid_qtys, ask_qtys, volumes, rates = [], [], [], [], [], []
+        nan = float('nan')
+        for ex_name, ex_data in funding_data.items():
+            ex_id = self._exchange_ids[ex_name]
+            funding_rates = ex_data.get('funding_rates', {})
+            ex_volumes = ex_data.get('volumes', {})
+            for symbol, book in ex_data.get('order_books', {}).items():
+                exchange_ids.append(ex_id)
+                symbol_ids.append(self._symbol_ids[symbol])
+                bids.append(book.get('bid', nan))
+                asks.append(book.get('ask', nan))
+                bid_qtys.append(book.get('bid_qty', nan))
+                ask_qtys.append(book.get('ask_qty', nan))
+                volumes.append(ex_volumes.get(symbol, nan))
+                info = funding_rates.get(symbol)
+                rates.append(info.funding_rate if info is not None else nan)
+
+        n = len(symbol_ids)
+        return {
+            'ts': np.full(n, ts_ms, dtype=COLUMNS['ts']),
+            'exchange_id': np.array(exchange_ids, dtype=COLUMNS['exchange_id']),
+            'symbol_id': np.array(symbol_ids, dtype=COLUMNS['symbol_id']),
+            'bid': np.array(bids, dtype=COLUMNS['bid']),
+            'ask': np.array(asks, dtype=COLUMNS['ask']),
+            'bid_qty': np.array(bid_qtys, dtype=COLUMNS['bid_qty']),
+            'ask_qty': np.array(ask_qtys, dtype=COLUMNS['ask_qty']),
+            'volume': np.array(volumes, dtype=COLUMNS['volume']),
+            'funding_rate': np.array(rates, dtype=COLUMNS['funding_rate']),
+        }
+
+    def write(self, columns: Dict[str, np.ndarray]):
+        """Append rows, split into one chunk per UTC day"""
+        ts = columns['ts']
+        if len(ts) == 0:
+            return
+        days = np.array([_day(int(t)) for t in np.unique(ts)])
+        if len(set(days)) == 1:
+            self._write_chunk(days[0], columns)
+            return
+        day_of_row = np.array([_day(int(t)) for t in ts])
+        for day in np.unique(days):
+            mask = day_of_row == day
+            self._write_chunk(day, {name: values[mask] for name, values in columns.items()})
+
+    def _write_chunk(self, day: str, columns: Dict[str, np.ndarray]):
+        order = np.lexsort((columns['exchange_id'], columns['ts'], columns['symbol_id']))
+        sorted_columns = {name: values[order] for name, values in columns.items()}
+
+        symbol_ids = sorted_columns['symbol_id']
+        index_symbols, index_starts = np.unique(symbol_ids, return_index=True)
+        index_offsets = np.append(index_starts, len(symbol_ids)).astype(np.int64)
+
+        ts = sorted_columns['ts']
+        partition = os.path.join(self.root, day)
+        os.makedirs(partition, exist_ok=True)
+        name = f"{int(ts.min())}-{int(ts.max())}"
+        path = os.path.join(partition, f"{name}.npz")
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(partition, f"{name}.{suffix}.npz")
+            suffix += 1
+
+        tmp = f"{path}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, index_symbols=index_symbols, index_offsets=index_offsets, **sorted_columns)
+        os.replace(tmp, path)
+
+    # ── Reading ──────────────────────────────────────────────────────
+
+    def chunks(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """Chunk paths overlapping [start, end] (epoch seconds), in time order"""
+        start_ms = int(start * 1000) if start is not None else None
+        end_ms = int(end * 1000) if end is not None else None
+        first_day = _day(start_ms) if start_ms is not None else None
+        last_day = _day(end_ms) if end_ms is not None else None
+
+        result = []
+        for day in sorted(os.listdir(self.root)):
+            partition = os.path.join(self.root, day)
+            if not os.path.isdir(partition):
+                continue
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for filename in os.listdir(partition):
+                if not filename.endswith('.npz'):
+                    continue
+                lo, hi = filename.split('.')[0].split('-')
+                if start_ms is not None and int(hi) < start_ms:
+                    continue
+                if end_ms is not None and int(lo) > end_ms:
+                    continue
+                result.append((int(lo), os.path.join(partition, filename)))
+        return [path for _, path in sorted(result)]
+
+    def iter_chunks(self, start: Optional[float] = None, end: Optional[float] = None,
+                    symbols: Optional[Sequence[str]] = None, exchanges: Optional[Sequence[str]] = None,
+                    columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield filtered column dicts chunk by chunk (rows sorted by symbol, ts)"""
+        self.reload_names()
+        columns = list(columns or COLUMNS)
+        needed = set(columns) | {'ts'}
+        if exchanges is not None:
+            needed.add('exchange_id')
+        symbol_ids = None
+        if symbols is not None:
+            symbol_ids = sorted(sid for sid in (self.symbol_id(s) for s in symbols) if sid is not None)
+            if not symbol_ids:
+                return
+        exchange_ids = None
+        if exchanges is not None:
+            exchange_ids = [eid for eid in (self.exchange_id(e) for e in exchanges) if eid is not None]
+        start_ms = int(start * 1000) if start is not None else None
+        end_ms = int(end * 1000) if end is not None else None
+
+        for path in self.chunks(start, end):
+            with np.load(path) as npz:
+                if symbol_ids is not None:
+                    index_symbols = npz['index_symbols']
+                    index_offsets = npz['index_offsets']
+                    positions = np.searchsorted(index_symbols, symbol_ids)
+                    slices = [
+                        slice(index_offsets[p], index_offsets[p + 1])
+                        for p, sid in zip(positions, symbol_ids)
+                        if p < len(index_symbols) and index_symbols[p] == sid
+                    ]
+                    if not slices:
+                        continue
+                    data = {name: np.concatenate([npz[name][s] for s in slices]) for name in needed}
+                else:
+                    data = {name: npz[name] for name in needed}
+
+            mask = None
+            if start_ms is not None:
+                mask = data['ts'] >= start_ms
+            if end_ms is not None:
+                upper = data['ts'] <= end_ms
+                mask = upper if mask is None else mask & upper
+            if exchange_ids is not None:
+                in_exchanges = np.isin(data['exchange_id'], exchange_ids)
+                mask = in_exchanges if mask is None else mask & in_exchanges
+            if mask is not None:
+                if not mask.any():
+                    continue
+                data = {name: values[mask] for name, values in data.items()}
+            yield {name: data[name] for name in columns}
+
+    def scan(self, start: Optional[float] = None, end: Optional[float] = None,
+             symbols: Optional[Sequence[str]] = None, exchanges: Optional[Sequence[str]] = None,
+             columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        """Concatenated iter_chunks() result"""
+        columns = list(columns or COLUMNS)
+        parts = list(self.iter_chunks(start, end, symbols, exchanges, columns))
+        if not parts:
+            return {name: np.empty(0, dtype=COLUMNS[name]) for name in columns}
+        return {name: np.concatenate([part[name] for part in parts]) for name in columns}
+
+
+class SnapshotRecorder:
+    """Background writer that batches snapshots into chunk files
+
+    Args:
+        root: store directory
+        flush_rows: write a chunk once this many rows are buffered
+        flush_interval: or once the oldest buffered snapshot is this old (seconds)
+        max_pending: snapshots queued for the writer thread before new ones are dropped
+    """
+
+    def __init__(self, root: str, flush_rows: int = 500000, flush_interval: float = 60.0,
+                 max_pending: int = 100):
+        self.store = SnapshotStore(root)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional['SnapshotRecorder']:
+        """Recorder for config.snapshot_store_path, or None when recording is disabled"""
+        path = config.snapshot_store_path
+        if not path:
+            return None
+        return cls(path)
+
+    def record(self, funding_data: Dict, ts: Optional[float] = None):
+        """Queue a snapshot (never blocks). funding_data must not be mutated afterwards."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='snapshot-recorder', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+        try:
+            self._queue.put_nowait((time.time() if ts is None else ts, funding_data))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Snapshot recorder is falling behind, dropping snapshot")
+
+    def close(self, timeout: float = 30.0):
+        """Flush buffered rows and stop the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        buffer: List[Dict[str, np.ndarray]] = []
+        rows = 0
+        oldest = None
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = ()
+
+            if item:
+                ts, funding_data = item
+                try:
+                    columns = self.store.encode_snapshot(ts, funding_data)
+                    buffer.append(columns)
+                    rows += len(columns['ts'])
+                    self.recorded += 1
+                    oldest = oldest or time.monotonic()
+                except Exception as e:
+                    logger.error(f"Error encoding snapshot: {str(e)}")
+
+            stop = item is None
+            if buffer and (stop or rows >= self.flush_rows or time.monotonic() - oldest >= self.flush_interval):
+                try:
+                    self.store.write({name: np.concatenate([b[name] for b in buffer]) for name in COLUMNS})
+                except Exception as e:
+                    logger.error(f"Error writing snapshot chunk: {str(e)}")
+                buffer = []
+                rows = 0
+                oldest = None
+            if stop:
+                break
@@ -0,0 +1,177 @@
+"""
+Alert subscriptions
+
+Each Telegram chat can subscribe with its own spread range, exchange and
+symbol allowlists and blocked tokens. SubscriptionIndex keeps the rules in
+sorted threshold arrays (bisect) and hash maps keyed by exchange / token
+prefix so a spread event is matched without scanning every rule.
+
+Symbols and blocked tokens use the same prefix semantics as the global
+blocked list: "BTC" matches "BTCUSDT".
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional, Set
+
+
+@dataclass
+class Subscription:
+    chat_id: str
+    min_spread: float = 0.0
+    max_spread: float = 100.0
+    exchanges: List[str] = field(default_factory=list)  # empty = all exchanges
+    symbols: List[str] = field(default_factory=list)    # empty = all symbols
+    blocked: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subscription':
+        return cls(
+            chat_id=str(data['chat_id']),
+            min_spread=float(data.get('min_spread', 0.0)),
+            max_spread=float(data.get('max_spread', 100.0)),
+            exchanges=list(data.get('exchanges', [])),
+            symbols=[s.upper() for s in data.get('symbols', [])],
+            blocked=[s.upper() for s in data.get('blocked', [])],
+        )
+
+
+def _prefixes(symbol: str) -> Iterable[str]:
+    for i in range(1, len(symbol) + 1):
+        yield symbol[:i]
+
+
+_EMPTY = frozenset()
+
+
+class SubscriptionIndex:
+    """Indexed subscriber rules; rebuild() after any change"""
+
+    def __init__(self, subscriptions: Optional[List[Subscription]] = None):
+        self.subscriptions: Dict[str, Subscription] = {}
+        for sub in subscriptions or []:
+            self.subscriptions[sub.chat_id] = sub
+        self.rebuild()
+
+    def rebuild(self):
+        subs = list(self.subscriptions.values())
+
+        by_min = sorted(subs, key=lambda s: s.min_spread)
+        self._min_keys = [s.min_spread for s in by_min]
+        self._min_ids = [s.chat_id for s in by_min]
+        by_max = sorted(subs, key=lambda s: s.max_spread)
+        self._max_keys = [s.max_spread for s in by_max]
+        self._max_ids = [s.chat_id for s in by_max]
+
+        self._any_exchange: Set[str] = set()
+        self._by_exchange: Dict[str, Set[str]] = {}
+        self._any_symbol: Set[str] = set()
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._blocked: Dict[str, Set[str]] = {}
+
+        for sub in subs:
+            if sub.exchanges:
+                for ex in sub.exchanges:
+                    self._by_exchange.setdefault(ex.lower(), set()).add(sub.chat_id)
+            else:
+                self._any_exchange.add(sub.chat_id)
+            if sub.symbols:
+                for token in sub.symbols:
+                    self._by_symbol.setdefault(token.upper(), set()).add(sub.chat_id)
+            else:
+                self._any_symbol.add(sub.chat_id)
+            for token in sub.blocked:
+                self._blocked.setdefault(token.upper(), set()).add(sub.chat_id)
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def get(self, chat_id) -> Optional[Subscription]:
+        return self.subscriptions.get(str(chat_id))
+
+    def upsert(self, sub: Subscription):
+        self.subscriptions[sub.chat_id] = sub
+        self.rebuild()
+
+    def remove(self, chat_id) -> bool:
+        removed = self.subscriptions.pop(str(chat_id), None) is not None
+        if removed:
+            self.rebuild()
+        return removed
+
+    def _threshold_candidates(self, value: float) -> List[str]:
+        # Subscribers with min <= value form a prefix of the min-sorted array,
+        # those with max >= value a suffix of the max-sorted array; the shorter
+        # slice is a superset of the matches
+        lo = bisect_right(self._min_keys, value)
+        hi = bisect_left(self._max_keys, value)
+        if lo <= len(self._max_keys) - hi:
+            return self._min_ids[:lo]
+        return self._max_ids[hi:]
+
+    def match(self, symbol: str, spread: float, buy_exchange: str = '', sell_exchange: str = '') -> Set[str]:
+        """Return chat ids whose rules accept this spread"""
+        if not self.subscriptions:
+            return set()
+        symbol = symbol.upper()
+        prefixes = list(_prefixes(symbol))
+        symbol_sets = [chats for chats in (self._by_symbol.get(p) for p in prefixes) if chats]
+        blocked_sets = [chats for chats in (self._blocked.get(p) for p in prefixes) if chats]
+        buy_ok = self._by_exchange.get(buy_exchange.lower(), _EMPTY)
+        sell_ok = self._by_exchange.get(sell_exchange.lower(), _EMPTY)
+
+        # Scan the smallest candidate source and test the other rules by
+        # membership, without materializing the unfiltered sets
+        candidates: Iterable[str] = self._threshold_candidates(spread)
+        size = len(candidates)
+        if not self._any_symbol:
+            symbol_size = sum(len(chats) for chats in symbol_sets)
+            if symbol_size < size:
+                candidates = set().union(*symbol_sets)
+                size = symbol_size
+        if not self._any_exchange:
+            pair = buy_ok if len(buy_ok) <= len(sell_ok) else sell_ok
+            if len(pair) < size:
+                candidates = pair
+
+        matched = set()
+        for cid in candidates:
+            sub = self.subscriptions[cid]
+            if not sub.min_spread <= spread <= sub.max_spread:
+                continue
+            if cid not in self._any_symbol and not any(cid in chats for chats in symbol_sets):
+                continue
+            if cid not in self._any_exchange and not (cid in buy_ok and cid in sell_ok):
+                continue
+            if any(cid in chats for chats in blocked_sets):
+                continue
+            matched.add(cid)
+        return matched
+
+    def match_spread(self, spread: Dict) -> Set[str]:
+        return self.match(
+            spread['symbol'],
+            spread['spread_percentage'],
+            spread.get('lowest_exchange', ''),
+            spread.get('highest_exchange', ''),
+        )
+
+    @classmethod
+    def from_config(cls, config) -> 'SubscriptionIndex':
+        """Load subscribers from config. Before any subscribers list was saved the
+        legacy telegram_chat_id is migrated into one, so a chat that later
+        unsubscribes stays unsubscribed"""
+        subs = [Subscription.from_dict(data) for data in config.subscribers]
+        index = cls(subs)
+        default_chat = str(config.telegram_chat_id or '')
+        if default_chat and not config.has_subscribers:
+            index.subscriptions[default_chat] = Subscription(chat_id=default_chat)
+            index.rebuild()
+            index.save(config)
+        return index
+
+    def save(self, config) -> bool:
+        return config.set_subscribers([sub.to_dict() for sub in self.subscriptions.values()])